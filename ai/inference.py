@@ -0,0 +1,339 @@
+# ai/inference.py
+"""
+Out-of-process model inference.
+
+SachielCore.predict builds pandas/ta features and runs a random forest.
+Inside the GUI process that holds the GIL for tens of milliseconds, during
+which Tk, the asyncio loop and the Twisted reactor all wait. InferencePool
+moves the work to worker processes that each load a fitted SachielCore
+saved with save_core().
+
+predict(df) copies the OHLCV window into one of a fixed set of
+shared-memory slots and immediately returns a concurrent.futures.Future. The
+worker builds the features, regime and confidence from the slot, and a
+reader thread resolves the future with the result. Only slot numbers and the
+small result dict cross the pipes. Requests for one symbol always go to the
+same worker, so that worker's regime cache keeps extending the same series.
+When every slot is busy, requests wait in order for one to free up. A worker
+that dies fails its requests and is restarted.
+
+Workers are spawned, not forked, because the GUI process runs threads.
+
+    python -m ai.inference --synthetic 5000           # fit and save a model
+    python -m ai.inference --csv eurusd_m1.csv --risk-level safe
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import sys
+import threading
+import zlib
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import Config
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+COLUMNS = ("ts", "open", "high", "low", "close", "volume")
+MAX_RESTARTS = 3  # Consecutive crashes without a result before the pool gives up
+
+
+def save_core(core, path=None):
+    path = os.path.expanduser(path or Config.INFERENCE_MODEL_FILE)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(core, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_core(path=None):
+    with open(os.path.expanduser(path or Config.INFERENCE_MODEL_FILE), "rb") as f:
+        return pickle.load(f)
+
+
+def fit_core(df, risk_level="medium"):
+    """SachielCore with its scaler and forest fitted on df, labelled as in ai/optimizer.py"""
+    from ai.optimizer import FEATURE_COLS, LABEL_HORIZON
+    from ai.sachiel_core import SachielCore
+
+    core = SachielCore(risk_level)
+    features = core.prepare_features(df.copy())
+    X = np.nan_to_num(features[FEATURE_COLS].to_numpy(dtype=np.float64))[:-LABEL_HORIZON]
+    close = features['close'].to_numpy(dtype=np.float64)
+    y = (close[LABEL_HORIZON:] > close[:-LABEL_HORIZON]).astype(int)
+    core.scaler.fit(X)
+    core.model.fit(core.scaler.transform(X), y)
+    return core
+
+
+def _write_frame(df, out):
+    """Copy df's OHLCV columns (and DatetimeIndex as seconds, else NaN) into out; returns rows written"""
+    n = min(len(df), len(out))
+    tail = df.iloc[len(df) - n:]
+    if isinstance(tail.index, pd.DatetimeIndex):
+        out[:n, 0] = tail.index.as_unit("ns").asi8 / 1e9
+    else:
+        out[:n, 0] = np.nan
+    for column, name in enumerate(COLUMNS[1:], start=1):
+        out[:n, column] = tail[name].to_numpy(dtype=np.float64)
+    return n
+
+
+def _read_frame(matrix):
+    ts = matrix[:, 0]
+    index = pd.to_datetime(ts, unit="s") if len(ts) and not np.isnan(ts[0]) else None
+    return pd.DataFrame(matrix[:, 1:], columns=list(COLUMNS[1:]), index=index)
+
+
+# --- Worker side ---------------------------------------------------------------------------------
+def _worker_main(model_path, slot_names, max_rows, requests, results):
+    core = load_core(model_path)
+    blocks = [shared_memory.SharedMemory(name=name) for name in slot_names]
+    views = [np.ndarray((max_rows, len(COLUMNS)), dtype=np.float64, buffer=block.buf) for block in blocks]
+    try:
+        while True:
+            item = requests.get()
+            if item is None:
+                break
+            request_id, slot, rows, symbol, timeframe = item
+            try:
+                df = _read_frame(views[slot][:rows].copy())
+                # Without timestamps the regime cache cannot tell a continuation from a new frame
+                cache_key = symbol if isinstance(df.index, pd.DatetimeIndex) else None
+                core.last_prediction = None
+                core.predict(df, cache_key, timeframe)
+                if core.last_prediction is None:
+                    raise RuntimeError("SachielCore.predict failed")
+                result = dict(core.last_prediction, threshold=core.params['confidence_threshold'])
+                results.put((request_id, True, result))
+            except Exception as e:
+                results.put((request_id, False, f"{type(e).__name__}: {e}"))
+    finally:
+        del views
+        for block in blocks:
+            block.close()
+
+
+# --- Client side ---------------------------------------------------------------------------------
+class InferencePool:
+    def __init__(self, model_path=None, workers=None, slots=None, max_rows=None):
+        self.model_path = os.path.expanduser(model_path or Config.INFERENCE_MODEL_FILE)
+        self.workers = workers or Config.INFERENCE_WORKERS
+        self.slots = slots or Config.INFERENCE_SLOTS
+        self.max_rows = max_rows or Config.INFERENCE_MAX_ROWS
+        self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._round_robin = itertools.count()
+        self._blocks = []
+        self._views = []
+        self._free = []
+        self._waiting = deque()  # (future, matrix, symbol, timeframe) queued for a free slot
+        self._outstanding = {}  # request id -> (future, slot, worker)
+        self._processes = []
+        self._requests = []
+        self._results = None
+        self._reader = None
+        self._crashes = 0
+        self._closed = False
+        self.error = None
+
+    @classmethod
+    def available(cls):
+        return Config.INFERENCE_ENABLED and os.path.exists(os.path.expanduser(Config.INFERENCE_MODEL_FILE))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        if self._processes:
+            return self
+        row_bytes = self.max_rows * len(COLUMNS) * 8
+        for _ in range(self.slots):
+            block = shared_memory.SharedMemory(create=True, size=row_bytes)
+            self._blocks.append(block)
+            self._views.append(np.ndarray((self.max_rows, len(COLUMNS)), dtype=np.float64, buffer=block.buf))
+        self._free = list(range(self.slots))
+        self._results = self._ctx.Queue()
+        for worker in range(self.workers):
+            self._requests.append(None)
+            self._processes.append(None)
+            self._spawn(worker)
+        self._reader = threading.Thread(target=self._read_results, name="inference-results", daemon=True)
+        self._reader.start()
+        return self
+
+    def _spawn(self, worker):
+        requests = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main, name=f"inference-{worker}", daemon=True,
+            args=(self.model_path, [block.name for block in self._blocks], self.max_rows, requests, self._results)
+        )
+        process.start()
+        self._requests[worker] = requests
+        self._processes[worker] = process
+
+    def predict(self, df, symbol=None, timeframe=None):
+        """Future resolving to SachielCore.last_prediction plus the model's confidence threshold"""
+        future = Future()
+        future.set_running_or_notify_cancel()
+        with self._lock:
+            if self.error is not None:
+                future.set_exception(RuntimeError(self.error))
+            elif self._closed or not self._processes:
+                future.set_exception(RuntimeError("Inference pool is not running"))
+            elif self._free:
+                slot = self._free.pop()
+                try:
+                    rows = _write_frame(df, self._views[slot])
+                except Exception as e:
+                    self._free.append(slot)
+                    future.set_exception(e)
+                else:
+                    self._send(future, slot, rows, symbol, timeframe)
+            else:
+                matrix = np.empty((min(len(df), self.max_rows), len(COLUMNS)))
+                try:
+                    _write_frame(df, matrix)
+                except Exception as e:
+                    future.set_exception(e)
+                else:
+                    self._waiting.append((future, matrix, symbol, timeframe))
+        return future
+
+    def _send(self, future, slot, rows, symbol, timeframe):
+        if symbol is not None:
+            worker = zlib.crc32(str(symbol).encode()) % self.workers
+        else:
+            worker = next(self._round_robin) % self.workers
+        request_id = next(self._ids)
+        self._outstanding[request_id] = (future, slot, worker)
+        self._requests[worker].put((request_id, slot, rows, symbol, timeframe))
+
+    def _release(self, slot):
+        """Give slot to the oldest waiting request, or back to the free list (lock held)"""
+        if self._waiting and not self._closed:
+            future, matrix, symbol, timeframe = self._waiting.popleft()
+            self._views[slot][:len(matrix)] = matrix
+            self._send(future, slot, len(matrix), symbol, timeframe)
+        else:
+            self._free.append(slot)
+
+    def _read_results(self):
+        while True:
+            try:
+                item = self._results.get(timeout=1.0)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            request_id, ok, payload = item
+            with self._lock:
+                self._crashes = 0
+                entry = self._outstanding.pop(request_id, None)
+                if entry is not None:
+                    self._release(entry[1])
+            if entry is not None:
+                _resolve(entry[0], payload if ok else RuntimeError(payload))
+
+    def _check_workers(self):
+        failed = []
+        with self._lock:
+            if self._closed or self.error is not None:
+                return
+            for worker, process in enumerate(self._processes):
+                if process.is_alive():
+                    continue
+                self._crashes += 1
+                for request_id, (future, slot, owner) in list(self._outstanding.items()):
+                    if owner == worker:
+                        del self._outstanding[request_id]
+                        failed.append(future)
+                        self._release(slot)
+                if self._crashes > MAX_RESTARTS:
+                    self.error = f"Inference worker {worker} keeps exiting (code {process.exitcode})"
+                    log.error("%s; inference disabled", self.error)
+                    failed += [entry[0] for entry in self._waiting]
+                    self._waiting.clear()
+                    break
+                log.error("Inference worker %d exited with code %s; restarting", worker, process.exitcode)
+                self._spawn(worker)
+        for future in failed:
+            _resolve(future, RuntimeError(self.error or "Inference worker exited"))
+
+    def pending(self):
+        with self._lock:
+            return len(self._outstanding) + len(self._waiting)
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            abandoned = [entry[0] for entry in self._outstanding.values()] + [entry[0] for entry in self._waiting]
+            self._outstanding.clear()
+            self._waiting.clear()
+        for requests in self._requests:
+            requests.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        if self._results is not None:
+            self._results.put(None)
+            self._reader.join(timeout=5)
+        self._views = []
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+        for future in abandoned:
+            _resolve(future, RuntimeError("Inference pool closed"))
+
+
+def _resolve(future, outcome):
+    try:
+        if isinstance(outcome, BaseException):
+            future.set_exception(outcome)
+        else:
+            future.set_result(outcome)
+    except InvalidStateError:
+        pass  # Cancelled by the caller
+
+
+def main(argv=None):
+    from ai.optimizer import load_frame
+
+    parser = argparse.ArgumentParser(description="Fit SachielCore and save it for the inference workers")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--csv", help="OHLCV CSV with a datetime index")
+    source.add_argument("--journal", help="SOURCE:SYMBOL bars from the market journal, e.g. alpaca:BTC/USD")
+    source.add_argument("--synthetic", type=int, default=3000, help="synthetic minute bars")
+    parser.add_argument("--risk-level", default="medium", choices=["safe", "medium", "aggressive"])
+    parser.add_argument("--output", help=f"model file (default {Config.INFERENCE_MODEL_FILE})")
+    args = parser.parse_args(argv)
+
+    path = save_core(fit_core(load_frame(args), args.risk_level), args.output)
+    print(f"Saved model to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,480 @@
+# ai/optimizer.py
+"""
+Parameter sweeps for SachielCore's risk tables.
+
+The model and regime inputs do not depend on the swept parameters. They are
+worked out once per dataset and cached as .npz:
+- raw model confidence, walk-forward: the forest is fitted on the first
+  train_fraction of bars
+- the regime of each later bar
+- ADX and RSI
+
+These arrays go in one shared-memory block. A process pool attaches to the
+block, so each evaluation is only the trade simulation below, run with a
+SachielCore built from the candidate overrides. Results are cached by a hash
+of the dataset, parameters and the simulation code, so repeated or resumed
+sweeps skip work and a changed backtest does not reuse stale metrics.
+
+A grid over the default space (every tunable value) is far too large to
+run; grids past Config.OPTIMIZER_MAX_GRID candidates are refused, so sweep
+a few --keys or use random or bayes search.
+
+    python -m ai.optimizer --synthetic 5000 --method bayes --iterations 60
+    python -m ai.optimizer --csv eurusd_m5.csv --method grid --keys params.stop_loss,params.take_profit
+"""
+import argparse
+import hashlib
+import inspect
+import itertools
+import json
+import math
+import os
+import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import Config
+from ai.regime import REGIMES, classify
+from ai.sachiel_core import SachielCore
+
+FIELDS = ("open", "high", "low", "close", "raw", "regime", "adx", "rsi")
+FEATURE_COLS = [
+    'sma_20', 'sma_50', 'macd_diff', 'rsi', 'stoch', 'mfi',
+    'bb_width', 'atr', 'obv', 'high_low_ratio', 'close_position',
+    'adx', 'price_momentum', 'volume_momentum'
+]
+LABEL_HORIZON = 5  # Bars ahead the model predicts, as in the benchmarks
+
+
+def backtest(core, data, start, cost=0.0):
+    """
+    Long-only simulation of the TradingTab entry/exit rules on bars
+    [start, n). Entries use core.adjust_confidence and
+    core.get_trade_parameters. Exits are stop loss, take profit, trailing
+    stop and one partial exit of half the position. Returns (equity per bar,
+    P/L of each closed trade as a fraction of starting equity).
+    """
+    close, high, low = data["close"], data["high"], data["low"]
+    raw, regime, adx, rsi = data["raw"], data["regime"], data["adx"], data["rsi"]
+    n = len(close)
+    equity = np.empty(n - start)
+    trades = []
+    threshold = core.params['confidence_threshold']
+    cash, units = 1.0, 0.0
+    entry = peak = stake = proceeds = 0.0
+    stop_loss = take_profit = trailing = partial = 0.0
+    partial_done = False
+
+    for i in range(start, n):
+        if units:
+            peak = max(peak, high[i])
+            exit_price = None
+            if low[i] <= entry * (1 - stop_loss):
+                exit_price = entry * (1 - stop_loss)  # Assume the stop hit first when both are in range
+            elif high[i] >= entry * (1 + take_profit):
+                exit_price = entry * (1 + take_profit)
+            elif close[i] <= peak * (1 - trailing):
+                exit_price = close[i]
+            elif not partial_done and high[i] >= entry * (1 + partial):
+                sold = units / 2
+                proceeds += sold * entry * (1 + partial) * (1 - cost)
+                cash += sold * entry * (1 + partial) * (1 - cost)
+                units -= sold
+                partial_done = True
+            if exit_price is not None:
+                value = units * exit_price * (1 - cost)
+                cash += value
+                trades.append(proceeds + value - stake)
+                units = 0.0
+        elif i < n - 1:
+            regime_name = REGIMES[int(regime[i])]
+            confidence = core.adjust_confidence(raw[i], regime_name)
+            if confidence > threshold:
+                core.last_prediction = {
+                    'market_regime': regime_name,
+                    'indicators': {'adx': adx[i], 'rsi': rsi[i]}
+                }
+                params = core.get_trade_parameters(confidence)
+                stake = cash * min(params['max_position_size'], 1.0)
+                if stake > 0:
+                    entry = peak = close[i]
+                    units = stake * (1 - cost) / entry
+                    cash -= stake
+                    proceeds = 0.0
+                    stop_loss, take_profit = params['stop_loss'], params['take_profit']
+                    trailing, partial = params['trailing_stop'], params['partial_take_profit']
+                    partial_done = False
+        equity[i - start] = cash + units * close[i]
+    return equity, trades
+
+
+def score(equity, trades, bars_per_year):
+    """Metrics of one backtest"""
+    returns = np.diff(equity) / equity[:-1] if len(equity) > 1 else np.zeros(0)
+    std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    peaks = np.maximum.accumulate(equity) if len(equity) else equity
+    wins = [t for t in trades if t > 0]
+    losses = [t for t in trades if t < 0]
+    return {
+        "sharpe": float(returns.mean() / std * math.sqrt(bars_per_year)) if std > 0 else 0.0,
+        "total_return": float(equity[-1] - 1) if len(equity) else 0.0,
+        "max_drawdown": float((1 - equity / peaks).max()) if len(equity) else 0.0,
+        "trades": len(trades),
+        "win_rate": len(wins) / len(trades) if trades else 0.0,
+        "profit_factor": sum(wins) / -sum(losses) if losses else (math.inf if wins else 0.0),
+    }
+
+
+# --- Worker side ---------------------------------------------------------------------------------
+_worker = {}
+
+
+def _attach(name, shape, meta):
+    """Process pool initializer: map the shared arrays without copying them"""
+    block = shared_memory.SharedMemory(name=name)
+    matrix = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+    _worker.update(block=block, data=dict(zip(FIELDS, matrix)), meta=meta)
+
+
+def _evaluate(overrides):
+    meta = _worker["meta"]
+    core = SachielCore(meta["risk_level"], overrides)
+    equity, trades = backtest(core, _worker["data"], meta["start"], meta["cost"])
+    return score(equity, trades, meta["bars_per_year"])
+
+
+# --- Search spaces -------------------------------------------------------------------------------
+def default_space(risk_level="medium", spread=0.5):
+    """Every tunable value, from (1 - spread)x to (1 + spread)x its current setting"""
+    space = {}
+    for key, value in SachielCore(risk_level).tunable_parameters().items():
+        low, high = value * (1 - spread), value * (1 + spread)
+        if key == "params.confidence_threshold":
+            low, high = max(low, 0.3), min(high, 0.95)
+        elif key == "params.max_position_size":
+            high = min(high, 1.0)
+        space[key] = (low, high)
+    return space
+
+
+def load_space(path):
+    """JSON space: {"key": [choices...]} or {"key": {"low": x, "high": y}}"""
+    with open(path, "r") as f:
+        raw = json.load(f)
+    return {key: (value["low"], value["high"]) if isinstance(value, dict) else list(value)
+            for key, value in raw.items()}
+
+
+def grid_size(space, steps=3):
+    return math.prod(steps if isinstance(dim, tuple) else len(dim) for dim in space.values())
+
+
+def grid_candidates(space, steps=3, max_candidates=None):
+    """Every combination of steps values per range and each choice list; ValueError past max_candidates"""
+    max_candidates = Config.OPTIMIZER_MAX_GRID if max_candidates is None else max_candidates
+    size = grid_size(space, steps)
+    if size > max_candidates:
+        raise ValueError(f"A {steps}-step grid over {len(space)} parameters is {size} candidates "
+                         f"(limit {max_candidates}); sweep fewer keys or use random or bayes search")
+    axes = [np.linspace(*dim, steps).tolist() if isinstance(dim, tuple) else list(dim) for dim in space.values()]
+    return [dict(zip(space, values)) for values in itertools.product(*axes)]
+
+
+def random_candidates(space, n, rng):
+    return [_decode(space, row) for row in rng.random((n, len(space)))]
+
+
+def code_version():
+    """Hash of the modules an evaluation runs, so edits to the backtest or SachielCore miss the result cache"""
+    digest = hashlib.sha1()
+    for path in (os.path.abspath(__file__), inspect.getsourcefile(SachielCore)):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def _decode(space, unit):
+    """Point in [0, 1]^d -> parameter dict"""
+    params = {}
+    for (key, dim), u in zip(space.items(), unit):
+        if isinstance(dim, tuple):
+            params[key] = float(dim[0] + u * (dim[1] - dim[0]))
+        else:
+            params[key] = dim[min(int(u * len(dim)), len(dim) - 1)]
+    return params
+
+
+def _encode(space, params):
+    unit = []
+    for key, dim in space.items():
+        if isinstance(dim, tuple):
+            unit.append((params[key] - dim[0]) / (dim[1] - dim[0]) if dim[1] != dim[0] else 0.0)
+        else:
+            unit.append((dim.index(params[key]) + 0.5) / len(dim))
+    return unit
+
+
+class Optimizer:
+    def __init__(self, df, risk_level="medium", workers=None, cache_dir=None, train_fraction=0.5,
+                 objective="sharpe", cost=None, bars_per_year=None):
+        self.df = df
+        self.risk_level = risk_level
+        self.workers = workers or Config.OPTIMIZER_WORKERS or os.cpu_count() or 1
+        self.cache_dir = os.path.expanduser(cache_dir or Config.OPTIMIZER_DIR)
+        self.train_fraction = train_fraction
+        self.objective = objective
+        self.cost = Config.OPTIMIZER_COST_PER_SIDE if cost is None else cost
+        self.bars_per_year = bars_per_year or self._bars_per_year(df)
+        self.start = int(len(df) * train_fraction)
+        self.dataset_id = self._dataset_id()
+        self.code_version = code_version()
+        self._block = None
+        self._executor = None
+        self._cache = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _bars_per_year(df):
+        if isinstance(df.index, pd.DatetimeIndex) and len(df) > 1:
+            spacing = pd.Series(df.index).diff().median().total_seconds()
+            if spacing > 0:
+                return Config.EQUITY_TRADING_DAYS_PER_YEAR * 86400 / spacing
+        return Config.EQUITY_TRADING_DAYS_PER_YEAR
+
+    def _dataset_id(self):
+        digest = hashlib.sha1()
+        for column in ("open", "high", "low", "close", "volume"):
+            digest.update(np.ascontiguousarray(self.df[column].to_numpy(dtype=np.float64)).tobytes())
+        digest.update(f"{self.risk_level}:{self.train_fraction}".encode())
+        return digest.hexdigest()[:16]
+
+    # --- Dataset preparation ---------------------------------------------------------------------
+    def prepare(self):
+        """Per-bar arrays for FIELDS, from the .npz cache when this dataset was seen before"""
+        path = os.path.join(self.cache_dir, f"{self.dataset_id}.npz")
+        if os.path.exists(path):
+            with np.load(path) as cached:
+                return {field: cached[field] for field in FIELDS}
+
+        core = SachielCore(self.risk_level)
+        features = core.prepare_features(self.df.copy())
+        X = np.nan_to_num(features[FEATURE_COLS].to_numpy(dtype=np.float64))
+        close = features['close'].to_numpy(dtype=np.float64)
+        train_end = max(self.start - LABEL_HORIZON, 1)
+        y = (close[LABEL_HORIZON:train_end + LABEL_HORIZON] > close[:train_end]).astype(int)
+        core.scaler.fit(X[:train_end])
+        core.model.fit(core.scaler.transform(X[:train_end]), y)
+
+        raw = np.zeros(len(close))
+        probas = core.model.predict_proba(core.scaler.transform(X[self.start:]))
+        raw[self.start:] = probas[:, list(core.model.classes_).index(1)] if 1 in core.model.classes_ else 0.0
+
+        regime = classify(self.df).astype(np.float64)
+
+        data = {
+            "open": features['open'].to_numpy(dtype=np.float64),
+            "high": features['high'].to_numpy(dtype=np.float64),
+            "low": features['low'].to_numpy(dtype=np.float64),
+            "close": close,
+            "raw": raw,
+            "regime": regime,
+            "adx": np.nan_to_num(features['adx'].to_numpy(dtype=np.float64)),
+            "rsi": np.nan_to_num(features['rsi'].to_numpy(dtype=np.float64), nan=50.0),
+        }
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, **data)
+        os.replace(tmp_path, path)
+        return data
+
+    def _pool(self):
+        if self._executor is None:
+            data = self.prepare()
+            matrix = np.stack([data[field] for field in FIELDS])
+            self._block = shared_memory.SharedMemory(create=True, size=matrix.nbytes)
+            np.ndarray(matrix.shape, dtype=np.float64, buffer=self._block.buf)[:] = matrix
+            meta = {"risk_level": self.risk_level, "start": self.start, "cost": self.cost,
+                    "bars_per_year": self.bars_per_year}
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_attach, initargs=(self._block.name, matrix.shape, meta)
+            )
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
+
+    # --- Result cache ----------------------------------------------------------------------------
+    def _cache_path(self):
+        return os.path.join(self.cache_dir, f"{self.dataset_id}.results.jsonl")
+
+    def _key(self, params):
+        payload = json.dumps({"params": params, "cost": self.cost, "bars_per_year": self.bars_per_year,
+                              "code": self.code_version}, sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def _load_cache(self):
+        if self._cache is None:
+            self._cache = {}
+            try:
+                with open(self._cache_path(), "r") as f:
+                    for line in f:
+                        entry = json.loads(line)
+                        self._cache[entry["key"]] = entry["metrics"]
+            except FileNotFoundError:
+                pass
+        return self._cache
+
+    def evaluate(self, candidates):
+        """Metrics for each candidate, computing only those not cached; returns [(params, metrics)]"""
+        cache = self._load_cache()
+        keys = [self._key(params) for params in candidates]
+        missing = {}
+        for key, params in zip(keys, candidates):
+            if key not in cache and key not in missing:
+                missing[key] = params
+        if missing:
+            metrics = list(self._pool().map(_evaluate, missing.values(), chunksize=max(1, len(missing) // (4 * self.workers))))
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._cache_path(), "a") as f:
+                for key, result in zip(missing, metrics):
+                    cache[key] = result
+                    f.write(json.dumps({"key": key, "params": missing[key], "metrics": result}) + "\n")
+        return [(params, cache[key]) for key, params in zip(keys, candidates)]
+
+    def _score(self, metrics):
+        value = metrics[self.objective]
+        # Lower drawdown is better; every other objective is maximised
+        return -value if self.objective == "max_drawdown" else value
+
+    # --- Sweeps ----------------------------------------------------------------------------------
+    def run(self, space=None, method="random", iterations=50, grid_steps=3, seed=0):
+        """Ranked [(params, metrics)], best first"""
+        space = space or default_space(self.risk_level)
+        rng = np.random.default_rng(seed)
+        if method == "grid":
+            results = self.evaluate(grid_candidates(space, grid_steps))
+        elif method == "random":
+            results = self.evaluate(random_candidates(space, iterations, rng))
+        elif method == "bayes":
+            results = self._bayesian(space, iterations, rng)
+        else:
+            raise ValueError(f"Unknown method: {method}")
+        return sorted(results, key=lambda result: self._score(result[1]), reverse=True)
+
+    def _bayesian(self, space, iterations, rng):
+        """Gaussian-process expected improvement, proposing one batch per worker round"""
+        from scipy.stats import norm
+        from sklearn.exceptions import ConvergenceWarning
+        from sklearn.gaussian_process import GaussianProcessRegressor
+        from sklearn.gaussian_process.kernels import Matern, WhiteKernel
+
+        results = self.evaluate(random_candidates(space, min(iterations, max(5, self.workers)), rng))
+        while len(results) < iterations:
+            X = np.array([_encode(space, params) for params, _ in results])
+            y = np.array([self._score(metrics) for _, metrics in results], dtype=float)
+            y = np.where(np.isfinite(y), y, np.nanmin(y[np.isfinite(y)]) if np.isfinite(y).any() else 0.0)
+            gp = GaussianProcessRegressor(kernel=Matern(nu=2.5) + WhiteKernel(), normalize_y=True,
+                                          random_state=int(rng.integers(1 << 31)))
+            with warnings.catch_warnings():
+                # Few, noisy points often leave kernel bounds unconverged; the proposal is still usable
+                warnings.simplefilter("ignore", ConvergenceWarning)
+                gp.fit(X, y)
+            candidates = rng.random((2000, len(space)))
+            mean, std = gp.predict(candidates, return_std=True)
+            std = np.maximum(std, 1e-12)
+            z = (mean - y.max()) / std
+            improvement = (mean - y.max()) * norm.cdf(z) + std * norm.pdf(z)
+            batch = min(self.workers, iterations - len(results))
+            chosen = candidates[np.argsort(improvement)[-batch:]]
+            results += self.evaluate([_decode(space, row) for row in chosen])
+        return results
+
+
+def report(results, top=10, objective="sharpe"):
+    """Ranked results as a text table"""
+    lines = [f"{'#':>3}  {'sharpe':>8}  {'return':>8}  {'max dd':>7}  {'trades':>6}  {'win %':>6}  parameters"]
+    for rank, (params, metrics) in enumerate(results[:top], 1):
+        shown = ", ".join(f"{key}={value:.4g}" if isinstance(value, float) else f"{key}={value}"
+                          for key, value in params.items())
+        lines.append(
+            f"{rank:>3}  {metrics['sharpe']:>8.2f}  {metrics['total_return'] * 100:>7.2f}%  "
+            f"{metrics['max_drawdown'] * 100:>6.2f}%  {metrics['trades']:>6}  {metrics['win_rate'] * 100:>5.1f}%  {shown}"
+        )
+    lines.append(f"Ranked by {objective} over {len(results)} evaluations")
+    return "\n".join(lines)
+
+
+def load_frame(args):
+    if args.csv:
+        df = pd.read_csv(args.csv, index_col=0, parse_dates=True)
+        df.columns = [column.lower() for column in df.columns]
+        return df
+    if args.journal:
+        from trading.market_journal import Journal, BARS, PRICE_SCALE
+        source, symbol = args.journal.split(":", 1)
+        journal = Journal(source)
+        keys = [key for key, name in journal.symbols().items() if name == symbol]
+        bars = journal.read(BARS, symbols=keys)
+        return pd.DataFrame(
+            {column: bars[column] / PRICE_SCALE for column in ("open", "high", "low", "close")}
+            | {"volume": bars["volume"]},
+            index=pd.to_datetime(bars["ts"], unit="ms")
+        )
+    from benchmarks.data import ohlcv_frame
+    return ohlcv_frame(args.synthetic)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep SachielCore risk parameters")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--csv", help="OHLCV CSV with a datetime index")
+    source.add_argument("--journal", help="SOURCE:SYMBOL bars from the market journal, e.g. alpaca:BTC/USD")
+    source.add_argument("--synthetic", type=int, default=3000, help="synthetic minute bars")
+    parser.add_argument("--risk-level", default="medium", choices=["safe", "medium", "aggressive"])
+    parser.add_argument("--method", default="random", choices=["grid", "random", "bayes"])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--grid-steps", type=int, default=3)
+    parser.add_argument("--space", help="JSON search space (default: +/-50%% around the current tables)")
+    parser.add_argument("--keys", help="comma-separated subset of the space to sweep")
+    parser.add_argument("--objective", default="sharpe",
+                        choices=["sharpe", "total_return", "max_drawdown", "profit_factor", "win_rate"])
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--output", help="write the ranked results as JSON here")
+    args = parser.parse_args(argv)
+
+    space = load_space(args.space) if args.space else default_space(args.risk_level)
+    if args.keys:
+        space = {key: space[key] for key in args.keys.split(",")}
+
+    if args.method == "grid" and grid_size(space, args.grid_steps) > Config.OPTIMIZER_MAX_GRID:
+        parser.error(f"--method grid over {len(space)} parameters is {grid_size(space, args.grid_steps)} "
+                     f"candidates (limit {Config.OPTIMIZER_MAX_GRID}); narrow it with --keys or use random or bayes")
+
+    with Optimizer(load_frame(args), args.risk_level, workers=args.workers, objective=args.objective) as optimizer:
+        results = optimizer.run(space, args.method, args.iterations, args.grid_steps, args.seed)
+    print(report(results, args.top, args.objective))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump([{"params": params, "metrics": metrics} for params, metrics in results], f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# ai/regime.py
+"""
+Vectorized market-regime labelling.
+
+classify() labels every bar in one pass, applying the rules of
+SachielCore.detect_market_regime to each bar with the average volatility
+taken over all bars up to it, so history is never read ahead. RegimeSeries
+keeps the labels of one symbol and timeframe and, when a frame continues
+the one it has already seen, labels only the new bars. regime_cache shares
+one RegimeSeries per (symbol, timeframe) between predict, the optimizer and
+anything else that needs historical regimes.
+"""
+import threading
+import numpy as np
+import pandas as pd
+
+# Same order as ai.sachiel_core.REGIME_ADJUSTMENTS; codes index this tuple
+REGIMES = ('volatile_bullish', 'volatile_bearish', 'uptrend', 'downtrend',
+           'low_vol_uptrend', 'low_vol_downtrend', 'choppy', 'unknown')
+UNKNOWN = REGIMES.index('unknown')
+
+WINDOW = 20
+MOMENTUM_PERIODS = 10
+
+
+def _components(close, volume):
+    """Rolling inputs for each bar: volatility, 20-bar SMA, 10-bar momentum, volume ratio"""
+    close = pd.Series(close, dtype=np.float64)
+    volume = pd.Series(volume, dtype=np.float64)
+    volatility = close.pct_change().rolling(window=WINDOW).std()
+    trend = close.rolling(window=WINDOW).mean()
+    momentum = close.pct_change(periods=MOMENTUM_PERIODS)
+    volume_ratio = volume / volume.rolling(window=WINDOW).mean()
+    return volatility.to_numpy(), trend.to_numpy(), momentum.to_numpy(), volume_ratio.to_numpy()
+
+
+def _label(close, volatility, avg_vol, trend, momentum, volume_ratio):
+    """Regime codes; the conditions mirror detect_market_regime branch for branch"""
+    with np.errstate(invalid="ignore"):
+        volatile = volatility > avg_vol * 1.5
+        quiet = volatility < avg_vol * 0.5
+        rising = close > trend
+        heavy = volume_ratio > 1.2
+        codes = np.select(
+            [volatile & (momentum > 0) & heavy,
+             volatile & (momentum < 0) & heavy,
+             volatile,
+             rising & quiet,
+             rising,
+             quiet],
+            [REGIMES.index('volatile_bullish'), REGIMES.index('volatile_bearish'), REGIMES.index('choppy'),
+             REGIMES.index('low_vol_uptrend'), REGIMES.index('uptrend'), REGIMES.index('low_vol_downtrend')],
+            default=REGIMES.index('downtrend')
+        )
+    # Bars before the first full volatility window have no regime yet
+    codes[np.isnan(volatility)] = UNKNOWN
+    return codes.astype(np.int8)
+
+
+def classify(df):
+    """Regime code of every bar of an OHLCV frame"""
+    close = df['close'].to_numpy(dtype=np.float64)
+    volatility, trend, momentum, volume_ratio = _components(close, df['volume'].to_numpy(dtype=np.float64))
+    valid = ~np.isnan(volatility)
+    counts = np.cumsum(valid)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_vol = np.cumsum(np.where(valid, volatility, 0.0)) / counts
+    return _label(close, volatility, avg_vol, trend, momentum, volume_ratio)
+
+
+class RegimeSeries:
+    """Regime labels of one symbol/timeframe, extended incrementally as bars arrive"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.index = None
+        self.close = np.zeros(0)
+        self.volume = np.zeros(0)
+        self.codes = np.zeros(0, dtype=np.int8)
+        self._vol_sum = 0.0
+        self._vol_count = 0
+
+    def update(self, df):
+        """Label the bars of df not seen yet; returns the codes aligned with df"""
+        with self._lock:
+            start = self._continuation(df)
+            if start is None:
+                self._reset(df)
+            elif start < len(df):
+                self._extend(df.iloc[start:])
+            return self.codes[len(self.codes) - len(df):]
+
+    def _continuation(self, df):
+        """Position in df of the first new bar, or None when df does not continue this series"""
+        if self.index is None or not len(self.index) or not isinstance(df.index, pd.DatetimeIndex):
+            return None
+        last = self.index[-1]
+        if last not in df.index:
+            return None
+        position = df.index.get_loc(last)
+        if not isinstance(position, (int, np.integer)) or df['close'].iloc[position] != self.close[-1]:
+            return None
+        if position + 1 > len(self.codes):
+            return None  # df reaches further back than what is cached
+        return position + 1
+
+    def _reset(self, df):
+        self.index = df.index
+        self.close = df['close'].to_numpy(dtype=np.float64).copy()
+        self.volume = df['volume'].to_numpy(dtype=np.float64).copy()
+        volatility = _components(self.close, self.volume)[0]
+        valid = ~np.isnan(volatility)
+        self._vol_sum = float(volatility[valid].sum())
+        self._vol_count = int(valid.sum())
+        self.codes = classify(df)
+
+    def _extend(self, new):
+        """Label new bars from the last WINDOW + 1 cached bars plus the new ones"""
+        keep = WINDOW + 1
+        close = np.concatenate((self.close[-keep:], new['close'].to_numpy(dtype=np.float64)))
+        volume = np.concatenate((self.volume[-keep:], new['volume'].to_numpy(dtype=np.float64)))
+        volatility, trend, momentum, volume_ratio = (part[-len(new):] for part in _components(close, volume))
+
+        valid = ~np.isnan(volatility)
+        counts = self._vol_count + np.cumsum(valid)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg_vol = (self._vol_sum + np.cumsum(np.where(valid, volatility, 0.0))) / counts
+        codes = _label(close[-len(new):], volatility, avg_vol, trend, momentum, volume_ratio)
+
+        self._vol_sum += float(volatility[valid].sum())
+        self._vol_count += int(valid.sum())
+        self.index = self.index.append(new.index)
+        self.close = np.concatenate((self.close, close[-len(new):]))
+        self.volume = np.concatenate((self.volume, volume[-len(new):]))
+        self.codes = np.concatenate((self.codes, codes))
+
+    def last(self):
+        return REGIMES[self.codes[-1]] if len(self.codes) else 'unknown'
+
+    def series(self):
+        """Regime names as a Series on the bar index"""
+        return pd.Series(np.array(REGIMES, dtype=object)[self.codes], index=self.index)
+
+
+class RegimeCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def get(self, symbol, timeframe=None):
+        key = (symbol, timeframe)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = RegimeSeries()
+            return series
+
+    def update(self, symbol, df, timeframe=None):
+        """Codes aligned with df, labelling only bars this cache has not seen"""
+        return self.get(symbol, timeframe).update(df)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+regime_cache = RegimeCache()
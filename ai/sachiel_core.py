@@ -5,9 +5,55 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 import ta
 from datetime import datetime, timedelta
+from ai.regime import REGIMES, classify, regime_cache
+
+RISK_PARAMETERS = {
+    "safe": {
+        "confidence_threshold": 0.7,  # Reduced from 0.8
+        "stop_loss": 0.02,
+        "take_profit": 0.03,
+        "max_position_size": 0.15,  # Increased from 0.1
+        "partial_take_profit": 0.02,  # New parameter
+        "trailing_stop": 0.015  # New parameter
+    },
+    "medium": {
+        "confidence_threshold": 0.6,  # Reduced from 0.7
+        "stop_loss": 0.03,
+        "take_profit": 0.05,
+        "max_position_size": 0.25,  # Increased from 0.2
+        "partial_take_profit": 0.035,  # New parameter
+        "trailing_stop": 0.02  # New parameter
+    },
+    "aggressive": {
+        "confidence_threshold": 0.5,  # Reduced from 0.6
+        "stop_loss": 0.05,
+        "take_profit": 0.08,
+        "max_position_size": 0.35,  # Increased from 0.3
+        "partial_take_profit": 0.05,  # New parameter
+        "trailing_stop": 0.03  # New parameter
+    }
+}
+
+REGIME_ADJUSTMENTS = {
+    'volatile_bullish': 1.0,    # Increased from 0.8
+    'volatile_bearish': 0.8,    # Increased from 0.6
+    'uptrend': 1.3,             # Increased from 1.2
+    'downtrend': 0.9,           # Increased from 0.7
+    'low_vol_uptrend': 1.2,     # Increased from 1.1
+    'low_vol_downtrend': 0.9,   # Increased from 0.8
+    'choppy': 0.7,              # New regime
+    'unknown': 1.1              # Increased from 1.0
+}
+
+RISK_ADJUSTMENTS = {
+    'safe': 0.9,      # Increased from 0.8
+    'medium': 1.1,    # Increased from 1.0
+    'aggressive': 1.3 # Increased from 1.2
+}
+
 
 class SachielCore:
-    def __init__(self, risk_level="medium"):
+    def __init__(self, risk_level="medium", overrides=None):
         self.risk_level = risk_level
         self.model = RandomForestClassifier(
             n_estimators=200,
@@ -16,76 +62,50 @@ class SachielCore:
             random_state=42
         )
         self.scaler = StandardScaler()
+        self.regime_adjustments = dict(REGIME_ADJUSTMENTS)
         self.setup_risk_parameters()
+        if overrides:
+            self.apply_overrides(overrides)
         self.market_regime = 'unknown'
         self.last_prediction = None
         self.trading_signals = {}  # Store signals for each symbol
         
     def setup_risk_parameters(self):
-        risk_params = {
-            "safe": {
-                "confidence_threshold": 0.7,  # Reduced from 0.8
-                "stop_loss": 0.02,
-                "take_profit": 0.03,
-                "max_position_size": 0.15,  # Increased from 0.1
-                "partial_take_profit": 0.02,  # New parameter
-                "trailing_stop": 0.015  # New parameter
-            },
-            "medium": {
-                "confidence_threshold": 0.6,  # Reduced from 0.7
-                "stop_loss": 0.03,
-                "take_profit": 0.05,
-                "max_position_size": 0.25,  # Increased from 0.2
-                "partial_take_profit": 0.035,  # New parameter
-                "trailing_stop": 0.02  # New parameter
-            },
-            "aggressive": {
-                "confidence_threshold": 0.5,  # Reduced from 0.6
-                "stop_loss": 0.05,
-                "take_profit": 0.08,
-                "max_position_size": 0.35,  # Increased from 0.3
-                "partial_take_profit": 0.05,  # New parameter
-                "trailing_stop": 0.03  # New parameter
-            }
-        }
-        self.params = risk_params[self.risk_level]
+        self.params = dict(RISK_PARAMETERS[self.risk_level])
+        self.risk_adjustment = RISK_ADJUSTMENTS.get(self.risk_level, 1.0)
         
-    def detect_market_regime(self, df):
-        """Enhanced market regime detection"""
+    def apply_overrides(self, overrides):
+        """Set tuned values, e.g. {"params.stop_loss": 0.025, "regime.uptrend": 1.2, "risk": 1.0}"""
+        for key, value in overrides.items():
+            if key == "risk":
+                self.risk_adjustment = value
+            elif key.startswith("params.") and key[7:] in self.params:
+                self.params[key[7:]] = value
+            elif key.startswith("regime.") and key[7:] in self.regime_adjustments:
+                self.regime_adjustments[key[7:]] = value
+            else:
+                raise KeyError(f"Unknown SachielCore parameter: {key}")
+
+    def tunable_parameters(self):
+        """Current values of everything apply_overrides accepts"""
+        values = {f"params.{name}": value for name, value in self.params.items()}
+        values.update({f"regime.{name}": value for name, value in self.regime_adjustments.items()})
+        values["risk"] = self.risk_adjustment
+        return values
+
+    def adjust_confidence(self, confidence, regime):
+        """Scale raw model confidence by the regime and risk-level multipliers"""
+        return confidence * self.regime_adjustments.get(regime, 1.0) * self.risk_adjustment
+
+    def detect_market_regime(self, df, symbol=None, timeframe=None):
+        """Regime of the last bar; with a symbol the labels come from the shared regime cache"""
         try:
-            # Calculate key indicators
-            df['volatility'] = df['close'].pct_change().rolling(window=20).std()
-            df['trend'] = df['close'].rolling(window=20).mean()
-            df['momentum'] = df['close'].pct_change(periods=10)
-            df['volume_ma'] = df['volume'].rolling(window=20).mean()
-            df['volume_ratio'] = df['volume'] / df['volume_ma']
-            
-            # Get latest values
-            current_vol = df['volatility'].iloc[-1]
-            avg_vol = df['volatility'].mean()
-            price = df['close'].iloc[-1]
-            sma20 = df['trend'].iloc[-1]
-            momentum = df['momentum'].iloc[-1]
-            volume_ratio = df['volume_ratio'].iloc[-1]
-            
-            # Enhanced regime detection
-            if current_vol > avg_vol * 1.5:
-                if momentum > 0 and volume_ratio > 1.2:
-                    return 'volatile_bullish'
-                elif momentum < 0 and volume_ratio > 1.2:
-                    return 'volatile_bearish'
-                else:
-                    return 'choppy'
-            elif price > sma20:
-                if current_vol < avg_vol * 0.5:
-                    return 'low_vol_uptrend'
-                else:
-                    return 'uptrend'
+            # Labels are computed from close and volume without adding columns to df
+            if symbol is not None:
+                codes = regime_cache.update(symbol, df, timeframe)
             else:
-                if current_vol < avg_vol * 0.5:
-                    return 'low_vol_downtrend'
-                else:
-                    return 'downtrend'
+                codes = classify(df)
+            return REGIMES[codes[-1]] if len(codes) else 'unknown'
                     
         except Exception as e:
             print(f"Error detecting market regime: {e}")
@@ -121,13 +141,13 @@ class SachielCore:
             df['price_momentum'] = df['close'].pct_change(5)
             df['volume_momentum'] = df['volume'].pct_change(5)
             
-            return df.fillna(method='ffill').fillna(method='bfill')
+            return df.ffill().bfill()
             
         except Exception as e:
             print(f"Error preparing features: {e}")
             return df
 
-    def predict(self, df):
+    def predict(self, df, symbol=None, timeframe=None):
         """Enhanced prediction with market regime consideration"""
         try:
             # Prepare features
@@ -139,7 +159,8 @@ class SachielCore:
                 'adx', 'price_momentum', 'volume_momentum'
             ]
             
-            X = df[feature_cols].values
+            # Only the latest bar is scored
+            X = df[feature_cols].values[-1:]
             X_scaled = self.scaler.transform(X)
             
             # Get prediction probabilities
@@ -147,32 +168,10 @@ class SachielCore:
             confidence = probas[-1][1]  # Probability of price increase
             
             # Update market regime
-            current_regime = self.detect_market_regime(df)
-            
-            # Enhanced regime adjustments
-            regime_adjustments = {
-                'volatile_bullish': 1.0,    # Increased from 0.8
-                'volatile_bearish': 0.8,    # Increased from 0.6
-                'uptrend': 1.3,             # Increased from 1.2
-                'downtrend': 0.9,           # Increased from 0.7
-                'low_vol_uptrend': 1.2,     # Increased from 1.1
-                'low_vol_downtrend': 0.9,   # Increased from 0.8
-                'choppy': 0.7,              # New regime
-                'unknown': 1.1              # Increased from 1.0
-            }
-            
-            risk_adjustments = {
-                'safe': 0.9,      # Increased from 0.8
-                'medium': 1.1,    # Increased from 1.0
-                'aggressive': 1.3 # Increased from 1.2
-            }
+            current_regime = self.detect_market_regime(df, symbol, timeframe)
             
             # Apply adjustments
-            adjusted_confidence = (
-                confidence *
-                regime_adjustments.get(current_regime, 1.0) *
-                risk_adjustments.get(self.risk_level, 1.0)
-            )
+            adjusted_confidence = self.adjust_confidence(confidence, current_regime)
             
             # Store prediction with enhanced metadata
             self.last_prediction = {
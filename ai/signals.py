@@ -0,0 +1,263 @@
+# ai/signals.py
+"""
+Rule-based trading signals from OHLCV bars.
+
+SignalGenerator scores trend, momentum and risk indicators into a
+should_trade decision with suggested stop loss, take profit and position
+size, adapting its parameters to the market conditions it sees. It needs no
+GUI, so the trading engine uses it directly and SachielAITab displays it.
+"""
+import traceback
+import pandas as pd
+
+
+class SignalGenerator:
+    def __init__(self):
+        self.params = {
+            'confidence_threshold': 0.6,
+            'stop_loss': 0.02,
+            'take_profit': 0.04,
+            'position_size': 100,
+            'volatility_threshold': 0.02,
+            'volume_threshold': 1.2,
+            'stop_loss_multiplier': 1.0,
+            'position_size_multiplier': 1.0
+        }
+
+    def signals_from_bars(self, symbol, df):
+        """Trading signals from an OHLCV frame already in hand; no broker calls"""
+        # Calculate technical indicators
+        df = self.calculate_technical_indicators(df)
+
+        # Analyze market conditions
+        market_analysis = self.analyze_market_conditions(df, symbol)
+
+        # Adjust parameters based on market conditions
+        adjusted_params = self.adjust_parameters(market_analysis)
+        if adjusted_params:
+            self.params.update(adjusted_params)
+
+        # Get trading signals
+        return self.get_trading_signals(df)
+
+    def calculate_technical_indicators(self, df):
+        """Calculate comprehensive technical indicators"""
+        try:
+            # Moving Averages
+            df['sma_20'] = df['close'].rolling(window=20).mean()
+            df['sma_50'] = df['close'].rolling(window=50).mean()
+            df['ema_12'] = df['close'].ewm(span=12).mean()
+            df['ema_26'] = df['close'].ewm(span=26).mean()
+            
+            # MACD
+            df['macd'] = df['ema_12'] - df['ema_26']
+            df['macd_signal'] = df['macd'].ewm(span=9).mean()
+            df['macd_hist'] = df['macd'] - df['macd_signal']
+            
+            # RSI
+            delta = df['close'].diff()
+            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+            rs = gain / loss
+            df['rsi'] = 100 - (100 / (1 + rs))
+            
+            # Bollinger Bands
+            df['bb_middle'] = df['close'].rolling(window=20).mean()
+            std = df['close'].rolling(window=20).std()
+            df['bb_upper'] = df['bb_middle'] + (std * 2)
+            df['bb_lower'] = df['bb_middle'] - (std * 2)
+            
+            # Average True Range (ATR)
+            high_low = df['high'] - df['low']
+            high_close = abs(df['high'] - df['close'].shift())
+            low_close = abs(df['low'] - df['close'].shift())
+            tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+            df['atr'] = tr.rolling(window=14).mean()
+            
+            # Volume Analysis
+            df['volume_sma'] = df['volume'].rolling(window=20).mean()
+            df['volume_ratio'] = df['volume'] / df['volume_sma']
+            
+            return df
+            
+        except Exception as e:
+            print(f"Error calculating indicators: {e}")
+            traceback.print_exc()
+            return df
+
+    def analyze_market_conditions(self, df, symbol):
+        """Analyze overall market conditions"""
+        try:
+            # Volatility Analysis
+            daily_returns = df['close'].pct_change()
+            volatility = daily_returns.std()
+            
+            # Volume Analysis
+            avg_volume = df['volume'].mean()
+            recent_volume = df['volume'].iloc[-5:].mean()
+            volume_trend = recent_volume / avg_volume
+            
+            # Trend Strength
+            price_trend = (df['close'].iloc[-1] - df['close'].iloc[-20]) / df['close'].iloc[-20]
+            
+            # Market Type Classification
+            market_conditions = {
+                'high_volatility': volatility > 0.02,
+                'increasing_volume': volume_trend > 1.2,
+                'strong_trend': abs(price_trend) > 0.05,
+                'breakout_potential': df['close'].iloc[-1] > df['bb_upper'].iloc[-1],
+                'support_level': df['close'].iloc[-1] < df['bb_lower'].iloc[-1]
+            }
+            
+            # Adjust strategy based on market conditions
+            if market_conditions['high_volatility']:
+                self.params['stop_loss_multiplier'] = 1.5
+                self.params['position_size_multiplier'] = 0.8
+            else:
+                self.params['stop_loss_multiplier'] = 1.0
+                self.params['position_size_multiplier'] = 1.0
+                
+            # Market specific adjustments
+            if 'BTC' in symbol or 'ETH' in symbol:
+                self.params['volatility_threshold'] = 0.03
+                self.params['volume_threshold'] = 1.5
+            else:
+                self.params['volatility_threshold'] = 0.02
+                self.params['volume_threshold'] = 1.2
+                
+            return {
+                'market_type': 'volatile' if market_conditions['high_volatility'] else 'normal',
+                'trend_strength': 'strong' if market_conditions['strong_trend'] else 'weak',
+                'volume_profile': 'increasing' if market_conditions['increasing_volume'] else 'normal',
+                'volatility': volatility,
+                'volume_trend': volume_trend,
+                'price_trend': price_trend
+            }
+            
+        except Exception as e:
+            print(f"Error analyzing market conditions: {e}")
+            traceback.print_exc()
+            return None
+
+    def adjust_parameters(self, market_analysis):
+        """Adjust trading parameters based on market conditions"""
+        try:
+            if market_analysis:
+                # Base parameters
+                params = {
+                    'confidence_threshold': 0.6,
+                    'stop_loss': 0.02,
+                    'take_profit': 0.04,
+                    'position_size': 100
+                }
+                
+                # Adjust based on market type
+                if market_analysis['market_type'] == 'volatile':
+                    params['confidence_threshold'] *= 1.2
+                    params['stop_loss'] *= 1.5
+                    params['take_profit'] *= 1.5
+                    params['position_size'] *= 0.8
+                    
+                # Adjust based on trend strength
+                if market_analysis['trend_strength'] == 'strong':
+                    params['take_profit'] *= 1.2
+                    params['position_size'] *= 1.2
+                    
+                # Adjust based on volume
+                if market_analysis['volume_profile'] == 'increasing':
+                    params['confidence_threshold'] *= 0.9
+                    
+                return params
+                
+            return None
+            
+        except Exception as e:
+            print(f"Error adjusting parameters: {e}")
+            traceback.print_exc()
+            return None
+
+    def get_trading_signals(self, df):
+        """Generate trading signals based on multiple indicators"""
+        try:
+            latest = df.iloc[-1]
+            
+            # Trend Signals
+            trend_signals = {
+                'above_sma20': latest['close'] > latest['sma_20'],
+                'above_sma50': latest['close'] > latest['sma_50'],
+                'golden_cross': latest['sma_20'] > latest['sma_50'],
+                'macd_positive': latest['macd_hist'] > 0,
+                'bb_position': (latest['close'] - latest['bb_lower']) / (latest['bb_upper'] - latest['bb_lower'])
+            }
+            
+            # Momentum Signals
+            momentum_signals = {
+                'rsi_bullish': 30 < latest['rsi'] < 70,
+                'volume_confirming': latest['volume_ratio'] > 1.0,
+                'macd_trending': latest['macd'] > latest['macd_signal']
+            }
+            
+            # Risk Metrics
+            volatility = latest['atr'] / latest['close']
+            risk_signals = {
+                'volatility_acceptable': volatility < 0.02,
+                'bb_not_extreme': 0.1 < trend_signals['bb_position'] < 0.9
+            }
+            
+            # Calculate overall confidence
+            trend_score = sum(trend_signals.values()) / len(trend_signals)
+            momentum_score = sum(momentum_signals.values()) / len(momentum_signals)
+            risk_score = sum(risk_signals.values()) / len(risk_signals)
+            
+            # Weight the scores
+            confidence = (trend_score * 0.4 + momentum_score * 0.4 + risk_score * 0.2)
+            
+            # Decision making
+            should_trade = (
+                confidence > 0.6 and
+                trend_signals['above_sma20'] and
+                momentum_signals['rsi_bullish'] and
+                risk_signals['volatility_acceptable']
+            )
+            
+            return {
+                'should_trade': should_trade,
+                'confidence': confidence,
+                'stop_loss': max(volatility * 2, 0.02),
+                'take_profit': max(volatility * 4, 0.04),
+                'position_size': int(100 * confidence) if should_trade else 0,
+                'reason': f"Trend:{trend_score:.2f} Momentum:{momentum_score:.2f} Risk:{risk_score:.2f}"
+            }
+            
+        except Exception as e:
+            print(f"Error generating signals: {e}")
+            traceback.print_exc()
+            return None
+
+    def default_signals(self, symbol):
+        """Get default signals when analysis fails"""
+        print(f"Using default signals for {symbol}")
+        is_crypto = 'BTC' in symbol or 'ETH' in symbol
+        
+        if is_crypto:
+            return {
+                'signals': {
+                    'should_trade': False,
+                    'confidence': 0.0,
+                    'stop_loss': 0.03,  # Higher stop loss for crypto
+                    'take_profit': 0.06,
+                    'position_size': 0,
+                    'reason': "Using default crypto signals"
+                }
+            }
+        else:
+            return {
+                'signals': {
+                    'should_trade': False,
+                    'confidence': 0.0,
+                    'stop_loss': 0.02,
+                    'take_profit': 0.04,
+                    'position_size': 0,
+                    'reason': "Using default stock signals"
+                }
+            }
@@ -0,0 +1,239 @@
+# benchmarks/cases.py
+"""
+Benchmark definitions. Each builder does its own imports and setup and
+returns a Benchmark, so one case with a missing dependency does not stop
+the others. GUI methods are called unbound with a minimal stand-in for the
+Tk frame; none of them touch widgets on the measured path.
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks import data
+from benchmarks.harness import Benchmark
+
+BARS = 500
+RSI_PRICES = 1000
+SPOT_EVENTS = 10_000
+TRADES = 1000
+RISK_SYMBOLS = 50
+RISK_CHECKS = 1000
+
+
+def _fitted_core(df):
+    """SachielCore with its scaler and forest fitted on synthetic features"""
+    import numpy as np
+    from ai.sachiel_core import SachielCore
+
+    core = SachielCore("medium")
+    features = core.prepare_features(df.copy())
+    feature_cols = [
+        'sma_20', 'sma_50', 'macd_diff', 'rsi', 'stoch', 'mfi',
+        'bb_width', 'atr', 'obv', 'high_low_ratio', 'close_position',
+        'adx', 'price_momentum', 'volume_momentum'
+    ]
+    X = np.nan_to_num(features[feature_cols].values)
+    y = (features['close'].shift(-5) > features['close']).astype(int).values
+    core.scaler.fit(X)
+    core.model.set_params(n_estimators=50)
+    core.model.fit(core.scaler.transform(X), y)
+    return core
+
+
+def sachiel_prepare_features():
+    from ai.sachiel_core import SachielCore
+
+    df = data.ohlcv_frame(BARS)
+    core = SachielCore("medium")
+    return Benchmark(
+        f"sachiel_core.prepare_features[{BARS} bars]",
+        core.prepare_features,
+        prepare=lambda: (df.copy(),),
+        repeat=20
+    )
+
+
+def sachiel_predict():
+    df = data.ohlcv_frame(BARS)
+    core = _fitted_core(df)
+    return Benchmark(
+        f"sachiel_core.predict[{BARS} bars]",
+        core.predict,
+        prepare=lambda: (df.copy(),),
+        repeat=20
+    )
+
+
+def sachiel_ai_indicators():
+    from ai.signals import SignalGenerator
+
+    df = data.ohlcv_frame(BARS)
+    return Benchmark(
+        f"sachiel_ai.calculate_technical_indicators[{BARS} bars]",
+        SignalGenerator().calculate_technical_indicators,
+        prepare=lambda: (df.copy(),),
+        repeat=30
+    )
+
+
+def trading_tab_rsi():
+    from trading.engine import calculate_rsi
+
+    prices = data.price_path(RSI_PRICES)
+    return Benchmark(
+        f"trading_tab.calculate_rsi[{RSI_PRICES} prices]",
+        lambda: calculate_rsi(prices),
+        repeat=50,
+        items=RSI_PRICES,
+        unit="prices"
+    )
+
+
+def ctrader_spot_events():
+    from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent
+    from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOASymbol
+    from trading.ctrader_client import CTraderClient
+
+    client = CTraderClient()
+    client.symbols_map.update({f"SYM{i}": i for i in range(1, 101)})
+    for symbol_id in range(1, 101):
+        client.symbol_details_map[symbol_id] = ProtoOASymbol(symbolId=symbol_id, digits=5, pipPosition=4)
+
+    prices = data.price_path(SPOT_EVENTS, base_price=1.1, volatility=0.0001)
+    events = [
+        ProtoOASpotEvent(ctidTraderAccountId=1, symbolId=1 + i % 100, bid=int(price * 100000))
+        for i, price in enumerate(prices)
+    ]
+
+    def handle_all():
+        handle = client._handle_spot_event
+        for event in events:
+            handle(event)
+
+    return Benchmark(
+        f"ctrader_client.handle_spot_event[{SPOT_EVENTS} events]",
+        handle_all,
+        repeat=10,
+        items=SPOT_EVENTS,
+        unit="events"
+    )
+
+
+def ctrader_spot_messages():
+    from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+    from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent
+    from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOASymbol
+    from trading.ctrader_client import CTraderClient
+
+    client = CTraderClient()
+    client.symbols_map.update({f"SYM{i}": i for i in range(1, 101)})
+    for symbol_id in range(1, 101):
+        client.symbol_details_map[symbol_id] = ProtoOASymbol(symbolId=symbol_id, digits=5, pipPosition=4)
+
+    prices = data.price_path(SPOT_EVENTS, base_price=1.1, volatility=0.0001)
+    payload_type = ProtoOASpotEvent().payloadType
+    # Serialized envelopes as the protocol hands them over, so decoding is measured too
+    messages = [
+        ProtoMessage(payloadType=payload_type, payload=ProtoOASpotEvent(
+            ctidTraderAccountId=1, symbolId=1 + i % 100, bid=int(price * 100000), ask=int(price * 100000) + 10,
+            timestamp=1760832000000 + i
+        ).SerializeToString())
+        for i, price in enumerate(prices)
+    ]
+
+    def receive_all():
+        receive = client._on_message_received
+        for message in messages:
+            receive(None, message)
+
+    return Benchmark(
+        f"ctrader_client.on_message_received[{SPOT_EVENTS} spot messages]",
+        receive_all,
+        repeat=10,
+        items=SPOT_EVENTS,
+        unit="messages"
+    )
+
+
+def performance_metrics():
+    from gui.performance import PerformanceTab
+    from trading.ledger import TradeLedger
+
+    class _Choice:
+        def __init__(self, value):
+            self.value = value
+
+        def get(self):
+            return self.value
+
+    class PerformanceStandIn:
+        time_range = _Choice("All Time")
+        get_range_start = PerformanceTab.get_range_start
+        calculate_changes = PerformanceTab.calculate_changes
+        get_default_metrics = PerformanceTab.get_default_metrics
+        format_duration = PerformanceTab.format_duration
+        record_trade = PerformanceTab.record_trade
+
+        def __init__(self, trades):
+            self.ledger = TradeLedger()
+            for trade in trades:
+                self.record_trade(trade)
+
+    stand_in = PerformanceStandIn(data.trade_log(TRADES))
+    return Benchmark(
+        f"performance.calculate_metrics[{TRADES} trades]",
+        lambda: PerformanceTab.calculate_metrics(stand_in),
+        repeat=30,
+        items=TRADES,
+        unit="trades"
+    )
+
+
+def risk_pre_trade_check():
+    from trading.order_manager import OrderIntent
+    from trading.risk_engine import RiskEngine
+
+    engine = RiskEngine(contract_size=lambda symbol: 100000, account=lambda: {"balance": 1e9, "currency": "USD"})
+    symbols = [f"SYM{i}" for i in range(RISK_SYMBOLS)]
+    prices = data.price_path(RISK_SYMBOLS * 20, base_price=1.1, volatility=0.0001)
+    for i, price in enumerate(prices):
+        engine.on_price(symbols[i % RISK_SYMBOLS], float(price), ts=i * 10)
+    intents = [OrderIntent(symbols[i % RISK_SYMBOLS], "BUY", 0.01) for i in range(RISK_CHECKS)]
+
+    def check_all():
+        check = engine.check
+        for intent in intents:
+            check(intent)
+
+    return Benchmark(
+        f"risk_engine.check[{RISK_SYMBOLS} symbols]",
+        check_all,
+        repeat=30,
+        items=RISK_CHECKS,
+        unit="checks"
+    )
+
+
+BUILDERS = [
+    sachiel_prepare_features,
+    sachiel_predict,
+    sachiel_ai_indicators,
+    trading_tab_rsi,
+    ctrader_spot_events,
+    ctrader_spot_messages,
+    performance_metrics,
+    risk_pre_trade_check,
+]
+
+
+def build(selected=None, log=print):
+    """Build the benchmarks whose builder name contains `selected` (all if None)"""
+    benchmarks = []
+    for builder in BUILDERS:
+        if selected and selected not in builder.__name__:
+            continue
+        try:
+            benchmarks.append(builder())
+        except ImportError as e:
+            log(f"Skipping {builder.__name__}: {e}")
+    return benchmarks
@@ -0,0 +1,125 @@
+# benchmarks/ctrader_load.py
+"""
+Load test CTraderClient against the local fake server.
+
+Starts trading/ctrader_fake_server.py in a subprocess (so the server does not
+share this process's GIL), connects a real CTraderClient to it with the
+reactor on its own thread as in the app, subscribes every symbol and
+measures the spot events actually handled per second and their latency from
+the server timestamp to _handle_spot_event.
+
+    python -m benchmarks.ctrader_load --rate 20000 --symbols 50 --seconds 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import Config
+
+
+def start_server(rate, symbols, latency):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "trading.ctrader_fake_server", "--port", "0", "--spot-rate", str(rate),
+         "--symbols", str(symbols), "--latency", str(latency)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    for line in process.stdout:
+        if line.startswith("Listening on"):
+            return process, int(line.rsplit(":", 1)[1])
+    raise RuntimeError("Fake cTrader server exited before listening")
+
+
+def wait_for(condition, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def run(rate, symbols, seconds, warmup, latency=0.0):
+    process, port = start_server(rate, symbols, latency)
+    Config.CTRADER_HOST_TYPE = "local"
+    Config.CTRADER_LOCAL_PORT = port
+    Config.CTRADING_CLIENT_ID = Config.CTRADING_CLIENT_ID or "load-test"
+    Config.CTRADING_CLIENT_SECRET = Config.CTRADING_CLIENT_SECRET or "load-test"
+    Config.CTRADING_ACCOUNT_ID = "1000001"
+    Config.SYMBOL_CACHE_FILE = os.path.join(tempfile.mkdtemp(), "symbols_{host}_{account}.json")
+
+    from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent
+    from trading.ctrader_client import CTraderClient
+    client = CTraderClient()
+    stats = {'count': 0, 'latencies': []}
+    handle = client._handle_spot_event
+
+    def counting_handler(event):
+        handle(event)
+        stats['count'] += 1
+        if stats['latencies'] is not None:
+            stats['latencies'].append(time.time() * 1000 - event.timestamp)
+
+    client.dispatcher.unregister(ProtoOASpotEvent, handle)
+    client.dispatcher.register(ProtoOASpotEvent, counting_handler)
+
+    try:
+        if not client.connect() or not wait_for(lambda: client.is_connected and client.symbols_map, 30):
+            raise RuntimeError(f"Could not connect: {client.get_connection_status()[1]}")
+        client.call_in_reactor(client._send_subscribe_spots_request, client.ctid_trader_account_id,
+                               list(client.symbols_map.values()))
+        wait_for(lambda: stats['count'] > 0, 10)
+
+        time.sleep(warmup)
+        stats['count'] = 0
+        stats['latencies'] = []
+        start = time.perf_counter()
+        time.sleep(seconds)
+        elapsed = time.perf_counter() - start
+        received = stats['count']
+        latencies = np.array(stats['latencies'])
+        stats['latencies'] = None
+    finally:
+        client.disconnect()
+        process.terminate()
+        process.wait(timeout=10)
+
+    return {
+        'target_rate': rate,
+        'symbols': symbols,
+        'seconds': round(elapsed, 3),
+        'received': received,
+        'events_per_sec': received / elapsed,
+        'latency_p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+        'latency_p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else None,
+        'latency_max_ms': float(latencies.max()) if len(latencies) else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CTraderClient spot throughput against the fake server")
+    parser.add_argument("--rate", type=float, default=10000, help="spot events per second to send")
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake server response delay in seconds")
+    parser.add_argument("--output", help="write the result as JSON here")
+    args = parser.parse_args(argv)
+
+    result = run(args.rate, args.symbols, args.seconds, args.warmup, args.latency)
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    # Falling short of the target by more than 5% means the client cannot keep up
+    return 0 if result['events_per_sec'] >= 0.95 * args.rate else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# benchmarks/data.py
+"""Deterministic synthetic market data built on PriceSimulator"""
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.price_simulator import PriceSimulator
+
+DEFAULT_SEED = 1234
+
+
+def seed_all(seed=DEFAULT_SEED):
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def price_path(n, base_price=100.0, volatility=0.002, seed=DEFAULT_SEED):
+    """n consecutive simulator prices"""
+    seed_all(seed)
+    simulator = PriceSimulator(base_price=base_price, volatility=volatility)
+    return np.array([simulator.get_next_price() for _ in range(n)])
+
+
+def ohlcv_frame(n, base_price=100.0, seed=DEFAULT_SEED):
+    """Minute bars with open/high/low/close/volume columns, as the AI code expects"""
+    closes = price_path(n, base_price, seed=seed)
+    rng = np.random.default_rng(seed)
+    opens = np.concatenate(([base_price], closes[:-1]))
+    spread = np.abs(rng.normal(0, 0.001, n)) * closes
+    highs = np.maximum(opens, closes) + spread
+    lows = np.minimum(opens, closes) - spread
+    volume = rng.integers(1_000, 50_000, n).astype(float)
+    index = pd.date_range(end=datetime(2025, 1, 2, 16, 0), periods=n, freq="min")
+    return pd.DataFrame(
+        {'open': opens, 'high': highs, 'low': lows, 'close': closes, 'volume': volume},
+        index=index
+    )
+
+
+def trade_log(n, seed=DEFAULT_SEED):
+    """Trade dicts shaped like PerformanceTab.get_trades() output, alternating entries and exits"""
+    closes = price_path(n, seed=seed)
+    rng = np.random.default_rng(seed)
+    start = datetime.now() - timedelta(days=20)
+    exit_types = ['SELL', 'STOP LOSS', 'TAKE PROFIT']
+    trades = []
+    for i in range(n):
+        is_exit = i % 2 == 1
+        trades.append({
+            'time': start + timedelta(minutes=15 * i),
+            'symbol': "SIM",
+            'type': exit_types[int(rng.integers(0, 3))] if is_exit else 'BUY',
+            'price': float(closes[i]),
+            'size': 10.0,
+            'pl': float((closes[i] - closes[i - 1]) * 10) if is_exit else 0.0,
+            'reason': "",
+            'confidence': "",
+        })
+    return trades
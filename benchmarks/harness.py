@@ -0,0 +1,145 @@
+# benchmarks/harness.py
+"""
+Timing, JSON baselines and regression comparison.
+
+Each Benchmark times `func(*prepare())` `repeat` times after `warmup` untimed
+calls; `prepare` runs outside the timed region, so per-call setup such as
+copying a DataFrame that the function mutates is not counted. Results are
+plain dicts keyed by benchmark name so they can be written to and compared
+against a baseline file.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.15  # Flag medians more than 15% slower than the baseline
+
+
+class Benchmark:
+    def __init__(self, name, func, prepare=None, repeat=30, warmup=3, items=1, unit="calls"):
+        self.name = name
+        self.func = func
+        self.prepare = prepare
+        self.repeat = repeat
+        self.warmup = warmup
+        self.items = items  # Work items per call, for throughput (e.g. events per batch)
+        self.unit = unit
+
+    def run(self, repeat=None):
+        repeat = repeat or self.repeat
+        for _ in range(self.warmup):
+            self.func(*(self.prepare() if self.prepare else ()))
+
+        samples = []
+        for _ in range(repeat):
+            args = self.prepare() if self.prepare else ()
+            start = time.perf_counter()
+            self.func(*args)
+            samples.append(time.perf_counter() - start)
+
+        samples = np.array(samples) * 1000
+        median_ms = float(np.median(samples))
+        return {
+            'median_ms': median_ms,
+            'mean_ms': float(samples.mean()),
+            'min_ms': float(samples.min()),
+            'p95_ms': float(np.percentile(samples, 95)),
+            'repeat': repeat,
+            'items': self.items,
+            'unit': self.unit,
+            'items_per_sec': self.items / (median_ms / 1000) if median_ms > 0 else float('inf'),
+        }
+
+
+def environment():
+    """Where the numbers came from; baselines are only comparable on similar machines"""
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        revision = ""
+
+    import pandas
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': revision,
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'pandas': pandas.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+    }
+
+
+def run_all(benchmarks, repeat=None, log=print):
+    results = {}
+    for bench in benchmarks:
+        result = bench.run(repeat)
+        results[bench.name] = result
+        log(f"{bench.name:<55} median {result['median_ms']:10.3f} ms   "
+            f"p95 {result['p95_ms']:10.3f} ms   {result['items_per_sec']:14,.0f} {bench.unit}/s")
+    return {'environment': environment(), 'results': results}
+
+
+def save(report, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare medians benchmark by benchmark. Returns rows of
+    (name, baseline_ms, current_ms, ratio, status) where status is
+    'REGRESSION', 'faster', 'ok', 'new' or 'missing'.
+    """
+    rows = []
+    current_results = current['results']
+    baseline_results = baseline['results']
+    for name in sorted(set(current_results) | set(baseline_results)):
+        if name not in baseline_results:
+            rows.append((name, None, current_results[name]['median_ms'], None, 'new'))
+            continue
+        if name not in current_results:
+            rows.append((name, baseline_results[name]['median_ms'], None, None, 'missing'))
+            continue
+
+        before = baseline_results[name]['median_ms']
+        after = current_results[name]['median_ms']
+        ratio = after / before if before > 0 else float('inf')
+        if ratio > 1 + threshold:
+            status = 'REGRESSION'
+        elif ratio < 1 - threshold:
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append((name, before, after, ratio, status))
+    return rows
+
+
+def format_comparison(rows):
+    lines = [f"{'benchmark':<55} {'baseline ms':>12} {'current ms':>12} {'ratio':>8}  status"]
+    for name, before, after, ratio, status in rows:
+        lines.append(
+            f"{name:<55} "
+            f"{before if before is not None else float('nan'):12.3f} "
+            f"{after if after is not None else float('nan'):12.3f} "
+            f"{ratio if ratio is not None else float('nan'):8.2f}  {status}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,61 @@
+# benchmarks/run.py
+"""
+Run the micro-benchmarks and optionally record or check a baseline.
+
+    python -m benchmarks.run                          # print timings
+    python -m benchmarks.run --save                   # write benchmarks/baselines/baseline.json
+    python -m benchmarks.run --compare                # exit 1 if any median regressed
+    python -m benchmarks.run -k spot --repeat 50      # one case, more samples
+
+Baselines are machine-specific: record one on the machine you compare on.
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks import cases, data, harness
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "baseline.json")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sachiel trading micro-benchmarks")
+    parser.add_argument("-k", dest="selected", help="only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, help="timed samples per case")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, help="write results as a baseline")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="compare against a baseline")
+    parser.add_argument("--threshold", type=float, default=harness.DEFAULT_THRESHOLD,
+                        help="relative slowdown that counts as a regression (default 0.15)")
+    parser.add_argument("--output", help="also write this run's results here")
+    args = parser.parse_args(argv)
+
+    data.seed_all()
+    report = harness.run_all(cases.build(args.selected), repeat=args.repeat)
+
+    if args.output:
+        harness.save(report, args.output)
+    if args.save:
+        harness.save(report, args.save)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        if not os.path.exists(args.compare):
+            print(f"No baseline at {args.compare}; run with --save first")
+            return 2
+        baseline = harness.load(args.compare)
+        if args.selected:
+            # Cases filtered out with -k are not missing
+            baseline['results'] = {
+                name: result for name, result in baseline['results'].items() if name in report['results']
+            }
+        rows = harness.compare(report, baseline, args.threshold)
+        print()
+        print(harness.format_comparison(rows))
+        if any(status == 'REGRESSION' for *_, status in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
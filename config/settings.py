@@ -6,11 +6,106 @@ class Config:
     RISK_LEVEL = "medium"
 
     # cTrader API settings
-    CTRADER_HOST_TYPE = "live"  # "live" or "demo"
+    CTRADER_HOST_TYPE = "live"  # "live", "demo" or "local" (see trading/ctrader_fake_server.py)
+    CTRADER_LOCAL_HOST = "127.0.0.1"
+    CTRADER_LOCAL_PORT = 5035
     CTRADER_SPOTWARE_AUTH_URL = "https://connect.spotware.com/oauth/v2/auth"
     CTRADER_SPOTWARE_TOKEN_URL = "https://connect.spotware.com/oauth/v2/token"
     CTRADER_REDIRECT_URI = "http://localhost:5000/callback"
 
+    # Latency metrics (see utils/tracing.py)
+    METRICS_FILE = "~/.sachiel_trading/metrics.json"
+    METRICS_HTTP_PORT = 0  # Set e.g. 9108 to serve /metrics in Prometheus format
+
+    # Logging (see utils/logger.py)
+    LOG_LEVEL = "INFO"
+    LOG_FILE = "~/.sachiel_trading/logs/sachiel.log"
+    LOG_TO_CONSOLE = True
+    LOG_MAX_BYTES = 5 * 1024 * 1024
+    LOG_BACKUP_COUNT = 5
+    LOG_QUEUE_SIZE = 10000
+    LOG_SAMPLE_RATE = 5  # Max records per second for each high-rate message
+
+    # Order management (see trading/order_manager.py)
+    ORDER_RATE_LIMIT_PER_SEC = 5  # Open API sends at most 5 messages per second per connection
+    ORDER_RATE_LIMIT_BURST = 5
+    ORDER_DEDUPE_WINDOW_SEC = 60
+    ORDER_SUBMIT_WORKERS = 4
+    ORDER_POLL_INTERVAL_SEC = 2
+
+    # Trading engine and headless mode (see trading/engine.py, headless.py)
+    ENGINE_CONFIG_FILE = "~/.sachiel_trading/engine.json"
+    LEDGER_ENABLED = True
+    LEDGER_FILE = "~/.sachiel_trading/ledger/{name}.jsonl"  # Every trade log row, one JSON object per line
+
+    # Live evaluations (see trading/evaluation_pipeline.py)
+    EVALUATION_TIMEOUT_SEC = 30  # An evaluation with no result by then is abandoned
+
+    # Simulation mode (see trading/sim_clock.py)
+    SIM_SPEED = "1x"  # "1x" is real time, "60x" runs an hour a minute, "max" as fast as possible
+    SIM_HISTORY_SEC = 3600  # Simulated price history generated before the first step
+    SIM_SIGNAL_MIN_BARS = 50  # Simulated signals need this many completed one-minute bars
+
+    # OAuth token lifecycle (see trading/token_manager.py)
+    TOKEN_FILE = "tokens.json"
+    TOKEN_REFRESH_MARGIN_SEC = 300  # Refresh this long before the access token expires
+    TOKEN_REQUEST_TIMEOUT_SEC = 10
+    TOKEN_RETRY_INTERVAL_SEC = 30
+
+    # Symbol metadata cache (see trading/symbol_metadata.py)
+    SYMBOL_CACHE_FILE = "~/.sachiel_trading/cache/ctrader_symbols_{host}_{account}.json"
+    SYMBOL_CACHE_TTL_SEC = 24 * 3600  # Re-list symbols at most once a day; changes arrive as events
+    SYMBOL_DETAILS_BATCH_SIZE = 200
+
+    # Market-data journal (see trading/market_journal.py)
+    JOURNAL_ENABLED = False
+    JOURNAL_DIR = "~/.sachiel_trading/journal"
+    JOURNAL_FLUSH_INTERVAL_SEC = 1.0
+
+    # Shared-memory market data bus (see trading/market_bus.py)
+    MARKET_BUS_ENABLED = False  # The process holding the broker connection publishes; others attach by name
+    MARKET_BUS_NAME = "sachiel_market_bus"
+    MARKET_BUS_SYMBOLS = 64
+    MARKET_BUS_TICKS = 8192  # Ticks kept per symbol
+    MARKET_BUS_BARS = 4096  # Bars kept per symbol
+
+    # Depth of market (see trading/order_book.py)
+    DEPTH_ENABLED = False  # Live strategies subscribe to depth quotes; exits are priced against the book
+    ORDER_BOOK_LEVELS = 4096  # Price ticks in each side's ladder
+    ORDER_BOOK_IMBALANCE_LEVELS = 5
+
+    # Performance analytics (see trading/equity_curve.py)
+    EQUITY_BUCKET_SEC = 3600  # Returns are measured per bucket; Sharpe/Sortino annualize by buckets per year
+    EQUITY_TRADING_DAYS_PER_YEAR = 252
+
+    # Portfolio risk limits, as multiples of equity unless noted (see trading/risk_engine.py)
+    RISK_ENABLED = True
+    RISK_ACCOUNT_CURRENCY = "GBP"  # Until the account reports its own
+    RISK_MAX_GROSS_LEVERAGE = 10.0
+    RISK_MAX_SYMBOL_LEVERAGE = 5.0
+    RISK_CLASS_LEVERAGE = {"FX": 10.0, "METALS": 3.0, "CRYPTO": 1.0, "OTHER": 3.0}
+    RISK_MAX_VAR_PCT = 10.0  # Parametric VaR as % of equity
+    RISK_VAR_CONFIDENCE = 0.99
+    RISK_VAR_HORIZON_SEC = 86400
+    RISK_RETURN_INTERVAL_SEC = 60  # Covariance is updated once per interval
+    RISK_EWMA_LAMBDA = 0.97
+    RISK_PRIOR_DAILY_VOL = 0.01  # Assumed for symbols without return history
+    RISK_MARGIN_RATE = 1 / 30  # Estimated margin per unit of notional (30:1 leverage)
+    RISK_MAX_MARGIN_USE = 0.8  # Used margin as a fraction of equity
+
+    # Parameter sweeps (see ai/optimizer.py)
+    OPTIMIZER_DIR = "~/.sachiel_trading/optimizer"
+    OPTIMIZER_WORKERS = 0  # 0 uses every CPU
+    OPTIMIZER_COST_PER_SIDE = 0.0001  # Spread and commission as a fraction of each fill
+    OPTIMIZER_MAX_GRID = 10000  # Grid sweeps larger than this are refused
+
+    # Model inference workers (see ai/inference.py)
+    INFERENCE_ENABLED = True  # Used only once a model has been saved with python -m ai.inference
+    INFERENCE_MODEL_FILE = "~/.sachiel_trading/models/sachiel_core.pkl"
+    INFERENCE_WORKERS = 1
+    INFERENCE_SLOTS = 8  # Shared-memory frames; requests beyond this wait for one to free up
+    INFERENCE_MAX_ROWS = 2000  # Bars per frame; longer frames are cut to their most recent rows
+
     @classmethod
     def update_credentials(cls, client_id, client_secret, account_id):
         cls.CTRADING_CLIENT_ID = client_id
@@ -2,7 +2,6 @@
 import tkinter as tk
 from tkinter import ttk
 import mplfinance as mpf
-import pandas as pd
 import numpy as np
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
@@ -14,12 +13,18 @@ from alpaca.data.requests import StockBarsRequest
 import threading
 import ta
 import traceback
+import logging
+from trading.market_bus import MarketBusReader
+from utils.logger import get_logger
+
+log = get_logger(__name__)
 
 class ChartTab(ttk.Frame):
     def __init__(self, parent):
         super().__init__(parent)
         self.current_symbol = None
         self.data = None
+        self.market_bus = None
         self.setup_ui()
         self.updating = False
         self.setup_auto_update()
@@ -147,6 +152,14 @@ class ChartTab(ttk.Frame):
                 if not symbol:
                     return
 
+                # Bars the broker connection already published; no request of our own
+                df = self.bus_bars(symbol)
+                if df is not None:
+                    self.data = df
+                    self.current_symbol = symbol
+                    self.after(0, self.update_chart)
+                    return
+
                 # Get market data
                 from trading.alpaca_client import AlpacaClient
                 client = AlpacaClient()
@@ -156,48 +169,36 @@ class ChartTab(ttk.Frame):
                 end = datetime(2023, 12, 15, 16, 0, 0).replace(tzinfo=pytz.timezone('America/New_York'))
                 start = end - timedelta(days=30)  # Get 30 days of data
 
-                print(f"Fetching data for {symbol} from {start} to {end}")
+                log.debug("Fetching data for %s from %s to %s", symbol, start, end)
 
                 # Get bars directly from AlpacaClient
                 bars = client.get_bars(symbol, is_crypto=('BTC' in symbol or 'ETH' in symbol))
                 
-                if bars and len(bars) > 0:
-                    # Convert bars to DataFrame
-                    df = pd.DataFrame([{
-                        'open': float(b.open),
-                        'high': float(b.high),
-                        'low': float(b.low),
-                        'close': float(b.close),
-                        'volume': float(b.volume),
-                        'timestamp': pd.to_datetime(b.timestamp)
-                    } for b in bars])
-                    
-                    # Set timestamp as index
-                    df.set_index('timestamp', inplace=True)
-                    df.sort_index(inplace=True)
-                    
+                if bars is not None and len(bars) > 0:
+                    # A BarArray, already in time order
+                    df = bars.frame()
+
                     # Convert any infinite values to NaN and drop them
                     df.replace([np.inf, -np.inf], np.nan, inplace=True)
                     df.dropna(inplace=True)
                     
-                    print(f"Received {len(df)} bars")
-                    print(f"Data range: {df.index.min()} to {df.index.max()}")
-                    print("Sample data:")
-                    print(df.head())
+                    log.debug("Received %d bars", len(df))
+                    # DataFrame rendering is costly; only build it when DEBUG is on
+                    if log.isEnabledFor(logging.DEBUG):
+                        log.debug("Data range: %s to %s\nSample data:\n%s", df.index.min(), df.index.max(), df.head())
                     
                     if len(df) >= 2:  # Need at least 2 bars for plotting
                         self.data = df
                         self.current_symbol = symbol
                         self.after(0, self.update_chart)
-                        print("Chart update scheduled")
+                        log.debug("Chart update scheduled")
                     else:
-                        print("Not enough data points for plotting")
+                        log.info("Not enough data points for plotting")
                 else:
-                    print("No bars received")
+                    log.info("No bars received")
 
-            except Exception as e:
-                print(f"Error fetching data: {e}")
-                traceback.print_exc()
+            except Exception:
+                log.exception("Error fetching data")
             finally:
                 self.updating = False
                 if self.winfo_exists():
@@ -205,16 +206,24 @@ class ChartTab(ttk.Frame):
 
         threading.Thread(target=fetch_data, daemon=True).start()
 
+    def bus_bars(self, symbol):
+        """Bars for symbol from the shared-memory market data bus, or None if it has too few"""
+        if self.market_bus is None:
+            self.market_bus = MarketBusReader.attach()
+            if self.market_bus is None:
+                return None
+        df = self.market_bus.bar_frame(symbol)
+        return df if len(df) >= 2 else None
+
     def update_chart(self):
         try:
             if self.data is None or len(self.data) < 2:
-                print("No data or insufficient data to plot")
+                log.info("No data or insufficient data to plot")
                 return
 
-            print("Updating chart...")
-            print(f"Data shape: {self.data.shape}")
-            print("Data types:", self.data.dtypes)
-            print("Data sample:", self.data.head())
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("Updating chart: shape %s\nData types:\n%s\nData sample:\n%s",
+                          self.data.shape, self.data.dtypes, self.data.head())
             
             # Calculate technical indicators
             addplot = []  # List to store additional plots
@@ -278,8 +287,7 @@ class ChartTab(ttk.Frame):
             self.canvas.figure = fig
             self.canvas.draw()
             
-            print("Chart updated successfully")
+            log.debug("Chart updated successfully")
             
-        except Exception as e:
-            print(f"Error updating chart: {e}")
-            traceback.print_exc()
\ No newline at end of file
+        except Exception:
+            log.exception("Error updating chart")
\ No newline at end of file
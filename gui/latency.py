@@ -0,0 +1,87 @@
+# gui/latency.py
+import os
+import tkinter as tk
+from tkinter import ttk
+from datetime import datetime
+import traceback
+from config.settings import Config
+from utils.tracing import tracer
+
+class LatencyTab(ttk.Frame):
+    """Live per-stage latency view fed by utils.tracing"""
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.parent = parent
+        self.refresh_interval_ms = 2000
+        self.setup_ui()
+        self.start_auto_update()
+
+    def setup_ui(self):
+        main_container = ttk.Frame(self)
+        main_container.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        stages_frame = ttk.LabelFrame(main_container, text="Pipeline Stage Latency")
+        stages_frame.pack(fill=tk.BOTH, expand=True)
+
+        tree_frame = ttk.Frame(stages_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        columns = ("Stage", "Count", "Last", "Mean", "p50", "p95", "p99", "Max")
+        self.stage_tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=15)
+        for col in columns:
+            self.stage_tree.heading(col, text=col if col in ("Stage", "Count") else f"{col} (ms)")
+            self.stage_tree.column(col, width=220 if col == "Stage" else 90)
+
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.stage_tree.yview)
+        self.stage_tree.configure(yscrollcommand=scrollbar.set)
+        self.stage_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        controls_frame = ttk.Frame(stages_frame)
+        controls_frame.pack(fill=tk.X, padx=5, pady=5)
+
+        ttk.Button(controls_frame, text="Export Metrics", command=self.export_metrics).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls_frame, text="Reset", command=self.reset_metrics).pack(side=tk.LEFT, padx=5)
+
+        self.status_label = ttk.Label(controls_frame, text="")
+        self.status_label.pack(side=tk.RIGHT, padx=5)
+
+    def refresh(self):
+        try:
+            for item in self.stage_tree.get_children():
+                self.stage_tree.delete(item)
+
+            for stage, stats in tracer.snapshot().items():
+                self.stage_tree.insert('', tk.END, values=(
+                    stage,
+                    stats['count'],
+                    f"{stats['last_ms']:.2f}",
+                    f"{stats['mean_ms']:.2f}",
+                    f"{stats['p50_ms']:.2f}",
+                    f"{stats['p95_ms']:.2f}",
+                    f"{stats['p99_ms']:.2f}",
+                    f"{stats['max_ms']:.2f}"
+                ))
+        except Exception as e:
+            print(f"Error refreshing latency view: {e}")
+            traceback.print_exc()
+
+    def export_metrics(self):
+        path = os.path.expanduser(Config.METRICS_FILE)
+        if tracer.export_json(path):
+            self.status_label.config(text=f"Exported to {path} at {datetime.now().strftime('%H:%M:%S')}")
+        else:
+            self.status_label.config(text="Export failed")
+
+    def reset_metrics(self):
+        tracer.reset()
+        self.refresh()
+
+    def start_auto_update(self):
+        def update():
+            if self.winfo_exists():
+                self.refresh()
+                self.after(self.refresh_interval_ms, update)
+
+        self.after(1000, update)
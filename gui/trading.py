@@ -2,47 +2,48 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from ctrader_open_api import Protobuf
-from trading.ctrader_client import CTraderClient
-# from trading.market_clock import MarketClock # Temporarily disabled
 from config.settings import Config
 import threading
-import time
-from datetime import datetime, timedelta
-import pytz
-import numpy as np
 import traceback
-import pandas as pd
-from trading.price_simulator import PriceSimulator
 from collections import defaultdict
 import queue
-import asyncio
+from utils.logger import get_logger
+from trading.engine import TradingEngine, StrategySettings
+from trading.ledger import trade_row
+
+log = get_logger(__name__)
+
+# Engine strategy name for the tab's trades; headless strategies on the same engine use their own
+STRATEGY_NAME = "trading_tab"
 
 class TradingTab(ttk.Frame):
-    def __init__(self, parent):
+    """Controls and trade log for one strategy on a TradingEngine; the engine does the trading"""
+
+    def __init__(self, parent, engine=None):
         super().__init__(parent)
-        self.ctrader_client = None
+        self.engine = engine or TradingEngine(name="gui")
+        self.strategy = None
         # self.market_clock = None  # Initialize as None # Temporarily disabled
         self.is_trading = False
         self.simulation_mode = False
         self.active_positions = defaultdict(dict)
-        self.highest_prices = {}
-        self.partial_exits = set()
+        # Called with each trade log row, e.g. PerformanceTab.on_trade when it has no shared ledger
+        self.trade_listeners = []
+        # Engine events arrive on engine threads and are shown from process_results
         self.result_queue = queue.Queue()
+        self.engine.add_listener(lambda event, strategy, payload: self.result_queue.put((event, (strategy, payload))))
         self.setup_ui()
         # self.start_market_status_updates() # Temporarily disabled
         self.process_results()
 
-    def verify_connection(self):
-            """Verify connection to cTrader is still active"""
-            try:
-                if self.ctrader_client and self.ctrader_client.client:
-                    # This will be implemented later
-                    return True
-                return False
-            except Exception as e:
-                print(f"Connection verification failed: {e}")
-                return False
+    @property
+    def ctrader_client(self):
+        return self.engine.client
+
+    @ctrader_client.setter
+    def ctrader_client(self, client):
+        self.engine.client = client
+
 
     def setup_ui(self):
         """Setup the complete trading interface"""
@@ -58,6 +59,9 @@ class TradingTab(ttk.Frame):
         )
         self.market_status_label.pack(side=tk.LEFT, padx=5)
 
+        self.evaluation_label = ttk.Label(status_frame, text="", foreground='gray')
+        self.evaluation_label.pack(side=tk.LEFT, padx=5)
+
         # Mode Controls
         self.simulation_var = tk.BooleanVar(value=False)
         self.aggressive_var = tk.BooleanVar(value=False)
@@ -72,6 +76,16 @@ class TradingTab(ttk.Frame):
             command=self.toggle_simulation_mode
         )
         self.simulation_check.pack(side=tk.RIGHT, padx=5)
+
+        self.sim_speed_var = tk.StringVar(value=Config.SIM_SPEED)
+        self.sim_speed_combo = ttk.Combobox(
+            mode_frame,
+            textvariable=self.sim_speed_var,
+            values=["1x", "10x", "60x", "600x", "max"],
+            width=6
+        )
+        self.sim_speed_combo.pack(side=tk.RIGHT)
+        ttk.Label(mode_frame, text="Sim Speed:").pack(side=tk.RIGHT)
         
         self.aggressive_check = ttk.Checkbutton(
             mode_frame,
@@ -168,6 +182,10 @@ class TradingTab(ttk.Frame):
         self.partial_exit = ttk.Entry(advanced_frame, width=10)
         self.partial_exit.insert(0, "75")
         self.partial_exit.grid(row=0, column=1, padx=5, pady=5)
+
+        for entry in (self.stop_loss, self.take_profit, self.trailing_stop, self.max_hold_time, self.partial_exit):
+            entry.bind('<FocusOut>', self.refresh_exit_rules)
+            entry.bind('<Return>', self.refresh_exit_rules)
         
         # Trading Mode Settings
         ttk.Label(advanced_frame, text="Trading Mode:").grid(row=0, column=2, padx=5, pady=5)
@@ -249,20 +267,20 @@ class TradingTab(ttk.Frame):
         """Process results from the result queue in a thread-safe way."""
         try:
             while not self.result_queue.empty():
-                result_type, data = self.result_queue.get_nowait()
-                loop = self.master.master.loop
-
-                if result_type == "bars_received":
-                    asyncio.run_coroutine_threadsafe(self._on_bars_received_gui(*data), loop)
-                elif result_type == "positions_received":
-                    self._on_positions_received_gui(*data)
-                elif result_type == "bars_error":
-                    self._on_bars_error_gui(*data)
-                elif result_type == "positions_error":
-                    self._on_positions_error_gui(*data)
-                elif result_type == "log":
-                    self.add_to_log(*data)
-                # ... handle other result types if any
+                result_type, (strategy, payload) = self.result_queue.get_nowait()
+                if strategy.name != STRATEGY_NAME:
+                    continue
+
+                if result_type == "trade":
+                    self.add_to_log(*trade_row(payload))
+                elif strategy is not self.strategy:
+                    continue  # A strategy this tab already replaced; its late fills are still logged
+                elif result_type == "settings":
+                    self._show_settings(payload)
+                elif result_type == "stopped":
+                    self._on_strategy_stopped()
+
+            self.update_loop_status()
 
         except queue.Empty:
             pass  # No more items in the queue
@@ -332,127 +350,50 @@ class TradingTab(ttk.Frame):
                 # Market clock is disabled, so we just enable the button
                 self.start_button.config(state=tk.NORMAL)
     
-    async def execute_live_trade(self):
-        """Initiates the process of fetching bars and executing a trade."""
-        try:
-            symbol = self.symbol_var.get()
-            if not symbol:
-                return
-                
-            is_crypto = 'BTC' in symbol or 'ETH' in symbol
-            print(f"Attempting to trade {symbol}, is_crypto: {is_crypto}")
-            
-            bars_response = await self.ctrader_client.get_bars(symbol, is_crypto)
-            self._on_bars_received(bars_response, symbol, is_crypto)
-
-        except Exception as e:
-            print(f"Error initiating live trade execution: {e}")
-            traceback.print_exc()
-
-    def _on_bars_received(self, bars_response, symbol, is_crypto):
-        """Callback executed when historical bar data is successfully received."""
-        self.result_queue.put(("bars_received", (bars_response, symbol, is_crypto)))
-
-    async def _on_bars_received_gui(self, bars_response, symbol, is_crypto):
-        """GUI update part of _on_bars_received."""
-        try:
-            bars = bars_response.trendbar
-            if not bars:
-                print(f"No price data available for {symbol}")
-                return
-
-            symbol_id = self.ctrader_client.symbols_map.get(symbol)
-            if not symbol_id:
-                print(f"Symbol ID not found for {symbol}")
-                return
-            symbol_details = self.ctrader_client.symbol_details_map.get(symbol_id)
-            if not symbol_details:
-                print(f"Could not get symbol details for {symbol} to scale price.")
-                return
-
-            price_scale = 10**symbol_details.digits
-            last_bar = bars[-1]
-            current_price = (last_bar.low + last_bar.deltaClose) / price_scale
-
-            print(f"Current price for {symbol}: {current_price}")
-
-            positions_response = await self.ctrader_client.get_positions()
-            self._on_positions_received(positions_response, symbol, current_price, bars)
-
-        except Exception as e:
-            print(f"Error processing bars: {e}")
-            traceback.print_exc()
-
-
-    def _on_positions_received(self, positions_response, symbol, current_price, bars):
-        """Callback executed when the list of positions is received."""
-        self.result_queue.put(("positions_received", (positions_response, symbol, current_price, bars)))
-
-    def _on_positions_received_gui(self, positions_response, symbol, current_price, bars):
-        """GUI update part of _on_positions_received."""
-        try:
-            position = None
-            for p in positions_response.position:
-                symbol_id = self.ctrader_client.symbols_map.get(symbol)
-                if p.tradeData.symbolId == symbol_id:
-                    position = p
-                    break
-
-            if position is None:
-                if self.check_entry_conditions(symbol, current_price, bars):
-                    self.enter_live_trade(symbol, current_price)
-            else:
-                self.check_live_exit(symbol, position, current_price)
-
-        except Exception as e:
-            print(f"Error processing positions: {e}")
-            traceback.print_exc()
+    def update_loop_status(self):
+        """Show simulated time, or live evaluation queue depth, next to the market status"""
+        text = self.strategy.status() if self.strategy is not None else ""
+        if self.evaluation_label.cget("text") != text:
+            self.evaluation_label.config(text=text)
+
+    def settings_from_fields(self):
+        """StrategySettings for the symbol and fields on screen"""
+        return StrategySettings(
+            symbol=self.symbol_var.get(),
+            name=STRATEGY_NAME,
+            position_size=self.position_size.get(),
+            stop_loss=self.stop_loss.get(),
+            take_profit=self.take_profit.get(),
+            trailing_stop=self.trailing_stop.get(),
+            max_hold_days=self.max_hold_time.get(),
+            partial_exit=self.partial_exit.get(),
+            simulation=self.simulation_mode,
+            sim_speed=self.sim_speed_var.get()
+        )
 
+    def _show_settings(self, settings):
+        """Put the size, stop and target the AI signals chose into the fields"""
+        for entry, value in ((self.position_size, settings.position_size),
+                             (self.stop_loss, settings.stop_loss),
+                             (self.take_profit, settings.take_profit)):
+            entry.delete(0, tk.END)
+            entry.insert(0, f"{value:g}")
 
     def start_trading(self):
-        """Start trading with improved stock handling"""
+        """Start a strategy on the engine for the selected symbol"""
         try:
             if not self.validate_inputs():
                 return
-                
-            # Initialize clients if not already done
-            if self.ctrader_client is None:
-                print("\nInitializing new cTrader client...")
-                if not self.initialize_clients():
-                    raise Exception("Failed to initialize trading clients")
-            
-            # Get symbol and check if it's crypto
-            symbol = self.symbol_var.get()
-            if not symbol:
-                raise ValueError("No symbol selected")
-                
-            is_crypto = 'BTC' in symbol or 'ETH' in symbol
-            print(f"\nStarting trade for {symbol} (is_crypto: {is_crypto})")
-            
+            settings = self.settings_from_fields()
+            log.info("Starting trade for %s (is_crypto: %s)", settings.symbol, settings.is_crypto)
+
             # cTrader is 24/5 for forex and 24/7 for crypto, so no need for market open checks
-                    
-            # Proceed with trading
+            self.strategy = self.engine.start_strategy(settings)
+
             self.is_trading = True
             self.start_button.config(state=tk.DISABLED)
             self.stop_button.config(state=tk.NORMAL)
-            
-            # Start trading thread
-            trading_thread = threading.Thread(target=self.trading_loop)
-            trading_thread.daemon = True
-            trading_thread.start()
-            
-            # Log trading start
-            self.add_to_log(
-                datetime.now(pytz.UTC).strftime('%Y-%m-%d %H:%M:%S'),
-                symbol,
-                "START",
-                "-",
-                self.position_size.get(),
-                "-",
-                "Trading Started",
-                "-"
-            )
-            
+
         except Exception as e:
             print(f"Error starting trade: {str(e)}")
             traceback.print_exc()
@@ -460,430 +401,49 @@ class TradingTab(ttk.Frame):
                 "Error",
                 f"Unable to start trading: {str(e)}\nPlease check connection and settings."
             )
-            self.stop_trading()
+            self.stop_trading(confirm=False)
 
-    def stop_trading(self):
+    def stop_trading(self, confirm=True):
         """Stop all trading operations"""
         try:
             self.is_trading = False
+            if self.strategy is not None:
+                self.strategy.stop()
             self.start_button.config(state=tk.NORMAL)
             self.stop_button.config(state=tk.DISABLED)
-            
-            # Get current symbol
-            symbol = self.symbol_var.get()
-            
-            # Log the stop event
-            self.add_to_log(
-                datetime.now(pytz.UTC).strftime('%Y-%m-%d %H:%M:%S'),
-                symbol,
-                "STOP",
-                "-",
-                "-",
-                "-",
-                "Trading Stopped",
-                "-"
-            )
-            
-            # Clean up any tracking variables
-            if symbol in self.highest_prices:
-                del self.highest_prices[symbol]
-            if symbol in self.partial_exits:
-                self.partial_exits.remove(symbol)
-                
+
             # Show confirmation
-            messagebox.showinfo("Trading Stopped", "Trading operations have been stopped.")
-            
+            if confirm:
+                messagebox.showinfo("Trading Stopped", "Trading operations have been stopped.")
+
         except Exception as e:
             print(f"Error stopping trading: {e}")
             traceback.print_exc()
             messagebox.showerror("Error", f"Error stopping trading: {str(e)}")
 
-    def trading_loop(self):
-        """Main trading loop with proper clock access"""
-        while self.is_trading:
-            try:
-                symbol = self.symbol_var.get()
-                is_crypto = 'BTC' in symbol or 'ETH' in symbol
-                
-                if self.simulation_mode:
-                    self.execute_simulation_trade()
-                else:
-                    loop = self.master.master.loop
-                    asyncio.run_coroutine_threadsafe(self.execute_live_trade(), loop)
-                            
-                time.sleep(1)  # Check every second
-                    
-            except Exception as e:
-                print(f"Error in trading loop: {e}")
-                traceback.print_exc()
-                time.sleep(5)  # Wait longer on error
-
-            # Add periodic connection check
-            if not self.simulation_mode:
-                try:
-                    if not self.verify_connection():
-                        print("Lost connection to cTrader, attempting to reconnect...")
-                        if not self.initialize_clients():
-                            print("Failed to reconnect, stopping trading")
-                            self.stop_trading()
-                            break
-                except Exception as e:
-                    print(f"Error in connection check: {e}")
-
-    def verify_connection(self):
-        """Verify connection to cTrader is still active"""
-        try:
-            if self.ctrader_client and self.ctrader_client.client:
-                # This will be implemented later
-                return True
-            return False
-        except Exception as e:
-            print(f"Connection verification failed: {e}")
-            return False
-            
-    def monitor_trade_execution(self):
-        """Monitor pending trades and update status"""
-        try:
-            if not self.ctrader_client:
-                return
-                
-            # This will be implemented later
-                    
-        except Exception as e:
-            print(f"Error monitoring trades: {e}")
-            traceback.print_exc()
+    def _on_strategy_stopped(self):
+        self.is_trading = False
+        self.start_button.config(state=tk.NORMAL)
+        self.stop_button.config(state=tk.DISABLED)
 
-    def execute_simulation_trade(self):
-        """Execute a simulated trade"""
-        try:
-            if self.check_ai_signals():
-                symbol = self.symbol_var.get()
-                
-                # Get latest simulated price
-                if not hasattr(self, 'price_simulator'):
-                    self.price_simulator = PriceSimulator()
-                    
-                current_price = self.price_simulator.get_next_price()
-                
-                if self.current_position is None:
-                    # Check if we should enter a trade
-                    if self.should_enter_trade(current_price):
-                        self.enter_simulation_trade(current_price)
-                else:
-                    # Check if we should exit existing trade
-                    self.check_simulation_exit(current_price)
-                    
-        except Exception as e:
-            print(f"Error in simulation trade: {e}")
-            traceback.print_exc()
-    
-    def enter_live_trade(self, symbol, price):
+    def refresh_exit_rules(self, event=None):
+        """Pass edited risk fields to the running strategy; invalid input keeps the previous rules"""
+        if self.strategy is None or not self.strategy.running:
+            return
         try:
-            position_size = float(self.position_size.get())
-            
-            order_data = {
-                "symbol": symbol,
-                "qty": position_size,
-                "side": "BUY",
-            }
-            
-            order = self.ctrader_client.submit_order(order_data)
-            
-            if order:
-                self.add_to_log(
-                    datetime.now(pytz.UTC).strftime('%Y-%m-%d %H:%M:%S'),
-                    symbol,
-                    "BUY",
-                    f"£{price:.2f}",
-                    position_size,
-                    "-"
-                )
-            
-            return order
-            
-        except Exception as e:
-            print(f"Error entering live trade: {e}")
-            traceback.print_exc()
-            return None
-    
-    def enter_live_crypto_trade(self, symbol, price):
-        """Enhanced crypto trade entry with proper time-in-force setting"""
-        try:
-            position_size = float(self.position_size.get())
-            
-            order_data = {
-                "symbol": symbol,
-                "qty": position_size,
-                "side": "BUY",
-            }
-            
-            order = self.ctrader_client.submit_order(order_data)
-            
-            if order:
-                print("Order submitted successfully!")
-                self.add_to_log(
-                    datetime.now(pytz.UTC).strftime('%Y-%m-%d %H:%M:%S'),
-                    symbol,
-                    "BUY CRYPTO",
-                    f"£{price:.2f}",
-                    position_size,
-                    "-",
-                    "Entry",
-                    "High Confidence"
-                )
-                return True
-            else:
-                print("Order submission failed!")
-                return False
-                
-        except Exception as e:
-            print(f"Error entering crypto trade: {e}")
-            traceback.print_exc()
-            return False
-    
-    def enter_simulation_trade(self, price):
-        """Enter a simulated trade"""
-        try:
-            position_size = float(self.position_size.get())
-            self.current_position = {
-                'symbol': self.symbol_var.get(),
-                'size': position_size,
-                'entry_price': price,
-                'stop_loss': price * (1 - float(self.stop_loss.get()) / 100),
-                'take_profit': price * (1 + float(self.take_profit.get()) / 100),
-                'entry_time': datetime.now(pytz.UTC)
-            }
-            
-            self.add_to_log(
-                datetime.now(pytz.UTC).strftime('%Y-%m-%d %H:%M:%S'),
-                self.symbol_var.get(),
-                "BUY (SIM)",
-                f"£{price:.2f}",
-                position_size,
-                "-"
+            settings = self.strategy.settings.replace(
+                position_size=self.position_size.get(),
+                stop_loss=self.stop_loss.get(),
+                take_profit=self.take_profit.get(),
+                trailing_stop=self.trailing_stop.get(),
+                max_hold_days=self.max_hold_time.get(),
+                partial_exit=self.partial_exit.get()
             )
-            
-            print(f"Entered simulation trade:")
-            print(f"Symbol: {self.current_position['symbol']}")
-            print(f"Entry Price: ${self.current_position['entry_price']:.2f}")
-            print(f"Stop Loss: ${self.current_position['stop_loss']:.2f}")
-            print(f"Take Profit: ${self.current_position['take_profit']:.2f}")
-            
-        except Exception as e:
-            print(f"Error entering simulation trade: {e}")
-            traceback.print_exc()
-            
-    def check_entry_conditions(self, symbol, current_price, bars):
-        """Enhanced entry condition checking with debug logging"""
-        try:
-            # Create DataFrame for technical analysis
-            df = pd.DataFrame([{
-                'close': bar.close,
-                'high': bar.high,
-                'low': bar.low,
-                'volume': bar.volume,
-                'timestamp': bar.timestamp
-            } for bar in bars])
-            
-            if len(df) < 20:
-                print(f"Insufficient data points: {len(df)}")
-                return False
-            
-            # Calculate technical indicators
-            df['sma_20'] = df['close'].rolling(window=20).mean()
-            df['sma_50'] = df['close'].rolling(window=50).mean()
-            df['rsi'] = self.calculate_rsi(df['close'])
-            df['volume_ma'] = df['volume'].rolling(window=20).mean()
-            
-            # Get latest values
-            latest = df.iloc[-1]
-            
-            # Check conditions with detailed logging
-            price_above_sma = current_price > latest['sma_20']
-            volume_increase = latest['volume'] > latest['volume_ma'] * 1.2
-            rsi_favorable = 30 < latest['rsi'] < 70
-            uptrend = latest['sma_20'] > latest['sma_50'] if len(df) >= 50 else True
-
-            print("\nEntry Conditions Check:")
-            print(f"Price (£{current_price:.2f}) above SMA20 (£{latest['sma_20']:.2f}): {price_above_sma}")
-            print(f"Volume ({latest['volume']:.0f}) above MA ({latest['volume_ma']:.0f}): {volume_increase}")
-            print(f"RSI ({latest['rsi']:.2f}) between 30-70: {rsi_favorable}")
-            print(f"Uptrend (SMA20 > SMA50): {uptrend}")
-            
-            # More lenient conditions for crypto
-            is_crypto = 'BTC' in symbol or 'ETH' in symbol
-            
-            if is_crypto:
-                # For crypto, require only 2 out of 4 conditions
-                conditions_met = sum([price_above_sma, volume_increase, rsi_favorable, uptrend])
-                should_enter = conditions_met >= 2
-                print(f"Crypto conditions met: {conditions_met}/4")
-            else:
-                # For stocks, use more conservative approach
-                should_enter = price_above_sma and (volume_increase or rsi_favorable) and uptrend
-                print(f"Stock conditions all met: {should_enter}")
-
-            return should_enter
-
-        except Exception as e:
-            print(f"Error checking entry conditions: {e}")
-            traceback.print_exc()
-            return False
+        except ValueError:
+            log.warning("Invalid exit settings; keeping previous rules")
+            return
+        self.strategy.update(settings)
 
-    def check_ai_signals(self):
-        try:
-            notebook = self.master
-            while not isinstance(notebook, ttk.Notebook):
-                notebook = notebook.master
-                if notebook is None:
-                    print("Could not find notebook")
-                    return False
-
-            sachiel_tab = None
-            for child in notebook.winfo_children():
-                if child.winfo_name() == '!sachielaitab':
-                    sachiel_tab = child
-                    break
-
-            if sachiel_tab is None:
-                print("AI tab not found - widget names:", [child.winfo_name() for child in notebook.winfo_children()])
-                return False
-
-            symbol = self.symbol_var.get()
-            signals = sachiel_tab.get_ai_signals(symbol)
-            
-            if not signals:
-                print("No signals available")
-                return False
-                
-            if signals['signals']['should_trade']:
-                def update_gui():
-                    try:
-                        if not self.winfo_exists():
-                            return
-                            
-                        self.position_size.delete(0, tk.END)
-                        self.position_size.insert(0, str(signals['signals']['position_size']))
-                        
-                        self.stop_loss.delete(0, tk.END)
-                        self.stop_loss.insert(0, str(signals['signals']['stop_loss'] * 100))
-                        
-                        self.take_profit.delete(0, tk.END)
-                        self.take_profit.insert(0, str(signals['signals']['take_profit'] * 100))
-                    except Exception as e:
-                        print(f"Error updating GUI: {e}")
-
-                if self.winfo_exists():
-                    self.after(0, update_gui)
-                
-                return True
-                
-            return False
-            
-        except Exception as e:
-            print(f"Error checking AI signals: {str(e)}")
-            traceback.print_exc()
-            return False
-            
-    def calculate_rsi(self, prices, period=14):
-        """Calculate RSI indicator"""
-        deltas = np.diff(prices)
-        seed = deltas[:period+1]
-        up = seed[seed >= 0].sum()/period
-        down = -seed[seed < 0].sum()/period
-        rs = up/down
-        rsi = np.zeros_like(prices)
-        rsi[:period] = 100. - 100./(1. + rs)
-        
-        for i in range(period, len(prices)):
-            delta = deltas[i - 1]
-            if delta > 0:
-                upval = delta
-                downval = 0.
-            else:
-                upval = 0.
-                downval = -delta
-                
-            up = (up * (period - 1) + upval) / period
-            down = (down * (period - 1) + downval) / period
-            rs = up/down
-            rsi[i] = 100. - 100./(1. + rs)
-            
-        return rsi
-    
-    def check_live_exit(self, symbol, position, current_price):
-        """Check and execute exit conditions for live trades"""
-        try:
-            # This will be implemented later
-            pass
-            
-        except Exception as e:
-            print(f"Error in exit check: {e}")
-            traceback.print_exc()
-            return False
-    
-    def check_simulation_exit(self, current_price):
-        """Check if we should exit the simulated trade"""
-        try:
-            if self.current_position is None:
-                return
-                
-            # Calculate P&L
-            entry_price = self.current_position['entry_price']
-            position_size = self.current_position['size']
-            pl_amount = (current_price - entry_price) * position_size
-            pl_percentage = ((current_price / entry_price) - 1) * 100
-            
-            # Check stop loss and take profit
-            stop_hit = current_price <= self.current_position['stop_loss']
-            profit_hit = current_price >= self.current_position['take_profit']
-            
-            if stop_hit or profit_hit:
-                exit_type = "STOP (SIM)" if stop_hit else "PROFIT (SIM)"
-                
-                self.add_to_log(
-                    datetime.now(pytz.UTC).strftime('%Y-%m-%d %H:%M:%S'),
-                    self.current_position['symbol'],
-                    exit_type,
-                    f"£{current_price:.2f}",
-                    position_size,
-                    f"£{pl_amount:.2f} ({pl_percentage:.2f}%)"
-                )
-                
-                print(f"Exited simulation trade:")
-                print(f"Exit Type: {exit_type}")
-                print(f"Exit Price: £{current_price:.2f}")
-                print(f"P/L: £{pl_amount:.2f} ({pl_percentage:.2f}%)")
-                
-                self.current_position = None
-                
-        except Exception as e:
-            print(f"Error checking simulation exit: {e}")
-            traceback.print_exc()
-            
-    def should_enter_trade(self, current_price):
-        """Determine if we should enter a trade based on price history"""
-        try:
-            # Initialize price history if needed
-            if not hasattr(self, 'price_history'):
-                self.price_history = []
-                
-            self.price_history.append(current_price)
-            self.price_history = self.price_history[-10:]  # Keep last 10 prices
-            
-            if len(self.price_history) < 4:
-                return False
-                
-            # Simple trend following strategy
-            return (self.price_history[-1] > self.price_history[-2] and
-                    self.price_history[-2] > self.price_history[-3] and
-                    self.price_history[-3] > self.price_history[-4])
-                    
-        except Exception as e:
-            print(f"Error in trade decision: {e}")
-            traceback.print_exc()
-            return False
-        
     def validate_inputs(self):
         if not self.symbol_var.get():
             messagebox.showerror("Error", "Please select a symbol")
@@ -931,7 +491,7 @@ class TradingTab(ttk.Frame):
     def add_to_log(self, time_str, symbol, type_, price, size, pl, exit_reason="", confidence=""):
         """Add entry to trade log with all parameters"""
         try:
-            self.trade_log.insert('', 0, values=(
+            values = (
                 time_str,
                 symbol,
                 type_,
@@ -940,7 +500,10 @@ class TradingTab(ttk.Frame):
                 pl,
                 exit_reason,
                 confidence
-            ))
+            )
+            self.trade_log.insert('', 0, values=values)
+            for listener in self.trade_listeners:
+                listener(values)
             
             # Scroll to top to show latest entry
             self.trade_log.yview_moveto(0)
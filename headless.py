@@ -0,0 +1,102 @@
+# headless.py
+"""
+Sachiel Trading Bot - headless engine
+
+Runs the trading engine (trading/engine.py) without Tk: strategies, the
+cTrader client, risk checks and the trade ledger, configured from a JSON
+file instead of the GUI's fields. One process can run many strategies, and a
+server without a display can run it. Stop it with Ctrl+C or SIGTERM.
+
+    python headless.py --config ~/.sachiel_trading/engine.json
+
+Live trading needs saved OAuth tokens (tokens.json from a GUI login), since
+there is no browser to complete the OAuth flow in. Trades are appended to
+LEDGER_FILE.
+"""
+
+# --- Absolutely first: set up asyncio + Twisted reactor, as in main.py --------------------------
+import sys
+import os
+import asyncio
+
+LOOP = asyncio.new_event_loop()
+asyncio.set_event_loop(LOOP)
+
+from twisted.internet import asyncioreactor
+
+if "twisted.internet.reactor" not in sys.modules:
+    asyncioreactor.install(eventloop=LOOP)
+
+# --- Standard library & project imports ---------------------------------------------------------
+import argparse
+import signal
+import threading
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from config.settings import Config
+from trading.engine import TradingEngine, load_engine_config
+from utils.tracing import tracer
+from utils.logger import configure_logging, shutdown_logging, get_logger
+
+log = get_logger("headless")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the trading engine without the GUI")
+    parser.add_argument("--config", default=Config.ENGINE_CONFIG_FILE,
+                        help=f"engine config file (default {Config.ENGINE_CONFIG_FILE})")
+    args = parser.parse_args(argv)
+
+    try:
+        # Applies the file's Config overrides, so it runs before anything reads Config
+        name, strategies = load_engine_config(args.config)
+    except (OSError, ValueError) as e:
+        print(f"Invalid engine config {args.config}: {e}")
+        return 2
+
+    configure_logging()
+    engine = TradingEngine(loop=LOOP, name=name)
+    if any(not settings.simulation for settings in strategies):
+        from trading.ctrader_client import CTraderClient
+        engine.client = CTraderClient(on_account_update=engine.on_account_update)
+
+    for settings in strategies:
+        engine.add_strategy(settings)
+
+    def request_stop(signum, frame):
+        log.info("Received signal %s, shutting down", signum)
+        LOOP.call_soon_threadsafe(LOOP.stop)
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    if Config.METRICS_HTTP_PORT:
+        tracer.start_http_server(Config.METRICS_HTTP_PORT)
+
+    if engine.client is not None:
+        # connect() blocks on token refreshes; live strategies wait until it is done
+        def connect():
+            if not engine.connect():
+                LOOP.call_soon_threadsafe(LOOP.stop)
+
+        threading.Thread(target=connect, name="ctrader-connect", daemon=True).start()
+
+    log.info("Engine %s running %d strategies", name, len(strategies))
+    try:
+        engine.start()
+        LOOP.run_forever()
+    finally:
+        engine.close()
+        if engine.client is not None:
+            engine.client.close()
+        tracer.export_json(os.path.expanduser(Config.METRICS_FILE))
+        tracer.stop_http_server()
+        shutdown_logging()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -49,7 +49,12 @@ from gui.settings import SettingsTab
 from gui.sachiel_ai import SachielAITab
 from gui.performance import PerformanceTab
 from gui.chart_tab import ChartTab
+from gui.latency import LatencyTab
 from trading.ctrader_client import CTraderClient
+from trading.engine import TradingEngine
+from config.settings import Config
+from utils.tracing import tracer
+from utils.logger import configure_logging, shutdown_logging
 
 
 class MainApp(tk.Tk):
@@ -77,28 +82,33 @@ class MainApp(tk.Tk):
         self.notebook = ttk.Notebook(self)
         self.notebook.pack(expand=True, fill="both", padx=5, pady=5)
 
-        # Create tabs
-        self.trading_tab = TradingTab(self.notebook)
-        # If TradingTab expects a client, attach it
-        if hasattr(self.trading_tab, "ctrader_client"):
-            self.trading_tab.ctrader_client = self.ctrader_client
+        # --- Trading engine; the tabs are its clients (headless.py runs it without them) ---
+        self.engine = TradingEngine(self.ctrader_client, self.loop, name="gui")
 
+        # Create tabs
+        self.trading_tab = TradingTab(self.notebook, self.engine)
         self.settings_tab = SettingsTab(self.notebook, self.ctrader_client)
         self.ai_tab = SachielAITab(self.notebook)
-        self.performance_tab = PerformanceTab(self.notebook)
+        self.performance_tab = PerformanceTab(self.notebook, self.engine.ledger)
         self.chart_tab = ChartTab(self.notebook)
+        self.latency_tab = LatencyTab(self.notebook)
 
         # Add tabs to the notebook
         self.notebook.add(self.trading_tab, text="Trading")
         self.notebook.add(self.performance_tab, text="Performance")
         self.notebook.add(self.chart_tab, text="Chart")
         self.notebook.add(self.ai_tab, text="Sachiel AI")
+        self.notebook.add(self.latency_tab, text="Latency")
         self.notebook.add(self.settings_tab, text="Settings")
 
         # Styling
         self.style = ttk.Style()
         self.style.configure("TNotebook.Tab", padding=[12, 4])
 
+        # Optional Prometheus-format metrics endpoint
+        if Config.METRICS_HTTP_PORT:
+            tracer.start_http_server(Config.METRICS_HTTP_PORT)
+
         # Window close handler
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
@@ -113,6 +123,13 @@ class MainApp(tk.Tk):
                     self.settings_tab.account_balance.config(text=f"Balance: £{balance:,.2f}")
                 else:
                     self.settings_tab.account_frame.pack_forget()
+            if hasattr(self, "performance_tab"):
+                # ProtoOATrader carries no equity, so the balance marks the curve until it does
+                equity = summary.get("equity")
+                if equity is None:
+                    equity = summary.get("balance")
+                if equity is not None:
+                    self.performance_tab.record_equity(equity)
 
         self.after(0, do_update)
 
@@ -156,6 +173,20 @@ class MainApp(tk.Tk):
             except Exception as e:
                 print(f"Error closing cTrader client: {e}")
 
+            # Stop strategies, the order manager and the inference workers
+            try:
+                if getattr(self, "engine", None):
+                    self.engine.close()
+            except Exception as e:
+                print(f"Error stopping trading engine: {e}")
+
+            # Persist the latency histograms for offline comparison
+            tracer.export_json(os.path.expanduser(Config.METRICS_FILE))
+            tracer.stop_http_server()
+
+            # Flush anything still queued for the log writer thread
+            shutdown_logging()
+
             # Stop the asyncio loop
             if hasattr(self, "loop") and self.loop.is_running():
                 self.loop.call_soon_threadsafe(self.loop.stop)
@@ -191,6 +222,7 @@ class MainApp(tk.Tk):
 # --- Entrypoint ---------------------------------------------------------------------------------
 def main():
     try:
+        configure_logging()
         app = MainApp()
         app.run()
     except Exception as e:
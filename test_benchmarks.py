@@ -0,0 +1,22 @@
+import unittest
+from benchmarks.harness import Benchmark, compare
+
+def report(**medians):
+    return {'results': {name: {'median_ms': ms} for name, ms in medians.items()}}
+
+class TestBenchmarkHarness(unittest.TestCase):
+    def test_prepare_runs_outside_timing(self):
+        calls = []
+        bench = Benchmark("noop", lambda x: calls.append(x), prepare=lambda: (1,), repeat=5, warmup=2, items=10)
+        result = bench.run()
+        self.assertEqual(len(calls), 7)
+        self.assertEqual(result['repeat'], 5)
+        self.assertGreater(result['items_per_sec'], 0)
+
+    def test_compare_flags_regressions(self):
+        rows = compare(report(a=12.0, b=5.0, c=1.0, new=1.0), report(a=10.0, b=10.0, c=1.0, gone=1.0), threshold=0.15)
+        status = {name: s for name, *_, s in rows}
+        self.assertEqual(status, {'a': 'REGRESSION', 'b': 'faster', 'c': 'ok', 'new': 'new', 'gone': 'missing'})
+
+if __name__ == '__main__':
+    unittest.main()
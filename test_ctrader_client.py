@@ -1,54 +1,132 @@
 import unittest
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import (
+    ProtoOASpotEvent, ProtoOAExecutionEvent, ProtoOATraderRes, ProtoOAGetTrendbarsRes
+)
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOATrendbar
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOASymbol
 from trading.ctrader_client import CTraderClient
+from trading.message_dispatch import decode_spot_event, decode_trendbars
+from trading.bars import BarArray
 from config.settings import Config
-from twisted.internet import reactor
 
 class TestCTraderClient(unittest.TestCase):
+    """Message handling that needs no broker connection"""
+
     def setUp(self):
         # Set up dummy credentials
         Config.CTRADING_CLIENT_ID = "test_client_id"
         Config.CTRADING_CLIENT_SECRET = "test_client_secret"
-        Config.CTRADING_ACCOUNT_ID = "12345"
         self.client = CTraderClient()
+        self.client.symbols_map["EURUSD"] = 1
+        self.client.symbol_details_map[1] = ProtoOASymbol(symbolId=1, digits=5, pipPosition=4, lotSize=10000000)
 
-    def test_connect(self):
-        # This test requires a running reactor, so we will skip it for now
-        pass
+    def test_spot_event_scales_bid(self):
+        self.client._handle_spot_event(ProtoOASpotEvent(ctidTraderAccountId=1, symbolId=1, bid=108525))
+        self.assertEqual(self.client.price_history["EURUSD"], [1.08525])
 
-    def test_get_account(self):
-        self.client.connect()
-        # This will be implemented later
-        pass
+    def test_quotes_keep_both_sides_in_wire_units(self):
+        # A 3-digit JPY pair is still quoted in 1/100000 units on the wire
+        self.client.symbols_map["USDJPY"] = 4
+        self.client.symbol_details_map[4] = ProtoOASymbol(symbolId=4, digits=3, pipPosition=2, lotSize=10000000)
+        self.client.history_size = 3
+        prices = []
+        self.client.add_spot_listener(lambda symbol, bid, ts: prices.append(bid))
+        for ts, bid, ask in ((1000, 15012300, 15013100), (2000, 0, 15013500), (3000, 15012400, 0),
+                             (4000, 15012500, 15013000)):
+            self.client._handle_spot_event(ProtoOASpotEvent(ctidTraderAccountId=1, symbolId=4, bid=bid, ask=ask,
+                                                            timestamp=ts))
+        # Spot events leave out an unchanged side: it is carried forward, and listeners only hear new bids
+        self.assertEqual(prices, [150.123, 150.124, 150.125])
+        history = self.client.quotes["USDJPY"]
+        self.assertEqual(history.scale.pip, 1000)
+        ts, bids, asks = history.window()
+        self.assertEqual(ts.tolist(), [2000, 3000, 4000])
+        self.assertEqual(bids.tolist(), [150.123, 150.124, 150.125])
+        self.assertEqual(asks.tolist(), [150.135, 150.135, 150.13])
+        self.assertEqual(history.records(1)["ask"].tolist(), [15013000])
+        self.assertEqual(self.client.price_history["USDJPY"], [150.123, 150.124, 150.125])
 
-    def test_get_positions(self):
-        self.client.connect()
-        # This will be implemented later
-        pass
+    def test_spot_messages_dispatch_by_payload_type(self):
+        event = ProtoOASpotEvent(ctidTraderAccountId=1, symbolId=1, bid=108525, ask=108530, timestamp=1760832000123)
+        self.client._on_message_received(None, ProtoMessage(payloadType=event.payloadType, payload=event.SerializeToString()))
+        self.assertEqual(self.client.price_history["EURUSD"], [1.08525])
 
-    def test_submit_order(self):
-        self.client.connect()
-        # This will be implemented later
-        pass
+        quote = decode_spot_event(event.SerializeToString())
+        for field in ('ctidTraderAccountId', 'symbolId', 'bid', 'ask', 'timestamp'):
+            self.assertEqual(getattr(quote, field), getattr(event, field))
+        self.assertTrue(quote.HasField('timestamp'))
+        self.assertFalse(quote.HasField('sessionClose'))
+        # Live trendbars do not fit a SpotQuote, so those events are parsed in full
+        event.trendbar.append(ProtoOATrendbar(volume=10, period=1, low=108500))
+        self.assertEqual(decode_spot_event(event.SerializeToString()), event)
 
-    def test_get_bars(self):
-        self.client.connect()
-        # This will be implemented later
-        pass
+    def test_trendbars_decode_to_bar_arrays(self):
+        response = ProtoOAGetTrendbarsRes(ctidTraderAccountId=1, period=1, timestamp=1760832000000, symbolId=4)
+        # USDJPY around 150.1: low and deltas are 1/100000 units whatever the symbol's digits
+        for minute, low, d_open, d_high, d_close, volume in ((29347200, 15010000, 300, 900, 500, 12),
+                                                             (29347201, 15009000, 1400, 2000, 0, 7)):
+            response.trendbar.add(volume=volume, period=1, low=low, deltaOpen=d_open, deltaHigh=d_high,
+                                  deltaClose=d_close, utcTimestampInMinutes=minute)
+        bars = decode_trendbars(response.SerializeToString())
+        self.assertEqual(bars.ts.tolist(), [1760832000000, 1760832060000])
+        self.assertEqual(bars.open.tolist(), [150.103, 150.104])
+        self.assertEqual(bars.high.tolist(), [150.109, 150.11])
+        self.assertEqual(bars.low.tolist(), [150.1, 150.09])
+        self.assertEqual(bars.close.tolist(), [150.105, 150.09])
+        self.assertEqual(bars.volume.tolist(), [12, 7])
+        reference = BarArray.from_trendbars(response.trendbar)
+        for column in ('ts', 'open', 'high', 'low', 'close', 'volume'):
+            self.assertEqual(getattr(bars, column).tolist(), getattr(reference, column).tolist())
+        # Wire records round-trip exactly for the journal and the bus
+        records = bars.records()
+        self.assertEqual(records['close'].tolist(), [15010500, 15009000])
+        self.assertEqual(BarArray.from_records(records).close.tolist(), bars.close.tolist())
+        self.assertEqual(list(bars[-1:].frame().columns), ['open', 'high', 'low', 'close', 'volume'])
+        empty = ProtoOAGetTrendbarsRes(ctidTraderAccountId=1, period=1, timestamp=0)
+        self.assertEqual(len(decode_trendbars(empty.SerializeToString())), 0)
 
-    def test_get_tradable_symbols(self):
-        self.client.connect()
-        # This will be implemented later
-        pass
+    def test_dispatcher_routes_registered_types_only(self):
+        seen = []
+        self.client.dispatcher.register(ProtoOAExecutionEvent, seen.append)
+        event = ProtoOAExecutionEvent(ctidTraderAccountId=1, executionType=2)
+        message = ProtoMessage(payloadType=event.payloadType, payload=event.SerializeToString())
+        self.assertTrue(self.client.dispatcher.dispatch(message))
+        self.assertEqual(seen, [event])
+
+        self.client.dispatcher.unregister(ProtoOAExecutionEvent, seen.append)
+        self.client.dispatcher.unregister(ProtoOATraderRes, self.client._handle_trader_response)
+        self.assertTrue(self.client.dispatcher.dispatch(message))
+        self.assertEqual(len(seen), 1)
+        self.assertFalse(self.client.dispatcher.dispatch(ProtoMessage(payloadType=ProtoOATraderRes().payloadType)))
+
+    def test_execution_listeners(self):
+        events = []
+        self.client.add_execution_listener(events.append)
+        event = ProtoOAExecutionEvent(ctidTraderAccountId=1, executionType=2)
+        self.client._handle_execution_event(event)
+        self.client.remove_execution_listener(events.append)
+        self.client._handle_execution_event(event)
+        self.assertEqual(events, [event])
 
-    def test_check_connection(self):
-        self.client.connect()
-        # This will be implemented later
-        pass
+    def test_lot_size(self):
+        self.assertEqual(self.client.lot_size(1), 10000000)
+        self.assertIsNone(self.client.lot_size(2))
+
+    def test_requests_need_connection(self):
+        self.assertFalse(self.client.check_connection())
+        self.assertIsNone(self.client.get_tradable_symbols())
+        self.assertIsNone(self.client.get_bars("EURUSD"))
+        self.assertIsNone(self.client.submit_order({"symbol": "EURUSD", "side": "BUY", "qty": 0.01}))
+
+    def test_get_tradable_symbols(self):
+        self.client.is_connected = True
+        self.assertEqual(self.client.get_tradable_symbols(), ["EURUSD"])
 
     def test_close(self):
-        self.client.connect()
-        # This will be implemented later
-        pass
+        self.client.is_connected = True
+        self.client.close()
+        self.assertFalse(self.client.check_connection())
 
 if __name__ == '__main__':
     unittest.main()
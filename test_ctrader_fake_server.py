@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from twisted.internet import reactor
+from twisted.internet.threads import blockingCallFromThread
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOAExecutionEvent
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOAExecutionType, ProtoOATrendbarPeriod
+from config.settings import Config
+from trading.bars import BarArray
+from trading.ctrader_client import CTraderClient
+from trading.ctrader_fake_server import FakeCTraderServer, DEFAULT_ACCOUNT_ID, PRICE_SCALE
+from trading.order_manager import CTraderOrderAdapter
+
+CONFIG_KEYS = ["CTRADER_HOST_TYPE", "CTRADER_LOCAL_PORT", "CTRADING_CLIENT_ID", "CTRADING_CLIENT_SECRET",
+               "CTRADING_ACCOUNT_ID", "SYMBOL_CACHE_FILE"]
+
+
+def wait_for(condition, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class TestFakeCTraderServer(unittest.TestCase):
+    """CTraderClient against the local fake server, with the reactor on its own thread like the app"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.saved_config = {key: getattr(Config, key) for key in CONFIG_KEYS}
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.server = FakeCTraderServer(spot_rate=200, seed=7)
+        Config.CTRADER_HOST_TYPE = "local"
+        Config.CTRADER_LOCAL_PORT = cls.server.listen(0)
+        Config.CTRADING_CLIENT_ID = "test_client_id"
+        Config.CTRADING_CLIENT_SECRET = "test_client_secret"
+        Config.CTRADING_ACCOUNT_ID = str(DEFAULT_ACCOUNT_ID)
+        Config.SYMBOL_CACHE_FILE = os.path.join(cls.tmpdir, "symbols_{host}_{account}.json")
+
+        cls.reactor_thread = threading.Thread(target=lambda: reactor.run(installSignalHandlers=0), daemon=True)
+        cls.reactor_thread.start()
+        wait_for(lambda: reactor.running)
+
+    @classmethod
+    def tearDownClass(cls):
+        reactor.callFromThread(reactor.stop)
+        cls.reactor_thread.join(timeout=5)
+        for key, value in cls.saved_config.items():
+            setattr(Config, key, value)
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+
+    def test_trendbars_end_at_current_bid(self):
+        symbol = self.server.symbols[1]
+        now = int(time.time() * 1000)
+        bars = self.server.trendbars(symbol, ProtoOATrendbarPeriod.M5, now - 3600 * 1000, now, 5000)
+        self.assertEqual(len(bars), 13)
+        self.assertEqual(bars[-1].low + bars[-1].deltaClose, symbol.bid)
+        for bar in bars:
+            self.assertLessEqual(max(bar.deltaOpen, bar.deltaClose), bar.deltaHigh)
+
+    def test_client_session(self):
+        client = CTraderClient()
+        fills = []
+        client.add_execution_listener(
+            lambda event: fills.append(event) if event.executionType == ProtoOAExecutionType.ORDER_FILLED else None
+        )
+        try:
+            self.assertTrue(client.connect())
+            self.assertTrue(wait_for(lambda: client.is_connected and client.price_history.get("EURUSD")),
+                            client.get_connection_status()[1])
+            self.assertEqual(client.account_id, str(DEFAULT_ACCOUNT_ID))
+            self.assertAlmostEqual(client.price_history["EURUSD"][-1], self.server.symbols[1].bid / PRICE_SCALE,
+                                   delta=0.01)
+
+            accepted = blockingCallFromThread(reactor, client.submit_order,
+                                              {"symbol": "EURUSD", "side": "BUY", "qty": 0.01,
+                                               "client_order_id": "test-1"})
+            self.assertIsInstance(accepted, ProtoOAExecutionEvent)
+            self.assertEqual(accepted.order.clientOrderId, "test-1")
+            self.assertTrue(wait_for(lambda: len(fills) == 1))
+            position_id = fills[0].position.positionId
+            self.assertEqual(fills[0].position.tradeData.volume, 100000)
+            self.assertTrue(client.positions.reconciled)
+            self.assertEqual([p.positionId for p in client.positions.for_symbol(1)], [position_id])
+
+            closed = blockingCallFromThread(reactor, client.close_position, position_id, 0.01, "EURUSD")
+            self.assertTrue(closed.order.closingOrder)
+            self.assertTrue(wait_for(lambda: len(fills) == 2))
+            self.assertNotIn(position_id, self.server.positions)
+            detail = fills[1].deal.closePositionDetail
+            self.assertEqual(detail.closedVolume, 100000)
+            self.assertAlmostEqual(CTraderOrderAdapter._realized_pl(fills[1]), detail.grossProfit / 100)
+            self.assertEqual(client.positions.for_symbol(1), [])
+
+            bars = blockingCallFromThread(reactor, client.get_bars, "EURUSD")
+            self.assertIsInstance(bars, BarArray)
+            self.assertGreaterEqual(len(bars), 100)
+            self.assertEqual(bars.symbol, "EURUSD")
+            self.assertTrue((bars.low <= bars.close).all() and (bars.close <= bars.high).all())
+        finally:
+            reactor.callFromThread(client.client.stopService)
+            client.tokens.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import os
+import random
+import tempfile
+import time
+import unittest
+import numpy as np
+from config.settings import Config
+from trading.engine import TradingEngine, StrategySettings, load_engine_config
+from trading.ledger import TradeLedger, CLOSING_TYPES
+
+
+class TestTradingEngine(unittest.TestCase):
+    def test_simulated_strategy_without_gui(self):
+        random.seed(7)
+        np.random.seed(7)
+        engine = TradingEngine(name="test", ledger=TradeLedger())
+        events = []
+        engine.add_listener(lambda event, strategy, payload: events.append((event, strategy.name, payload)))
+
+        strategy = engine.start_strategy(StrategySettings(symbol="SIM", simulation=True, sim_speed="max"))
+        # Run until the first round trip closes; a few simulated hours at max speed
+        deadline = time.perf_counter() + 60
+        while (not any(trade['type'] in CLOSING_TYPES for trade in engine.ledger.trades())
+               and time.perf_counter() < deadline):
+            time.sleep(0.02)
+        engine.close()
+        self.assertFalse(strategy.running)
+
+        trades = engine.ledger.trades()
+        self.assertEqual(trades[0]['type'], "START")
+        self.assertEqual(trades[-1]['type'], "STOP")
+        # Entries and exits alternate, and every trade reached the listeners
+        body = [trade['type'] for trade in trades[1:-1]]
+        for entry, exit_ in zip(body[::2], body[1::2]):
+            self.assertEqual(entry, "BUY (SIM)")
+            self.assertIn(exit_, CLOSING_TYPES)
+        self.assertEqual([payload for event, _, payload in events if event == "trade"], trades)
+        self.assertEqual(events[-1][:2], ("stopped", "SIM"))
+        closed = sum(1 for trade in trades if trade['type'] in CLOSING_TYPES)
+        self.assertGreaterEqual(closed, 1)
+        self.assertEqual(engine.ledger.stats()['trades'], closed)
+        # AI signals sized the entry
+        self.assertIn("settings", [event for event, _, _ in events])
+
+        with self.assertRaises(ValueError):
+            engine.add_strategy(StrategySettings(symbol="EURUSD"))
+
+    def test_load_engine_config(self):
+        saved = Config.SIM_SPEED
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "engine.json")
+            with open(path, "w") as f:
+                json.dump({"name": "demo", "settings": {"SIM_SPEED": "60x"},
+                           "strategies": [{"symbol": "EURUSD", "simulation": True},
+                                          {"symbol": "EURUSD", "name": "eur-fast", "position_size": 0.5}]}, f)
+            try:
+                name, strategies = load_engine_config(path)
+                self.assertEqual(name, "demo")
+                self.assertEqual([s.name for s in strategies], ["EURUSD", "eur-fast"])
+                self.assertEqual(strategies[0].sim_speed, "60x")
+                self.assertEqual(strategies[1].position_size, 0.5)
+                self.assertEqual(strategies[1].replace(stop_loss=1).take_profit, 4.0)
+
+                for bad in ({"settings": {"NOT_A_SETTING": 1}, "strategies": [{"symbol": "EURUSD"}]},
+                            {"strategies": [{"symbol": "EURUSD"}, {"symbol": "EURUSD"}]},
+                            {"strategies": [{"symbol": "EURUSD", "stop_loss": 5, "take_profit": 4}]},
+                            {"strategies": []}):
+                    with open(path, "w") as f:
+                        json.dump(bad, f)
+                    with self.assertRaises(ValueError):
+                        load_engine_config(path)
+            finally:
+                Config.SIM_SPEED = saved
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import math
+import unittest
+import numpy as np
+from datetime import datetime, timezone
+from trading.equity_curve import EquityCurve
+from trading.ledger import TradeLedger, make_trade
+
+HOUR = 3600
+START = 1760832000  # 2025-10-19 00:00 UTC
+
+
+def brute_force_drawdown(points):
+    peak, worst = -math.inf, 0.0
+    for value in points:
+        peak = max(peak, value)
+        worst = max(worst, 1 - value / peak)
+    return worst
+
+
+class TestEquityCurve(unittest.TestCase):
+    def setUp(self):
+        self.curve = EquityCurve(starting_equity=10000, bucket_seconds=HOUR, periods_per_year=252 * 24)
+
+    def test_range_queries_match_full_scan(self):
+        rng = np.random.default_rng(3)
+        marks = []
+        equity = 10000.0
+        for ts in np.sort(rng.uniform(START, START + 30 * 24 * HOUR, 2000)):
+            # Leave some hours without updates
+            if int(ts // HOUR) % 7 == 3:
+                continue
+            equity *= 1 + rng.normal(0, 0.004)
+            marks.append((float(ts), equity))
+            self.curve.record_equity(ts, equity)
+
+        for first_day, last_day in [(0, 30), (4, 9), (12, 13), (20, 31)]:
+            start, end = START + first_day * 24 * HOUR, START + last_day * 24 * HOUR
+            stats = self.curve.stats(start, end)
+            before = [value for ts, value in marks if ts < start]
+            window = [value for ts, value in marks if start <= ts < end]
+            opening = before[-1] if before else 10000.0
+            self.assertAlmostEqual(stats['max_drawdown_pct'], brute_force_drawdown([opening] + window) * 100)
+            self.assertAlmostEqual(stats['return_pct'], (window[-1] / opening - 1) * 100)
+
+            # Hourly returns with empty hours as zero returns
+            closes = {}
+            for ts, value in marks:
+                if start <= ts < end:
+                    closes[int(ts // HOUR)] = value
+            hours = range(start // HOUR, max(closes) + 1)
+            series, previous = [], opening
+            for hour in hours:
+                series.append(closes.get(hour, previous) / previous - 1)
+                previous = closes.get(hour, previous)
+            returns = np.array(series)
+            expected = returns.mean() / returns.std(ddof=1) * math.sqrt(252 * 24)
+            self.assertEqual(stats['periods'], len(returns), (first_day, last_day))
+            self.assertAlmostEqual(stats['sharpe'], expected, places=6)
+
+    def test_fills_measure_drawdown_on_equity(self):
+        for i, pl in enumerate([100, -50, 30, -200, 400]):
+            self.curve.record_fill(START + i * 600, pl)
+        stats = self.curve.stats()
+        self.assertEqual((stats['trades'], stats['wins'], stats['losses']), (5, 3, 2))
+        self.assertAlmostEqual(stats['pl'], 280)
+        self.assertAlmostEqual(stats['max_drawdown_pct'], (1 - 9880 / 10100) * 100)
+        self.assertAlmostEqual(stats['profit_factor'], 530 / 250)
+        self.assertEqual((stats['largest_win'], stats['largest_loss']), (400, -200))
+        # Drawdown from the 10,100 peak at 00:00 recovered at 00:40
+        self.assertEqual(stats['longest_drawdown'], 2400)
+
+    def test_exposure_is_time_in_market(self):
+        self.curve.record_equity(START, 10000)
+        self.curve.set_exposure(START + 900, 5000)
+        self.curve.set_exposure(START + 2700, 0)
+        stats = self.curve.stats(START, now=START + HOUR)
+        self.assertAlmostEqual(stats['exposure_pct'], 50.0)
+        self.assertAlmostEqual(stats['avg_exposure_pct'], 25.0)
+
+    def test_stats_do_not_change_the_curve(self):
+        self.curve.record_equity(START, 10000)
+        self.curve.set_exposure(START + 900, 5000)
+        # A query for a later time must not swallow the exposure change that follows it
+        self.curve.stats(START, now=START + 3000)
+        self.curve.set_exposure(START + 2700, 0)
+        self.assertAlmostEqual(self.curve.stats(START, now=START + HOUR)['exposure_pct'], 50.0)
+
+    def test_fills_wait_for_the_first_balance(self):
+        curve = EquityCurve(bucket_seconds=HOUR)
+        curve.record_fill(START, -500)
+        stats = curve.stats(now=START)
+        self.assertIsNone(stats['equity'])
+        self.assertEqual((stats['trades'], stats['max_drawdown_pct']), (1, 0.0))
+        curve.record_equity(START + 600, 2000)
+        curve.record_equity(START + 1200, 1500)
+        stats = curve.stats(now=START + 1200)
+        self.assertEqual(stats['equity'], 1500)
+        self.assertAlmostEqual(stats['max_drawdown_pct'], 25.0)
+
+
+class TestTradeLedger(unittest.TestCase):
+    def test_close_without_pl_is_not_a_trade(self):
+        ledger = TradeLedger()
+        time = datetime.fromtimestamp(START, timezone.utc)
+        ledger.record(make_trade(time, "EURUSD", "BUY", price=1.1, size=1000))
+        ledger.record(make_trade(time, "EURUSD", "SELL", price=1.2, size=1000))
+        stats = ledger.equity_curve.stats(now=START)
+        self.assertEqual(stats['trades'], 0)
+        self.assertEqual(ledger.open_notional, {})
+        ledger.record(make_trade(time, "EURUSD", "SELL", price=1.2, size=1000, pl=100.0))
+        self.assertEqual(ledger.equity_curve.stats(now=START)['trades'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
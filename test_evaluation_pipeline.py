@@ -0,0 +1,58 @@
+import unittest
+from trading.evaluation_pipeline import EvaluationPipeline
+
+
+class TestEvaluationPipeline(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.started = []
+        self.pipeline = EvaluationPipeline(lambda symbol, token: self.started.append((symbol, token)),
+                                           timeout=30, clock=lambda: self.now)
+
+    def test_one_in_flight_per_symbol_and_coalescing(self):
+        self.assertTrue(self.pipeline.request("EURUSD"))
+        self.assertTrue(self.pipeline.request("GBPUSD"))
+        # Three ticks while EURUSD is still running collapse into one follow-up
+        for _ in range(3):
+            self.now += 1
+            self.assertFalse(self.pipeline.request("EURUSD"))
+        self.assertEqual(len(self.started), 2)
+        self.assertEqual(self.pipeline.metrics()['pending'], 1)
+
+        self.pipeline.finish("EURUSD", self.started[0][1])
+        self.assertEqual(self.started[-1][0], "EURUSD")
+        self.assertEqual(len(self.started), 3)
+        self.pipeline.finish("EURUSD", self.started[-1][1], ok=False)
+        self.pipeline.finish("GBPUSD", self.started[1][1])
+        self.assertEqual(len(self.started), 3)
+
+        metrics = self.pipeline.metrics()
+        self.assertEqual((metrics['in_flight'], metrics['pending']), (0, 0))
+        self.assertEqual((metrics['requested'], metrics['started'], metrics['coalesced']), (5, 3, 3))
+        self.assertEqual((metrics['completed'], metrics['failed']), (2, 1))
+
+    def test_stalled_evaluation_is_abandoned(self):
+        self.pipeline.request("EURUSD")
+        stalled = self.started[0][1]
+        self.now = 31
+        self.assertTrue(self.pipeline.request("EURUSD"))
+        # The stalled one reporting late must not end its replacement
+        self.pipeline.finish("EURUSD", stalled)
+        self.assertEqual(self.pipeline.metrics()['in_flight'], 1)
+        self.assertFalse(self.pipeline.request("EURUSD"))
+        self.pipeline.cancel_pending()
+        self.pipeline.finish("EURUSD", self.started[1][1])
+        self.assertEqual(len(self.started), 2)
+        self.assertEqual(self.pipeline.metrics()['timed_out'], 1)
+
+    def test_failed_start_frees_the_symbol(self):
+        def broken(symbol, token):
+            raise RuntimeError("event loop closed")
+        pipeline = EvaluationPipeline(broken, timeout=30)
+        pipeline.request("EURUSD")
+        self.assertEqual(pipeline.metrics()['in_flight'], 0)
+        self.assertEqual(pipeline.metrics()['failed'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from trading.exit_engine import ExitEngine, ExitRules, ExitSignal
+
+class TestExitEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = ExitEngine(ExitRules(
+            stop_loss_pct=0.02, take_profit_pct=0.04, trailing_stop_pct=0.03,
+            max_hold_seconds=3600, partial_exit_ratio=0.75
+        ), capacity=2)
+
+    def test_stop_loss_and_take_profit(self):
+        self.engine.set_position("AAA", 100.0, 10)
+        self.engine.set_position("BBB", 50.0, 10)
+        signals = self.engine.evaluate({"AAA": 97.9, "BBB": 52.1})
+        kinds = {s.symbol: s.kind for s in signals}
+        self.assertEqual(kinds, {"AAA": ExitSignal.STOP_LOSS, "BBB": ExitSignal.TAKE_PROFIT})
+
+    def test_trailing_stop_uses_previous_peak(self):
+        self.engine.set_position("AAA", 100.0, 1)
+        self.assertEqual(self.engine.evaluate({"AAA": 103.0}), [])
+        signals = self.engine.evaluate({"AAA": 99.5})
+        self.assertEqual([s.kind for s in signals], [ExitSignal.TRAILING_STOP])
+
+    def test_time_exit_takes_precedence(self):
+        self.engine.set_position("AAA", 100.0, 1, entry_time=0)
+        signals = self.engine.evaluate({"AAA": 90.0}, now=7200)
+        self.assertEqual(signals[0].kind, ExitSignal.TIME_EXIT)
+
+    def test_partial_exit_fires_once(self):
+        self.engine.set_position("AAA", 100.0, 10)
+        signals = self.engine.evaluate({"AAA": 103.1})
+        self.assertEqual([(s.kind, s.qty) for s in signals], [(ExitSignal.PARTIAL_EXIT, 5.0)])
+        self.engine.set_position("AAA", 100.0, 5)
+        self.assertEqual(self.engine.evaluate({"AAA": 103.2}), [])
+
+    def test_only_updated_positions_are_evaluated(self):
+        self.engine.set_position("AAA", 100.0, 1)
+        self.engine.set_position("BBB", 100.0, 1)
+        self.engine.evaluate({"AAA": 90.0, "BBB": 100.0})
+        self.assertEqual([s.symbol for s in self.engine.evaluate({"BBB": 100.5})], [])
+
+    def test_remove_and_grow(self):
+        for i, symbol in enumerate(["AAA", "BBB", "CCC"]):
+            self.engine.set_position(symbol, 100.0 + i, 1)
+        self.engine.remove("AAA")
+        self.assertEqual(sorted(self.engine.symbols), ["BBB", "CCC"])
+        signals = self.engine.evaluate({"CCC": 200.0})
+        self.assertEqual((signals[0].symbol, signals[0].entry_price), ("CCC", 102.0))
+
+    def test_set_rules_applies_to_open_positions(self):
+        self.engine.set_position("AAA", 100.0, 1)
+        self.engine.set_rules(ExitRules.from_percentages(5, 10, 50, 5, 75))
+        self.assertEqual(self.engine.evaluate({"AAA": 97.0}), [])
+
+if __name__ == '__main__':
+    unittest.main()
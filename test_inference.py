@@ -0,0 +1,52 @@
+import copy
+import os
+import shutil
+import tempfile
+import unittest
+from ai.inference import InferencePool, fit_core, save_core
+from benchmarks.data import ohlcv_frame
+
+
+class TestInferencePool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = ohlcv_frame(1200)
+        cls.core = fit_core(cls.df.iloc[:800])
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.path = save_core(cls.core, os.path.join(cls.tmpdir, "models", "core.pkl"))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir)
+
+    def test_scores_match_in_process_predict(self):
+        # Two slots for five windows: the rest wait for a slot to free up
+        windows = [self.df.iloc[end - 300:end] for end in range(900, 1200, 60)]
+        with InferencePool(self.path, workers=1, slots=2, max_rows=500) as pool:
+            futures = [pool.predict(window, "EURUSD") for window in windows]
+            results = [future.result(timeout=120) for future in futures]
+            self.assertEqual(pool.pending(), 0)
+
+        core = copy.deepcopy(self.core)
+        for window, result in zip(windows, results):
+            core.predict(window.copy(), "EURUSD")
+            self.assertAlmostEqual(result['confidence'], core.last_prediction['confidence'])
+            self.assertEqual(result['market_regime'], core.last_prediction['market_regime'])
+            self.assertEqual(result['threshold'], core.params['confidence_threshold'])
+
+    def test_bad_frame_fails_only_its_future(self):
+        with InferencePool(self.path, workers=1, slots=1, max_rows=500) as pool:
+            missing = pool.predict(self.df.iloc[-300:].drop(columns="volume"))
+            self.assertIsInstance(missing.exception(timeout=1), KeyError)
+            # Too short for the indicators: the worker reports the failure and keeps serving
+            short = pool.predict(self.df.iloc[-5:])
+            good = pool.predict(self.df.iloc[-300:], "EURUSD")
+            self.assertIsInstance(short.exception(timeout=120), RuntimeError)
+            self.assertIn('confidence', good.result(timeout=120))
+
+        closed = pool.predict(self.df.iloc[-300:])
+        self.assertIsInstance(closed.exception(timeout=1), RuntimeError)
+
+
+if __name__ == '__main__':
+    unittest.main()
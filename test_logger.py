@@ -0,0 +1,24 @@
+import logging
+import unittest
+from utils.logger import SamplingFilter, SAMPLED
+
+class TestSamplingFilter(unittest.TestCase):
+    def make_record(self, msg, sampled):
+        record = logging.LogRecord("sachiel.test", logging.DEBUG, __file__, 1, msg, ("x",), None)
+        if sampled:
+            record.__dict__.update(SAMPLED)
+        return record
+
+    def test_sampled_messages_are_rate_limited(self):
+        sampling = SamplingFilter(max_per_interval=3, interval=60.0)
+        passed = [sampling.filter(self.make_record("Spot %s", True)) for _ in range(10)]
+        self.assertEqual(sum(passed), 3)
+        self.assertEqual(sampling.suppressed, 7)
+
+    def test_unsampled_messages_always_pass(self):
+        sampling = SamplingFilter(max_per_interval=1, interval=60.0)
+        passed = [sampling.filter(self.make_record("Order %s", False)) for _ in range(5)]
+        self.assertTrue(all(passed))
+
+if __name__ == '__main__':
+    unittest.main()
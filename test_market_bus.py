@@ -0,0 +1,108 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+import unittest
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent
+from trading.ctrader_client import CTraderClient
+from trading.market_bus import MarketBus, MarketBusReader
+
+DAY_START = 1760832000000  # 2025-10-19 00:00 UTC
+
+
+def _check_windows(name, symbol, stop, results):
+    """Reader process: every window copied while the writer runs must be internally consistent"""
+    reader = MarketBusReader(name)
+    windows = 0
+    try:
+        while not stop.is_set() or windows == 0:
+            count, ticks = reader.ticks(symbol, limit=64)
+            if len(ticks) and not ((ticks["bid"] == ticks["ts"] * 2).all() and (ticks["ask"] == ticks["ts"] * 3).all()
+                                   and (ticks["ts"][1:] - ticks["ts"][:-1] == 1).all() and ticks["ts"][-1] == count):
+                results.put("torn window")
+                return
+            windows += 1
+        results.put(windows)
+    finally:
+        reader.close()
+
+
+class TestMarketBus(unittest.TestCase):
+    def setUp(self):
+        self.name = f"test_bus_{os.getpid()}"
+        self.bus = MarketBus(self.name, symbols=2, tick_capacity=8, bar_capacity=4)
+        self.reader = MarketBusReader(self.name)
+
+    def tearDown(self):
+        self.reader.close()
+        self.bus.close()
+
+    def test_rings_cursors_and_bars(self):
+        for i in range(1, 21):
+            self.bus.publish_tick("EURUSD", DAY_START + i, 108500 + i, 108510 + i)
+        count, ticks = self.reader.ticks("EURUSD")
+        # The ring keeps the newest eight
+        self.assertEqual(count, 20)
+        self.assertEqual(ticks["bid"].tolist(), [108500 + i for i in range(13, 21)])
+        self.assertEqual(self.reader.ticks("EURUSD", since=18)[1]["bid"].tolist(), [108519, 108520])
+        self.assertEqual(len(self.reader.ticks("EURUSD", since=count)[1]), 0)
+        self.assertEqual(self.reader.latest_tick("EURUSD"), ((DAY_START + 20) / 1000, 1.0852, 1.0853))
+        self.assertAlmostEqual(self.reader.tick_frame("EURUSD", limit=2)["ask"].iloc[-1], 1.0853)
+
+        # The forming bar is replaced in place; older bars are ignored
+        self.bus.publish_bars("GBPUSD", [(DAY_START, 10, 12, 9, 11, 5.0), (DAY_START + 60000, 11, 13, 10, 12, 1.0)])
+        self.bus.publish_bar("GBPUSD", DAY_START + 60000, 11, 14, 10, 13, 2.0)
+        self.bus.publish_bar("GBPUSD", DAY_START, 1, 1, 1, 1, 1.0)
+        count, bars = self.reader.bars("GBPUSD")
+        self.assertEqual(count, 2)
+        self.assertEqual(bars["close"].tolist(), [11, 13])
+        frame = self.reader.bar_frame("GBPUSD")
+        self.assertEqual(frame["high"].tolist(), [12e-5, 14e-5])
+        self.assertEqual(frame.index[-1].value // 10**6, DAY_START + 60000)
+
+        # Two symbol slots: a third symbol is not published
+        self.bus.publish_tick("USDJPY", DAY_START, 1, 1)
+        self.assertEqual(self.reader.symbols(), ["EURUSD", "GBPUSD"])
+        self.assertEqual(self.reader.ticks("USDJPY")[0], 0)
+
+    def test_second_writer_only_replaces_a_dead_one(self):
+        self.assertIsNone(MarketBus.create(self.name))
+        exited = subprocess.Popen([sys.executable, "-c", "pass"])
+        exited.wait()
+        self.bus._header["pid"] = exited.pid
+        self.bus.publish_tick("EURUSD", DAY_START, 1, 1)
+        replacement = MarketBus.create(self.name)
+        try:
+            self.assertEqual(replacement.symbols(), [])
+            self.assertEqual(int(replacement._header["pid"]), os.getpid())
+        finally:
+            replacement.close()
+        # The old mapping stays readable; only the name was reused
+        self.bus._block.unlink = lambda: None
+
+    def test_client_publishes_spots_and_reader_process_sees_whole_windows(self):
+        client = CTraderClient()
+        client.symbols_map["EURUSD"] = 1
+        client.market_bus = self.bus
+        client._handle_spot_event(ProtoOASpotEvent(ctidTraderAccountId=1, symbolId=1, bid=108500, ask=108512,
+                                                   timestamp=DAY_START))
+        self.assertEqual(self.reader.latest_tick("EURUSD"), (DAY_START / 1000, 1.085, 1.08512))
+
+        ctx = multiprocessing.get_context("spawn")
+        stop, results = ctx.Event(), ctx.Queue()
+        process = ctx.Process(target=_check_windows, args=(self.name, "XAUUSD", stop, results))
+        process.start()
+        try:
+            for ts in range(1, 200001):
+                self.bus.publish_tick("XAUUSD", ts, ts * 2, ts * 3)
+                if ts == 100000:
+                    stop.set()
+            self.assertIsInstance(results.get(timeout=60), int)
+        finally:
+            stop.set()
+            process.join(timeout=10)
+        self.assertEqual(self.reader.ticks("XAUUSD")[0], 200000)
+
+
+if __name__ == '__main__':
+    unittest.main()
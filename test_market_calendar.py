@@ -0,0 +1,43 @@
+import unittest
+from datetime import datetime
+from trading_bot.trading.market_calendar import MarketCalendar, EXCHANGE_TZ
+
+def et(*args):
+    return EXCHANGE_TZ.localize(datetime(*args))
+
+class TestMarketCalendar(unittest.TestCase):
+    def setUp(self):
+        self.calendar = MarketCalendar(cache_file=None)
+        self.assertTrue(self.calendar.load_bundled())
+
+    def test_holiday_is_closed(self):
+        # Thanksgiving 2026
+        thanksgiving = et(2026, 11, 26, 11, 0)
+        self.assertFalse(self.calendar.is_open(thanksgiving))
+        self.assertEqual(self.calendar.next_open(thanksgiving), et(2026, 11, 27, 9, 30))
+
+    def test_early_close(self):
+        self.assertTrue(self.calendar.is_open(et(2026, 11, 27, 12, 59)))
+        self.assertFalse(self.calendar.is_open(et(2026, 11, 27, 13, 0)))
+        self.assertEqual(self.calendar.next_close(et(2026, 11, 27, 10, 0)), et(2026, 11, 27, 13, 0))
+
+    def test_weekend_is_closed(self):
+        saturday = et(2026, 11, 28, 12, 0)
+        self.assertFalse(self.calendar.is_open(saturday))
+        self.assertEqual(self.calendar.next_open(saturday), et(2026, 11, 30, 9, 30))
+        self.assertEqual(self.calendar.next_close(saturday), et(2026, 11, 30, 16, 0))
+
+    def test_session_boundaries(self):
+        self.assertFalse(self.calendar.is_open(et(2026, 11, 30, 9, 29, 59)))
+        self.assertTrue(self.calendar.is_open(et(2026, 11, 30, 9, 30)))
+        self.assertTrue(self.calendar.is_open(et(2026, 11, 30, 15, 59, 59)))
+        self.assertFalse(self.calendar.is_open(et(2026, 11, 30, 16, 0)))
+
+    def test_next_open_while_open_is_next_session(self):
+        clock = self.calendar.clock(et(2026, 11, 30, 10, 0))
+        self.assertTrue(clock.is_open)
+        self.assertEqual(clock.next_open, et(2026, 12, 1, 9, 30))
+        self.assertEqual(clock.next_close, et(2026, 11, 30, 16, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import unittest
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent
+from trading.ctrader_client import CTraderClient
+from trading.market_journal import (
+    JournalRecorder, JournalReader, Journal, ReplayEngine, ctrader_spot_delivery, TICKS, BARS, INDEX_STRIDE
+)
+
+DAY_START = 1760832000000  # 2025-10-19 00:00 UTC
+
+
+class TestMarketJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.recorder = JournalRecorder("ctrader", directory=self.tmpdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_range_reads_use_index(self):
+        n = INDEX_STRIDE * 5 + 17
+        for i in range(n):
+            self.recorder.record_tick(DAY_START + i * 10, 1 + i % 3, 108500 + i, 108510 + i)
+        self.recorder.flush()
+        # A second session appends to the same day's file
+        for i in range(n, n + 100):
+            self.recorder.record_tick(DAY_START + i * 10, 1, 108500 + i, 0)
+        self.recorder.stop()
+
+        reader = JournalReader(os.path.join(self.tmpdir, "ctrader", "20251019.ticks"))
+        self.assertEqual(reader.count, n + 100)
+        everything = reader.records()
+        start, end = DAY_START + 12345, DAY_START + 40000
+        expected = everything[(everything["ts"] >= start) & (everything["ts"] < end) & (everything["symbol"] == 2)]
+        window = reader.read(start, end, symbols=[2])
+        self.assertEqual(window.tolist(), expected.tolist())
+        self.assertEqual(len(Journal("ctrader", self.tmpdir).read(TICKS)), n + 100)
+
+    def test_backfilled_bars_read_in_time_order(self):
+        # Two symbols' 1400-minute histories arrive one symbol after the other
+        for symbol in (1, 2):
+            for minute in range(1400):
+                self.recorder.record_bar(DAY_START + minute * 60000, symbol, 10, 12, 9, 11, 1.0)
+        self.recorder.flush()
+        reader = JournalReader(os.path.join(self.tmpdir, "ctrader", "20251019.bars"))
+        start = DAY_START + 1000 * 60000
+        window = reader.read(start, start + 100 * 60000)
+        self.assertEqual(len(window), 200)
+        self.assertTrue((window["ts"][1:] >= window["ts"][:-1]).all())
+        self.assertEqual(window["symbol"][:2].tolist(), [1, 2])
+
+        # A later session appending live bars keeps the file marked as unordered
+        recorder = JournalRecorder("ctrader", directory=self.tmpdir)
+        recorder.record_bar(DAY_START + 1400 * 60000, 1, 10, 12, 9, 11, 1.0)
+        recorder.stop()
+        everything = Journal("ctrader", self.tmpdir).read(BARS, start_ms=start)
+        self.assertEqual(len(everything), 801)
+        self.assertTrue((everything["ts"][1:] >= everything["ts"][:-1]).all())
+
+    def test_bars_skip_duplicates(self):
+        self.assertTrue(self.recorder.record_bar(DAY_START, 1, 10, 12, 9, 11, 5.0))
+        self.assertFalse(self.recorder.record_bar(DAY_START, 1, 10, 12, 9, 11, 5.0))
+        self.recorder.flush()
+        self.assertEqual(len(Journal("ctrader", self.tmpdir).read(BARS)), 1)
+
+    def test_record_and_replay_through_client(self):
+        live = CTraderClient()
+        live.symbols_map["EURUSD"] = 1
+        live.journal = self.recorder
+        for i in range(50):
+            live._handle_spot_event(ProtoOASpotEvent(ctidTraderAccountId=1, symbolId=1, bid=108500 + i,
+                                                     timestamp=DAY_START + i * 100))
+        self.recorder.flush()
+
+        journal = Journal("ctrader", self.tmpdir)
+        replayed = CTraderClient()
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        engine = ReplayEngine(speed=10, sleep=sleep, clock=lambda: now[0])
+        count, _ = engine.replay(journal.read(TICKS), ctrader_spot_delivery(replayed, journal.symbols()))
+
+        self.assertEqual(count, 50)
+        self.assertEqual(replayed.price_history["EURUSD"], live.price_history["EURUSD"])
+        # 100 ms apart at 10x is 10 ms of wall time per tick
+        self.assertEqual(len(sleeps), 49)
+        self.assertAlmostEqual(now[0], 0.49)
+
+
+if __name__ == '__main__':
+    unittest.main()
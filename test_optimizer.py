@@ -0,0 +1,58 @@
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from ai.optimizer import Optimizer, backtest, default_space, grid_candidates, REGIMES
+from ai.sachiel_core import SachielCore
+from benchmarks.data import ohlcv_frame
+
+
+class TestOptimizer(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_backtest_stop_and_partial_exits(self):
+        close = np.array([100.0, 100.0, 103.6, 103.0, 96.0, 96.0])
+        data = {
+            "close": close, "high": close + 0.5, "low": close - 0.5,
+            "raw": np.array([0.9, 0.0, 0.0, 0.0, 0.0, 0.0]),
+            "regime": np.full(6, float(REGIMES.index('uptrend'))),
+            "adx": np.full(6, 20.0), "rsi": np.full(6, 50.0),
+        }
+        core = SachielCore("medium", {"params.trailing_stop": 0.5})
+        equity, trades = backtest(core, data, 0)
+        # 25% stake at 100; half sold at +3.5%, the rest stopped at -3%
+        self.assertEqual(len(trades), 1)
+        self.assertAlmostEqual(trades[0], 0.25 * (0.5 * 0.035 - 0.5 * 0.03))
+        self.assertAlmostEqual(equity[-1], 1 + trades[0])
+
+    def test_sweep_ranks_and_caches(self):
+        df = ohlcv_frame(400)
+        space = {"params.stop_loss": (0.01, 0.05), "params.confidence_threshold": [0.4, 0.6]}
+        with Optimizer(df, workers=1, cache_dir=self.tmpdir) as optimizer:
+            results = optimizer.run(space, method="grid", grid_steps=3)
+            self.assertEqual(len(results), len(grid_candidates(space, 3)))
+            sharpes = [metrics["sharpe"] for _, metrics in results]
+            self.assertEqual(sharpes, sorted(sharpes, reverse=True))
+
+        # A second run over the same data is answered from the cache without a process pool
+        with Optimizer(df, workers=1, cache_dir=self.tmpdir) as optimizer:
+            self.assertEqual(optimizer.run(space, method="grid", grid_steps=3), results)
+            self.assertIsNone(optimizer._executor)
+            # Results computed by other code are not reused
+            key = optimizer._key(results[0][0])
+            optimizer.code_version = "changed"
+            self.assertNotEqual(optimizer._key(results[0][0]), key)
+
+    def test_grid_over_default_space_is_refused(self):
+        with self.assertRaises(ValueError):
+            grid_candidates(default_space(), 3)
+        space = {key: dim for key, dim in default_space().items() if key.startswith("params.")}
+        self.assertEqual(len(grid_candidates(space, 2, max_candidates=2 ** len(space))), 2 ** len(space))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import random
+import unittest
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOADepthEvent
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOADepthQuote
+from trading.ctrader_client import CTraderClient
+from trading.order_book import OrderBook, BID, ASK
+
+
+class TestOrderBook(unittest.TestCase):
+    def test_matches_naive_book_under_random_updates(self):
+        rng = random.Random(3)
+        book = OrderBook("EURUSD", tick=1, levels=64)
+        quotes = {}
+        for _ in range(3000):
+            deleted = rng.sample(sorted(quotes), min(len(quotes), rng.randint(0, 2)))
+            for quote_id in deleted:
+                del quotes[quote_id]
+            new = []
+            for _ in range(rng.randint(0, 3)):
+                quote_id = rng.randint(1, 60)
+                # Mostly near 108500, now and then far enough to move the ladder
+                price = 108500 + (rng.randint(-20, 20) if rng.random() < 0.98 else rng.choice((-200, 200)))
+                is_bid = price < 108500 or (price == 108500 and rng.random() < 0.5)
+                size = rng.randint(1, 5) * 100000
+                quotes[quote_id] = (BID if is_bid else ASK, price, size)
+                new.append((quote_id, size, price if is_bid else 0, 0 if is_bid else price))
+            book.update(new, deleted)
+
+            levels = {BID: {}, ASK: {}}
+            for side, price, size in quotes.values():
+                levels[side][price] = levels[side].get(price, 0) + size
+            bids = sorted(levels[BID].items(), reverse=True)
+            asks = sorted(levels[ASK].items())
+            # Quotes further than the ladder reaches from the last re-centre are out of the book
+            in_ladder = lambda price: 0 <= price - book._base < book.levels
+            bids = [(p / 1e5, s) for p, s in bids if in_ladder(p)]
+            asks = [(p / 1e5, s) for p, s in asks if in_ladder(p)]
+            self.assertEqual(book.depth(BID, 100), bids)
+            self.assertEqual(book.depth(ASK, 100), asks)
+            self.assertEqual(book.best_bid(), bids[0][0] if bids else None)
+            self.assertEqual(book.best_ask(), asks[0][0] if asks else None)
+
+    def test_touch_figures_and_fill_estimate(self):
+        book = OrderBook("USDJPY", tick=100, levels=128)  # 3 digits: one level per 0.001
+        book.update([(1, 300, 15012300, 0), (2, 100, 15012200, 0), (3, 100, 0, 15012400), (4, 500, 0, 15012500)])
+        self.assertAlmostEqual(book.best_bid(), 150.123)
+        self.assertAlmostEqual(book.spread(), 0.001)
+        self.assertAlmostEqual(book.mid(), 150.1235)
+        # Three times the size on the bid pulls the microprice towards the ask
+        self.assertAlmostEqual(book.microprice(), (150.123 * 100 + 150.124 * 300) / 400)
+        self.assertAlmostEqual(book.imbalance(), (400 - 600) / 1000)
+        self.assertAlmostEqual(book.fill_price("SELL", 400), (150.123 * 300 + 150.122 * 100) / 400)
+        self.assertIsNone(book.fill_price("SELL", 401))
+        self.assertAlmostEqual(book.fill_price("BUY", 100), 150.124)
+
+        book.update(deleted=[1])
+        self.assertAlmostEqual(book.best_bid(), 150.122)
+        self.assertEqual(book.features()['best_ask'], book.best_ask())
+
+    def test_client_routes_depth_events(self):
+        client = CTraderClient()
+        book = OrderBook("EURUSD")
+        client.order_books["EURUSD"] = client._depth_books[1] = book
+        event = ProtoOADepthEvent(ctidTraderAccountId=1, symbolId=1, newQuotes=[
+            ProtoOADepthQuote(id=7, size=100, bid=108500), ProtoOADepthQuote(id=8, size=200, ask=108503)
+        ])
+        client._on_message_received(None, _wrap(event))
+        self.assertAlmostEqual(book.spread(), 0.00003)
+        client._on_message_received(None, _wrap(ProtoOADepthEvent(ctidTraderAccountId=1, symbolId=1,
+                                                                   deletedQuotes=[8])))
+        self.assertIsNone(book.best_ask())
+
+
+def _wrap(event):
+    return ProtoMessage(payloadType=event.payloadType, payload=event.SerializeToString())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import threading
+import time
+import unittest
+from trading.order_manager import OrderManager, OrderIntent, OrderState, TokenBucket
+
+class RecordingAdapter:
+    """Acknowledges every order immediately, as a broker would"""
+    def __init__(self):
+        self.sent = []
+        self.manager = None
+        self.event = threading.Event()
+
+    def bind(self, manager):
+        self.manager = manager
+
+    def close(self):
+        pass
+
+    def submit(self, intent):
+        self.sent.append((time.monotonic(), intent))
+        self.manager.on_submitted(intent.client_order_id, f"broker-{len(self.sent)}")
+        self.event.set()
+
+class TestOrderManager(unittest.TestCase):
+    def setUp(self):
+        self.adapter = RecordingAdapter()
+        self.manager = OrderManager(self.adapter, rate_per_sec=50, burst=1)
+        self.manager.start()
+
+    def tearDown(self):
+        self.manager.stop()
+
+    def wait_for(self, predicate, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.005)
+        return False
+
+    def test_duplicate_keys_submit_once(self):
+        first = self.manager.submit(OrderIntent("EURUSD", "BUY", 1, idempotency_key="sig-1"))
+        second = self.manager.submit(OrderIntent("EURUSD", "BUY", 1, idempotency_key="sig-1"))
+        self.assertIs(first, second)
+        self.assertTrue(self.wait_for(lambda: first.state == OrderState.SUBMITTED))
+        self.assertEqual(len(self.adapter.sent), 1)
+
+    def test_fill_lifecycle(self):
+        intent = self.manager.submit(OrderIntent("EURUSD", "BUY", 2))
+        self.assertTrue(self.wait_for(lambda: intent.state == OrderState.SUBMITTED))
+        self.manager.on_fill(intent.client_order_id, 1, 1.1)
+        self.assertEqual(intent.state, OrderState.PARTIALLY_FILLED)
+        self.manager.on_fill(intent.client_order_id, 2, 1.1)
+        self.assertEqual(intent.state, OrderState.FILLED)
+        self.assertIsNone(intent.realized_pl)
+        # Late acknowledgements must not move a filled order backwards
+        self.manager.on_submitted(intent.client_order_id)
+        self.assertEqual(intent.state, OrderState.FILLED)
+
+    def test_realized_pl_adds_up_across_fills(self):
+        intent = self.manager.submit(OrderIntent("EURUSD", "SELL", 2, metadata={'position_id': 7}))
+        self.assertTrue(self.wait_for(lambda: intent.state == OrderState.SUBMITTED))
+        self.manager.on_fill(intent.client_order_id, 1, 1.1, realized_pl=12.5)
+        self.manager.on_fill(intent.client_order_id, 2, 1.1, realized_pl=-2.5)
+        self.assertAlmostEqual(intent.realized_pl, 10.0)
+
+    def test_rate_limit_spaces_submissions(self):
+        intents = [self.manager.submit(OrderIntent("EURUSD", "BUY", 1)) for _ in range(4)]
+        self.assertTrue(self.wait_for(lambda: len(self.adapter.sent) == 4))
+        times = [t for t, _ in self.adapter.sent]
+        # Burst of 1 at 50/s: successive sends are at least ~20ms apart
+        self.assertGreaterEqual(times[-1] - times[0], 0.05)
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_empty(self):
+        bucket = TokenBucket(rate=1, capacity=3)
+        self.assertEqual(sum(bucket.try_acquire() for _ in range(5)), 3)
+        self.assertGreater(bucket.wait_time(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOAExecutionEvent, ProtoOAReconcileRes
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import (
+    ProtoOAPosition, ProtoOAOrder, ProtoOATradeData, ProtoOAExecutionType, ProtoOAOrderType, ProtoOAOrderStatus,
+    ProtoOAPositionStatus, ProtoOATradeSide
+)
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOASymbol
+from config.settings import Config
+from trading.ctrader_client import CTraderClient
+from trading.engine import TradingEngine
+from trading.ledger import TradeLedger
+from trading.position_store import PositionStore
+
+OPEN, CLOSED = ProtoOAPositionStatus.POSITION_STATUS_OPEN, ProtoOAPositionStatus.POSITION_STATUS_CLOSED
+
+
+def position(position_id, symbol_id, volume, side=ProtoOATradeSide.BUY, status=OPEN):
+    return ProtoOAPosition(positionId=position_id, positionStatus=status, price=1.0, swap=0,
+                           tradeData=ProtoOATradeData(symbolId=symbol_id, volume=volume, tradeSide=side))
+
+
+def event(pos=None, order_id=None, status=ProtoOAOrderStatus.ORDER_STATUS_FILLED):
+    message = ProtoOAExecutionEvent(ctidTraderAccountId=1, executionType=ProtoOAExecutionType.ORDER_FILLED)
+    if pos is not None:
+        message.position.CopyFrom(pos)
+    if order_id is not None:
+        message.order.CopyFrom(ProtoOAOrder(orderId=order_id, orderType=ProtoOAOrderType.MARKET, orderStatus=status,
+                                            tradeData=ProtoOATradeData(symbolId=1, volume=1,
+                                                                       tradeSide=ProtoOATradeSide.BUY)))
+    return message
+
+
+class TestPositionStore(unittest.TestCase):
+    def test_snapshot_then_deltas(self):
+        store = PositionStore()
+        synced = []
+        store.add_listener(lambda s: synced.append(s.net_volumes()))
+        store.begin_reconcile()
+        # Events racing the snapshot: a position opened and one closed while it was in flight
+        store.apply(event(position(3, 2, 500, ProtoOATradeSide.SELL)))
+        store.apply(event(position(1, 1, 0, status=CLOSED)))
+        store.reconcile(ProtoOAReconcileRes(ctidTraderAccountId=1, position=[position(1, 1, 1000), position(2, 1, 300)]))
+        self.assertTrue(store.reconciled)
+        self.assertEqual([p.positionId for p in store.for_symbol(1)], [2])
+        self.assertEqual(store.net_volumes(), {1: 300, 2: -500})
+        self.assertEqual(synced, [{1: 300, 2: -500}])
+
+        # A partial close updates in place; a working order is tracked until it is done
+        store.apply(event(position(2, 1, 100), order_id=9, status=ProtoOAOrderStatus.ORDER_STATUS_ACCEPTED))
+        self.assertEqual(store.position(2).tradeData.volume, 100)
+        self.assertIsNotNone(store.order(9))
+        store.apply(event(position(2, 1, 0, status=CLOSED), order_id=9))
+        self.assertEqual(store.for_symbol(1), [])
+        self.assertEqual(store.orders(), [])
+        self.assertEqual([p.positionId for p in store.positions()], [3])
+
+        store.invalidate()
+        self.assertFalse(store.reconciled)
+
+    def test_broker_closes_free_risk_exposure(self):
+        saved = Config.RISK_ENABLED
+        Config.RISK_ENABLED = True
+        client = CTraderClient()
+        client.symbols_map["EURUSD"] = 1
+        client.symbol_details_map[1] = ProtoOASymbol(symbolId=1, digits=5, pipPosition=4, lotSize=10000000)
+        engine = TradingEngine(client, name="test", ledger=TradeLedger())
+        try:
+            engine.order_manager()
+            client.positions.reconcile(ProtoOAReconcileRes(ctidTraderAccountId=1))
+            self.assertEqual(engine.risk_engine.gross, 0)
+
+            # Opened elsewhere (another terminal), then hit its stop loss at the broker
+            client._handle_execution_event(event(position(5, 1, 1000000)))
+            self.assertAlmostEqual(engine.risk_engine.gross, 0.1 * 100000 * 1.0)
+            client._handle_execution_event(event(position(5, 1, 0, status=CLOSED)))
+            self.assertEqual(engine.risk_engine.gross, 0)
+        finally:
+            engine.close()
+            client.tokens.stop()
+            Config.RISK_ENABLED = saved
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import numpy as np
+from ai.regime import REGIMES, RegimeCache, classify
+from ai.sachiel_core import SachielCore
+from benchmarks.data import ohlcv_frame
+
+
+def last_bar_regime(df):
+    """The per-call rules detect_market_regime used before labels were vectorized"""
+    volatility = df['close'].pct_change().rolling(window=20).std()
+    trend = df['close'].rolling(window=20).mean()
+    momentum = df['close'].pct_change(periods=10)
+    volume_ratio = df['volume'] / df['volume'].rolling(window=20).mean()
+    current_vol, avg_vol = volatility.iloc[-1], volatility.mean()
+    if current_vol > avg_vol * 1.5:
+        if momentum.iloc[-1] > 0 and volume_ratio.iloc[-1] > 1.2:
+            return 'volatile_bullish'
+        if momentum.iloc[-1] < 0 and volume_ratio.iloc[-1] > 1.2:
+            return 'volatile_bearish'
+        return 'choppy'
+    if df['close'].iloc[-1] > trend.iloc[-1]:
+        return 'low_vol_uptrend' if current_vol < avg_vol * 0.5 else 'uptrend'
+    return 'low_vol_downtrend' if current_vol < avg_vol * 0.5 else 'downtrend'
+
+
+class TestRegime(unittest.TestCase):
+    def setUp(self):
+        self.df = ohlcv_frame(600)
+        # Add a volatile stretch so more than two regimes show up
+        self.df.loc[self.df.index[400:430], 'close'] *= 1 + np.random.default_rng(1).normal(0, 0.01, 30)
+
+    def test_every_bar_matches_last_bar_rules(self):
+        codes = classify(self.df)
+        # The first return is NaN, so the first full volatility window ends at bar 20
+        self.assertTrue((codes[:20] == REGIMES.index('unknown')).all())
+        for end in range(21, len(self.df) + 1, 7):
+            self.assertEqual(REGIMES[codes[end - 1]], last_bar_regime(self.df.iloc[:end]), end)
+        self.assertGreater(len(set(codes.tolist())), 3)
+
+    def test_incremental_updates_match_one_pass(self):
+        cache = RegimeCache()
+        for end in (250, 251, 300, 340, 420):
+            # Live callers pass a sliding window of recent bars; the cache
+            # averages volatility over everything it has seen since bar 150
+            window = self.df.iloc[end - 100:end]
+            codes = cache.update("EURUSD", window, timeframe="M1")
+            np.testing.assert_array_equal(codes, classify(self.df.iloc[150:end])[-100:])
+        self.assertEqual(len(cache.get("EURUSD", "M1").codes), 270)
+        # A window that skips bars does not continue the series and starts a new one
+        codes = cache.update("EURUSD", self.df.iloc[500:600], timeframe="M1")
+        np.testing.assert_array_equal(codes, classify(self.df.iloc[500:600]))
+
+    def test_detect_does_not_touch_caller_frame(self):
+        columns = list(self.df.columns)
+        regime = SachielCore().detect_market_regime(self.df, symbol="EURUSD")
+        self.assertEqual(list(self.df.columns), columns)
+        self.assertEqual(regime, REGIMES[classify(self.df)[-1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import math
+import unittest
+import numpy as np
+from config.settings import Config
+from trading.order_manager import OrderIntent, OrderState
+from trading.risk_engine import RiskEngine
+
+UNITS = {"EURUSD": 100000, "GBPUSD": 100000, "USDJPY": 100000, "XAUUSD": 100}
+
+
+class TestRiskEngine(unittest.TestCase):
+    def setUp(self):
+        # Exposure limits first; VaR is checked on its own below
+        self.saved_var_limit = Config.RISK_MAX_VAR_PCT
+        Config.RISK_MAX_VAR_PCT = 100.0
+        self.account = {"balance": 10000.0, "currency": "USD"}
+        self.engine = RiskEngine(contract_size=UNITS.get, account=lambda: self.account)
+        self.engine.on_price("EURUSD", 1.10, ts=0)
+        self.engine.on_price("USDJPY", 150.0, ts=0)
+        self.engine.on_price("XAUUSD", 2000.0, ts=0)
+
+    def tearDown(self):
+        Config.RISK_MAX_VAR_PCT = self.saved_var_limit
+
+    def fill(self, intent):
+        self.assertTrue(self.engine.check(intent)[0])
+        intent.state = OrderState.FILLED
+        intent.filled_qty = intent.qty
+        self.engine.on_order_update(intent)
+
+    def test_limits_and_reservations(self):
+        # 0.4 lot EURUSD = 44,000 USD: inside 10x gross and 5x per symbol
+        first = OrderIntent("EURUSD", "BUY", 0.4)
+        self.assertEqual(self.engine.check(first), (True, ""))
+        self.assertAlmostEqual(self.engine.gross, 44000)
+        # A second one would take EURUSD to 88,000 > 5x equity, even before the first fills
+        ok, reason = self.engine.check(OrderIntent("EURUSD", "BUY", 0.4))
+        self.assertFalse(ok)
+        self.assertIn("EURUSD exposure", reason)
+
+        # Metals are capped at 3x equity: 32,000 USD is over
+        ok, reason = self.engine.check(OrderIntent("XAUUSD", "BUY", 0.16))
+        self.assertFalse(ok)
+        self.assertIn("METALS", reason)
+
+        # JPY notional is converted with USDJPY, so 0.3 lot is 30,000 USD, not 4.5m
+        self.assertTrue(self.engine.check(OrderIntent("USDJPY", "SELL", 0.3))[0])
+        self.assertAlmostEqual(self.engine.gross, 74000)
+
+        # A rejected order releases its reservation; closing is always allowed
+        first.state = OrderState.REJECTED
+        self.engine.on_order_update(first)
+        self.assertAlmostEqual(self.engine.gross, 30000)
+        self.account["balance"] = 1.0
+        self.assertTrue(self.engine.check(OrderIntent("USDJPY", "BUY", 0.3))[0])
+
+    def test_closes_are_never_blocked(self):
+        # Equity not reported yet: entries wait, closing a broker position (even one we never saw) goes through
+        self.account = {"currency": "USD"}
+        self.assertEqual(self.engine.check(OrderIntent("EURUSD", "BUY", 0.1)), (False, "risk: account equity unknown"))
+        close = OrderIntent("XAUUSD", "SELL", 50.0, metadata={"position_id": 7})
+        self.assertEqual(self.engine.check(close), (True, ""))
+        self.assertEqual(self.engine.gross, 0)
+
+    def test_factor_change_revalues_row(self):
+        self.fill(OrderIntent("USDJPY", "BUY", 0.3))
+        # USDJPY moves within the sample interval, so its JPY->USD factor is still the old one
+        self.engine.on_price("USDJPY", 100.0, ts=0)
+        # A blocked order reserves nothing, but the factor it looked up must re-value the row
+        self.account["balance"] = 1.0
+        self.assertFalse(self.engine.check(OrderIntent("USDJPY", "BUY", 0.01))[0])
+        engine = self.engine
+        row = engine.symbols.index("USDJPY")
+        self.assertAlmostEqual(engine.notional[row], engine.lots[row] * 100000 * 100.0 / 100.0)
+        self.assertAlmostEqual(engine.gross, np.abs(engine.notional).sum())
+
+    def test_sync_positions_keeps_reservations(self):
+        # A pending 0.4 lot EURUSD order, then a reconcile finds 0.1 lot GBPUSD opened before we started
+        self.assertTrue(self.engine.check(OrderIntent("EURUSD", "BUY", 0.4))[0])
+        for _ in range(2):  # Reconciling again changes nothing
+            self.engine.sync_positions({"GBPUSD": 0.1}, prices={"GBPUSD": 1.25})
+            self.assertAlmostEqual(self.engine.gross, 44000 + 12500)
+        # Closed at the broker: only the reservation is left
+        self.engine.sync_positions({})
+        self.assertAlmostEqual(self.engine.gross, 44000)
+
+    def test_var_tracks_full_recompute(self):
+        rng = np.random.default_rng(5)
+        self.fill(OrderIntent("EURUSD", "BUY", 0.2))
+        self.fill(OrderIntent("XAUUSD", "SELL", 0.05))
+        self.engine.check(OrderIntent("USDJPY", "BUY", 0.1))
+        prices = {"EURUSD": 1.10, "USDJPY": 150.0, "XAUUSD": 2000.0}
+        for ts in range(1, 3000, 7):
+            for symbol in prices:
+                prices[symbol] *= math.exp(rng.normal(0, 0.0005))
+                self.engine.on_price(symbol, prices[symbol], ts=ts)
+
+        engine = self.engine
+        expected = engine.notional @ engine.cov @ engine.notional
+        self.assertAlmostEqual(engine.variance / expected, 1.0, places=9)
+        self.assertAlmostEqual(engine.gross, np.abs(engine.notional).sum(), places=6)
+        symbols, corr = engine.correlation()
+        self.assertEqual(symbols, ["EURUSD", "USDJPY", "XAUUSD"])
+        np.testing.assert_allclose(np.diag(corr), 1.0)
+        var = engine.value_at_risk()
+        self.assertAlmostEqual(var, engine.var_scale * math.sqrt(expected))
+
+        # An order that would push VaR over the limit is blocked
+        Config.RISK_MAX_VAR_PCT = var / self.account["balance"] * 100 * 1.01
+        ok, reason = engine.check(OrderIntent("EURUSD", "BUY", 0.2))
+        self.assertFalse(ok)
+        self.assertIn("VaR", reason)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import time
+import unittest
+from trading.price_simulator import PriceSimulator
+from trading.sim_clock import SimulationClock, parse_speed
+
+START = 1760832000  # 2025-10-19 00:00 UTC
+
+
+class TestSimulationClock(unittest.TestCase):
+    def test_speeds(self):
+        self.assertEqual([parse_speed(v) for v in ("realtime", "max", "60x", "2.5", 10)], [1.0, 0.0, 60.0, 2.5, 10.0])
+        with self.assertRaises(ValueError):
+            parse_speed("-1x")
+
+        clock = SimulationClock("100x", start=START)
+        wall = time.perf_counter()
+        for _ in range(5):
+            clock.sleep(1)
+        self.assertGreaterEqual(time.perf_counter() - wall, 0.04)
+        self.assertEqual(clock.now(), START + 5)
+        self.assertEqual(clock.strftime(), "2025-10-19 00:00:05")
+
+        # stop() cuts a paced sleep short but still advances simulated time
+        clock = SimulationClock("realtime", start=START)
+        clock.stop()
+        wall = time.perf_counter()
+        clock.sleep(60)
+        self.assertLess(time.perf_counter() - wall, 1)
+        self.assertEqual(clock.now(), START + 60)
+
+    def test_simulated_day_runs_in_seconds(self):
+        clock = SimulationClock("max", start=START)
+        simulator = PriceSimulator(clock=clock, max_bars=2000)
+        simulator.prime(3600)
+        # An hour of one-second steps ending at START: 60 bars and the one START opens
+        self.assertEqual(len(simulator.bars), 61)
+        self.assertEqual(len(simulator.completed_bars()), 60)
+
+        wall = time.perf_counter()
+        for _ in range(86400):
+            simulator.get_next_price()
+            clock.sleep(1)
+        self.assertLess(time.perf_counter() - wall, 10)
+        self.assertEqual(clock.now(), START + 86400)
+
+        # Repeated calls within one simulated second do not move the price
+        self.assertEqual(simulator.get_next_price(), simulator.get_next_price())
+        bars = simulator.completed_bars()
+        self.assertEqual(len(bars), 60 + 1440)
+        self.assertEqual(bars.index[-1].timestamp(), START + 86400 - 60)
+        self.assertTrue(((bars['low'] <= bars[['open', 'close']].min(axis=1)) &
+                         (bars['high'] >= bars[['open', 'close']].max(axis=1))).all())
+        self.assertEqual(simulator.bars[-1][4], simulator.current_price)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from twisted.internet import defer
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASymbolByIdRes, ProtoOASymbolsListRes
+from trading.symbol_metadata import SymbolMetadataService
+
+class FakeClient:
+    """Answers ProtoOASymbolByIdReq from a table; each request stays pending until answer() is called"""
+    def __init__(self):
+        self.symbols_map = {}
+        self.symbol_details_map = {}
+        self.ctid_trader_account_id = 42
+        self.requests = []
+        self.client = self
+
+    def send(self, request):
+        self.requests.append((request, None))
+
+    def _send_request(self, request):
+        d = defer.Deferred()
+        self.requests.append((request, d))
+        return d
+
+    def answer(self):
+        for request, d in self.requests:
+            if d is None or d.called:
+                continue
+            response = ProtoOASymbolByIdRes()
+            for symbol_id in request.symbolId:
+                symbol = response.symbol.add()
+                symbol.symbolId = symbol_id
+                symbol.digits = 5
+                symbol.pipPosition = 4
+                symbol.lotSize = 100000
+            d.callback(response)
+
+class TestSymbolMetadata(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.tmpdir.name, "symbols_{host}_{account}.json")
+        self.client = FakeClient()
+        self.service = SymbolMetadataService(self.client, cache_file=self.cache_file, batch_size=2, ttl=3600)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def list_response(self, count):
+        response = ProtoOASymbolsListRes()
+        for i in range(1, count + 1):
+            light = response.symbol.add()
+            light.symbolId = i
+            light.symbolName = f"SYM{i}"
+        return response
+
+    def test_details_are_fetched_in_batches_and_shared(self):
+        done = []
+        self.service.ensure([1, 2, 3]).addCallback(done.append)
+        self.service.ensure([3, 1]).addCallback(done.append)  # Already in flight: no new request
+        self.assertEqual([list(r.symbolId) for r, _ in self.client.requests], [[1, 2], [3]])
+
+        self.client.answer()
+        self.assertEqual(len(done), 2)
+        self.assertEqual(sorted(self.client.symbol_details_map), [1, 2, 3])
+
+    def test_concurrent_ensure_requests_each_symbol_once(self):
+        barrier = threading.Barrier(8)
+
+        def ensure():
+            barrier.wait()
+            self.service.ensure(range(1, 201))
+
+        threads = [threading.Thread(target=ensure) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        requested = [symbol_id for request, _ in self.client.requests for symbol_id in request.symbolId]
+        self.assertEqual(sorted(requested), list(range(1, 201)))
+
+        self.client.answer()
+        self.assertEqual(self.service._pending, {})
+
+    def test_cache_round_trip_skips_symbol_list(self):
+        self.service.apply_symbol_list(self.list_response(3))
+        self.client.answer()
+        self.service._save(self.service._cache_path(), {
+            "version": 1,
+            "listed_at": self.service.listed_at,
+            "symbols": dict(self.client.symbols_map),
+            "details": dict(self.client.symbol_details_map),
+        })
+
+        restored = FakeClient()
+        service = SymbolMetadataService(restored, cache_file=self.cache_file, ttl=3600)
+        self.assertTrue(service.load())
+        self.assertEqual(restored.symbols_map["SYM2"], 2)
+        self.assertEqual(restored.symbol_details_map[3].lotSize, 100000)
+
+        service.refresh()
+        self.assertEqual(restored.requests, [])
+
+        # Mock mode: without the Open API package the cache is ignored rather than half-parsed
+        with mock.patch("trading.symbol_metadata.ProtoOASymbol", None):
+            self.assertFalse(SymbolMetadataService(FakeClient(), cache_file=self.cache_file).load())
+
+if __name__ == '__main__':
+    unittest.main()
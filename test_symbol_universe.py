@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from trading_bot.trading.symbol_universe import SymbolIndex, SymbolUniverse
+
+class FakeAlpacaClient:
+    def __init__(self, assets):
+        self.assets = assets
+        self.calls = 0
+
+    def get_tradable_assets(self):
+        self.calls += 1
+        return self.assets
+
+class CountingList(list):
+    reads = 0
+
+    def __getitem__(self, i):
+        self.reads += 1
+        return super().__getitem__(i)
+
+class TestSymbolIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SymbolIndex([
+            ("AAPL", "stock", "Apple Inc."),
+            ("AAP", "stock", "Advance Auto Parts"),
+            ("APLE", "stock", "Apple Hospitality REIT"),
+            ("MSFT", "stock", "Microsoft Corporation"),
+            ("BTCUSD", "crypto", "Bitcoin"),
+        ])
+
+    def test_prefix_then_substring_ranking(self):
+        self.assertEqual(self.index.search("aap"), ["AAP", "AAPL"])
+        self.assertEqual(self.index.search("apple"), ["AAPL", "APLE"])
+        self.assertEqual(self.index.search("USD"), ["BTCUSD"])
+        self.assertEqual(self.index.kind("btcusd"), "crypto")
+
+    def test_lookup_checks_only_candidate_rows(self):
+        index = SymbolIndex((f"S{i:05d}", "stock", f"Company {i}") for i in range(20000))
+        index._haystack = CountingList(index._haystack)
+        self.assertEqual(index.search("S1", limit=5), ["S10000", "S10001", "S10002", "S10003", "S10004"])
+        self.assertEqual(index._haystack.reads, 0)
+        self.assertEqual(index.search("pany 1999")[0], "S01999")
+        # Only rows holding every trigram of the query are substring-checked: Company 1999 and 19990-19999
+        self.assertEqual(index._haystack.reads, 11)
+
+class TestSymbolUniverse(unittest.TestCase):
+    def test_cache_skips_download_while_fresh(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_file = os.path.join(tmpdir, "universe.json")
+            client = FakeAlpacaClient([("AAPL", "stock", "Apple Inc."), ("ETHUSD", "crypto", "Ethereum")])
+            self.assertTrue(SymbolUniverse(cache_file=cache_file).refresh(client))
+
+            universe = SymbolUniverse(cache_file=cache_file, ttl=3600)
+            self.assertTrue(universe.load_cache())
+            self.assertTrue(universe.is_fresh())
+            self.assertEqual(universe.index.symbols, ["AAPL", "ETHUSD"])
+            self.assertEqual(client.calls, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from trading.token_manager import TokenManager
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+class SlowTokenEndpoint:
+    """Stands in for the requests module; counts calls and holds each one briefly"""
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = []
+
+    def post(self, url, data=None, timeout=None):
+        self.calls.append(timeout)
+        time.sleep(self.delay)
+        return FakeResponse({"access_token": f"access-{len(self.calls)}", "expires_in": 3600})
+
+class TestTokenManager(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.token_file = os.path.join(self.tmpdir.name, "tokens.json")
+        with open(self.token_file, "w") as f:
+            json.dump({"access_token": "old", "refresh_token": "refresh", "token_expires_at": time.time() + 30}, f)
+        self.http = SlowTokenEndpoint()
+        self.tokens = TokenManager(token_file=self.token_file, http=self.http, refresh_margin=300, request_timeout=5)
+        self.tokens.load()
+
+    def tearDown(self):
+        self.tokens.stop()
+        self.tmpdir.cleanup()
+
+    def test_concurrent_refreshes_coalesce(self):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.tokens.refresh())) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, [True] * 5)
+        self.assertEqual(self.http.calls, [5])
+        self.assertEqual(self.tokens.access_token, "access-1")
+        self.assertEqual(self.tokens.refresh_token, "refresh")
+
+        with open(self.token_file) as f:
+            self.assertEqual(json.load(f)["access_token"], "access-1")
+        self.assertFalse(os.path.exists(self.token_file + ".tmp"))
+
+    def test_background_refresh_ahead_of_expiry(self):
+        self.assertTrue(self.tokens.needs_refresh())
+        # Reads never wait on the refresh
+        self.tokens.start()
+        self.assertEqual(self.tokens.access_token, "old")
+
+        deadline = time.time() + 2
+        while self.tokens.access_token == "old" and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.tokens.access_token, "access-1")
+        self.assertFalse(self.tokens.needs_refresh())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from utils.tracing import Tracer
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.tracer = Tracer(window=8)
+
+    def test_span_records_duration(self):
+        with self.tracer.span("stage"):
+            pass
+        stats = self.tracer.snapshot()["stage"]
+        self.assertEqual(stats['count'], 1)
+        self.assertGreaterEqual(stats['max_ms'], 0.0)
+
+    def test_rolling_window_percentiles(self):
+        for ms in range(1, 21):
+            self.tracer.record("stage", float(ms))
+        stats = self.tracer.snapshot()["stage"]
+        # Only the last 8 samples (13..20) remain in the window
+        self.assertEqual(stats['count'], 20)
+        self.assertEqual(stats['p50_ms'], 17.0)
+        self.assertEqual(stats['max_ms'], 20.0)
+
+    def test_timed_decorator(self):
+        @self.tracer.timed("func")
+        def add(a, b):
+            return a + b
+
+        self.assertEqual(add(1, 2), 3)
+        self.assertEqual(self.tracer.snapshot()["func"]['count'], 1)
+
+    def test_prometheus_export(self):
+        self.tracer.record("order.submit", 3.0)
+        text = self.tracer.to_prometheus()
+        self.assertIn('sachiel_stage_latency_ms_bucket{stage="order.submit",le="5"} 1', text)
+        self.assertIn('sachiel_stage_latency_ms_bucket{stage="order.submit",le="2.5"} 0', text)
+        self.assertIn('sachiel_stage_latency_ms_count{stage="order.submit"} 1', text)
+
+    def test_disabled_tracer_records_nothing(self):
+        self.tracer.enabled = False
+        with self.tracer.span("stage"):
+            pass
+        self.assertEqual(self.tracer.snapshot(), {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,10 @@ from alpaca.data import StockHistoricalDataClient, CryptoHistoricalDataClient
 from alpaca.trading.requests import GetAssetsRequest
 from alpaca.trading.enums import AssetClass
 from config.settings import Config
+from trading.market_journal import JournalRecorder, to_price_units
+from trading.bars import BarArray
+from utils.tracing import tracer
+from utils.logger import get_logger, SAMPLED
 import pytz
 from alpaca.data.live import CryptoDataStream
 from alpaca.data.requests import CryptoLatestQuoteRequest
@@ -12,7 +16,10 @@ from datetime import datetime, timedelta
 from alpaca.data.timeframe import TimeFrame
 from alpaca.data.requests import StockBarsRequest, CryptoBarsRequest
 import pandas as pd
-import asyncio
+import threading
+import logging
+
+log = get_logger(__name__)
 
 
 class AlpacaClient:
@@ -21,7 +28,10 @@ class AlpacaClient:
         self.stock_data_client = None
         self.crypto_data_client = None
         self.crypto_stream = None
+        self._crypto_thread = None
         self.latest_crypto_prices = {}  # Cache for latest prices
+        self.journal = JournalRecorder("alpaca") if Config.JOURNAL_ENABLED else None
+        self.market_bus = None  # Set by whoever runs the stream; see trading/market_bus.py
 
     async def init_crypto_stream(self):
         """Initialize crypto data stream with proper connection"""
@@ -40,15 +50,19 @@ class AlpacaClient:
 
             # Define the handler for crypto data
             async def handle_crypto_data(data):
-                print(f"Crypto data received: {data}")
-
-            # Set up the handler
-            self.crypto_stream.data_feed = handle_crypto_data
+                self.on_stream_bar(data)
 
             # Subscribe to default crypto pairs
             default_symbols = ["BTC/USD", "ETH/USD"]
-            await self.crypto_stream.subscribe_bars(default_symbols)
-            
+            self.crypto_stream.subscribe_bars(handle_crypto_data, *default_symbols)
+
+            # run() blocks in an event loop of its own, so it gets a thread of its own
+            if self.journal is not None:
+                self.journal.start()
+            self._crypto_thread = threading.Thread(target=self.crypto_stream.run, name="alpaca-crypto-stream",
+                                                   daemon=True)
+            self._crypto_thread.start()
+
             print(f"Successfully subscribed to crypto streams: {default_symbols}")
             return True
 
@@ -57,16 +71,35 @@ class AlpacaClient:
             traceback.print_exc()
             return False
 
+    def on_stream_bar(self, bar):
+        """Stream (or journal replay) bar: refresh the price cache, record and publish it if enabled"""
+        self.latest_crypto_prices[bar.symbol] = float(bar.close)
+        if self.journal is None and self.market_bus is None:
+            return
+        record = (int(bar.timestamp.timestamp() * 1000), to_price_units(bar.open), to_price_units(bar.high),
+                  to_price_units(bar.low), to_price_units(bar.close), float(bar.volume))
+        if self.journal is not None:
+            self.journal.record_bar(record[0], self.journal.symbol_key(bar.symbol), *record[1:])
+        if self.market_bus is not None:
+            self.market_bus.publish_bars(bar.symbol, (record,))
+
     def close_crypto_stream(self):
         """Properly close the crypto stream"""
         try:
-            if hasattr(self, 'crypto_stream'):
-                asyncio.create_task(self.crypto_stream.close())
+            if self.crypto_stream is not None:
+                self._stop_crypto_stream()
                 print("Crypto stream closed")
         except Exception as e:
             print(f"Error closing crypto stream: {e}")
             traceback.print_exc()
         
+    def _stop_crypto_stream(self):
+        # stop() hands the shutdown to the stream's own loop and waits for it
+        stream, self.crypto_stream = self.crypto_stream, None
+        if self._crypto_thread is not None and self._crypto_thread.is_alive():
+            stream.stop()
+        self._crypto_thread = None
+
     def close(self):
         """Close all connections properly"""
         try:
@@ -76,18 +109,16 @@ class AlpacaClient:
                 pass
 
             # Close crypto stream if exists
-            if hasattr(self, 'crypto_stream'):
+            if self.crypto_stream is not None:
                 try:
-                    # Get event loop for async operations
-                    loop = asyncio.get_event_loop()
-                    if loop and loop.is_running():
-                        loop.create_task(self.crypto_stream.close())
-                    else:
-                        print("No running event loop for crypto stream cleanup")
+                    self._stop_crypto_stream()
                     print("Crypto stream closed")
                 except Exception as e:
                     print(f"Error closing crypto stream: {e}")
 
+            if self.journal is not None:
+                self.journal.stop()
+
         except Exception as e:
             print(f"Error in client cleanup: {e}")
             traceback.print_exc()
@@ -304,7 +335,7 @@ class AlpacaClient:
             return []
 
     def get_bars(self, symbol, is_crypto=False):
-        """Main method to get price bars for both crypto and stocks"""
+        """Main method to get price bars for both crypto and stocks, as a BarArray"""
         try:
             if is_crypto:
                 if not self.crypto_data_client:
@@ -317,7 +348,7 @@ class AlpacaClient:
                 else:
                     formatted_symbol = symbol
                     
-                print(f"Fetching crypto data for {formatted_symbol}")
+                log.debug("Fetching crypto data for %s", formatted_symbol, extra=SAMPLED)
                 
                 try:
                     # Try to get current price using historical data client
@@ -336,18 +367,17 @@ class AlpacaClient:
                         if bars and formatted_symbol in bars:
                             bar_list = list(bars[formatted_symbol])
                             if bar_list:
-                                print(f"Received real crypto data")
-                                print(f"Latest price: ${bar_list[-1].close:.2f}")
-                                return bar_list
+                                log.debug("Received real crypto data, latest price: $%.2f", bar_list[-1].close, extra=SAMPLED)
+                                return BarArray.from_objects(bar_list, formatted_symbol)
                     except Exception as e:
-                        print(f"Error fetching real data: {e}")
+                        log.warning("Error fetching real data: %s", e, extra=SAMPLED)
                     
                     # If real data fails, use simulation with current market price
-                    print("Using simulation data with current market prices")
+                    log.debug("Using simulation data with current market prices", extra=SAMPLED)
                     return self.get_simulated_bars(formatted_symbol)
                         
                 except Exception as e:
-                    print(f"Error in crypto request: {e}")
+                    log.warning("Error in crypto request: %s", e, extra=SAMPLED)
                     return self.get_simulated_bars(formatted_symbol)
                     
             else:
@@ -359,8 +389,7 @@ class AlpacaClient:
                 end_time = datetime(2023, 12, 15, 16, 0, 0).replace(tzinfo=pytz.timezone('America/New_York'))
                 start_time = end_time - timedelta(days=5)
                 
-                print(f"\nFetching IEX historical data for {symbol}")
-                print(f"Time range: {start_time} to {end_time} ET")
+                log.debug("Fetching IEX historical data for %s: %s to %s ET", symbol, start_time, end_time, extra=SAMPLED)
                 
                 # Try different timeframes
                 timeframes = [
@@ -371,7 +400,7 @@ class AlpacaClient:
                 
                 for timeframe, desc in timeframes:
                     try:
-                        print(f"\nTrying {desc} timeframe...")
+                        log.debug("Trying %s timeframe...", desc, extra=SAMPLED)
                         request = StockBarsRequest(
                             symbol_or_symbols=symbol,
                             timeframe=timeframe,
@@ -385,23 +414,22 @@ class AlpacaClient:
                         if bars and symbol in bars:
                             bar_list = list(bars[symbol])
                             if bar_list:
-                                print(f"Received {len(bar_list)} {desc} bars")
-                                print(f"Latest bar - Time: {bar_list[-1].timestamp}, Close: ${bar_list[-1].close:.2f}")
-                                return bar_list
+                                log.debug("Received %d %s bars, latest %s close $%.2f",
+                                          len(bar_list), desc, bar_list[-1].timestamp, bar_list[-1].close, extra=SAMPLED)
+                                return BarArray.from_objects(bar_list, symbol)
                     except Exception as e:
-                        print(f"Error fetching {desc} data: {e}")
+                        log.warning("Error fetching %s data: %s", desc, e, extra=SAMPLED)
                         continue
                 
-                print(f"\nNo historical data available for {symbol}, using simulation")
+                log.info("No historical data available for %s, using simulation", symbol, extra=SAMPLED)
                 return self.get_simulated_bars(symbol)
                     
-        except Exception as e:
-            print(f"Error in get_bars: {e}")
-            traceback.print_exc()
+        except Exception:
+            log.exception("Error in get_bars")
             return self.get_simulated_bars(symbol)
    
     def get_simulated_bars(self, symbol):
-        """Generate simulated bar data with realistic prices"""
+        """Generate simulated bar data with realistic prices, as a BarArray"""
         try:
             import numpy as np
             
@@ -434,7 +462,7 @@ class AlpacaClient:
                 else:
                     current_price = default_prices.get(symbol)
             except Exception as e:
-                print(f"Could not get current price: {e}")
+                log.warning("Could not get current price: %s", e)
             
             # Use default if no current price
             if not current_price:
@@ -442,7 +470,7 @@ class AlpacaClient:
                 if not current_price:
                     current_price = 100.0  # fallback default
                 
-            print(f"Using price: ${current_price:.2f}")
+            log.debug("Using price: $%.2f", current_price, extra=SAMPLED)
             
             # Generate bars with realistic price movement
             bars = []
@@ -457,8 +485,8 @@ class AlpacaClient:
             volume_mean = 10_000 if is_crypto else 1_000_000  # Adjusted volume for crypto
             volume_std = volume_mean * 0.2
             
-            print(f"Simulating with {'crypto' if is_crypto else 'stock'} parameters")
-            print(f"Volatility: {daily_volatility:.3f}")
+            log.debug("Simulating with %s parameters, volatility %.3f",
+                      'crypto' if is_crypto else 'stock', daily_volatility, extra=SAMPLED)
             
             for i in range(20):
                 price_drift = np.random.normal(0, daily_volatility) * base_price
@@ -486,16 +514,15 @@ class AlpacaClient:
                 
                 bars.append(bar)
             
-            print(f"\nSimulation summary for {symbol}:")
-            print(f"Generated {len(bars)} bars")
-            print(f"Price range: ${min(b.low for b in bars):.2f} - ${max(b.high for b in bars):.2f}")
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("Simulated %d bars for %s, price range $%.2f - $%.2f",
+                          len(bars), symbol, min(b.low for b in bars), max(b.high for b in bars))
             
-            return bars
+            return BarArray.from_objects(bars, symbol)
             
-        except Exception as e:
-            print(f"Error in simulation: {e}")
-            traceback.print_exc()
-            return []
+        except Exception:
+            log.exception("Error in simulation")
+            return BarArray.empty(symbol)
     
     def get_position(self, symbol):
         """Get position information for a symbol"""
@@ -527,50 +554,32 @@ class AlpacaClient:
             print(f"Error getting positions: {e}")
             return []
 
-    def submit_order(self, order_data):
-        """Submit an order with proper price validation"""
+    @tracer.timed("alpaca.submit_order")
+    def submit_order(self, order_data, reference_price=None):
+        """
+        Submit an order. Pass the caller's latest price as reference_price to
+        validate a take profit leg; no extra position or quote calls are made.
+        """
         try:
             if not self.trading_client:
                 self.connect()
 
-            # Get the current price from Alpaca's quote
             symbol = order_data.symbol
-            current_price = None
-            
-            try:
-                positions = self.trading_client.get_all_positions()
-                for pos in positions:
-                    if pos.symbol == symbol:
-                        current_price = float(pos.current_price)
-                        break
-            except Exception as e:
-                print(f"Warning: Could not get position price: {e}")
-
-            if not current_price:
-                try:
-                    # Get latest quote for better price accuracy
-                    quotes = self.trading_client.get_quotes(symbol, "2023-12-15", "2023-12-15", limit=1)
-                    if quotes and len(quotes) > 0:
-                        quote = quotes[0]
-                        current_price = (float(quote.ask_price) + float(quote.bid_price)) / 2
-                        print(f"Using quote midpoint price: ${current_price:.2f}")
-                except Exception as e:
-                    print(f"Warning: Could not get quote: {e}")
 
             # If we have a take profit order, ensure it's valid
-            if hasattr(order_data, 'take_profit') and order_data.take_profit:
-                if current_price:
-                    # Make sure take profit is above current price
-                    new_take_profit = max(current_price * 1.001, current_price + 0.01)
-                    order_data.take_profit['limit_price'] = new_take_profit
-                    print(f"Adjusted take profit to ${new_take_profit:.2f}")
-
-            print(f"Submitting order for {symbol}...")
+            take_profit = getattr(order_data, 'take_profit', None)
+            min_take_profit = max(reference_price * 1.001, reference_price + 0.01) if reference_price else None
+            if take_profit and min_take_profit and take_profit.limit_price < min_take_profit:
+                # Make sure take profit is above current price
+                new_take_profit = round(min_take_profit, 2)
+                take_profit.limit_price = new_take_profit
+                log.info("Adjusted take profit to $%.2f", new_take_profit)
+
+            log.info("Submitting order for %s", symbol)
             return self.trading_client.submit_order(order_data)
 
-        except Exception as e:
-            print(f"Error submitting order: {e}")
-            traceback.print_exc()
+        except Exception:
+            log.exception("Error submitting order")
             return None
 
     def cancel_all_orders(self):
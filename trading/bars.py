@@ -0,0 +1,103 @@
+# trading/bars.py
+"""
+OHLCV bars as contiguous NumPy arrays, the one bar type every source yields.
+
+cTrader trendbars arrive delta-encoded (low plus deltaOpen/deltaHigh/
+deltaClose, in 1/100000 units, stamped in minutes); Alpaca bars are objects
+with float fields; the market data bus holds BAR_DTYPE records. Each is
+turned into a BarArray in one pass, and consumers read columns (bars.close,
+bars.ts) or a DataFrame (bars.frame()) instead of walking bar objects.
+
+Timestamps are epoch milliseconds; prices are floats. records() gives the
+integer wire form back for the journal and the bus.
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.market_journal import PRICE_SCALE
+
+# Bus and journal layout: prices in 1/100000 units
+BAR_DTYPE = np.dtype([("ts", "<i8"), ("open", "<i8"), ("high", "<i8"), ("low", "<i8"), ("close", "<i8"),
+                      ("volume", "<f8")])
+
+
+class BarArray:
+    __slots__ = ("ts", "open", "high", "low", "close", "volume", "symbol")
+
+    def __init__(self, ts, open_, high, low, close, volume, symbol=None):
+        self.ts = np.asarray(ts, dtype=np.int64)
+        self.open = np.asarray(open_, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+        self.symbol = symbol
+
+    def __len__(self):
+        return len(self.ts)
+
+    def __getitem__(self, index):
+        """A slice of the bars, e.g. bars[-50:]"""
+        if not isinstance(index, slice):
+            raise TypeError("BarArray indexes by slice; read columns for single values")
+        return BarArray(self.ts[index], self.open[index], self.high[index], self.low[index], self.close[index],
+                        self.volume[index], self.symbol)
+
+    @classmethod
+    def empty(cls, symbol=None):
+        return cls((), (), (), (), (), (), symbol)
+
+    @classmethod
+    def from_wire(cls, minutes, low, d_open, d_high, d_close, volume, symbol=None):
+        """From trendbar columns: timestamps in minutes, low and deltas in 1/100000 units"""
+        low = np.asarray(low, dtype=np.int64)
+        return cls(np.asarray(minutes, dtype=np.int64) * 60000, (low + d_open) / PRICE_SCALE,
+                   (low + d_high) / PRICE_SCALE, low / PRICE_SCALE, (low + d_close) / PRICE_SCALE, volume, symbol)
+
+    @classmethod
+    def from_trendbars(cls, trendbars, symbol=None):
+        """From ProtoOATrendbar messages, oldest first"""
+        if not len(trendbars):
+            return cls.empty(symbol)
+        columns = np.array([(bar.utcTimestampInMinutes, bar.low, bar.deltaOpen, bar.deltaHigh, bar.deltaClose,
+                             bar.volume) for bar in trendbars], dtype=np.int64).T
+        return cls.from_wire(*columns, symbol=symbol)
+
+    @classmethod
+    def from_records(cls, records, symbol=None):
+        """From BAR_DTYPE records, as the market data bus stores them"""
+        return cls(records["ts"], records["open"] / PRICE_SCALE, records["high"] / PRICE_SCALE,
+                   records["low"] / PRICE_SCALE, records["close"] / PRICE_SCALE, records["volume"], symbol)
+
+    @classmethod
+    def from_objects(cls, bars, symbol=None):
+        """From bar objects with timestamp (datetime) and float OHLCV fields, e.g. Alpaca's; sorted by time"""
+        if not bars:
+            return cls.empty(symbol)
+        rows = np.array([(b.timestamp.timestamp() * 1000, b.open, b.high, b.low, b.close, b.volume) for b in bars],
+                        dtype=np.float64)
+        rows = rows[np.argsort(rows[:, 0], kind="stable")]
+        ts, open_, high, low, close, volume = rows.T
+        return cls(np.round(ts), open_, high, low, close, volume, symbol)
+
+    def records(self):
+        """BAR_DTYPE records in wire units"""
+        records = np.empty(len(self), dtype=BAR_DTYPE)
+        records["ts"] = self.ts
+        for field in ("open", "high", "low", "close"):
+            records[field] = np.round(getattr(self, field) * PRICE_SCALE)
+        records["volume"] = self.volume
+        return records
+
+    def frame(self):
+        """open/high/low/close/volume frame on a UTC index"""
+        return pd.DataFrame({
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume,
+        }, index=pd.to_datetime(self.ts, unit="ms", utc=True))
@@ -15,6 +15,18 @@ from typing import List, Any, Optional, Tuple, Dict, Callable
 # Add project root to sys.path to allow imports from other directories
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config.settings import Config
+from utils.tracing import tracer
+from utils.logger import get_logger, SAMPLED
+from trading.token_manager import TokenManager
+from trading.symbol_metadata import SymbolMetadataService
+from trading.market_journal import JournalRecorder
+from trading.market_bus import MarketBus
+from trading.order_book import OrderBook
+from trading.quotes import QuoteHistory, SymbolScale, DEFAULT_SCALE
+from trading.position_store import PositionStore
+from trading.message_dispatch import MessageDispatcher, decode_trendbars
+
+log = get_logger(__name__)
 
 # Conditional import for Twisted reactor for GUI integration
 _reactor_installed = False
@@ -27,13 +39,14 @@ except ImportError:
 # Imports from ctrader-open-api
 try:
     from ctrader_open_api import Client, TcpProtocol, EndPoints, Protobuf
-    from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoHeartbeatEvent, ProtoErrorRes, ProtoMessage
+    from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoHeartbeatEvent, ProtoErrorRes
     from ctrader_open_api.messages.OpenApiMessages_pb2 import (
         ProtoOAApplicationAuthReq, ProtoOAApplicationAuthRes,
         ProtoOAAccountAuthReq, ProtoOAAccountAuthRes,
         ProtoOAGetAccountListByAccessTokenReq, ProtoOAGetAccountListByAccessTokenRes,
         ProtoOATraderReq, ProtoOATraderRes,
         ProtoOASubscribeSpotsReq, ProtoOASubscribeSpotsRes,
+        ProtoOASubscribeDepthQuotesReq, ProtoOASubscribeDepthQuotesRes, ProtoOADepthEvent,
         ProtoOASpotEvent, ProtoOATraderUpdatedEvent,
         ProtoOANewOrderReq, ProtoOAExecutionEvent,
         ProtoOAErrorRes,
@@ -42,7 +55,11 @@ try:
         ProtoOASymbolsListReq, ProtoOASymbolsListRes,
         ProtoOASymbolByIdReq, ProtoOASymbolByIdRes,
         ProtoOAGetTrendbarsReq,
-        ProtoOAGetTrendbarsRes
+        ProtoOAGetTrendbarsRes,
+        ProtoOAOrderErrorEvent,
+        ProtoOAClosePositionReq,
+        ProtoOAReconcileReq, ProtoOAReconcileRes,
+        ProtoOASymbolChangedEvent
     )
     from ctrader_open_api.messages.OpenApiModelMessages_pb2 import (
         ProtoOATrader, ProtoOASymbol,
@@ -52,12 +69,28 @@ try:
         ProtoOAOrderStatus,
         ProtoOATrendbarPeriod
     )
+    from ctrader_open_api.factory import Factory
+    from twisted.application.internet import ClientService
+    from twisted.internet.endpoints import clientFromString
     USE_OPENAPI_LIB = True
 except ImportError as e:
     print(f"ctrader-open-api import failed ({e}); running in mock mode.")
     USE_OPENAPI_LIB = False
 
-TOKEN_FILE_PATH = "tokens.json"
+if USE_OPENAPI_LIB:
+    class LocalClient(Client):
+        """Client over plain TCP for the local fake server; Client itself always dials TLS"""
+
+        def __init__(self, host, port, protocol, numberOfMessagesToSendPerSecond=5):
+            # Same state as Client.__init__, with a tcp: endpoint instead of ssl:
+            self._runningReactor = reactor
+            self.numberOfMessagesToSendPerSecond = numberOfMessagesToSendPerSecond
+            endpoint = clientFromString(reactor, f"tcp:{host}:{port}")
+            factory = Factory.forProtocol(protocol, client=self)
+            ClientService.__init__(self, endpoint, factory)
+            self._events = dict()
+            self._responseDeferreds = dict()
+            self.isConnected = False
 
 class OAuthCallbackHandler(BaseHTTPRequestHandler):
     def __init__(self, *args, auth_code_queue: queue.Queue, **kwargs):
@@ -102,13 +135,13 @@ class CTraderClient:
         self.is_connected: bool = False
         self._is_client_connected: bool = False
         self._last_error: str = ""
-        self.price_history: Dict[str, List[float]] = {}
+        self.quotes: Dict[str, QuoteHistory] = {}
         self.history_size = 100
+        self.journal = JournalRecorder("ctrader") if Config.JOURNAL_ENABLED else None
+        self.market_bus = MarketBus.create() if Config.MARKET_BUS_ENABLED else None
 
-        self._access_token: Optional[str] = None
-        self._refresh_token: Optional[str] = None
-        self._token_expires_at: Optional[float] = None
-        self._load_tokens_from_file()
+        self.tokens = TokenManager()
+        self.tokens.load()
 
         self.ctid_trader_account_id: Optional[int] = int(Config.CTRADING_ACCOUNT_ID) if Config.CTRADING_ACCOUNT_ID else None
         self.account_id: Optional[str] = None
@@ -119,26 +152,41 @@ class CTraderClient:
 
         self.symbols_map: Dict[str, int] = {}
         self.symbol_details_map: Dict[int, Any] = {}
+        self.symbol_names: Dict[int, str] = {}  # symbolId -> name, rebuilt with symbols_map
+        self.symbol_scales: Dict[int, SymbolScale] = {}  # Built from details on first use
         self.subscribed_spot_symbol_ids: set[int] = set()
+        self.order_books: Dict[str, OrderBook] = {}
+        self._depth_books: Dict[int, OrderBook] = {}  # symbolId -> book, for depth events
+        self.positions = PositionStore()
+        self.symbol_metadata = SymbolMetadataService(self)
+        self.symbol_metadata.on_symbols_loaded = self._on_symbols_loaded
+        if self.ctid_trader_account_id:
+            self.symbol_metadata.load()
 
         self.client: Optional[Client] = None
         self._message_id_counter: int = 1
-        self._response_deferreds: Dict[str, Any] = {}
+        self._execution_listeners: List[Callable[[Any], None]] = []
+        self._spot_listeners: List[Callable[[str, float, float], None]] = []
+        self.dispatcher = MessageDispatcher()
         self._reactor_thread: Optional[threading.Thread] = None
         self._auth_code: Optional[str] = None
         self._account_auth_initiated: bool = False
 
         if USE_OPENAPI_LIB:
-            host = (
-                EndPoints.PROTOBUF_LIVE_HOST
-                if Config.CTRADER_HOST_TYPE == "live"
-                else EndPoints.PROTOBUF_DEMO_HOST
-            )
-            port = EndPoints.PROTOBUF_PORT
-            self.client = Client(host, port, TcpProtocol)
+            if Config.CTRADER_HOST_TYPE == "local":
+                self.client = LocalClient(Config.CTRADER_LOCAL_HOST, Config.CTRADER_LOCAL_PORT, TcpProtocol)
+            else:
+                host = (
+                    EndPoints.PROTOBUF_LIVE_HOST
+                    if Config.CTRADER_HOST_TYPE == "live"
+                    else EndPoints.PROTOBUF_DEMO_HOST
+                )
+                port = EndPoints.PROTOBUF_PORT
+                self.client = Client(host, port, TcpProtocol)
             self.client.setConnectedCallback(self._on_client_connected)
             self.client.setDisconnectedCallback(self._on_client_disconnected)
             self.client.setMessageReceivedCallback(self._on_message_received)
+            self._register_handlers()
         else:
             print("Trader initialized in MOCK mode.")
 
@@ -146,40 +194,6 @@ class CTraderClient:
         self._http_server_thread: Optional[threading.Thread] = None
         self._http_server: Optional[HTTPServer] = None
 
-    def _save_tokens_to_file(self):
-        tokens = {
-            "access_token": self._access_token,
-            "refresh_token": self._refresh_token,
-            "token_expires_at": self._token_expires_at,
-        }
-        try:
-            with open(TOKEN_FILE_PATH, "w") as f:
-                json.dump(tokens, f)
-            print(f"Tokens saved to {TOKEN_FILE_PATH}")
-        except IOError as e:
-            print(f"Error saving tokens to {TOKEN_FILE_PATH}: {e}")
-
-    def _load_tokens_from_file(self):
-        try:
-            with open(TOKEN_FILE_PATH, "r") as f:
-                tokens = json.load(f)
-            self._access_token = tokens.get("access_token")
-            self._refresh_token = tokens.get("refresh_token")
-            self._token_expires_at = tokens.get("token_expires_at")
-            if self._access_token:
-                print(f"Tokens loaded from {TOKEN_FILE_PATH}. Access token: {self._access_token[:20]}...")
-            else:
-                print(f"{TOKEN_FILE_PATH} not found or no access token in it. Will need OAuth.")
-        except FileNotFoundError:
-            print(f"Token file {TOKEN_FILE_PATH} not found. New OAuth flow will be required.")
-        except (IOError, json.JSONDecodeError) as e:
-            print(f"Error loading tokens from {TOKEN_FILE_PATH}: {e}.")
-            try:
-                os.remove(TOKEN_FILE_PATH)
-                print(f"Removed corrupted token file: {TOKEN_FILE_PATH}")
-            except OSError as rm_err:
-                print(f"Error removing corrupted token file: {rm_err}")
-
     def _next_message_id(self) -> str:
         mid = str(self._message_id_counter)
         self._message_id_counter += 1
@@ -205,62 +219,50 @@ class CTraderClient:
         self.is_connected = False
         self._is_client_connected = False
         self._account_auth_initiated = False
+        # Depth subscriptions end with the session; strategies subscribe again
+        self.order_books.clear()
+        self._depth_books.clear()
+        self.positions.invalidate()
         if self.on_status_update:
             self.on_status_update("Disconnected", "red")
 
+    def _register_handlers(self) -> None:
+        route = self.dispatcher.register
+        route(ProtoOASpotEvent, self._handle_spot_event)
+        route(ProtoOAExecutionEvent, self._handle_execution_event)
+        route(ProtoOADepthEvent, self._handle_depth_event)
+        route(ProtoOAApplicationAuthRes, self._handle_app_auth_response)
+        route(ProtoOAAccountAuthRes, self._handle_account_auth_response)
+        route(ProtoOAGetAccountListByAccessTokenRes, self._handle_get_account_list_response)
+        route(ProtoOASymbolsListRes, self._handle_symbols_list_response)
+        route(ProtoOASymbolByIdRes, self._handle_symbol_details_response)
+        route(ProtoOASymbolChangedEvent, self.symbol_metadata.on_symbol_changed)
+        route(ProtoOATraderRes, self._handle_trader_response)
+        route(ProtoOATraderUpdatedEvent, self._handle_trader_updated_event)
+        route(ProtoOAErrorRes, self._handle_error_response)
+        route(ProtoErrorRes, self._handle_error_response)
+        # Delivered to their callers through Deferreds, or nothing to do: never decoded here
+        self._ignored_payload_types = {
+            ProtoHeartbeatEvent().payloadType,
+            ProtoOAGetTrendbarsRes().payloadType,
+            ProtoOASubscribeDepthQuotesRes().payloadType,
+            ProtoOAReconcileRes().payloadType,
+        }
+
     def _on_message_received(self, client: Client, message: Any) -> None:
-        try:
-            actual_message = Protobuf.extract(message)
-        except Exception as e:
-            print(f"Error using Protobuf.extract: {e}. Falling back to manual deserialization if possible.")
-            actual_message = message
-
-        # Check if the message corresponds to a pending deferred
-        if hasattr(actual_message, "clientMsgId") and actual_message.clientMsgId in self._response_deferreds:
-            d = self._response_deferreds.pop(actual_message.clientMsgId)
-            if isinstance(actual_message, (ProtoOAErrorRes, ProtoErrorRes)):
-                d.errback(Exception(f"{actual_message.errorCode}: {actual_message.description}"))
-            else:
-                d.callback(actual_message)
+        if self.dispatcher.dispatch(message) or message.payloadType in self._ignored_payload_types:
             return
-
-        if isinstance(actual_message, ProtoOAApplicationAuthRes):
-            self._handle_app_auth_response(actual_message)
-        elif isinstance(actual_message, ProtoOAAccountAuthRes):
-            self._handle_account_auth_response(actual_message)
-        elif isinstance(actual_message, ProtoOAGetAccountListByAccessTokenRes):
-            self._handle_get_account_list_response(actual_message)
-        elif isinstance(actual_message, ProtoOASymbolsListRes):
-            self._handle_symbols_list_response(actual_message)
-        elif isinstance(actual_message, ProtoOASymbolByIdRes):
-            self._handle_symbol_details_response(actual_message)
-        elif isinstance(actual_message, ProtoOATraderRes):
-            self._handle_trader_response(actual_message)
-        elif isinstance(actual_message, ProtoOATraderUpdatedEvent):
-            self._handle_trader_updated_event(actual_message)
-        elif isinstance(actual_message, ProtoOASpotEvent):
-            self._handle_spot_event(actual_message)
-        elif isinstance(actual_message, ProtoOAExecutionEvent):
-            self._handle_execution_event(actual_message)
-        elif isinstance(actual_message, ProtoOAGetTrendbarsRes):
-            self._handle_get_trendbars_response(actual_message)
-        elif isinstance(actual_message, ProtoHeartbeatEvent):
-            pass
-        elif isinstance(actual_message, (ProtoOAErrorRes, ProtoErrorRes)):
-            self._last_error = f"{actual_message.errorCode}: {actual_message.description}"
-            print(self._last_error)
-            if "ALREADY_LOGGED_IN" in actual_message.errorCode:
-                # This can happen on reconnect. Treat as success and proceed.
-                print("Application is already logged in. Proceeding with account authentication.")
-                self._handle_app_auth_response(None)
-            elif "NOT_AUTHENTICATED" in actual_message.errorCode:
-                self.disconnect()
-        else:
-            if isinstance(actual_message, ProtoMessage):
-                print(f"Unhandled ProtoMessage with PayloadType {actual_message.payloadType}")
-            else:
-                print(f"Unhandled message type in _on_message_received: {type(actual_message)}")
-
+        log.debug("Unhandled ProtoMessage with PayloadType %s", message.payloadType, extra=SAMPLED)
+
+    def _handle_error_response(self, response: ProtoOAErrorRes | ProtoErrorRes) -> None:
+        self._last_error = f"{response.errorCode}: {response.description}"
+        print(self._last_error)
+        if "ALREADY_LOGGED_IN" in response.errorCode:
+            # This can happen on reconnect. Treat as success and proceed.
+            print("Application is already logged in. Proceeding with account authentication.")
+            self._handle_app_auth_response(None)
+        elif "NOT_AUTHENTICATED" in response.errorCode:
+            self.disconnect()
 
     def _handle_app_auth_response(self, response: ProtoOAApplicationAuthRes | None) -> None:
         if response is not None:
@@ -269,17 +271,17 @@ class CTraderClient:
         if self._account_auth_initiated:
             return
 
-        if not self._access_token:
+        if not self.tokens.access_token:
             self._last_error = "Critical: OAuth access token not available for subsequent account operations."
             print(self._last_error)
             if self.client:
                 self.client.stopService()
             return
 
-        if self.ctid_trader_account_id and self._access_token:
+        if self.ctid_trader_account_id and self.tokens.access_token:
             self._account_auth_initiated = True
             self._send_account_auth_request(self.ctid_trader_account_id)
-        elif self._access_token:
+        elif self.tokens.access_token:
             self._account_auth_initiated = True
             self._send_get_account_list_request()
         else:
@@ -297,6 +299,7 @@ class CTraderClient:
                 self.on_status_update("Connected", "green")
             self._send_get_trader_request(self.ctid_trader_account_id)
             self._send_get_symbols_list_request()
+            self.get_positions()
         else:
             self._last_error = "Account authentication failed (ID mismatch or error)."
             self.is_connected = False
@@ -321,20 +324,23 @@ class CTraderClient:
         self._send_account_auth_request(self.ctid_trader_account_id)
 
     def _handle_symbols_list_response(self, response: ProtoOASymbolsListRes):
-        self.symbols_map.clear()
-        for light_symbol_proto in response.symbol:
-            self.symbols_map[light_symbol_proto.symbolName] = light_symbol_proto.symbolId
-        print(f"Loaded {len(self.symbols_map)} symbols.")
+        self.symbol_metadata.apply_symbol_list(response)
+
+    def _on_symbols_loaded(self):
+        self.symbol_names = {symbol_id: name for name, symbol_id in self.symbols_map.items()}
         # You might want to subscribe to a default symbol here
         # For example, find "EURUSD" and subscribe
         if "EURUSD" in self.symbols_map:
             self._send_subscribe_spots_request(self.ctid_trader_account_id, [self.symbols_map["EURUSD"]])
 
-
     def _handle_symbol_details_response(self, response: ProtoOASymbolByIdRes):
-        for detailed_symbol_proto in response.symbol:
-            self.symbol_details_map[detailed_symbol_proto.symbolId] = detailed_symbol_proto
-        print(f"Loaded details for {len(response.symbol)} symbols.")
+        self.symbol_metadata.store(response)
+        for proto in response.symbol:
+            scale = self.symbol_scales[proto.symbolId] = SymbolScale.from_details(proto)
+            history = self.quotes.get(self.symbol_name(proto.symbolId))
+            if history is not None:
+                history.scale = scale
+        log.debug("Loaded details for %d symbols.", len(response.symbol))
 
     def _handle_trader_response(self, response: ProtoOATraderRes):
         self._update_trader_details("Trader details response.", response.trader)
@@ -357,27 +363,97 @@ class CTraderClient:
             if self.on_account_update:
                 self.on_account_update(self.get_account_summary())
 
+    def symbol_name(self, symbol_id: int) -> Optional[str]:
+        name = self.symbol_names.get(symbol_id)
+        if name is None and len(self.symbol_names) != len(self.symbols_map):
+            # symbols_map was filled without going through _on_symbols_loaded (e.g. from the cache)
+            self.symbol_names = {s_id: s_name for s_name, s_id in self.symbols_map.items()}
+            name = self.symbol_names.get(symbol_id)
+        return name
+
+    def symbol_scale(self, symbol_id: int) -> SymbolScale:
+        """The symbol's SymbolScale; the default 5-digit one until its details are loaded"""
+        scale = self.symbol_scales.get(symbol_id)
+        if scale is None:
+            details = self.symbol_details_map.get(symbol_id)
+            if details is None:
+                return DEFAULT_SCALE
+            scale = self.symbol_scales[symbol_id] = SymbolScale.from_details(details)
+        return scale
+
+    @property
+    def price_history(self) -> Dict[str, List[float]]:
+        """{symbol: [bid, ...]} oldest first, as plain floats"""
+        return {name: history.bids().tolist() for name, history in self.quotes.items()}
+
     def _handle_spot_event(self, event: ProtoOASpotEvent):
         symbol_id = event.symbolId
-        symbol_name = next((name for name, s_id in self.symbols_map.items() if s_id == symbol_id), None)
+        symbol_name = self.symbol_name(symbol_id)
         if not symbol_name:
             return
+        ts = event.timestamp if event.HasField('timestamp') else int(time.time() * 1000)
+
+        if self.journal is not None:
+            self.journal.record_tick(ts, self.journal.symbol_key(symbol_name, symbol_id), event.bid, event.ask)
+        if self.market_bus is not None:
+            self.market_bus.publish_tick(symbol_name, ts, event.bid, event.ask)
 
-        if symbol_name not in self.price_history:
-            self.price_history[symbol_name] = []
+        history = self.quotes.get(symbol_name)
+        if history is None:
+            history = self.quotes[symbol_name] = QuoteHistory(self.history_size, self.symbol_scale(symbol_id))
+        # Prices stay integer wire units; floats are made when a window is read
+        history.update(ts, event.bid, event.ask)
 
-        if hasattr(event, 'bid') and event.bid is not None:
-            digits = self.symbol_details_map.get(symbol_id, {}).get('digits', 5)
-            price = event.bid / (10**digits)
-            self.price_history[symbol_name].append(price)
-            if len(self.price_history[symbol_name]) > self.history_size:
-                self.price_history[symbol_name].pop(0)
+        if event.bid:
+            price = history.scale.to_price(event.bid)
+            log.debug("Spot %s bid=%s", symbol_name, price, extra=SAMPLED)
+            for listener in self._spot_listeners:
+                listener(symbol_name, price, ts / 1000)
 
     def _handle_execution_event(self, event: ProtoOAExecutionEvent):
-        print(f"Execution Event: {event}")
+        # Protobuf text formatting is expensive; only pay for it when DEBUG is on
+        log.debug("Execution Event: %s", event)
+        self.positions.apply(event)
+        for listener in list(self._execution_listeners):
+            try:
+                listener(event)
+            except Exception:
+                log.exception("Execution listener failed")
+        # After the order manager has seen the fill, so position listeners never count it twice
+        self.positions.notify()
+
+    def _handle_depth_event(self, event: ProtoOADepthEvent):
+        book = self._depth_books.get(event.symbolId)
+        if book is not None:
+            book.apply(event)
+
+    def add_execution_listener(self, callback: Callable[[Any], None]) -> None:
+        """Register callback(ProtoOAExecutionEvent); called on the reactor thread"""
+        if callback not in self._execution_listeners:
+            self._execution_listeners.append(callback)
+
+    def remove_execution_listener(self, callback: Callable[[Any], None]) -> None:
+        if callback in self._execution_listeners:
+            self._execution_listeners.remove(callback)
+
+    def add_spot_listener(self, callback: Callable[[str, float, float], None]) -> None:
+        """Register callback(symbol_name, bid, timestamp_seconds); called on the reactor thread"""
+        if callback not in self._spot_listeners:
+            self._spot_listeners.append(callback)
+
+    def call_in_reactor(self, func: Callable, *args, **kwargs) -> None:
+        """Run func on the reactor thread; the Open API client must only be used from there"""
+        if _reactor_installed:
+            reactor.callFromThread(func, *args, **kwargs)
+        else:
+            func(*args, **kwargs)
+
+    def lot_size(self, symbol_id: int) -> Optional[int]:
+        details = self.symbol_details_map.get(symbol_id)
+        return details.lotSize if details is not None else None
 
     def _handle_send_error(self, failure: Any) -> None:
-        print(f"Send error: {failure.getErrorMessage()}")
+        log.error("Send error: %s", failure.getErrorMessage())
         self._last_error = failure.getErrorMessage()
 
     def connect(self) -> bool:
@@ -385,11 +461,16 @@ class CTraderClient:
             self._last_error = "OpenAPI library not available (mock mode)."
             return False
 
-        if self._access_token and not self._is_token_expired():
+        if Config.CTRADER_HOST_TYPE == "local":
+            # The fake server accepts any token; never send a real one or open the browser
+            self.tokens.use_static("local")
+            return self._start_openapi_client_service()
+
+        if self.tokens.access_token and not self._is_token_expired():
             print("Using previously saved, valid access token.")
             return self._start_openapi_client_service()
 
-        if self._refresh_token:
+        if self.tokens.refresh_token:
             if self.refresh_access_token():
                 print("Access token refreshed successfully.")
                 return self._start_openapi_client_service()
@@ -474,21 +555,15 @@ class CTraderClient:
                 "client_id": Config.CTRADING_CLIENT_ID,
                 "client_secret": Config.CTRADING_CLIENT_SECRET,
             }
-            response = requests.post(Config.CTRADER_SPOTWARE_TOKEN_URL, data=payload)
+            response = requests.post(
+                Config.CTRADER_SPOTWARE_TOKEN_URL, data=payload, timeout=Config.TOKEN_REQUEST_TIMEOUT_SEC
+            )
             response.raise_for_status()
-            token_data = response.json()
 
-            if "access_token" not in token_data:
+            if not self.tokens.update(response.json()):
                 self._last_error = "OAuth2 Error: access_token not in response."
                 return False
 
-            self._access_token = token_data["access_token"]
-            self._refresh_token = token_data.get("refresh_token")
-            expires_in = token_data.get("expires_in")
-            if expires_in:
-                self._token_expires_at = time.time() + int(expires_in)
-
-            self._save_tokens_to_file()
             return self._start_openapi_client_service()
 
         except requests.exceptions.RequestException as e:
@@ -500,7 +575,14 @@ class CTraderClient:
             return True
 
         try:
-            self.client.startService()
+            self.tokens.start()
+            if self.journal is not None:
+                self.journal.start()
+            if _reactor_installed and reactor.running:
+                # The service must be started on the reactor thread once it runs
+                reactor.callFromThread(self.client.startService)
+            else:
+                self.client.startService()
             if _reactor_installed:
                 # Some environments (e.g. when Twisted is installed with the
                 # asyncio reactor) may already have an event loop running.
@@ -528,38 +610,11 @@ class CTraderClient:
             return False
 
     def refresh_access_token(self) -> bool:
-        if not self._refresh_token:
-            return False
-        try:
-            payload = {
-                "grant_type": "refresh_token",
-                "refresh_token": self._refresh_token,
-                "client_id": Config.CTRADING_CLIENT_ID,
-                "client_secret": Config.CTRADING_CLIENT_SECRET,
-            }
-            response = requests.post(Config.CTRADER_SPOTWARE_TOKEN_URL, data=payload)
-            response.raise_for_status()
-            token_data = response.json()
-
-            if "access_token" not in token_data:
-                return False
-
-            self._access_token = token_data["access_token"]
-            if "refresh_token" in token_data:
-                self._refresh_token = token_data["refresh_token"]
-            expires_in = token_data.get("expires_in")
-            if expires_in:
-                self._token_expires_at = time.time() + int(expires_in)
-
-            self._save_tokens_to_file()
-            return True
-        except requests.exceptions.RequestException:
-            return False
+        """Blocking refresh for connect(); coalesces with any refresh already in flight"""
+        return self.tokens.refresh(timeout=Config.TOKEN_REQUEST_TIMEOUT_SEC)
 
     def _is_token_expired(self, buffer_seconds: int = 60) -> bool:
-        if not self._access_token or not self._token_expires_at:
-            return True
-        return time.time() > (self._token_expires_at - buffer_seconds)
+        return self.tokens.is_expired(buffer_seconds)
 
     def set_account_id(self, account_id: str):
         """Sets the ctidTraderAccountId for the client."""
@@ -571,6 +626,9 @@ class CTraderClient:
             print("CTraderClient: Invalid Account ID provided. Set to None.")
 
     def disconnect(self) -> None:
+        self.tokens.stop()
+        if self.journal is not None:
+            self.journal.stop()
         if self.client:
             self.client.stopService()
         if _reactor_installed and reactor.running:
@@ -586,78 +644,151 @@ class CTraderClient:
             "account_id": self.account_id,
             "balance": self.balance,
             "equity": self.equity,
-            "margin": self.used_margin
+            "margin": self.used_margin,
+            "currency": self.currency
         }
 
     def _send_account_auth_request(self, ctid: int) -> None:
-        if not self._ensure_valid_token():
+        if not self._ensure_valid_token(lambda: self._send_account_auth_request(ctid)):
             return
         req = ProtoOAAccountAuthReq()
         req.ctidTraderAccountId = ctid
-        req.accessToken = self._access_token or ""
+        req.accessToken = self.tokens.access_token or ""
         self.client.send(req)
 
     def _send_get_account_list_request(self) -> None:
-        if not self._ensure_valid_token():
+        if not self._ensure_valid_token(lambda: self._send_get_account_list_request()):
             return
         req = ProtoOAGetAccountListByAccessTokenReq()
-        req.accessToken = self._access_token
+        req.accessToken = self.tokens.access_token
         self.client.send(req)
 
     def _send_get_trader_request(self, ctid: int) -> None:
-        if not self._ensure_valid_token():
+        if not self._ensure_valid_token(lambda: self._send_get_trader_request(ctid)):
             return
         req = ProtoOATraderReq()
         req.ctidTraderAccountId = ctid
         self.client.send(req)
 
     def _send_get_symbols_list_request(self) -> None:
-        if not self._ensure_valid_token():
+        if not self._ensure_valid_token(lambda: self._send_get_symbols_list_request()):
             return
-        req = ProtoOASymbolsListReq()
-        req.ctidTraderAccountId = self.ctid_trader_account_id
-        self.client.send(req)
+        # The account may only be known now (discovered from the account list)
+        if not self.symbols_map:
+            self.symbol_metadata.load()
+        self.symbol_metadata.refresh()
 
     def _send_subscribe_spots_request(self, ctid_trader_account_id: int, symbol_ids: List[int]) -> None:
-        if not self._ensure_valid_token():
+        if not self._ensure_valid_token(lambda: self._send_subscribe_spots_request(ctid_trader_account_id, symbol_ids)):
             return
         req = ProtoOASubscribeSpotsReq()
         req.ctidTraderAccountId = ctid_trader_account_id
         req.symbolId.extend(symbol_ids)
         self.client.send(req)
 
-    def _ensure_valid_token(self) -> bool:
-        if self._is_token_expired():
-            if not self.refresh_access_token():
-                if self.client and self._is_client_connected:
-                    self.client.stopService()
-                self.is_connected = False
-                return False
-        return True
+    def _send_subscribe_depth_request(self, ctid_trader_account_id: int, symbol_ids: List[int]) -> None:
+        if not self._ensure_valid_token(lambda: self._send_subscribe_depth_request(ctid_trader_account_id, symbol_ids)):
+            return
+        req = ProtoOASubscribeDepthQuotesReq()
+        req.ctidTraderAccountId = ctid_trader_account_id
+        req.symbolId.extend(symbol_ids)
+        self.client.send(req)
 
-    def _send_request(self, request):
-        """Helper to send a request and return a Deferred."""
-        if not self.is_connected:
-            print("Not connected to cTrader")
-            return None
+    def subscribe_depth(self, symbol_name):
+        """Subscribe to depth quotes; the book is then order_books[symbol_name]. Repeat calls do nothing."""
+        if not self.is_connected or symbol_name in self.order_books:
+            return
+        symbol_id = self.symbols_map.get(symbol_name)
+        if not symbol_id:
+            log.warning("Symbol '%s' not found.", symbol_name, extra=SAMPLED)
+            return
+        if symbol_id not in self.symbol_details_map:
+            # The ladder's tick comes from the symbol's digits; the next call subscribes
+            self.symbol_metadata.ensure([symbol_id])
+            return
+        book = OrderBook(symbol_name, self.symbol_scale(symbol_id).point)
+        self.order_books[symbol_name] = book
+        self._depth_books[symbol_id] = book
+        self._send_subscribe_depth_request(self.ctid_trader_account_id, [symbol_id])
+
+    def _ensure_valid_token(self, retry: Optional[Callable[[], None]] = None) -> bool:
+        """
+        Never blocks: the token manager refreshes ahead of expiry in the background. If the
+        token has already lapsed, a refresh is started and `retry` is re-run on the reactor
+        thread once it succeeds.
+        """
+        if not self._is_token_expired(buffer_seconds=0):
+            return True
 
-        client_msg_id = self._next_message_id()
-        request.clientMsgId = client_msg_id
+        log.warning("Access token expired; deferring request until it is refreshed")
+        self.tokens.refresh_async(lambda ok: self.call_in_reactor(self._on_deferred_refresh, ok, retry))
+        return False
 
-        d = Deferred()
-        self._response_deferreds[client_msg_id] = d
+    def _on_deferred_refresh(self, ok: bool, retry: Optional[Callable[[], None]]) -> None:
+        if ok:
+            if retry:
+                retry()
+            return
+        self._last_error = "Access token expired and could not be refreshed."
+        if self.client and self._is_client_connected:
+            self.client.stopService()
+        self.is_connected = False
 
-        self.client.send(request)
+    def _send_request(self, request, decode=None):
+        """Send a request and return a Deferred that fires with the decoded response.
+
+        decode(message) replaces the default Protobuf.extract of the response envelope.
+        """
+        if not self.is_connected:
+            log.warning("Not connected to cTrader", extra=SAMPLED)
+            return None
+
+        # Client.send matches the response by the wrapper's clientMsgId
+        d = self.client.send(request, clientMsgId=self._next_message_id())
+        d.addCallback(decode or self._decode_response)
         return d
 
+    @staticmethod
+    def _decode_response(message):
+        response = Protobuf.extract(message)
+        if isinstance(response, (ProtoOAErrorRes, ProtoErrorRes)):
+            raise Exception(f"{response.errorCode}: {response.description}")
+        if isinstance(response, ProtoOAOrderErrorEvent):
+            raise Exception(f"{response.errorCode}: {response.description}")
+        return response
+
+    @classmethod
+    def _decode_trendbars(cls, message):
+        if message.payloadType != ProtoOAGetTrendbarsRes().payloadType:
+            return cls._decode_response(message)
+        return decode_trendbars(message.payload)
+
     def get_positions(self):
-        request = ProtoOAGetPositionListReq()
+        """Snapshot open positions and orders into self.positions (execution events keep it current after).
+
+        The Deferred fires with the ProtoOAReconcileRes, or None if the request failed.
+        """
+        request = ProtoOAReconcileReq()
         request.ctidTraderAccountId = self.ctid_trader_account_id
-        return self._send_request(request)
+        d = self._send_request(request)
+        if d is not None:
+            self.positions.begin_reconcile()
+            d.addCallback(self._on_reconcile)
+            d.addErrback(self._on_reconcile_failed)
+        return d
+
+    def _on_reconcile(self, response):
+        self.positions.reconcile(response)
+        return response
 
+    def _on_reconcile_failed(self, failure):
+        log.error("Could not reconcile positions: %s", failure.getErrorMessage())
+        self.positions.invalidate()
+
+    @tracer.timed("ctrader.submit_order")
     def submit_order(self, order_data):
         if not self.is_connected:
-            print("Not connected to cTrader")
+            log.warning("Not connected to cTrader", extra=SAMPLED)
             return
 
         symbol_name = order_data.get("symbol")
@@ -665,17 +796,34 @@ class CTraderClient:
         qty_lots = order_data.get("qty")
 
         if not all([symbol_name, side, qty_lots]):
-            print("Order data is missing required fields.")
+            log.error("Order data is missing required fields: %s", order_data)
             return
 
         symbol_id = self.symbols_map.get(symbol_name)
         if not symbol_id:
-            print(f"Symbol '{symbol_name}' not found.")
+            log.error("Symbol '%s' not found.", symbol_name)
             return
 
+        if symbol_id not in self.symbol_details_map:
+            # Not prefetched yet: fetch this symbol's details, then send
+            log.info("Fetching details for '%s' before submitting", symbol_name)
+            d = self.symbol_metadata.ensure([symbol_id])
+            d.addCallback(self._require_sent, self._send_new_order, symbol_name, symbol_id, side, qty_lots, order_data)
+            return d
+
+        return self._send_new_order(symbol_name, symbol_id, side, qty_lots, order_data)
+
+    @staticmethod
+    def _require_sent(_, send, *args):
+        d = send(*args)
+        if d is None:
+            raise Exception("Request could not be sent; see log")
+        return d
+
+    def _send_new_order(self, symbol_name, symbol_id, side, qty_lots, order_data):
         symbol_details = self.symbol_details_map.get(symbol_id)
         if not symbol_details:
-            print(f"Details for symbol '{symbol_name}' not loaded.")
+            log.error("Details for symbol '%s' could not be loaded.", symbol_name)
             return
 
         volume_in_units = int(qty_lots * symbol_details.lotSize)
@@ -686,8 +834,45 @@ class CTraderClient:
         request.orderType = ProtoOAOrderType.MARKET
         request.tradeSide = ProtoOATradeSide.BUY if side.upper() == "BUY" else ProtoOATradeSide.SELL
         request.volume = volume_in_units
+        if order_data.get("client_order_id"):
+            request.clientOrderId = order_data["client_order_id"]
+        if order_data.get("label"):
+            request.label = order_data["label"]
 
-        print(f"Submitting order: {request}")
+        log.info("Submitting order: %s", request)
+        return self._send_request(request)
+
+    @tracer.timed("ctrader.close_position")
+    def close_position(self, position_id, qty_lots, symbol_name=None):
+        """Close qty_lots of an open position; cTrader needs the positionId on hedging accounts"""
+        if not self.is_connected:
+            log.warning("Not connected to cTrader", extra=SAMPLED)
+            return
+
+        symbol_id = self.symbols_map.get(symbol_name) if symbol_name else None
+        if not symbol_id:
+            log.error("Symbol '%s' not found.", symbol_name)
+            return
+
+        if symbol_id not in self.symbol_details_map:
+            d = self.symbol_metadata.ensure([symbol_id])
+            d.addCallback(self._require_sent, self._send_close_position, symbol_name, symbol_id, position_id, qty_lots)
+            return d
+
+        return self._send_close_position(symbol_name, symbol_id, position_id, qty_lots)
+
+    def _send_close_position(self, symbol_name, symbol_id, position_id, qty_lots):
+        lot_size = self.lot_size(symbol_id)
+        if not lot_size:
+            log.error("Details for symbol '%s' could not be loaded.", symbol_name)
+            return
+
+        request = ProtoOAClosePositionReq()
+        request.ctidTraderAccountId = self.ctid_trader_account_id
+        request.positionId = int(position_id)
+        request.volume = int(qty_lots * lot_size)
+
+        log.info("Closing position: %s", request)
         return self._send_request(request)
 
     def get_tradable_symbols(self):
@@ -697,15 +882,20 @@ class CTraderClient:
         return list(self.symbols_map.keys())
 
     def get_bars(self, symbol, is_crypto=False):
+        """Last 100 one-minute bars; a Deferred that fires with a BarArray, the newest bar still forming"""
         if not self.is_connected:
-            print("Not connected to cTrader")
+            log.warning("Not connected to cTrader", extra=SAMPLED)
             return None
 
         symbol_id = self.symbols_map.get(symbol)
         if not symbol_id:
-            print(f"Symbol '{symbol}' not found.")
+            log.warning("Symbol '%s' not found.", symbol, extra=SAMPLED)
             return None
 
+        # Orders on the symbol need its lot size; fetch details alongside if not cached
+        if symbol_id not in self.symbol_details_map:
+            self.symbol_metadata.ensure([symbol_id])
+
         request = ProtoOAGetTrendbarsReq()
         request.ctidTraderAccountId = self.ctid_trader_account_id
         request.symbolId = symbol_id
@@ -717,13 +907,39 @@ class CTraderClient:
         request.fromTimestamp = from_timestamp
         request.toTimestamp = to_timestamp
 
-        return self._send_request(request)
+        d = self._send_request(request, self._decode_trendbars)
+        if d is None:
+            return None
+        d.addCallback(self._name_bars, symbol)
+        if self.journal is not None:
+            d.addCallback(self._journal_trendbars, self.journal.symbol_key(symbol, symbol_id))
+        if self.market_bus is not None:
+            d.addCallback(self._publish_trendbars, symbol)
+        return d
+
+    @staticmethod
+    def _name_bars(bars, symbol):
+        bars.symbol = symbol
+        return bars
+
+    def _journal_trendbars(self, bars, symbol_key):
+        # The newest bar is still forming; record_bar skips bars already journaled
+        for ts, open_, high, low, close, volume in bars.records()[:-1].tolist():
+            self.journal.record_bar(ts, symbol_key, open_, high, low, close, volume)
+        return bars
+
+    def _publish_trendbars(self, bars, symbol):
+        # Including the forming bar, which replaces its previous version on the bus
+        self.market_bus.publish_bars(symbol, bars.records().tolist())
+        return bars
 
     def check_connection(self):
         return self.is_connected
 
     def close(self):
         self.disconnect()
+        if self.market_bus is not None:
+            self.market_bus.close()
 
 if __name__ == '__main__':
     # Example usage (for testing)
@@ -0,0 +1,515 @@
+# trading/ctrader_fake_server.py
+"""
+Local stand-in for the cTrader Open API protobuf server.
+
+Speaks the same length-prefixed ProtoMessage framing as the real endpoint
+over plain TCP, so CTraderClient (with CTRADER_HOST_TYPE = "local") can be
+run end to end, reactor threading included, without network access or
+credentials. Supported: application and account auth (any token is
+accepted), account list, trader details, symbol list and details, spot
+subscriptions streamed at a configurable total rate, trendbars, market
+orders and position closes with execution events, and reconcile.
+
+Prices on the wire follow the real API: spot and trendbar prices are
+integers in 1/100000 of a unit, execution prices are doubles.
+
+    python -m trading.ctrader_fake_server --port 5035 --spot-rate 20000 --symbols 50
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+from twisted.internet import reactor, task
+from twisted.internet.protocol import Factory
+from twisted.protocols.basic import Int32StringReceiver
+from ctrader_open_api import Protobuf
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage, ProtoHeartbeatEvent
+from ctrader_open_api.messages.OpenApiMessages_pb2 import (
+    ProtoOAApplicationAuthReq, ProtoOAApplicationAuthRes,
+    ProtoOAAccountAuthReq, ProtoOAAccountAuthRes,
+    ProtoOAGetAccountListByAccessTokenReq, ProtoOAGetAccountListByAccessTokenRes,
+    ProtoOATraderReq, ProtoOATraderRes,
+    ProtoOASymbolsListReq, ProtoOASymbolsListRes,
+    ProtoOASymbolByIdReq, ProtoOASymbolByIdRes,
+    ProtoOASubscribeSpotsReq, ProtoOASubscribeSpotsRes,
+    ProtoOAUnsubscribeSpotsReq, ProtoOAUnsubscribeSpotsRes,
+    ProtoOASpotEvent,
+    ProtoOAGetTrendbarsReq, ProtoOAGetTrendbarsRes,
+    ProtoOANewOrderReq, ProtoOAClosePositionReq,
+    ProtoOAExecutionEvent, ProtoOAOrderErrorEvent,
+    ProtoOAReconcileReq, ProtoOAReconcileRes,
+    ProtoOAErrorRes
+)
+from ctrader_open_api.messages.OpenApiModelMessages_pb2 import (
+    ProtoOACtidTraderAccount, ProtoOATrader, ProtoOALightSymbol, ProtoOASymbol, ProtoOATrendbar,
+    ProtoOAPosition, ProtoOAOrder, ProtoOADeal, ProtoOAClosePositionDetail, ProtoOATradeData,
+    ProtoOAOrderType, ProtoOATradeSide, ProtoOAExecutionType, ProtoOAOrderStatus,
+    ProtoOAPositionStatus, ProtoOADealStatus, ProtoOATrendbarPeriod
+)
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+PRICE_SCALE = 100000  # Open API spot and trendbar prices are in 1/100000 of a unit
+DEFAULT_ACCOUNT_ID = 1000001
+
+# name, digits, pipPosition, starting price
+DEFAULT_SYMBOLS = [
+    ("EURUSD", 5, 4, 1.08500),
+    ("GBPUSD", 5, 4, 1.27000),
+    ("USDJPY", 3, 2, 151.200),
+    ("AUDUSD", 5, 4, 0.65500),
+    ("USDCHF", 5, 4, 0.90500),
+    ("USDCAD", 5, 4, 1.36000),
+    ("NZDUSD", 5, 4, 0.60000),
+    ("XAUUSD", 2, 1, 2350.00),
+]
+
+PERIOD_MINUTES = {
+    ProtoOATrendbarPeriod.M1: 1, ProtoOATrendbarPeriod.M2: 2, ProtoOATrendbarPeriod.M3: 3,
+    ProtoOATrendbarPeriod.M4: 4, ProtoOATrendbarPeriod.M5: 5, ProtoOATrendbarPeriod.M10: 10,
+    ProtoOATrendbarPeriod.M15: 15, ProtoOATrendbarPeriod.M30: 30, ProtoOATrendbarPeriod.H1: 60,
+    ProtoOATrendbarPeriod.H4: 240, ProtoOATrendbarPeriod.H12: 720, ProtoOATrendbarPeriod.D1: 1440,
+    ProtoOATrendbarPeriod.W1: 10080, ProtoOATrendbarPeriod.MN1: 43200,
+}
+MAX_TRENDBARS = 5000
+
+
+class FakeSymbol:
+    def __init__(self, symbol_id, name, digits, pip_position, price, lot_size=10000000):
+        self.symbol_id = symbol_id
+        self.name = name
+        self.digits = digits
+        self.pip_position = pip_position
+        self.lot_size = lot_size  # In cents of units, like the real server
+        self.bid = int(round(price * PRICE_SCALE))
+        # One point of the symbol's own precision, in wire units
+        self.point = max(1, PRICE_SCALE // 10 ** digits)
+        self.spread = max(1, PRICE_SCALE // 10 ** pip_position)  # One pip
+
+    @property
+    def ask(self):
+        return self.bid + self.spread
+
+    def light(self):
+        return ProtoOALightSymbol(symbolId=self.symbol_id, symbolName=self.name, enabled=True,
+                                  description=f"{self.name} (fake)")
+
+    def details(self):
+        return ProtoOASymbol(symbolId=self.symbol_id, digits=self.digits, pipPosition=self.pip_position,
+                             lotSize=self.lot_size, minVolume=100000, stepVolume=100000,
+                             maxVolume=10000000000, enableShortSelling=True)
+
+
+class FakeCTraderProtocol(Int32StringReceiver):
+    """One client connection: its auth state, spot subscriptions and pacing"""
+
+    MAX_LENGTH = 15000000
+
+    def __init__(self, server):
+        self.server = server
+        self.app_authorized = False
+        self.accounts = set()
+        self.subscriptions = {}  # ctidTraderAccountId -> list of symbolIds, round-robin order
+        self._cycle = None
+        self.spots_sent = 0
+        self._spot_started = None
+        self.handlers = {
+            ProtoOAApplicationAuthReq().payloadType: self._on_app_auth,
+            ProtoOAAccountAuthReq().payloadType: self._on_account_auth,
+            ProtoOAGetAccountListByAccessTokenReq().payloadType: self._on_account_list,
+            ProtoOATraderReq().payloadType: self._on_trader,
+            ProtoOASymbolsListReq().payloadType: self._on_symbols_list,
+            ProtoOASymbolByIdReq().payloadType: self._on_symbol_by_id,
+            ProtoOASubscribeSpotsReq().payloadType: self._on_subscribe_spots,
+            ProtoOAUnsubscribeSpotsReq().payloadType: self._on_unsubscribe_spots,
+            ProtoOAGetTrendbarsReq().payloadType: self._on_trendbars,
+            ProtoOANewOrderReq().payloadType: self._on_new_order,
+            ProtoOAClosePositionReq().payloadType: self._on_close_position,
+            ProtoOAReconcileReq().payloadType: self._on_reconcile,
+        }
+
+    def connectionMade(self):
+        self.server.connections.add(self)
+        log.info("Fake cTrader: client connected from %s", self.transport.getPeer())
+
+    def connectionLost(self, reason):
+        self.server.connections.discard(self)
+        log.info("Fake cTrader: client disconnected (%d spots sent)", self.spots_sent)
+
+    def send(self, message, client_msg_id=None):
+        wrapper = ProtoMessage(payloadType=message.payloadType, payload=message.SerializeToString())
+        if client_msg_id:
+            wrapper.clientMsgId = client_msg_id
+        self.sendString(wrapper.SerializeToString())
+
+    def reply(self, message, client_msg_id=None):
+        """Send a response, after the configured simulated latency"""
+        if self.server.latency > 0:
+            reactor.callLater(self.server.latency, self._send_if_connected, message, client_msg_id)
+        else:
+            self.send(message, client_msg_id)
+
+    def _send_if_connected(self, message, client_msg_id):
+        if self.transport is not None and self.connected:
+            self.send(message, client_msg_id)
+
+    def error(self, code, description, client_msg_id=None, account_id=None):
+        res = ProtoOAErrorRes(errorCode=code, description=description)
+        if account_id:
+            res.ctidTraderAccountId = account_id
+        self.reply(res, client_msg_id)
+
+    def stringReceived(self, data):
+        wrapper = ProtoMessage()
+        wrapper.ParseFromString(data)
+        if wrapper.payloadType == ProtoHeartbeatEvent().payloadType:
+            return
+
+        client_msg_id = wrapper.clientMsgId if wrapper.HasField("clientMsgId") else None
+        handler = self.handlers.get(wrapper.payloadType)
+        if handler is None:
+            self.error("INVALID_REQUEST", f"Payload type {wrapper.payloadType} is not supported by the fake server",
+                       client_msg_id)
+            return
+
+        request = Protobuf.extract(wrapper)
+        if handler != self._on_app_auth and not self.app_authorized:
+            self.error("CH_CLIENT_NOT_AUTHENTICATED", "Application is not authorized", client_msg_id)
+            return
+        account_id = getattr(request, "ctidTraderAccountId", None)
+        if account_id and handler != self._on_account_auth and account_id not in self.accounts:
+            self.error("CH_CTID_TRADER_ACCOUNT_NOT_AUTHORIZED", "Account is not authorized", client_msg_id, account_id)
+            return
+
+        try:
+            handler(request, client_msg_id)
+        except Exception:
+            log.exception("Fake cTrader: handler for %s failed", type(request).__name__)
+            self.error("INTERNAL_ERROR", "Fake server error", client_msg_id)
+
+    # --- Auth and account ------------------------------------------------------------------------
+    def _on_app_auth(self, req, client_msg_id):
+        if self.app_authorized:
+            self.error("ALREADY_LOGGED_IN", "Application is already authorized", client_msg_id)
+            return
+        if not req.clientId or not req.clientSecret:
+            self.error("CH_CLIENT_AUTH_FAILURE", "Missing client credentials", client_msg_id)
+            return
+        self.app_authorized = True
+        self.reply(ProtoOAApplicationAuthRes(), client_msg_id)
+
+    def _on_account_auth(self, req, client_msg_id):
+        if req.ctidTraderAccountId not in self.server.accounts or not req.accessToken:
+            self.error("CH_CTID_TRADER_ACCOUNT_NOT_FOUND", "Unknown account or empty token",
+                       client_msg_id, req.ctidTraderAccountId)
+            return
+        self.accounts.add(req.ctidTraderAccountId)
+        self.reply(ProtoOAAccountAuthRes(ctidTraderAccountId=req.ctidTraderAccountId), client_msg_id)
+
+    def _on_account_list(self, req, client_msg_id):
+        res = ProtoOAGetAccountListByAccessTokenRes(accessToken=req.accessToken)
+        for account_id in sorted(self.server.accounts):
+            res.ctidTraderAccount.append(ProtoOACtidTraderAccount(ctidTraderAccountId=account_id, isLive=False,
+                                                                 traderLogin=account_id))
+        self.reply(res, client_msg_id)
+
+    def _on_trader(self, req, client_msg_id):
+        trader = ProtoOATrader(ctidTraderAccountId=req.ctidTraderAccountId,
+                               balance=int(round(self.server.balance * 100)), depositAssetId=1,
+                               moneyDigits=2, leverageInCents=10000, brokerName="Fake cTrader")
+        self.reply(ProtoOATraderRes(ctidTraderAccountId=req.ctidTraderAccountId, trader=trader), client_msg_id)
+
+    # --- Symbols and market data -----------------------------------------------------------------
+    def _on_symbols_list(self, req, client_msg_id):
+        res = ProtoOASymbolsListRes(ctidTraderAccountId=req.ctidTraderAccountId)
+        res.symbol.extend(symbol.light() for symbol in self.server.symbols.values())
+        self.reply(res, client_msg_id)
+
+    def _on_symbol_by_id(self, req, client_msg_id):
+        res = ProtoOASymbolByIdRes(ctidTraderAccountId=req.ctidTraderAccountId)
+        res.symbol.extend(self.server.symbols[s].details() for s in req.symbolId if s in self.server.symbols)
+        self.reply(res, client_msg_id)
+
+    def _on_subscribe_spots(self, req, client_msg_id):
+        unknown = [s for s in req.symbolId if s not in self.server.symbols]
+        if unknown:
+            self.error("SYMBOL_NOT_FOUND", f"Unknown symbolIds {unknown}", client_msg_id, req.ctidTraderAccountId)
+            return
+        subscribed = self.subscriptions.setdefault(req.ctidTraderAccountId, [])
+        subscribed.extend(s for s in req.symbolId if s not in subscribed)
+        self._reset_spot_cycle()
+        self.reply(ProtoOASubscribeSpotsRes(ctidTraderAccountId=req.ctidTraderAccountId), client_msg_id)
+
+    def _on_unsubscribe_spots(self, req, client_msg_id):
+        subscribed = self.subscriptions.get(req.ctidTraderAccountId, [])
+        self.subscriptions[req.ctidTraderAccountId] = [s for s in subscribed if s not in req.symbolId]
+        self._reset_spot_cycle()
+        self.reply(ProtoOAUnsubscribeSpotsRes(ctidTraderAccountId=req.ctidTraderAccountId), client_msg_id)
+
+    def _reset_spot_cycle(self):
+        pairs = [(account_id, s) for account_id, symbols in self.subscriptions.items() for s in symbols]
+        self._cycle = itertools.cycle(pairs) if pairs else None
+        if self._cycle is not None and self._spot_started is None:
+            self._spot_started = time.monotonic()
+            self.spots_sent = 0
+
+    def send_due_spots(self, now):
+        """Send the spot events owed since streaming started, round-robin over subscriptions"""
+        if self._cycle is None:
+            return
+        due = int((now - self._spot_started) * self.server.spot_rate) - self.spots_sent
+        # After a stall, skip ahead rather than bursting more than a tick's worth of backlog
+        max_burst = max(1, int(self.server.spot_rate * self.server.tick_interval * 4))
+        if due > max_burst:
+            self.spots_sent += due - max_burst
+            due = max_burst
+
+        timestamp = int(time.time() * 1000)
+        symbols = self.server.symbols
+        for _ in range(due):
+            account_id, symbol_id = next(self._cycle)
+            symbol = symbols[symbol_id]
+            self.server.step_price(symbol)
+            self.send(ProtoOASpotEvent(ctidTraderAccountId=account_id, symbolId=symbol_id,
+                                       bid=symbol.bid, ask=symbol.ask, timestamp=timestamp))
+        self.spots_sent += due
+
+    def _on_trendbars(self, req, client_msg_id):
+        symbol = self.server.symbols.get(req.symbolId)
+        if symbol is None:
+            self.error("SYMBOL_NOT_FOUND", f"Unknown symbolId {req.symbolId}", client_msg_id, req.ctidTraderAccountId)
+            return
+        res = ProtoOAGetTrendbarsRes(ctidTraderAccountId=req.ctidTraderAccountId, period=req.period,
+                                     timestamp=int(time.time() * 1000), symbolId=req.symbolId)
+        count = req.count if req.HasField("count") and req.count else MAX_TRENDBARS
+        res.trendbar.extend(self.server.trendbars(symbol, req.period, req.fromTimestamp, req.toTimestamp, count))
+        self.reply(res, client_msg_id)
+
+    # --- Trading ---------------------------------------------------------------------------------
+    def _order_error(self, req, code, description, client_msg_id):
+        self.reply(ProtoOAOrderErrorEvent(ctidTraderAccountId=req.ctidTraderAccountId, errorCode=code,
+                                          description=description), client_msg_id)
+
+    def _on_new_order(self, req, client_msg_id):
+        symbol = self.server.symbols.get(req.symbolId)
+        if symbol is None:
+            self._order_error(req, "SYMBOL_NOT_FOUND", f"Unknown symbolId {req.symbolId}", client_msg_id)
+            return
+        if req.orderType != ProtoOAOrderType.MARKET:
+            self._order_error(req, "INVALID_REQUEST", "The fake server fills market orders only", client_msg_id)
+            return
+        if req.volume <= 0 or req.volume % 100000:
+            self._order_error(req, "TRADING_BAD_VOLUME", f"Invalid volume {req.volume}", client_msg_id)
+            return
+
+        position = self.server.open_position(req, symbol)
+        order = self.server.new_order(req.ctidTraderAccountId, position, req.tradeSide, req.volume,
+                                      client_order_id=req.clientOrderId, label=req.label)
+        self._execute(req.ctidTraderAccountId, order, position, symbol, client_msg_id)
+
+    def _on_close_position(self, req, client_msg_id):
+        position = self.server.positions.get(req.positionId)
+        if position is None or position.positionStatus != ProtoOAPositionStatus.POSITION_STATUS_OPEN:
+            self._order_error(req, "POSITION_NOT_FOUND", f"Position {req.positionId} is not open", client_msg_id)
+            return
+        if req.volume <= 0 or req.volume > position.tradeData.volume:
+            self._order_error(req, "TRADING_BAD_VOLUME", f"Invalid close volume {req.volume}", client_msg_id)
+            return
+
+        symbol = self.server.symbols[position.tradeData.symbolId]
+        side = (ProtoOATradeSide.SELL if position.tradeData.tradeSide == ProtoOATradeSide.BUY
+                else ProtoOATradeSide.BUY)
+        order = self.server.new_order(req.ctidTraderAccountId, position, side, req.volume, closing=True)
+        position.tradeData.volume -= req.volume
+        if position.tradeData.volume == 0:
+            position.positionStatus = ProtoOAPositionStatus.POSITION_STATUS_CLOSED
+            self.server.positions.pop(position.positionId)
+            self.server._position_accounts.pop(position.positionId)
+        self._execute(req.ctidTraderAccountId, order, position, symbol, client_msg_id)
+
+    def _execute(self, account_id, order, position, symbol, client_msg_id):
+        """ORDER_ACCEPTED answers the request; ORDER_FILLED follows as an unsolicited event"""
+        accepted = ProtoOAExecutionEvent(ctidTraderAccountId=account_id,
+                                         executionType=ProtoOAExecutionType.ORDER_ACCEPTED)
+        accepted.order.CopyFrom(order)
+        accepted.position.CopyFrom(position)
+        self.reply(accepted, client_msg_id)
+
+        price = (symbol.ask if order.tradeData.tradeSide == ProtoOATradeSide.BUY else symbol.bid) / PRICE_SCALE
+        now_ms = int(time.time() * 1000)
+        order.orderStatus = ProtoOAOrderStatus.ORDER_STATUS_FILLED
+        order.executionPrice = price
+        order.executedVolume = order.tradeData.volume
+        order.utcLastUpdateTimestamp = now_ms
+        deal = ProtoOADeal(dealId=self.server.next_id(), orderId=order.orderId, positionId=position.positionId,
+                           volume=order.tradeData.volume, filledVolume=order.tradeData.volume,
+                           symbolId=symbol.symbol_id, createTimestamp=now_ms, executionTimestamp=now_ms,
+                           executionPrice=price, tradeSide=order.tradeData.tradeSide,
+                           dealStatus=ProtoOADealStatus.FILLED)
+        if order.closingOrder:
+            # Quote currency is taken as the deposit currency; volume is in cents of a unit
+            direction = 1 if position.tradeData.tradeSide == ProtoOATradeSide.BUY else -1
+            gross_profit = int(round((price - position.price) * direction * order.tradeData.volume))
+            self.server.balance += gross_profit / 100
+            deal.closePositionDetail.CopyFrom(ProtoOAClosePositionDetail(
+                entryPrice=position.price, grossProfit=gross_profit, swap=0, commission=0,
+                balance=int(round(self.server.balance * 100)), closedVolume=order.tradeData.volume, moneyDigits=2))
+        filled = ProtoOAExecutionEvent(ctidTraderAccountId=account_id,
+                                       executionType=ProtoOAExecutionType.ORDER_FILLED)
+        filled.order.CopyFrom(order)
+        filled.position.CopyFrom(position)
+        filled.deal.CopyFrom(deal)
+        self.reply(filled)
+
+    def _on_reconcile(self, req, client_msg_id):
+        res = ProtoOAReconcileRes(ctidTraderAccountId=req.ctidTraderAccountId)
+        res.position.extend(
+            position for account_id, position in self.server.account_positions()
+            if account_id == req.ctidTraderAccountId
+        )
+        self.reply(res, client_msg_id)
+
+
+class FakeCTraderServer(Factory):
+    """
+    Shared market state (symbols, prices, positions) for every connection.
+    `spot_rate` is the total number of spot events per second sent to each
+    connection, spread round-robin over its subscribed symbols.
+    """
+
+    def __init__(self, symbols=None, symbol_count=None, accounts=(DEFAULT_ACCOUNT_ID,), spot_rate=10,
+                 tick_interval=0.01, latency=0.0, balance=100000.0, seed=None):
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.accounts = set(accounts)
+        self.spot_rate = spot_rate
+        self.tick_interval = tick_interval
+        self.latency = latency  # Seconds added before every response (not spot events)
+        self.balance = balance
+
+        specs = list(symbols or DEFAULT_SYMBOLS)
+        for i in range(len(specs), symbol_count or 0):
+            specs.append((f"FAKE{i:03d}", 5, 4, round(self.rng.uniform(0.5, 2.0), 5)))
+        self.symbols = {
+            symbol_id: FakeSymbol(symbol_id, *spec) for symbol_id, spec in enumerate(specs, start=1)
+        }
+
+        self.positions = {}  # positionId -> ProtoOAPosition
+        self._position_accounts = {}  # positionId -> ctidTraderAccountId
+        self._ids = itertools.count(1)
+        self.connections = set()
+        self._ticker = task.LoopingCall(self._tick)
+        self.port = None
+
+    def buildProtocol(self, addr):
+        return FakeCTraderProtocol(self)
+
+    def listen(self, port=0, interface="127.0.0.1"):
+        """Start listening and streaming; returns the bound port (useful with port=0)"""
+        self.port = reactor.listenTCP(port, self, interface=interface)
+        if not self._ticker.running:
+            self._ticker.start(self.tick_interval, now=False)
+        return self.port.getHost().port
+
+    def stop(self):
+        if self._ticker.running:
+            self._ticker.stop()
+        for connection in list(self.connections):
+            connection.transport.loseConnection()
+        if self.port is not None:
+            d = self.port.stopListening()
+            self.port = None
+            return d
+
+    def _tick(self):
+        now = time.monotonic()
+        for connection in list(self.connections):
+            connection.send_due_spots(now)
+
+    def next_id(self):
+        return next(self._ids)
+
+    def step_price(self, symbol):
+        """Random walk of one point, never below one point"""
+        symbol.bid = max(symbol.point, symbol.bid + symbol.point * self.rng.choice((-1, 0, 1)))
+
+    def trendbars(self, symbol, period, from_ms, to_ms, count):
+        """Deterministic bars for the range, ending at the symbol's current bid"""
+        minutes = PERIOD_MINUTES.get(period, 1)
+        first = from_ms // 60000 // minutes * minutes
+        last = to_ms // 60000 // minutes * minutes
+        stamps = list(range(first, last + 1, minutes))[-count:]
+
+        rng = random.Random(hash((self.seed, symbol.symbol_id, period, stamps[-1] if stamps else 0)))
+        step = symbol.point * 10 * minutes ** 0.5
+        closes = [symbol.bid]
+        for _ in range(len(stamps) - 1):
+            closes.append(max(symbol.point * 10, int(closes[-1] + rng.gauss(0, step))))
+        closes.reverse()
+
+        bars = []
+        previous = closes[0]
+        for stamp, close in zip(stamps, closes):
+            open_ = previous
+            low = max(1, min(open_, close) - int(abs(rng.gauss(0, step / 2))))
+            high = max(open_, close) + int(abs(rng.gauss(0, step / 2)))
+            bars.append(ProtoOATrendbar(volume=rng.randint(10, 500), period=period, low=low,
+                                        deltaOpen=open_ - low, deltaHigh=high - low, deltaClose=close - low,
+                                        utcTimestampInMinutes=stamp))
+            previous = close
+        return bars
+
+    def open_position(self, req, symbol):
+        position_id = self.next_id()
+        price = (symbol.ask if req.tradeSide == ProtoOATradeSide.BUY else symbol.bid) / PRICE_SCALE
+        trade_data = ProtoOATradeData(symbolId=symbol.symbol_id, volume=req.volume, tradeSide=req.tradeSide,
+                                      openTimestamp=int(time.time() * 1000), label=req.label)
+        position = ProtoOAPosition(positionId=position_id, tradeData=trade_data,
+                                   positionStatus=ProtoOAPositionStatus.POSITION_STATUS_OPEN, swap=0,
+                                   price=price, moneyDigits=2)
+        self.positions[position_id] = position
+        self._position_accounts[position_id] = req.ctidTraderAccountId
+        return position
+
+    def account_positions(self):
+        for position_id, position in self.positions.items():
+            yield self._position_accounts[position_id], position
+
+    def new_order(self, account_id, position, side, volume, client_order_id="", label="", closing=False):
+        trade_data = ProtoOATradeData(symbolId=position.tradeData.symbolId, volume=volume, tradeSide=side,
+                                      openTimestamp=int(time.time() * 1000), label=label)
+        order = ProtoOAOrder(orderId=self.next_id(), tradeData=trade_data, orderType=ProtoOAOrderType.MARKET,
+                             orderStatus=ProtoOAOrderStatus.ORDER_STATUS_ACCEPTED, positionId=position.positionId,
+                             closingOrder=closing)
+        if client_order_id:
+            order.clientOrderId = client_order_id
+        return order
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local fake cTrader Open API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5035, help="0 picks a free port")
+    parser.add_argument("--spot-rate", type=float, default=10, help="spot events per second per connection")
+    parser.add_argument("--symbols", type=int, default=len(DEFAULT_SYMBOLS), help="number of symbols to offer")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to delay every response")
+    parser.add_argument("--account", type=int, default=DEFAULT_ACCOUNT_ID)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    server = FakeCTraderServer(symbol_count=args.symbols, accounts=(args.account,), spot_rate=args.spot_rate,
+                               latency=args.latency, seed=args.seed)
+    port = server.listen(args.port, interface=args.host)
+    # Parent processes (e.g. benchmarks/ctrader_load.py) read the port from this line
+    print(f"Listening on {args.host}:{port}", flush=True)
+    reactor.run()
+
+
+if __name__ == "__main__":
+    main()
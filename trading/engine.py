@@ -0,0 +1,745 @@
+# trading/engine.py
+"""
+Trading engine with no GUI dependency.
+
+TradingEngine owns everything trading needs apart from a screen: the cTrader
+client, the order manager and risk engine, the model inference workers and
+the trade ledger. A Strategy is one symbol traded with one StrategySettings;
+an engine runs any number of them.
+
+Live strategies tick once a second on the asyncio loop that also drives the
+Twisted reactor, and their evaluations (trendbars, model score, entry or
+exit against the client's position store) run there too, at most one per
+symbol at a time. Simulated
+strategies step on their own SimulationClock thread.
+
+headless.py runs an engine from a config file. The GUI builds
+StrategySettings from its fields, starts strategies on the engine MainApp
+gives it and shows what engine listeners receive:
+
+    listener("trade", strategy, trade)        a trade log row, already in engine.ledger
+    listener("settings", strategy, settings)  AI signals changed size, stop or target
+    listener("stopped", strategy, reason)
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import Config
+from ai.inference import InferencePool
+from ai.signals import SignalGenerator
+from trading.evaluation_pipeline import EvaluationPipeline
+from trading.exit_engine import ExitEngine, ExitRules, ExitSignal
+from trading.ledger import TradeLedger, make_trade
+from trading.order_manager import OrderManager, OrderIntent, OrderState, CTraderOrderAdapter
+from trading.price_simulator import PriceSimulator
+from trading.risk_engine import RiskEngine
+from trading.sim_clock import WallClock, SimulationClock
+from utils.logger import get_logger, SAMPLED
+from utils.tracing import tracer
+
+log = get_logger(__name__)
+
+TICK_SECONDS = 1
+
+
+def calculate_rsi(prices, period=14):
+    """Calculate RSI indicator"""
+    deltas = np.diff(prices)
+    seed = deltas[:period+1]
+    up = seed[seed >= 0].sum()/period
+    down = -seed[seed < 0].sum()/period
+    rs = up/down
+    rsi = np.zeros_like(prices)
+    rsi[:period] = 100. - 100./(1. + rs)
+
+    for i in range(period, len(prices)):
+        delta = deltas[i - 1]
+        if delta > 0:
+            upval = delta
+            downval = 0.
+        else:
+            upval = 0.
+            downval = -delta
+
+        up = (up * (period - 1) + upval) / period
+        down = (down * (period - 1) + downval) / period
+        rs = up/down
+        rsi[i] = 100. - 100./(1. + rs)
+
+    return rsi
+
+
+class StrategySettings:
+    """One strategy's symbol and parameters; percentages and days as the GUI fields show them"""
+
+    DEFAULTS = {
+        'symbol': None,
+        'name': None,  # Defaults to the symbol; order intents are tagged with it
+        'position_size': 100.0,
+        'stop_loss': 2.0,
+        'take_profit': 4.0,
+        'trailing_stop': 1.5,
+        'max_hold_days': 5.0,
+        'partial_exit': 75.0,
+        'simulation': False,
+        'sim_speed': None,  # Config.SIM_SPEED
+    }
+    NUMERIC = ('position_size', 'stop_loss', 'take_profit', 'trailing_stop', 'max_hold_days', 'partial_exit')
+
+    def __init__(self, **values):
+        unknown = set(values) - set(self.DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown strategy settings: {', '.join(sorted(unknown))}")
+        for field, default in self.DEFAULTS.items():
+            setattr(self, field, values.get(field, default))
+        for field in self.NUMERIC:
+            setattr(self, field, float(getattr(self, field)))
+        self.simulation = bool(self.simulation)
+        if self.sim_speed is None:
+            self.sim_speed = Config.SIM_SPEED
+        if self.name is None:
+            self.name = self.symbol
+        self.validate()
+
+    def validate(self):
+        if not self.symbol:
+            raise ValueError("No symbol selected")
+        if self.position_size <= 0:
+            raise ValueError("Position size must be greater than 0")
+        if self.stop_loss <= 0 or self.stop_loss >= 100:
+            raise ValueError("Stop loss must be between 0 and 100")
+        if self.take_profit <= 0 or self.take_profit >= 100:
+            raise ValueError("Take profit must be between 0 and 100")
+        if self.take_profit <= self.stop_loss:
+            raise ValueError("Take profit must be greater than stop loss")
+        self.exit_rules()
+
+    def exit_rules(self):
+        return ExitRules.from_percentages(
+            self.stop_loss, self.take_profit, self.trailing_stop, self.max_hold_days, self.partial_exit
+        )
+
+    def replace(self, **values):
+        return StrategySettings(**dict(self.as_dict(), **values))
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.DEFAULTS}
+
+    @property
+    def is_crypto(self):
+        return 'BTC' in self.symbol or 'ETH' in self.symbol
+
+
+def load_engine_config(path):
+    """(engine name, [StrategySettings]) from a JSON config file, applying its Config overrides
+
+    {
+      "name": "fx-demo",
+      "settings": {"CTRADER_HOST_TYPE": "demo", "CTRADING_ACCOUNT_ID": "1234567"},
+      "strategies": [{"symbol": "EURUSD", "position_size": 0.1}, {"symbol": "GBPUSD", "simulation": true}]
+    }
+    """
+    with open(os.path.expanduser(path), encoding="utf-8") as f:
+        config = json.load(f)
+    unknown = set(config) - {"name", "settings", "strategies"}
+    if unknown:
+        raise ValueError(f"Unknown config sections: {', '.join(sorted(unknown))}")
+    for key, value in config.get("settings", {}).items():
+        if not key.isupper() or not hasattr(Config, key):
+            raise ValueError(f"Unknown setting {key}")
+        setattr(Config, key, value)
+    strategies = [StrategySettings(**values) for values in config.get("strategies", [])]
+    if not strategies:
+        raise ValueError("No strategies configured")
+    names = [settings.name for settings in strategies]
+    if len(set(names)) != len(names):
+        raise ValueError("Strategy names must be unique; set \"name\" when trading a symbol twice")
+    return config.get("name", "engine"), strategies
+
+
+class Strategy:
+    def __init__(self, engine, settings):
+        self.engine = engine
+        self.settings = settings
+        self.name = settings.name
+        self.symbol = settings.symbol
+        self.simulation = settings.simulation
+        self.running = False
+        # Live trading runs on wall time; simulation on a SimulationClock created at start
+        self.clock = WallClock()
+        self.exit_engine = ExitEngine(settings.exit_rules())
+        # At most one live evaluation per symbol; ticks during one are coalesced
+        self.evaluations = EvaluationPipeline(self._start_evaluation)
+        self.signal_generator = SignalGenerator()
+        self.price_simulator = None
+        self.current_position = None
+        self.price_history = []
+        self._sim_signals = (None, None)  # (last completed bar, signals computed from it)
+        self._applied_signals = None
+        self._thread = None
+
+    # --- Lifecycle -------------------------------------------------------------------------------
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        if self.simulation:
+            self.clock = SimulationClock(self.settings.sim_speed)
+            self.price_simulator = PriceSimulator(clock=self.clock)
+            self.price_simulator.prime(Config.SIM_HISTORY_SEC)
+            self.current_position = None
+            self._sim_signals = (None, None)
+            self._thread = threading.Thread(target=self._run_simulation, name=f"sim-{self.name}", daemon=True)
+            self._thread.start()
+        else:
+            self.clock = WallClock()
+            self.engine.loop.call_soon_threadsafe(self._tick)
+        log.info("Started %s (%s)", self.name, "simulation" if self.simulation else "live")
+        self.engine.log_trade(self, "START", size=self.settings.position_size, reason="Trading Started",
+                              confidence="-")
+
+    def stop(self, reason="Trading Stopped"):
+        if not self.running:
+            return
+        self.running = False
+        self.clock.stop()
+        # Clean up any tracking variables
+        self.exit_engine.remove(self.symbol)
+        self.evaluations.cancel_pending()
+        log.info("Stopped %s: %s", self.name, reason)
+        self.engine.log_trade(self, "STOP", reason=reason, confidence="-")
+        self.engine.emit("stopped", self, reason)
+
+    def update(self, settings):
+        """New position size and exit thresholds; the symbol and mode stay as started"""
+        self.settings = settings
+        self.exit_engine.set_rules(settings.exit_rules())
+
+    def status(self):
+        """Simulated time, or live evaluation queue depth, for status displays"""
+        if self.simulation:
+            speed = f"{self.clock.speed:g}x" if self.clock.speed else "max speed"
+            return f"Simulated {self.clock.strftime()} ({speed})" if self.running else ""
+        metrics = self.evaluations.metrics()
+        if not metrics['started']:
+            return ""
+        text = (f"Evaluations: {metrics['in_flight']} running, {metrics['pending']} queued, "
+                f"{metrics['coalesced']} coalesced")
+        if metrics['failed'] or metrics['timed_out']:
+            text += f", {metrics['failed']} failed, {metrics['timed_out']} timed out"
+        return text
+
+    # --- Live trading ----------------------------------------------------------------------------
+    def _tick(self):
+        """One live loop iteration, on the event loop"""
+        if not self.running:
+            return
+        try:
+            if self.engine.is_connected():
+                if Config.DEPTH_ENABLED:
+                    self.engine.client.subscribe_depth(self.symbol)
+                # Starts an evaluation, or coalesces this tick into the one running for the symbol
+                self.evaluations.request(self.symbol)
+            else:
+                log.warning("Not connected to cTrader; %s waits", self.name, extra=SAMPLED)
+        except Exception:
+            log.exception("Error in trading loop")
+        self.engine.loop.call_later(TICK_SECONDS, self._tick)
+
+    def _start_evaluation(self, symbol, token):
+        """EvaluationPipeline start hook: run one evaluation on the event loop"""
+        asyncio.run_coroutine_threadsafe(self._evaluate(token), self.engine.loop)
+
+    @tracer.timed("live.execute")
+    async def _evaluate(self, token):
+        """Fetch bars, score them and decide against the symbol's positions; finishes the evaluation either way"""
+        ok = True
+        try:
+            await self._evaluate_once()
+        except Exception:
+            log.exception("Error in live evaluation of %s", self.symbol)
+            ok = False
+        finally:
+            self.evaluations.finish(self.symbol, token, ok)
+
+    async def _evaluate_once(self):
+        client = self.engine.client
+        symbol = self.symbol
+        log.debug("Attempting to trade %s, is_crypto: %s", symbol, self.settings.is_crypto, extra=SAMPLED)
+        if not client.positions.reconciled:
+            log.warning("Positions not reconciled yet; %s waits", symbol, extra=SAMPLED)
+            return
+
+        with tracer.span("live.bars_fetch"):
+            bars = await self.engine.wait(client.get_bars(symbol, self.settings.is_crypto))
+        if bars is None or not len(bars):
+            log.warning("No price data available for %s", symbol, extra=SAMPLED)
+            return
+
+        symbol_id = client.symbols_map.get(symbol)
+        if not symbol_id:
+            log.warning("Symbol ID not found for %s", symbol, extra=SAMPLED)
+            return
+
+        # Decoded into a BarArray straight off the wire (trading/message_dispatch.py)
+        current_price = float(bars.close[-1])
+        log.debug("Current price for %s: %s", symbol, current_price, extra=SAMPLED)
+
+        prediction = await self.engine.score(bars.frame(), symbol)
+
+        with tracer.span("live.decision"):
+            # Kept current by execution events; no request per evaluation
+            self._decide(client.positions.for_symbol(symbol_id), current_price, bars, prediction)
+
+    def _decide(self, positions, current_price, bars, prediction):
+        position = positions[0] if positions else None
+        if position is not None:
+            self.check_live_exit(position, current_price)
+            return
+
+        # Closed (by us or externally): drop its trailing peak and partial-exit state
+        self.exit_engine.remove(self.symbol)
+        # An entry already in flight for this symbol will show up as a position shortly
+        if self.engine.order_manager().open_orders(self.symbol):
+            return
+        if prediction is not None and prediction['confidence'] < prediction['threshold']:
+            log.debug("Model confidence %.2f for %s below %.2f", prediction['confidence'], self.symbol,
+                      prediction['threshold'], extra=SAMPLED)
+            return
+        if self.check_entry_conditions(current_price, bars):
+            # One entry per bar: repeats of the same signal collapse onto one order
+            signal_key = f"{self.name}:{self.symbol}:BUY:{bars.ts[-1] // 60000}"
+            if prediction is None:
+                self.enter_live_trade(current_price, signal_key)
+            else:
+                self.enter_live_trade(
+                    current_price, signal_key,
+                    reason=f"Model ({prediction['market_regime']})",
+                    confidence=f"{prediction['confidence']:.0%}"
+                )
+
+    def enter_live_trade(self, price, signal_key=None, log_type="BUY", reason="", confidence=""):
+        """Queue a market buy; returns the OrderIntent without waiting for the broker"""
+        try:
+            intent = OrderIntent(
+                self.symbol,
+                "BUY",
+                self.settings.position_size,
+                strategy=self.name,
+                idempotency_key=signal_key,
+                reference_price=price,
+                metadata={'log_type': log_type, 'reason': reason, 'confidence': confidence}
+            )
+            return self.engine.order_manager().submit(intent)
+        except Exception:
+            log.exception("Error entering live trade")
+            return None
+
+    def check_entry_conditions(self, current_price, bars):
+        """Enhanced entry condition checking with debug logging; bars is a BarArray, oldest first"""
+        symbol = self.symbol
+        try:
+            # Create DataFrame for technical analysis
+            with tracer.span("entry.dataframe_build"):
+                df = bars.frame()
+
+            if len(df) < 20:
+                log.debug("Insufficient data points: %d", len(df), extra=SAMPLED)
+                return False
+
+            # Calculate technical indicators
+            with tracer.span("entry.indicators"):
+                df['sma_20'] = df['close'].rolling(window=20).mean()
+                df['sma_50'] = df['close'].rolling(window=50).mean()
+                df['rsi'] = calculate_rsi(df['close'])
+                df['volume_ma'] = df['volume'].rolling(window=20).mean()
+
+            # Get latest values
+            latest = df.iloc[-1]
+
+            # Check conditions with detailed logging
+            price_above_sma = current_price > latest['sma_20']
+            volume_increase = latest['volume'] > latest['volume_ma'] * 1.2
+            rsi_favorable = 30 < latest['rsi'] < 70
+            uptrend = latest['sma_20'] > latest['sma_50'] if len(df) >= 50 else True
+
+            log.debug(
+                "Entry conditions for %s: price %.2f > SMA20 %.2f: %s | volume %.0f > MA %.0f: %s | "
+                "RSI %.2f in 30-70: %s | uptrend (SMA20 > SMA50): %s",
+                symbol, current_price, latest['sma_20'], price_above_sma,
+                latest['volume'], latest['volume_ma'], volume_increase,
+                latest['rsi'], rsi_favorable, uptrend,
+                extra=SAMPLED
+            )
+
+            if self.settings.is_crypto:
+                # For crypto, require only 2 out of 4 conditions
+                conditions_met = sum([price_above_sma, volume_increase, rsi_favorable, uptrend])
+                should_enter = conditions_met >= 2
+                log.debug("Crypto conditions met: %d/4", conditions_met, extra=SAMPLED)
+            else:
+                # For stocks, use more conservative approach
+                should_enter = price_above_sma and (volume_increase or rsi_favorable) and uptrend
+                log.debug("Stock conditions all met: %s", should_enter, extra=SAMPLED)
+
+            return should_enter
+
+        except Exception:
+            log.exception("Error checking entry conditions")
+            return False
+
+    def check_live_exit(self, position, current_price):
+        """Check exit conditions for a cTrader position and queue closes through the order manager"""
+        symbol = self.symbol
+        try:
+            lot_size = self.engine.client.lot_size(position.tradeData.symbolId)
+            if not lot_size:
+                log.warning("Could not get lot size for %s", symbol, extra=SAMPLED)
+                return False
+
+            self.exit_engine.set_position(
+                symbol,
+                position.price,
+                position.tradeData.volume / lot_size,
+                position.tradeData.openTimestamp / 1000 if position.tradeData.openTimestamp else None,
+                key=position.positionId
+            )
+            signals = self.exit_engine.evaluate({symbol: current_price})
+            book = self.engine.client.order_books.get(symbol)
+
+            exited = False
+            for signal in signals:
+                log.info("%s triggered for %s at %.2f%%", signal.kind, symbol, signal.pl_pct * 100)
+                # What selling this much into the bids would fetch, rather than the last bar's close
+                estimate = book.fill_price("SELL", signal.qty * lot_size) if book is not None else None
+                intent = OrderIntent(
+                    symbol,
+                    "SELL",
+                    signal.qty,
+                    strategy=self.name,
+                    # Repeats of the same exit for this position collapse onto one close
+                    idempotency_key=f"{self.name}:exit:{signal.key}:{signal.kind}",
+                    reference_price=estimate or signal.price,
+                    metadata={
+                        'position_id': signal.key,
+                        'exit_kind': signal.kind,
+                        'log_type': signal.kind,
+                        'reason': "Partial Profit" if signal.is_partial else signal.kind,
+                        'confidence': f"{signal.pl_pct:.2%}"
+                    }
+                )
+                self.engine.order_manager().submit(intent)
+                exited = exited or not signal.is_partial
+            return exited
+
+        except Exception:
+            log.exception("Error in exit check")
+            return False
+
+    def on_order_update(self, intent):
+        """Exit bookkeeping and trade log rows for this strategy's orders"""
+        exit_kind = intent.metadata.get('exit_kind')
+        if exit_kind == ExitSignal.PARTIAL_EXIT and intent.state in (OrderState.REJECTED, OrderState.FAILED):
+            self.exit_engine.clear_partial(intent.symbol)
+        elif exit_kind and intent.state == OrderState.FILLED and exit_kind != ExitSignal.PARTIAL_EXIT:
+            self.exit_engine.remove(intent.symbol)
+
+        if intent.state == OrderState.FILLED:
+            self.engine.log_trade(
+                self,
+                intent.metadata.get('log_type', intent.side),
+                price=intent.avg_fill_price or intent.reference_price,
+                size=intent.filled_qty,
+                pl=intent.realized_pl,
+                reason=intent.metadata.get('reason', ""),
+                confidence=intent.metadata.get('confidence', "")
+            )
+        elif intent.state in (OrderState.REJECTED, OrderState.FAILED):
+            self.engine.log_trade(
+                self, f"{intent.side} {intent.state}", size=intent.qty, reason=intent.error or ""
+            )
+
+    # --- Simulation ------------------------------------------------------------------------------
+    def _run_simulation(self):
+        """Simulation loop; one iteration per second of self.clock"""
+        clock = self.clock
+        while self.running:
+            try:
+                with tracer.span("simulation.iteration"):
+                    self.execute_simulation_trade()
+                clock.sleep(TICK_SECONDS)
+            except Exception:
+                log.exception("Error in simulation of %s", self.name)
+                clock.sleep(5)  # Wait longer on error
+
+    def execute_simulation_trade(self):
+        """Execute a simulated trade"""
+        # Get latest simulated price; it moves with self.clock, not with calls
+        current_price = self.price_simulator.get_next_price()
+
+        if self.current_position is None:
+            # Check if we should enter a trade; signals only gate entries, exits always run
+            if self.should_enter_trade(current_price) and self.check_ai_signals():
+                self.enter_simulation_trade(current_price)
+        else:
+            # Check if we should exit existing trade
+            self.check_simulation_exit(current_price)
+
+    def should_enter_trade(self, current_price):
+        """Simple trend following: three rising prices in a row"""
+        self.price_history.append(current_price)
+        self.price_history = self.price_history[-10:]  # Keep last 10 prices
+
+        if len(self.price_history) < 4:
+            return False
+
+        return (self.price_history[-1] > self.price_history[-2] and
+                self.price_history[-2] > self.price_history[-3] and
+                self.price_history[-3] > self.price_history[-4])
+
+    @tracer.timed("ai.signal")
+    def check_ai_signals(self):
+        """True when the AI signals say trade; their size, stop and target become the settings"""
+        try:
+            signals = self.get_simulated_signals()
+            if not signals:
+                log.debug("No signals available", extra=SAMPLED)
+                return False
+            if not signals['should_trade']:
+                return False
+            # Cached simulated signals repeat every step; apply them once
+            if signals is not self._applied_signals:
+                self._applied_signals = signals
+                settings = self.settings.replace(
+                    position_size=signals['position_size'],
+                    stop_loss=signals['stop_loss'] * 100,
+                    take_profit=signals['take_profit'] * 100
+                )
+                self.update(settings)
+                self.engine.emit("settings", self, settings)
+            return True
+        except Exception:
+            log.exception("Error checking AI signals")
+            return False
+
+    def get_simulated_signals(self):
+        """AI signals from the simulator's own bars, recomputed once per completed bar"""
+        bars = self.price_simulator.completed_bars()
+        if len(bars) < Config.SIM_SIGNAL_MIN_BARS:
+            return None
+        last_bar = bars.index[-1]
+        if self._sim_signals[0] != last_bar:
+            self._sim_signals = (last_bar, self.signal_generator.signals_from_bars(self.symbol, bars))
+        return self._sim_signals[1]
+
+    def enter_simulation_trade(self, price):
+        """Enter a simulated trade"""
+        settings = self.settings
+        self.current_position = {
+            'symbol': self.symbol,
+            'size': settings.position_size,
+            'entry_price': price,
+            'stop_loss': price * (1 - settings.stop_loss / 100),
+            'take_profit': price * (1 + settings.take_profit / 100),
+            'entry_time': self.clock.datetime()
+        }
+        self.engine.log_trade(self, "BUY (SIM)", price=price, size=settings.position_size)
+        log.info("Entered simulation trade: %s at %.2f, stop %.2f, target %.2f", self.symbol, price,
+                 self.current_position['stop_loss'], self.current_position['take_profit'])
+
+    def check_simulation_exit(self, current_price):
+        """Check if we should exit the simulated trade"""
+        position = self.current_position
+        entry_price = position['entry_price']
+        position_size = position['size']
+        pl_amount = (current_price - entry_price) * position_size
+        pl_percentage = ((current_price / entry_price) - 1) * 100
+
+        # Check stop loss, take profit and hold time, all in simulated time
+        stop_hit = current_price <= position['stop_loss']
+        profit_hit = current_price >= position['take_profit']
+        held = self.clock.now() - position['entry_time'].timestamp()
+        time_hit = held > self.exit_engine.rules.max_hold_seconds
+
+        if stop_hit or profit_hit or time_hit:
+            exit_type = "STOP (SIM)" if stop_hit else "PROFIT (SIM)" if profit_hit else "TIME EXIT (SIM)"
+            self.engine.log_trade(self, exit_type, price=current_price, size=position_size, pl=pl_amount,
+                                  pl_pct=pl_percentage)
+            log.info("Exited simulation trade: %s at %.2f, P/L %.2f (%.2f%%)", exit_type, current_price,
+                     pl_amount, pl_percentage)
+            self.current_position = None
+
+
+class TradingEngine:
+    def __init__(self, client=None, loop=None, name="engine", ledger=None):
+        self.client = client
+        self.loop = loop
+        self.name = name
+        if ledger is None:
+            ledger = TradeLedger(Config.LEDGER_FILE.format(name=name) if Config.LEDGER_ENABLED else None)
+        self.ledger = ledger
+        self.strategies = {}  # name -> Strategy
+        self.risk_engine = None
+        self.inference_pool = None
+        self._order_manager = None
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    # --- Strategies ------------------------------------------------------------------------------
+    def add_strategy(self, settings):
+        with self._lock:
+            current = self.strategies.get(settings.name)
+            if current is not None and current.running:
+                raise ValueError(f"Strategy {settings.name} is already running")
+            if not settings.simulation and (self.client is None or self.loop is None):
+                raise ValueError("Live trading needs a cTrader client and an event loop")
+            strategy = Strategy(self, settings)
+            self.strategies[settings.name] = strategy
+        return strategy
+
+    def start_strategy(self, settings):
+        strategy = self.add_strategy(settings)
+        if not settings.simulation:
+            self.get_inference_pool()
+        strategy.start()
+        return strategy
+
+    def start(self):
+        """Start every added strategy"""
+        for strategy in list(self.strategies.values()):
+            if not strategy.simulation:
+                self.get_inference_pool()
+            strategy.start()
+
+    def stop(self, reason="Trading Stopped"):
+        for strategy in list(self.strategies.values()):
+            strategy.stop(reason)
+
+    # --- Events ----------------------------------------------------------------------------------
+    def add_listener(self, callback):
+        """callback(event, strategy, payload); called from engine threads"""
+        self._listeners.append(callback)
+
+    def emit(self, event, strategy, payload):
+        for listener in self._listeners:
+            try:
+                listener(event, strategy, payload)
+            except Exception:
+                log.exception("Engine listener failed for %s", event)
+
+    def log_trade(self, strategy, type_, price=None, size=None, pl=None, reason="", confidence="", pl_pct=None):
+        trade = make_trade(strategy.clock.datetime(), strategy.symbol, type_, price, size, pl, reason,
+                           confidence, pl_pct)
+        self.ledger.record(trade)
+        self.emit("trade", strategy, trade)
+        return trade
+
+    def on_account_update(self, summary):
+        """CTraderClient account callback; ProtoOATrader carries no equity, so balance marks it until it does"""
+        equity = summary.get("equity")
+        if equity is None:
+            equity = summary.get("balance")
+        if equity is not None:
+            self.ledger.record_equity(equity)
+
+    # --- Shared services -------------------------------------------------------------------------
+    def is_connected(self):
+        return self.client is not None and self.client.is_connected
+
+    def connect(self):
+        """Blocking; call off the event loop"""
+        if not self.client.connect():
+            log.error("Could not connect to cTrader: %s", self.client.get_connection_status()[1])
+            return False
+        return True
+
+    def order_manager(self):
+        """Create the order manager on first use; orders are sent off the strategy threads"""
+        with self._lock:
+            if self._order_manager is None:
+                self._order_manager = OrderManager(CTraderOrderAdapter(self.client))
+                self._order_manager.add_listener(self._on_order_update)
+                if Config.RISK_ENABLED:
+                    self.risk_engine = RiskEngine.for_ctrader(self.client)
+                    self.risk_engine.attach(self._order_manager)
+                    self.client.add_spot_listener(self.risk_engine.on_price)
+                    # Positions opened before this session count against the limits too
+                    self.client.positions.add_listener(self._sync_risk)
+                    if self.client.positions.reconciled:
+                        self._sync_risk(self.client.positions)
+                self._order_manager.start()
+            return self._order_manager
+
+    def _sync_risk(self, store, retry=True):
+        """Position store listener: hand the broker's positions to the risk engine in lots on every change
+
+        Closes the broker makes on its own (stop loss, take profit, stop-out, manual) free their exposure here.
+        """
+        volumes = store.net_volumes()
+        missing = [symbol_id for symbol_id in volumes if not self.client.lot_size(symbol_id)]
+        if missing and retry:
+            # The snapshot can arrive before the symbol details do
+            self.client.symbol_metadata.ensure(missing).addCallback(lambda _: self._sync_risk(store, retry=False))
+            return
+        lots, prices = {}, {}
+        for symbol_id, volume in volumes.items():
+            name, lot_size = self.client.symbol_name(symbol_id), self.client.lot_size(symbol_id)
+            if name is None or not lot_size:
+                log.warning("Position in symbol %s left out of risk: no symbol details", symbol_id)
+                continue
+            lots[name] = volume / lot_size
+        for position in store.positions():
+            name = self.client.symbol_name(position.tradeData.symbolId)
+            if name is not None:
+                prices.setdefault(name, position.price)
+        self.risk_engine.sync_positions(lots, prices)
+
+    def _on_order_update(self, intent):
+        strategy = self.strategies.get(intent.strategy)
+        if strategy is not None:
+            strategy.on_order_update(intent)
+
+    def get_inference_pool(self):
+        """Start the model workers if a saved model exists"""
+        with self._lock:
+            if self.inference_pool is None and InferencePool.available():
+                try:
+                    self.inference_pool = InferencePool().start()
+                except Exception:
+                    log.exception("Could not start inference workers")
+            return self.inference_pool
+
+    async def score(self, frame, symbol):
+        """Model prediction from the inference workers, or None without a model"""
+        pool = self.inference_pool
+        if pool is None:
+            return None
+        # The worker does the feature work; the loop just waits for its score
+        try:
+            with tracer.span("live.inference"):
+                return await asyncio.wrap_future(pool.predict(frame, symbol))
+        except Exception:
+            log.warning("Model score for %s unavailable", symbol, exc_info=True, extra=SAMPLED)
+            return None
+
+    async def wait(self, deferred):
+        """Result of a client request's Deferred; None when the request was not sent"""
+        if deferred is None:
+            return None
+        return await deferred.asFuture(self.loop)
+
+    def close(self):
+        """Stop strategies and background workers"""
+        self.stop()
+        if self._order_manager is not None:
+            self._order_manager.stop()
+        if self.inference_pool is not None:
+            self.inference_pool.close()
+            self.inference_pool = None
+        self.ledger.close()
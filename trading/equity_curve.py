@@ -0,0 +1,341 @@
+# trading/equity_curve.py
+"""
+Incremental equity-curve analytics.
+
+EquityCurve keeps account equity in fixed time buckets (EQUITY_BUCKET_SEC).
+Each update touches only the open bucket; when a bucket closes its totals are
+appended to prefix-sum lists and to a segment tree of equity highs, lows
+and drawdowns. Any time range (Today, 7 Days, ...) is then answered with two
+bisects, prefix differences and one O(log n) tree query instead of
+re-scanning the trade history.
+
+Returns are per bucket on equity, so Sharpe and Sortino are annualized with
+sqrt(buckets per year) rather than sqrt(252) over per-trade P/L, and buckets
+with no updates count as flat periods. Drawdown is measured against peak
+equity, which stays positive, instead of cumulative P/L, which starts at 0.
+"""
+import math
+import os
+import sys
+from bisect import bisect_left
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import Config
+
+# Per-bucket totals kept as prefix sums
+PREFIX_FIELDS = (
+    "periods", "ret", "ret2", "down2", "pl", "trades", "wins", "losses",
+    "gross_profit", "gross_loss", "in_market", "exposure",
+)
+
+# Segment tree node: (equity max, bucket of the max, equity min, max drawdown fraction, largest win, largest loss)
+_EMPTY = (-math.inf, -1, math.inf, 0.0, -math.inf, math.inf)
+
+
+def _combine(left, right):
+    """Merge two adjacent ranges; drawdown may run from the left range's peak to the right range's trough"""
+    if left[1] < 0:
+        return right
+    if right[1] < 0:
+        return left
+    if right[0] >= left[0]:
+        peak, peak_at = right[0], right[1]  # Latest peak wins ties, so drawdown duration starts there
+    else:
+        peak, peak_at = left[0], left[1]
+    cross = 1 - right[2] / left[0] if left[0] > 0 else 0.0
+    return (peak, peak_at, min(left[2], right[2]), max(left[3], right[3], cross),
+            max(left[4], right[4]), min(left[5], right[5]))
+
+
+class _DrawdownTree:
+    """Append-only segment tree over closed buckets; grows by doubling"""
+
+    def __init__(self):
+        self.capacity = 1
+        self.nodes = [_EMPTY, _EMPTY]
+        self.size = 0
+
+    def append(self, leaf):
+        if self.size == self.capacity:
+            leaves = self.nodes[self.capacity:self.capacity + self.size]
+            self.capacity *= 2
+            self.nodes = [_EMPTY] * (2 * self.capacity)
+            self.nodes[self.capacity:self.capacity + self.size] = leaves
+            for i in range(self.capacity - 1, 0, -1):
+                self.nodes[i] = _combine(self.nodes[2 * i], self.nodes[2 * i + 1])
+        i = self.capacity + self.size
+        self.nodes[i] = leaf
+        self.size += 1
+        i //= 2
+        while i:
+            self.nodes[i] = _combine(self.nodes[2 * i], self.nodes[2 * i + 1])
+            i //= 2
+
+    def query(self, lo, hi):
+        """Combined node for leaves [lo, hi)"""
+        left, right = _EMPTY, _EMPTY
+        lo += self.capacity
+        hi += self.capacity
+        while lo < hi:
+            if lo & 1:
+                left = _combine(left, self.nodes[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                right = _combine(self.nodes[hi], right)
+            lo //= 2
+            hi //= 2
+        return _combine(left, right)
+
+
+class _Bucket:
+    def __init__(self, index, open_equity, periods):
+        self.index = index
+        self.open_equity = open_equity  # None while equity is unknown
+        self.high = -math.inf if open_equity is None else open_equity
+        self.low = math.inf if open_equity is None else open_equity
+        self.peak = self.high
+        self.drawdown = 0.0
+        self.totals = dict.fromkeys(PREFIX_FIELDS, 0.0)
+        self.totals["periods"] = periods
+        self.pl_max = -math.inf
+        self.pl_min = math.inf
+
+    def mark(self, equity):
+        if self.open_equity is None:
+            self.open_equity = equity
+        self.high = max(self.high, equity)
+        self.low = min(self.low, equity)
+        self.peak = max(self.peak, equity)
+        if self.peak > 0:
+            self.drawdown = max(self.drawdown, 1 - equity / self.peak)
+
+    def leaf(self):
+        return (self.high, self.index, self.low, self.drawdown, self.pl_max, self.pl_min)
+
+    def with_return(self, close):
+        """Totals including this bucket's return up to `close` equity"""
+        totals = dict(self.totals)
+        ret = close / self.open_equity - 1 if self.open_equity else 0.0
+        totals["ret"] = ret
+        totals["ret2"] = ret * ret
+        totals["down2"] = ret * ret if ret < 0 else 0.0
+        return totals
+
+
+class EquityCurve:
+    """
+    Feed it account equity (record_equity) or realized P/L from closing
+    fills (record_fill), plus gross open exposure (set_exposure). Times are
+    epoch seconds. Once record_equity has been called, fills only update the
+    trade statistics. Without a starting_equity, fills before the first
+    record_equity are counted as trades but move no equity, since the
+    account's size is not known yet.
+    Not thread-safe: call from one thread (the Tk thread).
+    """
+
+    def __init__(self, starting_equity=None, bucket_seconds=None, periods_per_year=None):
+        self.bucket_seconds = bucket_seconds or Config.EQUITY_BUCKET_SEC
+        self.periods_per_year = periods_per_year or (
+            Config.EQUITY_TRADING_DAYS_PER_YEAR * 86400 / self.bucket_seconds
+        )
+        self.starting_equity = starting_equity
+        self.equity = starting_equity  # None until known
+        self.realized_pl = 0.0
+        self._marked = False
+
+        # Closed buckets
+        self._index = []  # Bucket number (epoch seconds // bucket_seconds)
+        self._open_equity = []
+        self._prefix = {name: [0.0] for name in PREFIX_FIELDS}
+        self._tree = _DrawdownTree()
+        self._bucket = None
+
+        # All-time drawdown, maintained per update
+        self.peak = -math.inf if self.equity is None else self.equity
+        self.peak_time = None
+        self.max_drawdown = 0.0
+        self.longest_drawdown = 0.0
+
+        self._gross = 0.0
+        self._exposure_since = None
+        self.first_time = None
+        self.last_time = None
+
+    # --- Updates (O(1) amortized) ----------------------------------------------------------------
+    def _advance(self, ts):
+        if self.first_time is None:
+            self.first_time = ts
+        self.last_time = max(self.last_time or ts, ts)
+        index = int(ts // self.bucket_seconds)
+        if self._bucket is None:
+            self._bucket = _Bucket(index, self.equity, 1)
+        elif index > self._bucket.index:
+            self._accrue((self._bucket.index + 1) * self.bucket_seconds)
+            self._close_bucket()
+            # Buckets with no updates were flat: count them as zero-return periods
+            self._bucket = _Bucket(index, self.equity, index - self._index[-1])
+        # Late updates for an already closed bucket land in the open one
+        return self._bucket
+
+    def _close_bucket(self):
+        bucket = self._bucket
+        totals = bucket.with_return(self.equity)
+        for name in PREFIX_FIELDS:
+            prefix = self._prefix[name]
+            prefix.append(prefix[-1] + totals[name])
+        self._index.append(bucket.index)
+        self._open_equity.append(bucket.open_equity)
+        self._tree.append(bucket.leaf())
+
+    def _mark(self, ts, equity):
+        bucket = self._advance(ts)
+        self.equity = equity
+        bucket.mark(equity)
+        if equity >= self.peak:
+            if self.peak_time is not None and equity > self.peak:
+                self.longest_drawdown = max(self.longest_drawdown, ts - self.peak_time)
+            self.peak = equity
+            self.peak_time = ts
+        elif self.peak > 0:
+            self.max_drawdown = max(self.max_drawdown, 1 - equity / self.peak)
+            if self.peak_time is None:
+                self.peak_time = self.first_time
+
+    def record_equity(self, ts, equity):
+        """Mark-to-market account equity, e.g. from CTraderClient._update_trader_details"""
+        self._marked = True
+        self._accrue(ts)
+        self._mark(ts, float(equity))
+
+    def record_fill(self, ts, pl):
+        """Realized P/L of a closing fill"""
+        pl = float(pl)
+        self._accrue(ts)
+        bucket = self._advance(ts)
+        totals = bucket.totals
+        totals["pl"] += pl
+        totals["trades"] += 1
+        if pl > 0:
+            totals["wins"] += 1
+            totals["gross_profit"] += pl
+        elif pl < 0:
+            totals["losses"] += 1
+            totals["gross_loss"] -= pl
+        bucket.pl_max = max(bucket.pl_max, pl)
+        bucket.pl_min = min(bucket.pl_min, pl)
+        self.realized_pl += pl
+        if not self._marked and self.starting_equity is not None:
+            self._mark(ts, self.starting_equity + self.realized_pl)
+
+    def set_exposure(self, ts, gross_notional):
+        """Gross value of open positions from now on (0 when flat)"""
+        self._accrue(ts)
+        self._advance(ts)
+        self._gross = max(0.0, float(gross_notional))
+
+    def _accrue(self, ts):
+        in_market, exposure = self._pending_exposure(ts)
+        since = self._exposure_since
+        self._exposure_since = ts if since is None else max(since, ts)
+        if in_market:
+            self._bucket.totals["in_market"] += in_market
+            self._bucket.totals["exposure"] += exposure
+
+    def _pending_exposure(self, ts):
+        """(time in market, exposure-weighted time) since the last update, up to ts"""
+        since = self._exposure_since
+        if since is None or self._gross <= 0 or self._bucket is None or ts <= since:
+            return 0.0, 0.0
+        elapsed = ts - since
+        equity = self.equity or 0.0
+        return elapsed, elapsed * self._gross / equity if equity > 0 else 0.0
+
+    # --- Queries (O(log n)) ----------------------------------------------------------------------
+    def stats(self, start=None, end=None, now=None):
+        """Metrics for buckets starting in [start, end); None means unbounded. Changes no state."""
+        first = 0 if start is None else int(start // self.bucket_seconds)
+        last = math.inf if end is None else int(end // self.bucket_seconds)
+        lo = bisect_left(self._index, first)
+        hi = bisect_left(self._index, last) if end is not None else len(self._index)
+
+        totals = {name: self._prefix[name][hi] - self._prefix[name][lo] for name in PREFIX_FIELDS}
+        node = self._tree.query(lo, hi)
+        open_equity = self._open_equity[lo] if lo < hi else None
+        equity = self._open_equity[hi] if hi < len(self._index) else self.equity
+
+        bucket = self._bucket
+        if bucket is not None and first <= bucket.index < last:
+            for name, value in bucket.with_return(self.equity).items():
+                totals[name] += value
+            if now is not None:
+                in_market, exposure = self._pending_exposure(now)
+                totals["in_market"] += in_market
+                totals["exposure"] += exposure
+            node = _combine(node, bucket.leaf())
+            if open_equity is None:
+                open_equity = bucket.open_equity
+            equity = self.equity
+
+        # Empty buckets before the first one in range belong to an earlier range
+        if start is not None and (lo < hi or bucket is not None and first <= bucket.index < last):
+            if lo < hi:
+                index, periods = self._index[lo], self._prefix["periods"][lo + 1] - self._prefix["periods"][lo]
+            else:
+                index, periods = bucket.index, bucket.totals["periods"]
+            totals["periods"] -= max(0, periods - (index - first + 1))
+
+        return self._summarize(totals, node, open_equity, equity, start, end, now)
+
+    def _summarize(self, totals, node, open_equity, equity, start, end, now):
+        periods = totals["periods"]
+        sharpe = sortino = 0.0
+        if periods > 1:
+            mean = totals["ret"] / periods
+            variance = max(0.0, (totals["ret2"] - periods * mean * mean) / (periods - 1))
+            downside = math.sqrt(totals["down2"] / periods)
+            annualize = math.sqrt(self.periods_per_year)
+            if variance > 0:
+                sharpe = mean / math.sqrt(variance) * annualize
+            if downside > 0:
+                sortino = mean / downside * annualize
+
+        now = now if now is not None else self.last_time
+        drawdown_duration = 0.0
+        if node[1] >= 0 and equity is not None and equity < node[0] and now is not None:
+            drawdown_duration = max(0.0, now - node[1] * self.bucket_seconds)
+
+        span_start = max(start, self.first_time) if start is not None and self.first_time is not None else self.first_time
+        span_end = min(end, now) if end is not None and now is not None else now
+        elapsed = (span_end - span_start) if span_start is not None and span_end is not None else 0.0
+
+        trades = totals["trades"]
+        wins, losses = totals["wins"], totals["losses"]
+        gross_profit, gross_loss = totals["gross_profit"], totals["gross_loss"]
+        return {
+            "equity": equity,
+            "return_pct": (equity / open_equity - 1) * 100 if open_equity else 0.0,
+            "pl": totals["pl"],
+            "trades": int(trades),
+            "wins": int(wins),
+            "losses": int(losses),
+            "win_rate": wins / trades if trades else 0.0,
+            "avg_win": gross_profit / wins if wins else 0.0,
+            "avg_loss": -gross_loss / losses if losses else 0.0,
+            "largest_win": node[4] if node[4] > 0 else 0.0,
+            "largest_loss": node[5] if node[5] < 0 else 0.0,
+            "profit_factor": gross_profit / gross_loss if gross_loss else (math.inf if gross_profit else 0.0),
+            "sharpe": sharpe,
+            "sortino": sortino,
+            "max_drawdown_pct": node[3] * 100,
+            "drawdown_duration": drawdown_duration,
+            "longest_drawdown": max(self.longest_drawdown, self._current_drawdown_duration(now)),
+            "exposure_pct": totals["in_market"] / elapsed * 100 if elapsed > 0 else 0.0,
+            "avg_exposure_pct": totals["exposure"] / elapsed * 100 if elapsed > 0 else 0.0,
+            "periods": int(periods),
+        }
+
+    def _current_drawdown_duration(self, now):
+        if self.peak_time is None or now is None or self.equity >= self.peak:
+            return 0.0
+        return now - self.peak_time
@@ -0,0 +1,113 @@
+# trading/evaluation_pipeline.py
+"""
+Live strategy evaluations with at most one in flight per symbol.
+
+The live loop asks for an evaluation every tick, but an evaluation is a
+trendbars round trip plus a positions round trip and can outlast the tick.
+EvaluationPipeline.request() starts one only when none is running for the
+symbol. Requests arriving meanwhile are coalesced into a single follow-up,
+started as soon as the running evaluation finishes. A slow broker therefore
+means fewer, fresher evaluations instead of a pile of overlapping ones. An
+evaluation that never reports back is abandoned after EVALUATION_TIMEOUT_SEC
+so the symbol cannot wedge.
+"""
+import itertools
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import Config
+from utils.logger import get_logger, SAMPLED
+from utils.tracing import tracer
+
+log = get_logger(__name__)
+
+
+class EvaluationPipeline:
+    def __init__(self, start, timeout=None, clock=time.monotonic):
+        """start(symbol, token) launches an evaluation, which must end with finish(symbol, token)"""
+        self._start = start
+        self.timeout = Config.EVALUATION_TIMEOUT_SEC if timeout is None else timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = itertools.count(1)
+        self._in_flight = {}  # symbol -> (token, started_at)
+        self._pending = {}  # symbol -> time of the first request coalesced behind the running one
+        self.requested = 0
+        self.started = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+
+    def request(self, symbol):
+        """Evaluate symbol now, or once the running evaluation finishes; True if started now"""
+        with self._lock:
+            self.requested += 1
+            now = self._clock()
+            current = self._in_flight.get(symbol)
+            if current is not None:
+                if now - current[1] < self.timeout:
+                    self._pending.setdefault(symbol, now)
+                    self.coalesced += 1
+                    return False
+                self.timed_out += 1
+                log.warning("Evaluation of %s gave no result in %.0fs; starting a new one",
+                            symbol, now - current[1], extra=SAMPLED)
+            self._pending.pop(symbol, None)
+            token = self._begin(symbol, now)
+        self._launch(symbol, token)
+        return True
+
+    def finish(self, symbol, token, ok=True):
+        """Mark an evaluation done and start the coalesced follow-up, if any"""
+        with self._lock:
+            current = self._in_flight.get(symbol)
+            if current is None or current[0] != token:
+                return  # Abandoned after the timeout; its replacement is already running
+            del self._in_flight[symbol]
+            now = self._clock()
+            tracer.record("live.evaluation", (now - current[1]) * 1000)
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+            queued_at = self._pending.pop(symbol, None)
+            if queued_at is None:
+                return
+            tracer.record("live.evaluation_wait", (now - queued_at) * 1000)
+            token = self._begin(symbol, now)
+        self._launch(symbol, token)
+
+    def cancel_pending(self):
+        """Drop queued follow-ups; evaluations already running still finish"""
+        with self._lock:
+            self._pending.clear()
+
+    def _begin(self, symbol, now):
+        token = next(self._tokens)
+        self._in_flight[symbol] = (token, now)
+        self.started += 1
+        return token
+
+    def _launch(self, symbol, token):
+        try:
+            self._start(symbol, token)
+        except Exception:
+            log.exception("Could not start evaluation of %s", symbol)
+            self.finish(symbol, token, ok=False)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._in_flight),
+                'pending': len(self._pending),
+                'requested': self.requested,
+                'started': self.started,
+                'coalesced': self.coalesced,
+                'completed': self.completed,
+                'failed': self.failed,
+                'timed_out': self.timed_out,
+            }
@@ -0,0 +1,134 @@
+# trading/ledger.py
+"""
+Trade ledger shared by the engine and whatever displays it.
+
+Every row the trade log shows (entries, exits, order failures, start/stop)
+is recorded here as a trade dict with numeric price, size and P/L, not as
+formatted Treeview strings. Opening and closing trades feed an EquityCurve;
+the most recent rows are kept in memory; with a path, every row is also
+appended to a JSON-lines file so a headless engine leaves an audit trail.
+trade_row() formats a trade for the GUI's trade log.
+
+Engine threads record and the Tk thread reads stats, so access is locked.
+"""
+import json
+import os
+import sys
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.equity_curve import EquityCurve
+from trading.exit_engine import ExitSignal
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# Trade types that close a position and carry realized P/L
+CLOSING_TYPES = (
+    'SELL', ExitSignal.STOP_LOSS, ExitSignal.TAKE_PROFIT, ExitSignal.TRAILING_STOP, ExitSignal.TIME_EXIT,
+    'STOP (SIM)', 'PROFIT (SIM)', 'TIME EXIT (SIM)'
+)
+
+TRADE_FIELDS = ('time', 'symbol', 'type', 'price', 'size', 'pl', 'reason', 'confidence')
+
+
+def make_trade(time, symbol, type_, price=None, size=None, pl=None, reason="", confidence="", pl_pct=None):
+    """Trade dict; time is an aware datetime, price/size/pl numbers or None"""
+    trade = {
+        'time': time, 'symbol': symbol, 'type': type_, 'price': price, 'size': size,
+        'pl': pl, 'reason': reason, 'confidence': confidence
+    }
+    if pl_pct is not None:
+        trade['pl_pct'] = pl_pct
+    return trade
+
+
+def trade_row(trade):
+    """Trade log Treeview values for a trade dict"""
+    price, size, pl = trade['price'], trade['size'], trade['pl']
+    if pl is None:
+        pl_text = "-"
+    elif trade.get('pl_pct') is not None:
+        pl_text = f"£{pl:.2f} ({trade['pl_pct']:.2f}%)"
+    else:
+        pl_text = f"£{pl:.2f}"
+    return (
+        trade['time'].strftime('%Y-%m-%d %H:%M:%S'),
+        trade['symbol'],
+        trade['type'],
+        f"£{price:.2f}" if price else "-",
+        "-" if size is None else size,
+        pl_text,
+        trade['reason'],
+        trade['confidence']
+    )
+
+
+class TradeLedger:
+    def __init__(self, path=None, max_trades=1000):
+        self.path = os.path.expanduser(path) if path else None
+        self.equity_curve = EquityCurve()
+        self.open_notional = {}
+        self._recent = deque(maxlen=max_trades)
+        self._lock = threading.Lock()
+        self._file = None
+
+    def record(self, trade):
+        """Add one trade log row; opening and closing trades also move the equity curve"""
+        with self._lock:
+            self._recent.append(trade)
+            self._apply(trade)
+            self._write(trade)
+
+    def _apply(self, trade):
+        ts = trade['time'].timestamp()
+        trade_type = str(trade['type'])
+        symbol = trade['symbol']
+        if trade_type in CLOSING_TYPES:
+            # A close whose P/L is unknown would count as a flat trade; leave it out of the fill stats
+            if trade['pl'] is not None:
+                self.equity_curve.record_fill(ts, trade['pl'])
+            self.open_notional.pop(symbol, None)
+        elif trade_type.startswith('BUY') and trade['price'] and trade['size']:
+            self.open_notional[symbol] = self.open_notional.get(symbol, 0.0) + trade['price'] * trade['size']
+        else:
+            return
+        self.equity_curve.set_exposure(ts, sum(self.open_notional.values()))
+
+    def _write(self, trade):
+        if self.path is None:
+            return
+        try:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps(dict(trade, time=trade['time'].isoformat())) + "\n")
+            self._file.flush()
+        except OSError:
+            log.exception("Could not write to the trade ledger %s", self.path)
+
+    def record_equity(self, equity, ts=None):
+        """Account equity (or balance) update"""
+        with self._lock:
+            self.equity_curve.record_equity(datetime.now(timezone.utc).timestamp() if ts is None else ts, equity)
+
+    def stats(self, start=None, end=None, now=None):
+        with self._lock:
+            return self.equity_curve.stats(start, end, now=now)
+
+    @property
+    def first_time(self):
+        return self.equity_curve.first_time
+
+    def trades(self):
+        """Recent trade log rows, oldest first"""
+        with self._lock:
+            return list(self._recent)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,427 @@
+# trading/market_bus.py
+"""
+Shared-memory market data bus.
+
+The process that holds the broker connection (the GUI, or headless.py)
+publishes every tick and bar it receives into one shared-memory segment;
+chart, strategy and model processes attach to it by name and read the same
+data without each polling the broker.
+
+Layout, in one multiprocessing.shared_memory block:
+
+    header     magic, version, writer pid, capacities, number of symbols registered
+    names      symbol name per slot, 32 bytes
+    control    per symbol: tick sequence, ticks written, bar sequence, bars written
+    ticks      per symbol: ring of (ts, bid, ask)
+    bars       per symbol: ring of (ts, open, high, low, close, volume)
+
+Prices are integers in 1/100000 of a unit, as in the market journal and on
+the Open API wire; ts is milliseconds since the epoch. Readers convert to
+floats only for the window they ask for.
+
+Each ring is guarded by a seqlock. The writer makes the sequence odd,
+writes, advances the written count and makes the sequence even again; a
+reader copies its window between two reads of the sequence and retries if
+the sequence was odd or moved. Readers never block the writer, and there is
+exactly one writer per bus. A bar with the same timestamp as the newest bar
+replaces it, so the bar still forming can be republished as it changes.
+
+The writer unlinks the block when it closes. A bus left behind by a writer
+that died is taken over by the next one, which checks the pid in the header.
+
+    python -m trading.market_bus info
+    python -m trading.market_bus watch EURUSD
+    python -m trading.market_bus replay --source ctrader --speed 10
+"""
+import argparse
+import sys
+import os
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import Config
+from trading.bars import BAR_DTYPE, BarArray
+from trading.market_journal import PRICE_SCALE
+from utils.logger import get_logger, SAMPLED
+
+log = get_logger(__name__)
+
+MAGIC = b"SMDB"
+VERSION = 1
+NAME_BYTES = 32
+SPINS = 100  # Retries before a reader yields while the writer is mid-update
+
+HEADER_DTYPE = np.dtype([("magic", "S4"), ("version", "<u4"), ("pid", "<u4"), ("symbols", "<u4"),
+                         ("tick_capacity", "<u4"), ("bar_capacity", "<u4"), ("symbol_count", "<u4")])
+TICK_DTYPE = np.dtype([("ts", "<i8"), ("bid", "<i8"), ("ask", "<i8")])
+TICK_SEQ, TICK_COUNT, BAR_SEQ, BAR_COUNT = range(4)
+
+
+def _untrack(block):
+    """Leave the block to the writer's close(): a resource tracker would unlink it when this process exits"""
+    resource_tracker.unregister(block._name, "shared_memory")
+
+
+def _writer_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _align(offset):
+    return (offset + 63) // 64 * 64
+
+
+def _layout(symbols, tick_capacity, bar_capacity):
+    """Offsets of names, control, ticks and bars, and the total size"""
+    names = _align(HEADER_DTYPE.itemsize)
+    control = _align(names + symbols * NAME_BYTES)
+    ticks = _align(control + symbols * 4 * 8)
+    bars = _align(ticks + symbols * tick_capacity * TICK_DTYPE.itemsize)
+    return names, control, ticks, bars, bars + symbols * bar_capacity * BAR_DTYPE.itemsize
+
+
+class _Segment:
+    """NumPy views over a bus block"""
+
+    def _map(self, block):
+        self._block = block
+        self._header = np.ndarray((), dtype=HEADER_DTYPE, buffer=block.buf)
+        if self._header["magic"] != MAGIC or self._header["version"] != VERSION:
+            raise ValueError(f"{block.name} is not a version {VERSION} market data bus")
+        self.symbol_capacity = int(self._header["symbols"])
+        self.tick_capacity = int(self._header["tick_capacity"])
+        self.bar_capacity = int(self._header["bar_capacity"])
+        names, control, ticks, bars, _ = _layout(self.symbol_capacity, self.tick_capacity, self.bar_capacity)
+        self._names = np.ndarray((self.symbol_capacity,), dtype=f"S{NAME_BYTES}", buffer=block.buf, offset=names)
+        self._control = np.ndarray((self.symbol_capacity, 4), dtype="<i8", buffer=block.buf, offset=control)
+        self._ticks = np.ndarray((self.symbol_capacity, self.tick_capacity), dtype=TICK_DTYPE, buffer=block.buf,
+                                 offset=ticks)
+        self._bars = np.ndarray((self.symbol_capacity, self.bar_capacity), dtype=BAR_DTYPE, buffer=block.buf,
+                                offset=bars)
+        self._slots = {}
+
+    @property
+    def name(self):
+        return self._block.name
+
+    def symbols(self):
+        count = int(self._header["symbol_count"])
+        return [name.decode() for name in self._names[:count]]
+
+    def _release(self):
+        self._header = self._names = self._control = self._ticks = self._bars = None
+        self._block.close()
+
+
+class MarketBus(_Segment):
+    """Writer side; create one per bus name, in the process that receives market data"""
+
+    def __init__(self, name=None, symbols=None, tick_capacity=None, bar_capacity=None):
+        symbols = symbols or Config.MARKET_BUS_SYMBOLS
+        tick_capacity = tick_capacity or Config.MARKET_BUS_TICKS
+        bar_capacity = bar_capacity or Config.MARKET_BUS_BARS
+        size = _layout(symbols, tick_capacity, bar_capacity)[-1]
+        block = shared_memory.SharedMemory(name=name or Config.MARKET_BUS_NAME, create=True, size=size)
+        _untrack(block)
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=block.buf)
+        header[()] = (MAGIC, VERSION, os.getpid(), symbols, tick_capacity, bar_capacity, 0)
+        del header
+        self._map(block)
+        # Client callbacks arrive on the reactor thread and the event loop; the seqlock allows one writer
+        self._lock = threading.Lock()
+        self._full_warned = False
+        self._closed = False
+
+    @classmethod
+    def create(cls, name=None):
+        """The bus, or None if a running process already publishes under this name"""
+        name = name or Config.MARKET_BUS_NAME
+        try:
+            return cls(name)
+        except FileExistsError:
+            pass
+        try:
+            reader = MarketBusReader(name)
+            pid = int(reader._header["pid"])
+            reader.close()
+        except ValueError:
+            pid = 0  # Not a bus we can read; treat as stale
+        except FileNotFoundError:
+            return cls.create(name)  # Removed in the meantime
+        if pid and _writer_alive(pid):
+            log.error("Market data bus %s is already published by process %d", name, pid)
+            return None
+        log.warning("Taking over market data bus %s left by process %d", name, pid)
+        unlink(name)
+        return cls(name)
+
+    def _slot(self, symbol):
+        """Slot for symbol, registering it on first use (lock held)"""
+        slot = self._slots.get(symbol)
+        if slot is not None:
+            return slot
+        count = int(self._header["symbol_count"])
+        if count >= self.symbol_capacity:
+            if not self._full_warned:
+                log.warning("Market data bus is full (%d symbols); %s is not published", count, symbol)
+                self._full_warned = True
+            return None
+        # The name is in place before readers can see the new count
+        self._names[count] = symbol.encode()[:NAME_BYTES]
+        self._header["symbol_count"] = count + 1
+        self._slots[symbol] = count
+        return count
+
+    def publish_tick(self, symbol, ts, bid, ask):
+        """One quote; bid and ask in 1/100000 units, 0 when the side is absent"""
+        with self._lock:
+            if self._closed:
+                return
+            slot = self._slot(symbol)
+            if slot is None:
+                return
+            control = self._control[slot]
+            control[TICK_SEQ] += 1
+            count = int(control[TICK_COUNT])
+            self._ticks[slot, count % self.tick_capacity] = (ts, bid, ask)
+            control[TICK_COUNT] = count + 1
+            control[TICK_SEQ] += 1
+
+    def publish_bars(self, symbol, bars):
+        """(ts, open, high, low, close, volume) tuples, oldest first; bars older than the newest are skipped"""
+        with self._lock:
+            if self._closed:
+                return
+            slot = self._slot(symbol)
+            if slot is None:
+                return
+            control = self._control[slot]
+            ring = self._bars[slot]
+            capacity = self.bar_capacity
+            control[BAR_SEQ] += 1
+            count = int(control[BAR_COUNT])
+            last_ts = int(ring[(count - 1) % capacity]["ts"]) if count else None
+            for bar in bars:
+                if last_ts is not None and bar[0] < last_ts:
+                    continue
+                if bar[0] == last_ts:
+                    ring[(count - 1) % capacity] = bar
+                else:
+                    ring[count % capacity] = bar
+                    count += 1
+                    last_ts = bar[0]
+            control[BAR_COUNT] = count
+            control[BAR_SEQ] += 1
+
+    def publish_bar(self, symbol, ts, open_, high, low, close, volume):
+        self.publish_bars(symbol, ((ts, open_, high, low, close, volume),))
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._release()
+            resource_tracker.register(self._block._name, "shared_memory")
+            self._block.unlink()
+
+
+class MarketBusReader(_Segment):
+    """Reader side; attach from any process on the machine"""
+
+    def __init__(self, name=None):
+        block = shared_memory.SharedMemory(name=name or Config.MARKET_BUS_NAME)
+        _untrack(block)
+        try:
+            self._map(block)
+        except ValueError:
+            block.close()
+            raise
+
+    @classmethod
+    def attach(cls, name=None):
+        """A reader, or None when no bus is running"""
+        try:
+            return cls(name)
+        except FileNotFoundError:
+            return None
+
+    def _slot(self, symbol):
+        slot = self._slots.get(symbol)
+        if slot is None:
+            # Registered since we last looked
+            self._slots = {name: index for index, name in enumerate(self.symbols())}
+            slot = self._slots.get(symbol)
+        return slot
+
+    def _read(self, symbol, ring, seq_field, count_field, limit, since):
+        """(records written so far, copy of the requested records) under the ring's seqlock"""
+        slot = self._slot(symbol)
+        if slot is None:
+            return 0, np.empty(0, dtype=ring.dtype)
+        control = self._control[slot]
+        ring = ring[slot]
+        capacity = len(ring)
+        attempt = 0
+        while True:
+            begin = int(control[seq_field])
+            if not begin & 1:
+                count = int(control[count_field])
+                first = max(count - capacity, since or 0, count - limit if limit else 0)
+                start, end = first % capacity, count % capacity
+                if first == count:
+                    records = np.empty(0, dtype=ring.dtype)
+                elif start < end:
+                    records = ring[start:end].copy()
+                else:
+                    records = np.concatenate((ring[start:], ring[:end]))
+                if int(control[seq_field]) == begin:
+                    if since is not None and since < count - capacity:
+                        log.warning("Market data bus reader fell %d records behind on %s",
+                                    count - capacity - since, symbol, extra=SAMPLED)
+                    return count, records
+            attempt += 1
+            if attempt % SPINS == 0:
+                time.sleep(0)
+
+    def ticks(self, symbol, limit=None, since=None):
+        """(ticks written so far, newest ticks); pass the count back as since to read only newer ones"""
+        return self._read(symbol, self._ticks, TICK_SEQ, TICK_COUNT, limit, since)
+
+    def bars(self, symbol, limit=None, since=None):
+        """(bars written so far, newest bars); the last one may still be forming"""
+        return self._read(symbol, self._bars, BAR_SEQ, BAR_COUNT, limit, since)
+
+    def latest_tick(self, symbol):
+        """(ts seconds, bid, ask) as floats, or None before the first tick"""
+        _, records = self.ticks(symbol, limit=1)
+        if not len(records):
+            return None
+        ts, bid, ask = records[0].tolist()
+        return ts / 1000, bid / PRICE_SCALE if bid else None, ask / PRICE_SCALE if ask else None
+
+    def tick_frame(self, symbol, limit=None):
+        _, records = self.ticks(symbol, limit)
+        prices = {side: np.where(records[side] != 0, records[side] / PRICE_SCALE, np.nan) for side in ("bid", "ask")}
+        return pd.DataFrame(prices, index=pd.to_datetime(records["ts"], unit="ms", utc=True))
+
+    def bar_array(self, symbol, limit=None):
+        _, records = self.bars(symbol, limit)
+        return BarArray.from_records(records, symbol)
+
+    def bar_frame(self, symbol, limit=None):
+        """OHLCV frame on a UTC index, as BarArray.frame builds for any bar source"""
+        return self.bar_array(symbol, limit).frame()
+
+    def close(self):
+        if self._block is not None:
+            self._release()
+            self._block = None
+
+
+def unlink(name=None):
+    """Remove a bus block; True if there was one"""
+    try:
+        block = shared_memory.SharedMemory(name=name or Config.MARKET_BUS_NAME)
+    except FileNotFoundError:
+        return False
+    block.close()
+    # unlink() unregisters the block from the tracker attaching just registered it with
+    block.unlink()
+    return True
+
+
+def _replay(args):
+    from trading.market_journal import Journal, ReplayEngine, ctrader_spot_delivery, alpaca_bar_delivery, TICKS, BARS
+
+    journal = Journal(args.source, args.dir)
+    names = journal.symbols()
+    # Replay through the client handlers so the bus sees what a live session would publish
+    if args.source == "alpaca":
+        from trading.alpaca_client import AlpacaClient
+        client = AlpacaClient()
+        records, deliver = journal.read(BARS), alpaca_bar_delivery(client, names)
+    else:
+        from trading.ctrader_client import CTraderClient
+        client = CTraderClient()
+        records, deliver = journal.read(TICKS), ctrader_spot_delivery(client, names)
+    client.journal = None  # Do not record the replay itself
+    bus = client.market_bus or MarketBus.create(args.name)
+    if bus is None:
+        return 1
+    client.market_bus = bus
+    try:
+        if args.source != "alpaca":
+            bars = journal.read(BARS)
+            for key, name in names.items():
+                rows = bars[bars["symbol"] == key]
+                bus.publish_bars(name, zip(*(rows[field].tolist() for field in
+                                             ("ts", "open", "high", "low", "close", "volume"))))
+        count, elapsed = ReplayEngine(args.speed).replay(records, deliver)
+        print(f"Published {count:,} records in {elapsed:.3f}s to {bus.name}; Ctrl+C to remove it")
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bus.close()
+    return 0
+
+
+def main(argv=None):
+    from trading.market_journal import _parse_speed
+
+    parser = argparse.ArgumentParser(description="Inspect, watch or feed the shared-memory market data bus")
+    parser.add_argument("command", choices=["info", "watch", "replay", "unlink"])
+    parser.add_argument("symbol", nargs="?", help="symbol to watch")
+    parser.add_argument("--name", help=f"bus name (default {Config.MARKET_BUS_NAME})")
+    parser.add_argument("--source", default="ctrader", help="journal source to replay")
+    parser.add_argument("--dir", help=f"journal directory (default {Config.JOURNAL_DIR})")
+    parser.add_argument("--speed", type=_parse_speed, default=1.0, help="1, N or max (default 1)")
+    args = parser.parse_args(argv)
+
+    if args.command == "replay":
+        return _replay(args)
+    if args.command == "unlink":
+        if not unlink(args.name):
+            print("No market data bus to remove")
+            return 1
+        return 0
+
+    reader = MarketBusReader.attach(args.name)
+    if reader is None:
+        print("No market data bus is running")
+        return 1
+    try:
+        if args.command == "info":
+            for symbol in reader.symbols():
+                ticks, _ = reader.ticks(symbol, limit=1)
+                bars, _ = reader.bars(symbol, limit=1)
+                print(f"{symbol:<12} {ticks:>12,} ticks {bars:>8,} bars  last {reader.latest_tick(symbol)}")
+            return 0
+        if not args.symbol:
+            parser.error("watch needs a symbol")
+        seen = None
+        while True:
+            count, records = reader.ticks(args.symbol, since=seen)
+            for ts, bid, ask in records.tolist():
+                print(f"{pd.Timestamp(ts, unit='ms', tz='UTC')} {args.symbol} bid {bid / PRICE_SCALE} ask {ask / PRICE_SCALE}")
+            seen = count
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        reader.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+# trading/message_dispatch.py
+"""
+payloadType dispatch for inbound cTrader Open API messages.
+
+CTraderClient used to Protobuf.extract every message and walk an isinstance
+chain to find its handler. MessageDispatcher looks the handler up by the
+envelope's payloadType instead, and only decodes a payload when a handler is
+registered for its type: heartbeats and anything nobody listens to are never
+parsed. Other components register for message types here rather than
+editing the client.
+
+Spot events are the bulk of the traffic. When protobuf runs its pure-Python
+implementation, decode_spot_event reads the few scalar fields straight off
+the wire into a SpotQuote, which is several times cheaper than building a
+ProtoOASpotEvent.
+
+Trendbar responses are the other heavy payload: a few hundred nested
+messages per request. decode_trendbars reads them into the columns of one
+BarArray without building a message per bar.
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.bars import BarArray
+from utils.logger import get_logger, SAMPLED
+
+log = get_logger(__name__)
+
+try:
+    from google.protobuf.internal import api_implementation
+    from ctrader_open_api import Protobuf
+    from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent, ProtoOAGetTrendbarsRes
+except ImportError:
+    Protobuf = None
+    ProtoOASpotEvent = None
+
+
+def payload_type(message_type):
+    """payloadType of a generated message class, or the int itself"""
+    if isinstance(message_type, int):
+        return message_type
+    return message_type().payloadType
+
+
+class SpotQuote:
+    """The scalar fields of a ProtoOASpotEvent; quacks like one for _handle_spot_event"""
+    # Defaults for absent fields; decoded ones live in the instance __dict__
+    ctidTraderAccountId = 0
+    symbolId = 0
+    bid = 0
+    ask = 0
+    sessionClose = 0
+    timestamp = 0
+
+    FIELDS = {2: 'ctidTraderAccountId', 3: 'symbolId', 4: 'bid', 5: 'ask', 7: 'sessionClose', 8: 'timestamp'}
+
+    def __init__(self, fields):
+        self.__dict__.update(fields)
+
+    def HasField(self, name):
+        return name in self.__dict__
+
+
+def _varint(data, pos):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def decode_spot_event(payload):
+    """SpotQuote from serialized ProtoOASpotEvent bytes
+
+    Events carrying live trendbars (field 6) are decoded in full, since
+    SpotQuote has nowhere to put them.
+    """
+    names = SpotQuote.FIELDS
+    fields = {}
+    pos, end = 0, len(payload)
+    while pos < end:
+        # Every ProtoOASpotEvent tag fits in one byte
+        key = payload[pos]
+        pos += 1
+        if key > 0x7F:
+            key, pos = _varint(payload, pos - 1)
+        wire = key & 7
+        if wire == 0:
+            value, pos = _varint(payload, pos)
+            name = names.get(key >> 3)
+            if name is not None:
+                fields[name] = value
+        elif key >> 3 == 6:
+            return ProtoOASpotEvent.FromString(payload)
+        elif wire == 2:
+            length, pos = _varint(payload, pos)
+            pos += length
+        elif wire == 1:
+            pos += 8
+        elif wire == 5:
+            pos += 4
+        else:
+            raise ValueError(f"Unsupported wire type {wire} in ProtoOASpotEvent")
+    if pos != end:
+        raise ValueError("Truncated ProtoOASpotEvent")
+    return SpotQuote(fields)
+
+
+# ProtoOATrendbar field number -> BarArray.from_wire column (minutes, low, deltaOpen, deltaHigh, deltaClose, volume)
+TRENDBAR_COLUMNS = {9: 0, 5: 1, 6: 2, 8: 3, 7: 4, 3: 5}
+TRENDBAR_FIELD = 5  # ProtoOAGetTrendbarsRes.trendbar
+
+
+def decode_trendbars(payload):
+    """BarArray from serialized ProtoOAGetTrendbarsRes bytes, oldest bar first"""
+    if api_implementation.Type() != 'python':
+        return BarArray.from_trendbars(ProtoOAGetTrendbarsRes.FromString(payload).trendbar)
+    columns = TRENDBAR_COLUMNS
+    rows = []
+    pos, end = 0, len(payload)
+    while pos < end:
+        key, pos = _varint(payload, pos)
+        wire = key & 7
+        if wire == 0:
+            _, pos = _varint(payload, pos)
+        elif wire == 2:
+            length, pos = _varint(payload, pos)
+            if key >> 3 != TRENDBAR_FIELD:
+                pos += length
+                continue
+            row = [0] * 6
+            bar_end = pos + length
+            while pos < bar_end:
+                # Every ProtoOATrendbar field is a varint with a one-byte tag
+                tag = payload[pos]
+                if tag & 7 or tag > 0x7F:
+                    return BarArray.from_trendbars(ProtoOAGetTrendbarsRes.FromString(payload).trendbar)
+                value, pos = _varint(payload, pos + 1)
+                column = columns.get(tag >> 3)
+                if column is not None:
+                    row[column] = value
+            rows.append(row)
+        elif wire == 1:
+            pos += 8
+        elif wire == 5:
+            pos += 4
+        else:
+            raise ValueError(f"Unsupported wire type {wire} in ProtoOAGetTrendbarsRes")
+    if pos != end:
+        raise ValueError("Truncated ProtoOAGetTrendbarsRes")
+    if not rows:
+        return BarArray.empty()
+    return BarArray.from_wire(*np.array(rows, dtype=np.int64).T)
+
+
+def _fast_decoders():
+    # The upb/C++ runtimes parse faster than any Python loop; only the pure-Python one benefits
+    if Protobuf is None or api_implementation.Type() != 'python':
+        return {}
+    return {payload_type(ProtoOASpotEvent): decode_spot_event}
+
+
+class MessageDispatcher:
+    """Routes ProtoMessage envelopes to handlers registered by payloadType"""
+
+    def __init__(self):
+        self._routes = {}  # payloadType -> (decode, (handler, ...))
+        self._fast = _fast_decoders()
+
+    def register(self, message_type, handler, decode=None):
+        """Call handler(decoded) for each inbound message_type (generated class or payloadType)
+
+        decode(payload_bytes) overrides how the payload is parsed; by default
+        it is the generated class's FromString, or the fast decoder for spots.
+        """
+        key = payload_type(message_type)
+        current = self._routes.get(key)
+        if decode is None:
+            decode = current[0] if current else self._default_decoder(key, message_type)
+        handlers = current[1] if current else ()
+        if handler not in handlers:
+            handlers += (handler,)
+        # Replace rather than mutate, so the reactor thread never sees a half-updated route
+        self._routes[key] = (decode, handlers)
+
+    def unregister(self, message_type, handler):
+        key = payload_type(message_type)
+        current = self._routes.get(key)
+        if current is None or handler not in current[1]:
+            return
+        handlers = tuple(h for h in current[1] if h != handler)
+        if handlers:
+            self._routes[key] = (current[0], handlers)
+        else:
+            del self._routes[key]
+
+    def handles(self, message_type):
+        return payload_type(message_type) in self._routes
+
+    def _default_decoder(self, key, message_type):
+        if key in self._fast:
+            return self._fast[key]
+        klass = message_type if not isinstance(message_type, int) else type(Protobuf.get(key))
+        return klass.FromString
+
+    def dispatch(self, message):
+        """Decode and deliver one envelope; False when no handler is registered for it"""
+        route = self._routes.get(message.payloadType)
+        if route is None:
+            return False
+        decode, handlers = route
+        try:
+            decoded = decode(message.payload)
+        except Exception:
+            log.warning("Could not decode payloadType %s", message.payloadType, exc_info=True, extra=SAMPLED)
+            return True
+        for handler in handlers:
+            try:
+                handler(decoded)
+            except Exception:
+                log.exception("Handler for payloadType %s failed", message.payloadType)
+        return True
@@ -0,0 +1,195 @@
+# trading/order_book.py
+"""
+Level-2 order book built from cTrader depth quotes.
+
+A ProtoOADepthEvent carries new quotes (id, size, and a bid or an ask
+price) and the ids of deleted ones; a quote with a known id replaces it.
+The book keeps the quotes by id, so a delete knows where to take size from,
+and aggregates them into one price ladder per side: a NumPy array of sizes
+indexed by price tick from a base price. Adding or removing a quote is an
+O(1) array update; the best price only moves by a vectorized scan when its
+own level empties. The ladder is re-centred if a quote falls outside it.
+
+Prices are integers in 1/100000 of a unit as on the wire, sizes in cents of
+a unit as position volumes are; the accessors return floats. Depth events
+arrive on the reactor thread, which is also where strategies read books.
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import Config
+from trading.market_journal import PRICE_SCALE
+from utils.logger import get_logger, SAMPLED
+
+log = get_logger(__name__)
+
+BID, ASK = 0, 1
+
+
+class OrderBook:
+    def __init__(self, symbol, tick=1, levels=None):
+        self.symbol = symbol
+        self.tick = tick  # Wire units per ladder level; 10 ** (5 - digits)
+        self.levels = levels or Config.ORDER_BOOK_LEVELS
+        self._quotes = {}  # quote id -> (side, price, size)
+        self._sizes = np.zeros((2, self.levels), dtype=np.int64)
+        self._base = None  # Wire price of ladder index 0
+        self._best = [-1, self.levels]  # Highest bid index, lowest ask index
+        self.updates = 0
+
+    def __len__(self):
+        return len(self._quotes)
+
+    # --- Updates ---------------------------------------------------------------------------------
+    def apply(self, event):
+        """Apply a ProtoOADepthEvent"""
+        self.update(((quote.id, quote.size, quote.bid, quote.ask) for quote in event.newQuotes),
+                    event.deletedQuotes)
+
+    def update(self, new_quotes=(), deleted=()):
+        """new_quotes: (id, size, bid, ask) with 0 for the absent side; deleted: quote ids"""
+        for quote_id in deleted:
+            self._remove(quote_id)
+        for quote_id, size, bid, ask in new_quotes:
+            self._remove(quote_id)
+            side, price = (BID, bid) if bid else (ASK, ask)
+            if not price:
+                continue
+            # Placed before it is stored: a re-centre rebuilds the ladder from the stored quotes
+            self._add(side, price, size)
+            self._quotes[quote_id] = (side, price, size)
+        self.updates += 1
+
+    def clear(self):
+        self._quotes.clear()
+        self._sizes[:] = 0
+        self._base = None
+        self._best = [-1, self.levels]
+
+    def _index(self, price):
+        if self._base is None:
+            self._base = price - self.levels // 2 * self.tick
+        index = (price - self._base) // self.tick
+        if 0 <= index < self.levels:
+            return index
+        self._recenter(price)
+        return (price - self._base) // self.tick
+
+    def _recenter(self, price):
+        """Move the ladder to centre on price and rebuild it from the quotes"""
+        log.debug("Re-centring %s order book on %s", self.symbol, price, extra=SAMPLED)
+        self._base = price - self.levels // 2 * self.tick
+        self._sizes[:] = 0
+        self._best = [-1, self.levels]
+        for side, quote_price, size in self._quotes.values():
+            index = (quote_price - self._base) // self.tick
+            if 0 <= index < self.levels:
+                self._place(side, index, size)
+
+    def _add(self, side, price, size):
+        index = self._index(price)
+        self._place(side, index, size)
+
+    def _place(self, side, index, size):
+        self._sizes[side, index] += size
+        if side == BID and index > self._best[BID]:
+            self._best[BID] = index
+        elif side == ASK and index < self._best[ASK]:
+            self._best[ASK] = index
+
+    def _remove(self, quote_id):
+        quote = self._quotes.pop(quote_id, None)
+        if quote is None:
+            return
+        side, price, size = quote
+        index = (price - self._base) // self.tick
+        if not 0 <= index < self.levels:
+            return  # Dropped from the ladder by a re-centre
+        sizes = self._sizes[side]
+        sizes[index] -= size
+        if sizes[index] > 0 or index != self._best[side]:
+            return
+        # The best level emptied: find the next one out
+        if side == BID:
+            filled = np.flatnonzero(sizes[:index])
+            self._best[BID] = int(filled[-1]) if len(filled) else -1
+        else:
+            filled = np.flatnonzero(sizes[index + 1:])
+            self._best[ASK] = index + 1 + int(filled[0]) if len(filled) else self.levels
+
+    # --- Reads -----------------------------------------------------------------------------------
+    def _price(self, index):
+        return (self._base + index * self.tick) / PRICE_SCALE
+
+    def best_bid(self):
+        index = self._best[BID]
+        return self._price(index) if index >= 0 else None
+
+    def best_ask(self):
+        index = self._best[ASK]
+        return self._price(index) if index < self.levels else None
+
+    def spread(self):
+        bid, ask = self.best_bid(), self.best_ask()
+        return ask - bid if bid is not None and ask is not None else None
+
+    def mid(self):
+        bid, ask = self.best_bid(), self.best_ask()
+        return (bid + ask) / 2 if bid is not None and ask is not None else None
+
+    def microprice(self):
+        """Mid weighted towards the side with less size at the touch"""
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        bid_size = int(self._sizes[BID, self._best[BID]])
+        ask_size = int(self._sizes[ASK, self._best[ASK]])
+        return (bid * ask_size + ask * bid_size) / (bid_size + ask_size)
+
+    def depth(self, side, count=10):
+        """[(price, size)] for the best count levels of side, best first"""
+        sizes = self._sizes[side]
+        if side == BID:
+            indexes = np.flatnonzero(sizes[:self._best[BID] + 1])[::-1][:count]
+        else:
+            start = self._best[ASK]
+            indexes = start + np.flatnonzero(sizes[start:])[:count]
+        prices = (self._base + indexes * self.tick) / PRICE_SCALE if len(indexes) else indexes
+        return list(zip(np.asarray(prices, dtype=np.float64).tolist(), sizes[indexes].tolist()))
+
+    def imbalance(self, count=None):
+        """(bid size - ask size) / total over the best count levels of each side, in [-1, 1]"""
+        count = count or Config.ORDER_BOOK_IMBALANCE_LEVELS
+        bid_size = sum(size for _, size in self.depth(BID, count))
+        ask_size = sum(size for _, size in self.depth(ASK, count))
+        total = bid_size + ask_size
+        return (bid_size - ask_size) / total if total else 0.0
+
+    def fill_price(self, side, volume):
+        """Average price for a market order of volume (cents of a unit) walking the book, or None if too thin
+
+        side is the order's side: a SELL fills against bids, a BUY against asks.
+        """
+        book_side = BID if side.upper() == "SELL" else ASK
+        remaining = volume
+        notional = 0.0
+        for price, size in self.depth(book_side, self.levels):
+            take = min(size, remaining)
+            notional += take * price
+            remaining -= take
+            if remaining <= 0:
+                return notional / volume
+        return None
+
+    def features(self):
+        """Touch and imbalance figures for models and logs; None where a side is empty"""
+        return {
+            'best_bid': self.best_bid(),
+            'best_ask': self.best_ask(),
+            'spread': self.spread(),
+            'mid': self.mid(),
+            'microprice': self.microprice(),
+            'imbalance': self.imbalance(),
+        }
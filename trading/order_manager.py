@@ -0,0 +1,487 @@
+# trading/order_manager.py
+"""
+Asynchronous order management.
+
+Strategies hand an OrderIntent to OrderManager.submit() and return
+immediately. The manager deduplicates intents by idempotency key, paces
+submissions through a token bucket that matches the broker's rate limit,
+and hands them to a broker adapter that sends without blocking the caller.
+Each intent then moves through an explicit state machine as acknowledgements
+and execution reports arrive:
+
+    NEW -> PENDING_SUBMIT -> SUBMITTED -> PARTIALLY_FILLED -> FILLED
+                          \\-> FAILED     \\-> REJECTED / CANCELED
+"""
+import hashlib
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import Config
+from utils.logger import get_logger
+from utils.tracing import tracer
+
+try:
+    from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOAExecutionType
+except ImportError:
+    ProtoOAExecutionType = None
+
+log = get_logger(__name__)
+
+
+class OrderState:
+    NEW = "NEW"
+    PENDING_SUBMIT = "PENDING_SUBMIT"
+    SUBMITTED = "SUBMITTED"
+    PARTIALLY_FILLED = "PARTIALLY_FILLED"
+    FILLED = "FILLED"
+    CANCELED = "CANCELED"
+    REJECTED = "REJECTED"
+    FAILED = "FAILED"
+
+    TERMINAL = frozenset((FILLED, CANCELED, REJECTED, FAILED))
+
+    TRANSITIONS = {
+        NEW: frozenset((PENDING_SUBMIT, CANCELED, REJECTED, FAILED)),
+        PENDING_SUBMIT: frozenset((SUBMITTED, PARTIALLY_FILLED, FILLED, CANCELED, REJECTED, FAILED)),
+        SUBMITTED: frozenset((PARTIALLY_FILLED, FILLED, CANCELED, REJECTED)),
+        PARTIALLY_FILLED: frozenset((PARTIALLY_FILLED, FILLED, CANCELED)),
+    }
+
+
+class OrderIntent:
+    """A strategy's request to trade, plus the manager's view of its lifecycle"""
+
+    def __init__(self, symbol, side, qty, strategy="default", order_type="MARKET",
+                 idempotency_key=None, time_in_force=None, reference_price=None, metadata=None):
+        self.symbol = symbol
+        self.side = side.upper()
+        self.qty = float(qty)
+        self.strategy = strategy
+        self.order_type = order_type
+        self.time_in_force = time_in_force
+        self.reference_price = reference_price
+        self.metadata = metadata or {}
+
+        # Without a key every intent is unique; with one, repeats collapse onto the first intent
+        self.idempotency_key = idempotency_key or uuid.uuid4().hex
+        self.client_order_id = self.make_client_order_id(self.idempotency_key)
+
+        self.state = OrderState.NEW
+        self.broker_order_id = None
+        self.filled_qty = 0.0
+        self.avg_fill_price = None
+        self.realized_pl = None  # Net P/L booked by closing fills, when the broker reports it
+        self.error = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.history = [(self.created_at, OrderState.NEW)]
+
+    @staticmethod
+    def make_client_order_id(idempotency_key):
+        # Stable, short and broker-safe (Alpaca allows 48 chars, cTrader 50)
+        return "sx-" + hashlib.sha1(idempotency_key.encode()).hexdigest()[:24]
+
+    @property
+    def is_terminal(self):
+        return self.state in OrderState.TERMINAL
+
+    def transition(self, new_state):
+        """Move to new_state if the state machine allows it; returns False otherwise"""
+        if new_state not in OrderState.TRANSITIONS.get(self.state, ()):
+            return False
+        self.state = new_state
+        self.updated_at = time.time()
+        self.history.append((self.updated_at, new_state))
+        return True
+
+    def __repr__(self):
+        return (f"OrderIntent({self.side} {self.qty} {self.symbol}, state={self.state}, "
+                f"client_order_id={self.client_order_id})")
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `capacity` saved for bursts"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self, tokens=1):
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def wait_time(self, tokens=1):
+        """Seconds until `tokens` would be available (0 if they already are)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            missing = tokens - self._tokens
+            return 0.0 if missing <= 0 else missing / self.rate
+
+
+class OrderManager:
+    def __init__(self, adapter, rate_per_sec=None, burst=None, dedupe_window=None):
+        self.adapter = adapter
+        self.bucket = TokenBucket(
+            rate_per_sec or Config.ORDER_RATE_LIMIT_PER_SEC,
+            burst or Config.ORDER_RATE_LIMIT_BURST
+        )
+        self.dedupe_window = Config.ORDER_DEDUPE_WINDOW_SEC if dedupe_window is None else dedupe_window
+
+        self._queue = queue.Queue()
+        self._orders = {}    # client_order_id -> intent
+        self._by_key = {}    # idempotency_key -> intent
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._pre_trade_checks = []
+        self._stop = threading.Event()
+        self._thread = None
+
+        adapter.bind(self)
+
+    # --- Lifecycle -------------------------------------------------------------------------------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._dispatch_loop, name="order-dispatch", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        self.adapter.close()
+
+    # --- Strategy-facing API ---------------------------------------------------------------------
+    def submit(self, intent):
+        """Queue an intent and return at once; a duplicate key returns the original intent"""
+        with self._lock:
+            existing = self._by_key.get(intent.idempotency_key)
+            if existing is not None and (
+                not existing.is_terminal or time.time() - existing.created_at < self.dedupe_window
+            ):
+                log.debug("Duplicate order intent %s ignored (%s)", intent.idempotency_key, existing.state)
+                return existing
+            if existing is not None:
+                # Same key reused after the window: brokers require a fresh client order id
+                intent.client_order_id = intent.make_client_order_id(f"{intent.idempotency_key}:{time.time()}")
+
+            self._by_key[intent.idempotency_key] = intent
+            self._orders[intent.client_order_id] = intent
+
+        self._queue.put(intent)
+        return intent
+
+    def add_listener(self, callback):
+        """callback(intent) is invoked after every state change, on the thread that caused it"""
+        self._listeners.append(callback)
+
+    def add_pre_trade_check(self, check):
+        """check(intent) -> (ok, reason); run on the dispatch thread before an intent is sent"""
+        self._pre_trade_checks.append(check)
+
+    def get(self, client_order_id):
+        return self._orders.get(client_order_id)
+
+    def open_orders(self, symbol=None):
+        with self._lock:
+            return [o for o in self._orders.values()
+                    if not o.is_terminal and (symbol is None or o.symbol == symbol)]
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    # --- Adapter-facing API ----------------------------------------------------------------------
+    def on_submitted(self, client_order_id, broker_order_id=None):
+        self._update(client_order_id, OrderState.SUBMITTED, broker_order_id=broker_order_id)
+
+    def on_fill(self, client_order_id, filled_qty, fill_price=None, broker_order_id=None, realized_pl=None):
+        """
+        Report cumulative filled quantity; decides between PARTIALLY_FILLED and FILLED.
+        realized_pl is the P/L booked by this fill alone and adds up across fills.
+        """
+        intent = self._orders.get(client_order_id)
+        if intent is None:
+            return
+        state = OrderState.FILLED if filled_qty >= intent.qty - 1e-12 else OrderState.PARTIALLY_FILLED
+        self._update(client_order_id, state, broker_order_id=broker_order_id,
+                     filled_qty=filled_qty, fill_price=fill_price, realized_pl=realized_pl)
+
+    def on_rejected(self, client_order_id, reason):
+        self._update(client_order_id, OrderState.REJECTED, error=reason)
+
+    def on_canceled(self, client_order_id, reason=None):
+        self._update(client_order_id, OrderState.CANCELED, error=reason)
+
+    def on_failed(self, client_order_id, reason):
+        self._update(client_order_id, OrderState.FAILED, error=reason)
+
+    # --- Internals -------------------------------------------------------------------------------
+    def _update(self, client_order_id, new_state, broker_order_id=None, filled_qty=None,
+                fill_price=None, realized_pl=None, error=None):
+        with self._lock:
+            intent = self._orders.get(client_order_id)
+            if intent is None:
+                return
+            if not intent.transition(new_state):
+                # Late or duplicate reports (e.g. an ack after the fill) are expected; ignore them
+                log.debug("Ignoring %s for %s in state %s", new_state, client_order_id, intent.state)
+                return
+            if broker_order_id is not None:
+                intent.broker_order_id = broker_order_id
+            if filled_qty is not None:
+                intent.filled_qty = filled_qty
+            if fill_price is not None:
+                intent.avg_fill_price = fill_price
+            if realized_pl is not None:
+                intent.realized_pl = (intent.realized_pl or 0.0) + realized_pl
+            if error is not None:
+                intent.error = error
+
+        if new_state in (OrderState.REJECTED, OrderState.FAILED):
+            log.warning("Order %s %s: %s", client_order_id, new_state, error)
+        else:
+            log.info("Order %s %s", client_order_id, new_state)
+        self._notify(intent)
+
+    def _notify(self, intent):
+        for callback in list(self._listeners):
+            try:
+                callback(intent)
+            except Exception:
+                log.exception("Order listener failed")
+
+    def _dispatch_loop(self):
+        while not self._stop.is_set():
+            intent = self._queue.get()
+            if intent is None:
+                continue
+
+            # Block only this thread, never the strategy, while the bucket refills
+            delay = self.bucket.wait_time()
+            while delay > 0 and not self._stop.is_set():
+                self._stop.wait(delay)
+                delay = self.bucket.wait_time()
+            if self._stop.is_set() or not self.bucket.try_acquire():
+                self._queue.put(intent)
+                continue
+
+            for check in self._pre_trade_checks:
+                try:
+                    ok, reason = check(intent)
+                except Exception as e:
+                    ok, reason = False, f"pre-trade check error: {e}"
+                if not ok:
+                    self._update(intent.client_order_id, OrderState.REJECTED, error=reason)
+                    break
+            else:
+                if self._update_pending(intent):
+                    try:
+                        with tracer.span("order.dispatch"):
+                            self.adapter.submit(intent)
+                    except Exception as e:
+                        log.exception("Adapter submit failed")
+                        self.on_failed(intent.client_order_id, str(e))
+
+    def _update_pending(self, intent):
+        with self._lock:
+            if not intent.transition(OrderState.PENDING_SUBMIT):
+                return False
+        self._notify(intent)
+        return True
+
+
+class CTraderOrderAdapter:
+    """
+    Sends intents as ProtoOANewOrderReq with clientOrderId and tracks execution events.
+    Intents with metadata['position_id'] close that position with ProtoOAClosePositionReq.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.manager = None
+        # ProtoOAClosePositionReq carries no clientOrderId; its closing order is matched by positionId
+        self._pending_closes = {}
+
+    def bind(self, manager):
+        self.manager = manager
+        self.client.add_execution_listener(self._on_execution_event)
+
+    def close(self):
+        self.client.remove_execution_listener(self._on_execution_event)
+
+    def submit(self, intent):
+        order_data = {
+            "symbol": intent.symbol,
+            "qty": intent.qty,
+            "side": intent.side,
+            "client_order_id": intent.client_order_id,
+            "label": intent.strategy,
+        }
+        # The Open API client is not thread-safe; all sends happen on the reactor thread
+        self.client.call_in_reactor(self._send, intent, order_data)
+
+    def _send(self, intent, order_data):
+        position_id = intent.metadata.get('position_id')
+        if position_id is not None:
+            self._pending_closes[int(position_id)] = intent.client_order_id
+            d = self.client.close_position(position_id, intent.qty, intent.symbol)
+        else:
+            d = self.client.submit_order(order_data)
+        if d is None:
+            self._forget_close(position_id)
+            self.manager.on_failed(intent.client_order_id, self.client.get_connection_status()[1] or "not sent")
+            return
+        d.addErrback(self._on_send_error, intent, position_id)
+
+    def _on_send_error(self, failure, intent, position_id):
+        self._forget_close(position_id)
+        self.manager.on_rejected(intent.client_order_id, failure.getErrorMessage())
+
+    def _forget_close(self, position_id):
+        if position_id is not None:
+            self._pending_closes.pop(int(position_id), None)
+
+    def _on_execution_event(self, event):
+        if not event.HasField("order"):
+            return
+        order = event.order
+        client_order_id = order.clientOrderId
+        if not client_order_id and order.closingOrder:
+            client_order_id = self._pending_closes.get(order.positionId)
+        if not client_order_id or self.manager.get(client_order_id) is None:
+            return
+
+        execution_type = event.executionType
+        broker_order_id = str(order.orderId)
+
+        if execution_type == ProtoOAExecutionType.ORDER_ACCEPTED:
+            self.manager.on_submitted(client_order_id, broker_order_id)
+        elif execution_type in (ProtoOAExecutionType.ORDER_FILLED, ProtoOAExecutionType.ORDER_PARTIAL_FILL):
+            lot_size = self.client.lot_size(order.tradeData.symbolId)
+            filled_lots = order.executedVolume / lot_size if lot_size else float(order.executedVolume)
+            price = order.executionPrice if order.HasField("executionPrice") else None
+            self.manager.on_fill(client_order_id, filled_lots, price, broker_order_id, self._realized_pl(event))
+        elif execution_type == ProtoOAExecutionType.ORDER_CANCELLED:
+            self.manager.on_canceled(client_order_id, "cancelled")
+        elif execution_type == ProtoOAExecutionType.ORDER_EXPIRED:
+            self.manager.on_canceled(client_order_id, "expired")
+        elif execution_type == ProtoOAExecutionType.ORDER_REJECTED:
+            self.manager.on_rejected(client_order_id, event.errorCode or "rejected")
+
+        if self.manager.get(client_order_id).is_terminal and order.closingOrder:
+            self._forget_close(order.positionId)
+
+    @staticmethod
+    def _realized_pl(event):
+        """Net P/L of a closing deal (gross profit, swap and commission) in account currency, else None"""
+        if not event.HasField("deal") or not event.deal.HasField("closePositionDetail"):
+            return None
+        detail = event.deal.closePositionDetail
+        digits = detail.moneyDigits if detail.HasField("moneyDigits") else 2
+        return (detail.grossProfit + detail.swap + detail.commission) / 10 ** digits
+
+
+class AlpacaOrderAdapter:
+    """Pipelines blocking Alpaca REST submissions on a small worker pool and polls open orders"""
+
+    STATUS_MAP = {
+        "new": OrderState.SUBMITTED,
+        "accepted": OrderState.SUBMITTED,
+        "pending_new": OrderState.SUBMITTED,
+        "accepted_for_bidding": OrderState.SUBMITTED,
+        "partially_filled": OrderState.PARTIALLY_FILLED,
+        "filled": OrderState.FILLED,
+        "canceled": OrderState.CANCELED,
+        "expired": OrderState.CANCELED,
+        "done_for_day": OrderState.CANCELED,
+        "rejected": OrderState.REJECTED,
+    }
+
+    def __init__(self, client, workers=None, poll_interval=None):
+        self.client = client
+        self.manager = None
+        self.poll_interval = Config.ORDER_POLL_INTERVAL_SEC if poll_interval is None else poll_interval
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or Config.ORDER_SUBMIT_WORKERS,
+            thread_name_prefix="alpaca-order"
+        )
+        self._stop = threading.Event()
+        self._poller = None
+
+    def bind(self, manager):
+        self.manager = manager
+        if self.poll_interval:
+            self._poller = threading.Thread(target=self._poll_loop, name="alpaca-order-poll", daemon=True)
+            self._poller.start()
+
+    def close(self):
+        self._stop.set()
+        self._executor.shutdown(wait=False)
+
+    def submit(self, intent):
+        self._executor.submit(self._send, intent)
+
+    def _send(self, intent):
+        from alpaca.trading.requests import MarketOrderRequest
+        from alpaca.trading.enums import OrderSide, TimeInForce
+
+        try:
+            order_data = MarketOrderRequest(
+                symbol=intent.symbol.replace('/', ''),
+                qty=intent.qty,
+                side=OrderSide.BUY if intent.side == "BUY" else OrderSide.SELL,
+                time_in_force=intent.time_in_force or TimeInForce.DAY,
+                client_order_id=intent.client_order_id
+            )
+            order = self.client.submit_order(order_data, reference_price=intent.reference_price)
+            if order is None:
+                self.manager.on_failed(intent.client_order_id, "submission failed")
+                return
+            self._apply(intent.client_order_id, order)
+        except Exception as e:
+            self.manager.on_failed(intent.client_order_id, str(e))
+
+    def _apply(self, client_order_id, order):
+        status = getattr(order.status, 'value', str(order.status))
+        state = self.STATUS_MAP.get(status, OrderState.SUBMITTED)
+        broker_order_id = str(order.id)
+
+        if state in (OrderState.FILLED, OrderState.PARTIALLY_FILLED):
+            price = float(order.filled_avg_price) if order.filled_avg_price else None
+            self.manager.on_fill(client_order_id, float(order.filled_qty or 0), price, broker_order_id)
+        elif state == OrderState.SUBMITTED:
+            self.manager.on_submitted(client_order_id, broker_order_id)
+        elif state == OrderState.CANCELED:
+            self.manager.on_canceled(client_order_id, status)
+        elif state == OrderState.REJECTED:
+            self.manager.on_rejected(client_order_id, status)
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            for intent in self.manager.open_orders():
+                if intent.state == OrderState.PENDING_SUBMIT:
+                    continue
+                try:
+                    order = self.client.trading_client.get_order_by_client_id(intent.client_order_id)
+                    self._apply(intent.client_order_id, order)
+                except Exception as e:
+                    log.warning("Could not refresh order %s: %s", intent.client_order_id, e)
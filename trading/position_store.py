@@ -0,0 +1,152 @@
+# trading/position_store.py
+"""
+Open positions and working orders of one cTrader account, kept in memory.
+
+Every ProtoOAExecutionEvent carries the full current state of the order and
+position it touches, so apply() replaces that entry (or drops it once the
+position is closed or the order is done) instead of asking the server again.
+One ProtoOAReconcileRes snapshot at connect time fills the store with what
+was open before the session started. Events that arrive while the snapshot
+is in flight are applied again on top of it, in order, since the snapshot
+may predate them.
+
+Positions are indexed by positionId and by symbolId, orders by orderId, so
+strategies look their symbol up locally instead of requesting the position
+list on every tick. Events arrive on the reactor thread; reads may come from
+other threads, so access is locked.
+
+Listeners hear about every change once the store is reconciled: after each
+snapshot, and after each execution event once the client has also handed it
+to its execution listeners (the order manager), so a listener sees orders
+and positions that agree.
+"""
+import os
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# ProtoOAPositionStatus.POSITION_STATUS_OPEN and the terminal ProtoOAOrderStatus values
+POSITION_OPEN = 1
+ORDER_DONE = frozenset((2, 3, 4, 5))  # FILLED, REJECTED, EXPIRED, CANCELLED
+BUY = 1  # ProtoOATradeSide.BUY
+
+
+class PositionStore:
+    def __init__(self):
+        self._positions = {}  # positionId -> ProtoOAPosition
+        self._by_symbol = {}  # symbolId -> {positionId: ProtoOAPosition}
+        self._orders = {}  # orderId -> ProtoOAOrder still working
+        self._replay = None  # Events seen while a snapshot is in flight
+        self._listeners = []
+        self._lock = threading.Lock()
+        self.reconciled = False
+
+    def add_listener(self, callback):
+        """callback(store) after each snapshot and each execution event (see notify)"""
+        self._listeners.append(callback)
+
+    # --- Updates ---------------------------------------------------------------------------------
+    def begin_reconcile(self):
+        """A snapshot was requested; remember events until it arrives"""
+        with self._lock:
+            self._replay = []
+
+    def reconcile(self, response):
+        """Replace everything with a ProtoOAReconcileRes, then re-apply events seen since it was requested"""
+        with self._lock:
+            self._positions.clear()
+            self._by_symbol.clear()
+            self._orders.clear()
+            for position in response.position:
+                self._set_position(position)
+            for order in response.order:
+                self._set_order(order)
+            for event in self._replay or ():
+                self._apply(event)
+            self._replay = None
+            self.reconciled = True
+            count = len(self._positions)
+        log.info("Reconciled %d open positions and %d orders", count, len(response.order))
+        self.notify()
+
+    def notify(self):
+        """Tell listeners the store changed; nothing before the first snapshot, which would look like no positions"""
+        if not self.reconciled:
+            return
+        for listener in self._listeners:
+            try:
+                listener(self)
+            except Exception:
+                log.exception("Position store listener failed")
+
+    def invalidate(self):
+        """The session ended; contents are stale until the next snapshot"""
+        with self._lock:
+            self.reconciled = False
+            self._replay = None
+
+    def apply(self, event):
+        """Apply a ProtoOAExecutionEvent; the caller calls notify() when it is done with the event"""
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append(event)
+            self._apply(event)
+
+    def _apply(self, event):
+        if event.HasField('position'):
+            self._set_position(event.position)
+        if event.HasField('order'):
+            self._set_order(event.order)
+
+    def _set_position(self, position):
+        position_id = position.positionId
+        symbol_positions = self._by_symbol.setdefault(position.tradeData.symbolId, {})
+        if position.positionStatus == POSITION_OPEN and position.tradeData.volume > 0:
+            self._positions[position_id] = position
+            symbol_positions[position_id] = position
+        else:
+            self._positions.pop(position_id, None)
+            symbol_positions.pop(position_id, None)
+
+    def _set_order(self, order):
+        if order.orderStatus in ORDER_DONE:
+            self._orders.pop(order.orderId, None)
+        else:
+            self._orders[order.orderId] = order
+
+    # --- Reads -----------------------------------------------------------------------------------
+    def position(self, position_id):
+        with self._lock:
+            return self._positions.get(position_id)
+
+    def for_symbol(self, symbol_id):
+        """Open positions in symbol_id, oldest first"""
+        with self._lock:
+            return list(self._by_symbol.get(symbol_id, {}).values())
+
+    def positions(self):
+        with self._lock:
+            return list(self._positions.values())
+
+    def order(self, order_id):
+        with self._lock:
+            return self._orders.get(order_id)
+
+    def orders(self):
+        with self._lock:
+            return list(self._orders.values())
+
+    def net_volumes(self):
+        """{symbolId: net volume}, buys positive, in the Open API's cents of a unit"""
+        with self._lock:
+            volumes = {}
+            for symbol_id, positions in self._by_symbol.items():
+                net = sum(p.tradeData.volume if p.tradeData.tradeSide == BUY else -p.tradeData.volume
+                          for p in positions.values())
+                if net:
+                    volumes[symbol_id] = net
+            return volumes
@@ -1,38 +1,93 @@
 # trading/price_simulator.py
 import random
+from collections import deque
 import numpy as np
+import pandas as pd
 
 class PriceSimulator:
-    def __init__(self, base_price=100.0, volatility=0.002):
+    """Random-walk prices with trends
+
+    Without a clock every get_next_price() call is one step. With one
+    (trading/sim_clock.py) the price takes one step per step_seconds of clock
+    time, and the prices are also kept as OHLCV bars of bar_seconds so
+    simulated signals can be computed locally instead of asking the broker.
+    """
+
+    def __init__(self, base_price=100.0, volatility=0.002, clock=None, step_seconds=1.0,
+                 bar_seconds=60, max_bars=200):
         self.base_price = base_price
         self.current_price = base_price
         self.volatility = volatility
         self.trend = 0  # -1 for downtrend, 0 for sideways, 1 for uptrend
         self.trend_duration = 0
         self.max_trend_duration = 100
-        
-    def get_next_price(self):
+        self.clock = clock
+        self.step_seconds = step_seconds
+        self.bar_seconds = bar_seconds
+        self.bars = deque(maxlen=max_bars)  # [start, open, high, low, close, volume], oldest first
+        self._last_step_time = None
+
+    def _step(self):
         # Randomly change trend
         if self.trend_duration >= self.max_trend_duration or random.random() < 0.02:
             self.trend = random.choice([-1, 0, 1])
             self.trend_duration = 0
-            
+
         # Calculate price movement
         trend_component = self.trend * self.volatility * self.base_price
         random_component = np.random.normal(0, self.volatility * self.base_price)
-        
+
         # Update price
         self.current_price += trend_component + random_component
         self.trend_duration += 1
-        
+
         # Ensure price doesn't go negative
         self.current_price = max(self.current_price, 0.01)
-        
+
         return self.current_price
-        
+
+    def get_next_price(self):
+        if self.clock is None:
+            return self._step()
+
+        now = self.clock.now()
+        if self._last_step_time is None:
+            self._last_step_time = now - self.step_seconds
+        # Catch up on every step the clock has moved past since the last call
+        while self._last_step_time + self.step_seconds <= now:
+            self._last_step_time += self.step_seconds
+            self._record(self._last_step_time, self._step())
+        return self.current_price
+
+    def prime(self, seconds):
+        """Generate the seconds of history leading up to the clock's current time"""
+        self._last_step_time = self.clock.now() - seconds
+        return self.get_next_price()
+
+    def _record(self, ts, price):
+        start = ts - ts % self.bar_seconds
+        volume = random.randint(1, 100)
+        bar = self.bars[-1] if self.bars else None
+        if bar is None or bar[0] != start:
+            self.bars.append([start, price, price, price, price, volume])
+            return
+        bar[2] = max(bar[2], price)
+        bar[3] = min(bar[3], price)
+        bar[4] = price
+        bar[5] += volume
+
+    def completed_bars(self):
+        """Finished bars as an OHLCV frame on a UTC index; the forming bar is left out"""
+        rows = list(self.bars)[:-1]
+        index = pd.to_datetime([row[0] for row in rows], unit='s', utc=True)
+        return pd.DataFrame([row[1:] for row in rows], index=index,
+                            columns=['open', 'high', 'low', 'close', 'volume'])
+
     def reset(self, new_base_price=None):
         if new_base_price is not None:
             self.base_price = new_base_price
         self.current_price = self.base_price
         self.trend = 0
-        self.trend_duration = 0
\ No newline at end of file
+        self.trend_duration = 0
+        self.bars.clear()
+        self._last_step_time = None
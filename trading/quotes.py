@@ -0,0 +1,105 @@
+# trading/quotes.py
+"""
+Per-symbol price scaling and compact spot quote history.
+
+Open API spot and trendbar prices are integers in 1/100000 of a unit for
+every symbol (PRICE_SCALE), whatever its digits; dividing by 10 ** digits
+misprices JPY pairs and metals. SymbolScale is built once per symbol from
+its ProtoOASymbol and holds what does vary: the quoted digits, and how many
+wire units make a point (the smallest price step) and a pip.
+
+QuoteHistory keeps the last quotes of one symbol as (ts, bid, ask) int64
+records in a NumPy ring, so a tick costs one record write and no Python
+floats. Spot events leave out a side that did not change, so the last value
+of each side is carried forward. Floats are only produced, for a whole
+window at once, when a consumer reads one.
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.market_journal import PRICE_SCALE
+
+QUOTE_DTYPE = np.dtype([("ts", "<i8"), ("bid", "<i8"), ("ask", "<i8")])
+
+
+class SymbolScale:
+    __slots__ = ("digits", "point", "pip")
+
+    def __init__(self, digits=5, pip_position=4):
+        self.digits = digits
+        self.point = max(1, PRICE_SCALE // 10 ** digits)  # Wire units per quoted digit
+        self.pip = max(1, PRICE_SCALE // 10 ** pip_position)
+
+    @classmethod
+    def from_details(cls, details):
+        """From a ProtoOASymbol"""
+        return cls(details.digits, details.pipPosition)
+
+    def to_price(self, wire):
+        """Wire units (an int or an array) to a price"""
+        return wire / PRICE_SCALE
+
+    def to_pips(self, wire):
+        return wire / self.pip
+
+
+DEFAULT_SCALE = SymbolScale()
+
+
+class QuoteHistory:
+    def __init__(self, capacity, scale=DEFAULT_SCALE):
+        self.scale = scale
+        self._records = np.zeros(capacity, dtype=QUOTE_DTYPE)
+        self.count = 0  # Quotes ever added; the ring holds the last len(self)
+        # Last known wire prices, 0 until a side has been quoted
+        self.ts = 0
+        self.bid = 0
+        self.ask = 0
+
+    def __len__(self):
+        return min(self.count, len(self._records))
+
+    def update(self, ts, bid=0, ask=0):
+        """Add a quote in wire units; a side given as 0 keeps its last value"""
+        if bid:
+            self.bid = bid
+        if ask:
+            self.ask = ask
+        self.ts = ts
+        self._records[self.count % len(self._records)] = (ts, self.bid, self.ask)
+        self.count += 1
+
+    def records(self, count=None):
+        """The last count (default all) records, oldest first, as a copy"""
+        size = len(self)
+        count = size if count is None else min(count, size)
+        end = self.count % len(self._records)
+        if size < len(self._records) or end == 0:
+            return self._records[size - count:size].copy()
+        return np.roll(self._records, -end)[size - count:]
+
+    def window(self, count=None):
+        """(timestamps in ms, bids, asks) for the last count quotes; a side not yet quoted is NaN"""
+        records = self.records(count)
+        bids, asks = (np.where(records[side] != 0, self.scale.to_price(records[side]), np.nan)
+                      for side in ("bid", "ask"))
+        return records["ts"], bids, asks
+
+    def bids(self, count=None):
+        """Known bids of the last count quotes, oldest first"""
+        bids = self.records(count)["bid"]
+        return self.scale.to_price(bids[bids != 0])
+
+    def last_bid(self):
+        return self.scale.to_price(self.bid) if self.bid else None
+
+    def last_ask(self):
+        return self.scale.to_price(self.ask) if self.ask else None
+
+    def frame(self, count=None):
+        """bid/ask frame on a UTC index, as MarketBusReader.tick_frame builds"""
+        ts, bids, asks = self.window(count)
+        return pd.DataFrame({"bid": bids, "ask": asks}, index=pd.to_datetime(ts, unit="ms", utc=True))
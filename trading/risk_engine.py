@@ -0,0 +1,339 @@
+# trading/risk_engine.py
+"""
+Streaming portfolio risk.
+
+RiskEngine keeps every symbol's position (in lots, including orders that
+passed the pre-trade check but have not filled yet), last price and
+notional in account currency in parallel NumPy arrays. Gross and net
+exposure, per-asset-class exposure and the portfolio variance w'Σw are
+updated incrementally on each price and fill, so check() can answer for a
+new OrderIntent in O(1) time before it is sent.
+
+Σ is an EWMA covariance of log returns sampled every RISK_RETURN_INTERVAL_SEC
+(one rank-1 update per interval). VaR is parametric: z * sqrt(w'Σw) scaled
+to RISK_VAR_HORIZON_SEC. Symbols with no history yet are seeded with
+RISK_PRIOR_DAILY_VOL so a new position never looks riskless.
+
+    engine = RiskEngine.for_ctrader(client)
+    engine.attach(order_manager)
+"""
+import math
+import os
+import sys
+import threading
+import time
+from statistics import NormalDist
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import Config
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+CURRENCIES = frozenset((
+    "USD", "EUR", "GBP", "JPY", "CHF", "AUD", "NZD", "CAD", "SEK", "NOK", "DKK", "PLN", "HUF", "CZK",
+    "TRY", "ZAR", "MXN", "SGD", "HKD", "CNH",
+))
+METALS = frozenset(("XAU", "XAG", "XPT", "XPD"))
+CRYPTO = frozenset(("BTC", "ETH", "LTC", "XRP", "BCH", "SOL", "ADA", "DOG"))
+
+
+def asset_class(symbol):
+    """FX, METALS, CRYPTO or OTHER from the symbol name"""
+    name = symbol.replace("/", "").upper()
+    base = name[:3]
+    if base in METALS:
+        return "METALS"
+    if base in CRYPTO:
+        return "CRYPTO"
+    if len(name) == 6 and base in CURRENCIES and name[3:] in CURRENCIES:
+        return "FX"
+    return "OTHER"
+
+
+def quote_currency(symbol):
+    """Quote currency of a six-letter pair, else None"""
+    name = symbol.replace("/", "").upper()
+    return name[3:] if len(name) == 6 else None
+
+
+class RiskEngine:
+    def __init__(self, contract_size=None, account=None, classify=None):
+        self.contract_size = contract_size or (lambda symbol: 1.0)  # Units per lot
+        self.account = account or (lambda: {})
+        self.classify = classify or asset_class
+
+        self.interval = Config.RISK_RETURN_INTERVAL_SEC
+        self.decay = Config.RISK_EWMA_LAMBDA
+        self.prior_variance = Config.RISK_PRIOR_DAILY_VOL ** 2 * self.interval / 86400
+        self.var_scale = (NormalDist().inv_cdf(Config.RISK_VAR_CONFIDENCE)
+                          * math.sqrt(Config.RISK_VAR_HORIZON_SEC / self.interval))
+
+        self._lock = threading.Lock()
+        self._index = {}          # symbol -> row
+        self.symbols = []
+        self.classes = []         # asset class of each row
+        self._units = np.zeros(0)       # Contract units per lot
+        self._factor = np.zeros(0)      # Quote currency -> account currency
+        self.lots = np.zeros(0)         # Filled + reserved, signed
+        self.prices = np.zeros(0)
+        self.notional = np.zeros(0)     # Signed, account currency
+        self.cov = np.zeros((0, 0))
+        self._sigma_w = np.zeros(0)     # Σw, kept in step with notional
+        self.variance = 0.0             # w'Σw
+        self.gross = 0.0
+        self.net = 0.0
+        self.class_gross = {}
+
+        self._sample_prices = np.zeros(0)
+        self._sample_index = None
+        self._reserved = {}       # client_order_id -> (row, signed lots not yet filled)
+        self._filled = {}         # client_order_id -> filled lots seen
+
+    @classmethod
+    def for_ctrader(cls, client):
+        def contract_size(symbol):
+            # Open API volumes are in cents of a unit
+            lot_size = client.lot_size(client.symbols_map.get(symbol))
+            return lot_size / 100 if lot_size else 1.0
+
+        return cls(contract_size=contract_size, account=client.get_account_summary)
+
+    def attach(self, order_manager):
+        order_manager.add_pre_trade_check(self.check)
+        order_manager.add_listener(self.on_order_update)
+
+    # --- Incremental updates ---------------------------------------------------------------------
+    def _row(self, symbol):
+        row = self._index.get(symbol)
+        if row is not None:
+            return row
+        row = len(self.symbols)
+        self._index[symbol] = row
+        self.symbols.append(symbol)
+        self.classes.append(self.classify(symbol))
+        self._units = np.append(self._units, float(self.contract_size(symbol)))
+        self._factor = np.append(self._factor, 1.0)
+        self.lots = np.append(self.lots, 0.0)
+        self.prices = np.append(self.prices, 0.0)
+        self.notional = np.append(self.notional, 0.0)
+        self._sample_prices = np.append(self._sample_prices, 0.0)
+        self._sigma_w = np.append(self._sigma_w, 0.0)
+        cov = np.zeros((row + 1, row + 1))
+        cov[:row, :row] = self.cov
+        cov[row, row] = self.prior_variance
+        self.cov = cov
+        return row
+
+    def _set_notional(self, row, value):
+        """Move one row's notional and keep gross, net, class totals and w'Σw in step: O(n)"""
+        delta = value - self.notional[row]
+        if delta == 0:
+            return
+        old = self.notional[row]
+        self.gross += abs(value) - abs(old)
+        self.net += delta
+        klass = self.classes[row]
+        self.class_gross[klass] = self.class_gross.get(klass, 0.0) + abs(value) - abs(old)
+        self.variance += 2 * delta * self._sigma_w[row] + delta * delta * self.cov[row, row]
+        self._sigma_w += delta * self.cov[:, row]
+        self.notional[row] = value
+
+    def on_price(self, symbol, price, ts=None):
+        """Spot update (reactor thread)"""
+        if not price or price <= 0:
+            return
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            row = self._row(symbol)
+            sample = int(ts // self.interval)
+            if self._sample_index is None:
+                self._sample_index = sample
+            elif sample > self._sample_index:
+                self._sample(sample)
+            self.prices[row] = price
+            if self.lots[row]:
+                self._set_notional(row, self.lots[row] * self._units[row] * price * self._factor[row])
+
+    def _sample(self, sample):
+        """Close a return interval: one EWMA update of Σ, then rebuild Σw and w'Σw"""
+        valid = (self._sample_prices > 0) & (self.prices > 0)
+        returns = np.zeros(len(self.prices))
+        returns[valid] = np.log(self.prices[valid] / self._sample_prices[valid])
+        # Seeded rows keep their prior until they have a return of their own
+        update = np.outer(valid, valid)
+        self.cov = np.where(update, self.decay * self.cov + (1 - self.decay) * np.outer(returns, returns), self.cov)
+        self._sample_prices = np.where(self.prices > 0, self.prices, self._sample_prices)
+        self._sample_index = sample
+        self._refresh_factors()
+        self._sigma_w = self.cov @ self.notional
+        self.variance = float(self.notional @ self._sigma_w)
+
+    def _refresh_factors(self):
+        """Quote-to-account currency rates from our own prices; re-values every row"""
+        currency = self._account_currency()
+        for row in range(len(self.symbols)):
+            self._factor[row] = self._quote_factor(row, currency)
+        self.notional = self.lots * self._units * self.prices * self._factor
+        self.gross = float(np.abs(self.notional).sum())
+        self.net = float(self.notional.sum())
+        self.class_gross = {}
+        for row, klass in enumerate(self.classes):
+            self.class_gross[klass] = self.class_gross.get(klass, 0.0) + abs(self.notional[row])
+
+    def _account_currency(self):
+        return (self.account().get("currency") or Config.RISK_ACCOUNT_CURRENCY).upper()
+
+    def _quote_factor(self, row, currency):
+        quote = quote_currency(self.symbols[row])
+        return self._conversion(quote, currency) if quote and quote != currency else 1.0
+
+    def _price(self, symbol):
+        row = self._index.get(symbol)
+        return self.prices[row] if row is not None and self.prices[row] > 0 else None
+
+    def _conversion(self, source, target):
+        direct = self._price(source + target)
+        if direct:
+            return direct
+        inverse = self._price(target + source)
+        if inverse:
+            return 1 / inverse
+        if "USD" not in (source, target):
+            to_usd, from_usd = self._conversion(source, "USD"), self._conversion("USD", target)
+            if to_usd != 1.0 and from_usd != 1.0:
+                return to_usd * from_usd
+        return 1.0
+
+    def _apply_lots(self, row, lots):
+        self.lots[row] += lots
+        if self.prices[row] > 0:
+            self._set_notional(row, self.lots[row] * self._units[row] * self.prices[row] * self._factor[row])
+
+    # --- Orders ----------------------------------------------------------------------------------
+    def check(self, intent):
+        """OrderManager pre-trade check: (ok, reason). Reserves the order's exposure when it passes."""
+        if intent.metadata.get('position_id') is not None:
+            # Closing a broker position is never blocked, even one we do not know or before equity is;
+            # nothing is reserved, its exposure leaves with the fill (sync_positions)
+            return True, ""
+        signed = intent.qty if intent.side == "BUY" else -intent.qty
+        with self._lock:
+            row = self._row(intent.symbol)
+            position = self.lots[row]
+            if position and signed * position < 0 and abs(signed) <= abs(position) + 1e-12:
+                # Reducing or closing a position is always allowed
+                self._reserve(intent, row, signed)
+                return True, ""
+
+            summary = self.account()
+            equity = summary.get("equity") or summary.get("balance")
+            if not equity or equity <= 0:
+                return False, "risk: account equity unknown"
+            price = self.prices[row] if self.prices[row] > 0 else (intent.reference_price or 0.0)
+            if price <= 0:
+                return False, f"risk: no price for {intent.symbol}"
+
+            currency = (summary.get("currency") or Config.RISK_ACCOUNT_CURRENCY).upper()
+            factor = self._quote_factor(row, currency)
+            if factor != self._factor[row]:
+                # Re-value the row's current exposure at the new rate so the totals stay in step
+                self._factor[row] = factor
+                if self.prices[row] > 0:
+                    self._set_notional(row, self.lots[row] * self._units[row] * self.prices[row] * factor)
+            value = (position + signed) * self._units[row] * price * self._factor[row]
+            delta = value - self.notional[row]
+            gross = self.gross + abs(value) - abs(self.notional[row])
+            klass = self.classes[row]
+            class_gross = self.class_gross.get(klass, 0.0) + abs(value) - abs(self.notional[row])
+            variance = self.variance + 2 * delta * self._sigma_w[row] + delta * delta * self.cov[row, row]
+            var = self.var_scale * math.sqrt(max(variance, 0.0))
+            # Broker margin plus an estimate for this order, or an estimate for the whole book
+            used_margin = summary.get("margin")
+            if used_margin is not None:
+                margin = used_margin + abs(delta) * Config.RISK_MARGIN_RATE
+            else:
+                margin = gross * Config.RISK_MARGIN_RATE
+            class_limit = Config.RISK_CLASS_LEVERAGE.get(klass, Config.RISK_CLASS_LEVERAGE.get("OTHER"))
+
+            if gross > Config.RISK_MAX_GROSS_LEVERAGE * equity:
+                reason = f"risk: gross exposure {gross:,.0f} over {Config.RISK_MAX_GROSS_LEVERAGE}x equity"
+            elif abs(value) > Config.RISK_MAX_SYMBOL_LEVERAGE * equity:
+                reason = f"risk: {intent.symbol} exposure {abs(value):,.0f} over {Config.RISK_MAX_SYMBOL_LEVERAGE}x equity"
+            elif class_limit is not None and class_gross > class_limit * equity:
+                reason = f"risk: {klass} exposure {class_gross:,.0f} over {class_limit}x equity"
+            elif var > Config.RISK_MAX_VAR_PCT / 100 * equity:
+                reason = f"risk: VaR {var:,.2f} over {Config.RISK_MAX_VAR_PCT}% of equity"
+            elif margin > Config.RISK_MAX_MARGIN_USE * equity:
+                reason = f"risk: margin {margin:,.2f} over {Config.RISK_MAX_MARGIN_USE:.0%} of equity"
+            else:
+                self._reserve(intent, row, signed)
+                return True, ""
+        log.warning("Order %s blocked: %s", intent.client_order_id, reason)
+        return False, reason
+
+    def _reserve(self, intent, row, signed):
+        self._reserved[intent.client_order_id] = (row, signed)
+        self._filled[intent.client_order_id] = 0.0
+        if self.prices[row] <= 0 and intent.reference_price:
+            self.prices[row] = intent.reference_price
+        self._apply_lots(row, signed)
+
+    def on_order_update(self, intent):
+        """OrderManager listener: fills turn reservations into positions; failures release them"""
+        with self._lock:
+            reserved = self._reserved.get(intent.client_order_id)
+            if reserved is None:
+                return
+            row, signed = reserved
+            sign = 1.0 if signed > 0 else -1.0
+            filled = intent.filled_qty - self._filled[intent.client_order_id]
+            if filled > 0:
+                self._filled[intent.client_order_id] = intent.filled_qty
+                signed -= sign * filled
+                self._reserved[intent.client_order_id] = (row, signed)
+            if intent.is_terminal:
+                # Whatever did not fill never reached the book
+                self._apply_lots(row, -signed)
+                del self._reserved[intent.client_order_id]
+                del self._filled[intent.client_order_id]
+
+    def sync_positions(self, positions, prices=None):
+        """Broker positions {symbol: signed lots}, e.g. from a reconcile; unfilled reservations stay on top
+
+        prices ({symbol: price}) value positions whose symbol has had no spot price yet.
+        """
+        with self._lock:
+            pending = {}
+            for row, signed in self._reserved.values():
+                pending[row] = pending.get(row, 0.0) + signed
+            for symbol in list(self._index) + [s for s in positions if s not in self._index]:
+                row = self._row(symbol)
+                if self.prices[row] <= 0 and prices and prices.get(symbol):
+                    self.prices[row] = prices[symbol]
+                target = positions.get(symbol, 0.0) + pending.get(row, 0.0)
+                if self.lots[row] != target:
+                    self._apply_lots(row, target - self.lots[row])
+
+    # --- Views -----------------------------------------------------------------------------------
+    def value_at_risk(self):
+        return self.var_scale * math.sqrt(max(self.variance, 0.0))
+
+    def correlation(self):
+        """(symbols, correlation matrix) from the current covariance"""
+        with self._lock:
+            sd = np.sqrt(np.diag(self.cov))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                corr = np.where(np.outer(sd, sd) > 0, self.cov / np.outer(sd, sd), 0.0)
+            return list(self.symbols), corr
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "gross": self.gross,
+                "net": self.net,
+                "by_class": dict(self.class_gross),
+                "var": self.value_at_risk(),
+                "positions": {s: self.lots[r] for s, r in self._index.items() if self.lots[r]},
+            }
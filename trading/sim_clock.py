@@ -0,0 +1,74 @@
+# trading/sim_clock.py
+"""
+Clocks for the trading loop.
+
+Live trading runs on WallClock. Simulation mode runs on a SimulationClock,
+whose time moves only when the loop sleeps: each sleep(seconds) advances
+simulated time by exactly that much and blocks for seconds / speed of wall
+time. The speed is 1 for real time, N for N times faster, and 0 for as fast
+as possible, where a simulated day of one-second steps takes as long as the
+steps themselves. The loop, exit checks and PriceSimulator all read the same
+clock, so timestamps, hold times and price steps agree at any speed.
+"""
+import threading
+import time
+from datetime import datetime
+
+import pytz
+
+SPEEDS = {"realtime": 1.0, "max": 0.0}
+
+
+def parse_speed(value):
+    """Speed from "realtime", "max", "10x", "10" or a number"""
+    if isinstance(value, (int, float)):
+        speed = float(value)
+    else:
+        text = str(value).strip().lower()
+        speed = SPEEDS[text] if text in SPEEDS else float(text.rstrip("x"))
+    if speed < 0:
+        raise ValueError(f"Clock speed must be >= 0, got {value!r}")
+    return speed
+
+
+class WallClock:
+    speed = 1.0
+
+    def now(self):
+        """Seconds since the epoch"""
+        return time.time()
+
+    def datetime(self):
+        return datetime.fromtimestamp(self.now(), pytz.UTC)
+
+    def strftime(self, fmt='%Y-%m-%d %H:%M:%S'):
+        return self.datetime().strftime(fmt)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def stop(self):
+        pass
+
+
+class SimulationClock(WallClock):
+    def __init__(self, speed=1.0, start=None):
+        self.speed = parse_speed(speed)
+        self._now = time.time() if start is None else float(start)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def now(self):
+        with self._lock:
+            return self._now
+
+    def sleep(self, seconds):
+        """Advance simulated time by seconds, pacing it against the wall clock unless speed is 0"""
+        if self.speed > 0:
+            # Waiting on the event lets stop() cut a long real-time sleep short
+            self._stopped.wait(seconds / self.speed)
+        with self._lock:
+            self._now += seconds
+
+    def stop(self):
+        self._stopped.set()
@@ -0,0 +1,246 @@
+# trading/symbol_metadata.py
+"""
+cTrader symbol metadata: name -> symbolId and symbolId -> ProtoOASymbol.
+
+The maps are loaded from a versioned on-disk cache when the client is
+created, so lot sizes and digits are available before the connection is
+up. After account auth the light symbol list is only re-downloaded when the
+cache is older than SYMBOL_CACHE_TTL_SEC. Details for symbols that are new
+or reported by ProtoOASymbolChangedEvent are fetched in batched
+ProtoOASymbolByIdReq calls. The cache is rewritten on a background thread.
+"""
+import base64
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import Config
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+try:
+    from twisted.internet import defer
+    from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASymbolByIdReq, ProtoOASymbolsListReq
+    from ctrader_open_api.messages.OpenApiModelMessages_pb2 import ProtoOASymbol
+except ImportError:
+    # Mock mode: nothing is fetched, and cached details cannot be parsed
+    defer = None
+    ProtoOASymbol = None
+
+CACHE_VERSION = 1
+
+
+class SymbolMetadataService:
+    def __init__(self, client, cache_file=None, batch_size=None, ttl=None):
+        self.client = client
+        self.cache_file = cache_file or Config.SYMBOL_CACHE_FILE
+        self.batch_size = batch_size or Config.SYMBOL_DETAILS_BATCH_SIZE
+        self.ttl = Config.SYMBOL_CACHE_TTL_SEC if ttl is None else ttl
+        self.listed_at = None
+        self.on_symbols_loaded = None  # Called with no arguments once the name map is current
+
+        # symbolId -> Deferred for batches in flight, so concurrent ensure() calls share requests.
+        # ensure() runs on the reactor and GUI threads, so _pending is only touched under _pending_lock.
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+    @property
+    def names(self):
+        return self.client.symbols_map
+
+    @property
+    def details(self):
+        return self.client.symbol_details_map
+
+    def _cache_path(self):
+        return os.path.expanduser(self.cache_file.format(
+            host=Config.CTRADER_HOST_TYPE,
+            account=self.client.ctid_trader_account_id or "default"
+        ))
+
+    # --- Disk cache ------------------------------------------------------------------------------
+    def load(self):
+        """Fill the client's maps from disk; returns True if a usable cache was found"""
+        if ProtoOASymbol is None:
+            return False
+        path = self._cache_path()
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (IOError, ValueError) as e:
+            log.warning("Ignoring unreadable symbol cache %s: %s", path, e)
+            return False
+
+        if data.get("version") != CACHE_VERSION:
+            log.info("Symbol cache %s has an old format; it will be rebuilt", path)
+            return False
+
+        details = {}
+        for symbol_id, blob in data.get("details", {}).items():
+            proto = ProtoOASymbol()
+            proto.ParseFromString(base64.b64decode(blob))
+            details[int(symbol_id)] = proto
+
+        self.names.clear()
+        self.names.update(data.get("symbols", {}))
+        self.details.clear()
+        self.details.update(details)
+        self.listed_at = data.get("listed_at")
+        log.info("Loaded %d symbols (%d with details) from cache", len(self.names), len(self.details))
+        return True
+
+    def save_async(self):
+        """Snapshot the maps on the calling thread and write them from a worker thread"""
+        data = {
+            "version": CACHE_VERSION,
+            "listed_at": self.listed_at,
+            "symbols": dict(self.names),
+            "details": {str(symbol_id): proto for symbol_id, proto in self.details.items()},
+        }
+        path = self._cache_path()
+        threading.Thread(target=self._save, args=(path, data), name="symbol-cache-save", daemon=True).start()
+
+    def _save(self, path, data):
+        data["details"] = {
+            symbol_id: base64.b64encode(proto.SerializeToString()).decode("ascii")
+            for symbol_id, proto in data["details"].items()
+        }
+        tmp_path = f"{path}.tmp"
+        with self._save_lock:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(tmp_path, "w") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                log.error("Error saving symbol cache %s: %s", path, e)
+
+    def is_fresh(self):
+        return bool(self.names) and self.listed_at is not None and time.time() - self.listed_at < self.ttl
+
+    # --- Refresh (reactor thread) ----------------------------------------------------------------
+    def refresh(self):
+        """Called after account auth: re-list symbols only if the cache is stale"""
+        if self.is_fresh():
+            log.info("Symbol cache is fresh; skipping symbol list download")
+            self._symbols_loaded()
+            self.ensure(list(self.names.values()))
+            return
+
+        req = ProtoOASymbolsListReq()
+        req.ctidTraderAccountId = self.client.ctid_trader_account_id
+        self.client.client.send(req)
+
+    def apply_symbol_list(self, response):
+        """Replace the name map from a ProtoOASymbolsListRes and fetch details for new symbols only"""
+        names = {light.symbolName: light.symbolId for light in response.symbol}
+        listed = set(names.values())
+
+        self.names.clear()
+        self.names.update(names)
+        for symbol_id in [s for s in self.details if s not in listed]:
+            del self.details[symbol_id]
+        self.listed_at = time.time()
+        log.info("Loaded %d symbols.", len(names))
+        self._symbols_loaded()
+
+        missing = [s for s in listed if s not in self.details]
+        if missing:
+            self.ensure(missing).addBoth(lambda _: self.save_async())
+        else:
+            self.save_async()
+
+    def on_symbol_changed(self, event):
+        """ProtoOASymbolChangedEvent: drop and re-fetch just the changed symbols"""
+        changed = list(event.symbolId)
+        for symbol_id in changed:
+            self.details.pop(symbol_id, None)
+        log.info("Symbols changed: %s", changed)
+        self.ensure(changed).addBoth(lambda _: self.save_async())
+
+    def store(self, response):
+        """Store details from a ProtoOASymbolByIdRes"""
+        for proto in response.symbol:
+            self.details[proto.symbolId] = proto
+
+    def _symbols_loaded(self):
+        if self.on_symbols_loaded:
+            self.on_symbols_loaded()
+
+    def ensure(self, symbol_ids):
+        """
+        Return a Deferred that fires (with None) once details for symbol_ids have been
+        requested and answered; callers check `details` for the outcome. Ids already
+        cached or already being fetched are not requested again.
+        """
+        waits = {}
+        batches = []
+        with self._pending_lock:
+            missing = []
+            for symbol_id in dict.fromkeys(symbol_ids):
+                if symbol_id in self.details:
+                    continue
+                pending = self._pending.get(symbol_id)
+                if pending is not None:
+                    waits[id(pending)] = pending
+                else:
+                    missing.append(symbol_id)
+
+            # Claim the ids before sending, so another thread cannot request them too
+            for start in range(0, len(missing), self.batch_size):
+                batch = missing[start:start + self.batch_size]
+                done = defer.Deferred()
+                for symbol_id in batch:
+                    self._pending[symbol_id] = done
+                batches.append((batch, done))
+                waits[id(done)] = done
+
+        for batch, done in batches:
+            self._fetch_batch(batch, done)
+
+        if not waits:
+            return defer.succeed(None)
+        return defer.gatherResults([_follow(d) for d in waits.values()])
+
+    def _fetch_batch(self, batch, done):
+        """Request details for batch; done fires (with None) once they are stored or the request failed"""
+        def finished(_):
+            with self._pending_lock:
+                for symbol_id in batch:
+                    if self._pending.get(symbol_id) is done:
+                        del self._pending[symbol_id]
+            done.callback(None)
+
+        req = ProtoOASymbolByIdReq()
+        req.ctidTraderAccountId = self.client.ctid_trader_account_id
+        req.symbolId.extend(batch)
+
+        d = self.client._send_request(req)
+        if d is None:
+            finished(None)
+            return
+
+        def failed(failure):
+            log.warning("Symbol details request for %d symbols failed: %s", len(batch), failure.getErrorMessage())
+
+        d.addCallbacks(self.store, failed)
+        d.addBoth(finished)
+
+
+def _follow(source):
+    """A new Deferred that fires with None when `source` fires, leaving its result untouched"""
+    d = defer.Deferred()
+
+    def relay(result):
+        d.callback(None)
+        return result
+
+    source.addBoth(relay)
+    return d
@@ -0,0 +1,236 @@
+# trading/token_manager.py
+"""
+OAuth token lifecycle for the cTrader Open API.
+
+TokenManager holds the current access/refresh token pair and serves it
+without blocking. A background thread refreshes the access token
+TOKEN_REFRESH_MARGIN_SEC before it expires, so requests on the reactor
+thread never wait on the token endpoint. Concurrent refresh attempts are
+coalesced into a single HTTP call, every call has a timeout, and tokens are
+written to disk atomically (temp file + os.replace) from the refresh thread.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import Config
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+class _PendingRefresh:
+    """Result slot shared by every caller waiting on the same refresh"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = False
+
+
+class TokenManager:
+    def __init__(self, token_file=None, http=requests, refresh_margin=None, request_timeout=None,
+                 retry_interval=None, on_refresh=None):
+        self.token_file = token_file or Config.TOKEN_FILE
+        self.http = http
+        self.refresh_margin = Config.TOKEN_REFRESH_MARGIN_SEC if refresh_margin is None else refresh_margin
+        self.request_timeout = request_timeout or Config.TOKEN_REQUEST_TIMEOUT_SEC
+        self.retry_interval = retry_interval or Config.TOKEN_RETRY_INTERVAL_SEC
+        self.on_refresh = on_refresh
+
+        # Readers take the tuple in one step; writers swap the whole tuple under the lock
+        self._tokens = (None, None, None)  # (access_token, refresh_token, expires_at)
+        self._lock = threading.Lock()
+        self._inflight = None
+        self._failed_at = None
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- Token access (never blocks) -------------------------------------------------------------
+    @property
+    def access_token(self):
+        return self._tokens[0]
+
+    @property
+    def refresh_token(self):
+        return self._tokens[1]
+
+    @property
+    def expires_at(self):
+        return self._tokens[2]
+
+    def is_expired(self, buffer_seconds=60):
+        access_token, _, expires_at = self._tokens
+        if not access_token or not expires_at:
+            return True
+        return time.time() > expires_at - buffer_seconds
+
+    def needs_refresh(self):
+        return self.is_expired(self.refresh_margin)
+
+    # --- Persistence -----------------------------------------------------------------------------
+    def load(self):
+        """Load tokens saved by a previous session; a corrupt file is removed"""
+        try:
+            with open(self.token_file, "r") as f:
+                tokens = json.load(f)
+            self._tokens = (tokens.get("access_token"), tokens.get("refresh_token"), tokens.get("token_expires_at"))
+            if self.access_token:
+                log.info("Tokens loaded from %s", self.token_file)
+            else:
+                log.info("No access token in %s. Will need OAuth.", self.token_file)
+        except FileNotFoundError:
+            log.info("Token file %s not found. New OAuth flow will be required.", self.token_file)
+        except (IOError, json.JSONDecodeError) as e:
+            log.warning("Error loading tokens from %s: %s", self.token_file, e)
+            try:
+                os.remove(self.token_file)
+            except OSError as rm_err:
+                log.warning("Error removing corrupted token file: %s", rm_err)
+
+    def _save(self, tokens):
+        access_token, refresh_token, expires_at = tokens
+        data = {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "token_expires_at": expires_at,
+        }
+        tmp_path = f"{self.token_file}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.token_file)
+        except OSError as e:
+            log.error("Error saving tokens to %s: %s", self.token_file, e)
+
+    def update(self, token_data):
+        """Store a token endpoint response; returns False if it holds no access token"""
+        if "access_token" not in token_data:
+            return False
+
+        with self._lock:
+            _, refresh_token, expires_at = self._tokens
+            expires_in = token_data.get("expires_in")
+            tokens = (
+                token_data["access_token"],
+                token_data.get("refresh_token", refresh_token),
+                time.time() + int(expires_in) if expires_in else expires_at
+            )
+            self._tokens = tokens
+            self._failed_at = None
+
+        self._save(tokens)
+        self._wake.set()  # Reschedule the refresh timer for the new expiry
+        return True
+
+    def use_static(self, access_token):
+        """Serve a fixed token that never expires and is never saved (local fake server)"""
+        with self._lock:
+            self._tokens = (access_token, None, time.time() + 10 * 365 * 24 * 3600)
+            self._failed_at = None
+
+    # --- Refresh ---------------------------------------------------------------------------------
+    def refresh(self, timeout=None):
+        """
+        Refresh the access token. Callers arriving while a refresh is in flight wait
+        for that one instead of issuing their own request. Returns True on success.
+        """
+        with self._lock:
+            pending = self._inflight
+            leader = pending is None
+            if leader:
+                pending = self._inflight = _PendingRefresh()
+
+        if not leader:
+            pending.done.wait(timeout)
+            return pending.ok
+
+        try:
+            pending.ok = self._request_refresh()
+        finally:
+            with self._lock:
+                self._inflight = None
+                if not pending.ok:
+                    self._failed_at = time.time()
+            pending.done.set()
+
+        if pending.ok and self.on_refresh:
+            try:
+                self.on_refresh(self.access_token)
+            except Exception:
+                log.exception("Token refresh callback failed")
+        return pending.ok
+
+    def refresh_async(self, callback=None):
+        """Refresh on a worker thread; callback(ok) runs there when it completes"""
+        def run():
+            ok = self.refresh()
+            if callback:
+                callback(ok)
+
+        threading.Thread(target=run, name="token-refresh", daemon=True).start()
+
+    def _request_refresh(self):
+        refresh_token = self.refresh_token
+        if not refresh_token:
+            return False
+
+        payload = {
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+            "client_id": Config.CTRADING_CLIENT_ID,
+            "client_secret": Config.CTRADING_CLIENT_SECRET,
+        }
+        try:
+            response = self.http.post(Config.CTRADER_SPOTWARE_TOKEN_URL, data=payload, timeout=self.request_timeout)
+            response.raise_for_status()
+            ok = self.update(response.json())
+        except (requests.exceptions.RequestException, ValueError) as e:
+            log.warning("Token refresh failed: %s", e)
+            return False
+
+        if ok:
+            log.info("Access token refreshed")
+        else:
+            log.warning("Token refresh response had no access token")
+        return ok
+
+    # --- Background timer ------------------------------------------------------------------------
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="token-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.request_timeout + 1)
+            self._thread = None
+
+    def _next_refresh_delay(self):
+        if not self.refresh_token:
+            return None  # Nothing to refresh with; sleep until update() wakes us
+        expires_at = self.expires_at
+        due = (expires_at - self.refresh_margin) if expires_at else time.time()
+        if self._failed_at is not None:
+            due = max(due, self._failed_at + self.retry_interval)
+        return max(0.0, due - time.time())
+
+    def _run(self):
+        while not self._stop.is_set():
+            delay = self._next_refresh_delay()
+            if delay is None or delay > 0:
+                self._wake.wait(delay)
+                self._wake.clear()
+                continue
+            self.refresh()
@@ -4,6 +4,24 @@ class Config:
     API_SECRET = ""
     PAPER_TRADING = True
     RISK_LEVEL = "medium"
+
+    # Logging (see utils/logger.py)
+    LOG_LEVEL = "INFO"
+    LOG_FILE = "~/.sachiel_trading/logs/sachiel_alpaca.log"
+    LOG_TO_CONSOLE = True
+    LOG_MAX_BYTES = 5 * 1024 * 1024
+    LOG_BACKUP_COUNT = 5
+    LOG_QUEUE_SIZE = 10000
+    LOG_SAMPLE_RATE = 5  # Max records per second for each high-rate message
+
+    # Market-data journal (see trading/market_journal.py)
+    JOURNAL_ENABLED = False
+    JOURNAL_DIR = "~/.sachiel_trading/journal"
+    JOURNAL_FLUSH_INTERVAL_SEC = 1.0
+
+    # Performance analytics (see trading/equity_curve.py)
+    EQUITY_BUCKET_SEC = 3600  # Returns are measured per bucket; Sharpe/Sortino annualize by buckets per year
+    EQUITY_TRADING_DAYS_PER_YEAR = 252
     
     @classmethod
     def update_credentials(cls, api_key, api_secret, paper_trading):
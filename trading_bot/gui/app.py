@@ -53,6 +53,7 @@ class TradingApp:
         self.performance_tab = PerformanceTab(self.notebook)
         self.settings_tab = SettingsTab(self.notebook)
         self.sachiel_tab = SachielAITab(self.notebook)
+        self.trading_tab.trade_listeners.append(self.performance_tab.on_trade)
         
         # Add tabs to notebook
         self.notebook.add(self.dashboard_tab, text="Dashboard")
@@ -1,10 +1,12 @@
 # gui/performance.py
 import tkinter as tk
 from tkinter import ttk
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import traceback
+from trading.equity_curve import EquityCurve
+
+# Trade log types that close a position and carry realized P/L
+CLOSING_TYPES = ('SELL', 'STOP LOSS', 'TAKE PROFIT', 'STOP (SIM)', 'PROFIT (SIM)')
 
 class PerformanceTab(ttk.Frame):
     def __init__(self, parent):
@@ -13,6 +15,9 @@ class PerformanceTab(ttk.Frame):
         self.metrics = {}
         self.trades_cache = []
         self.last_update = None
+        # Fed as trades are logged and account equity changes; the trade log itself is capped at 1000 rows
+        self.equity_curve = EquityCurve()
+        self.open_notional = {}
         self.setup_ui()
         self.start_auto_update()
 
@@ -101,21 +106,9 @@ class PerformanceTab(ttk.Frame):
             for item in trading_tab.trade_log.get_children():
                 values = trading_tab.trade_log.item(item)['values']
                 if len(values) >= 8:  # Ensure we have all needed values
-                    try:
-                        trade_time = datetime.strptime(values[0], '%Y-%m-%d %H:%M:%S')
-                        trades.append({
-                            'time': trade_time,
-                            'symbol': values[1],
-                            'type': values[2],
-                            'price': self.extract_price(values[3]),
-                            'size': self.extract_size(values[4]),
-                            'pl': self.extract_pl(values[5]),
-                            'reason': values[6],
-                            'confidence': values[7]
-                        })
-                    except Exception as e:
-                        print(f"Error processing trade: {e}")
-                        continue
+                    trade = self.parse_trade(values)
+                    if trade:
+                        trades.append(trade)
             
             # Cache the trades
             self.trades_cache = trades
@@ -126,6 +119,49 @@ class PerformanceTab(ttk.Frame):
             traceback.print_exc()
             return []
 
+    def parse_trade(self, values):
+        """Trade dict from a trade log row"""
+        try:
+            values = list(values) + [""] * (8 - len(values))
+            return {
+                'time': datetime.strptime(str(values[0]), '%Y-%m-%d %H:%M:%S'),
+                'symbol': values[1],
+                'type': values[2],
+                'price': self.extract_price(values[3]),
+                'size': self.extract_size(values[4]),
+                'pl': self.extract_pl(values[5]),
+                'reason': values[6],
+                'confidence': values[7]
+            }
+        except Exception as e:
+            print(f"Error processing trade: {e}")
+            return None
+
+    def on_trade(self, values):
+        """TradingTab trade listener; may be called off the Tk thread"""
+        self.after(0, lambda: self.record_trade(self.parse_trade(values)))
+
+    def record_trade(self, trade):
+        """Feed one trade into the equity curve (log times are UTC)"""
+        if not trade:
+            return
+        ts = trade['time'].replace(tzinfo=timezone.utc).timestamp()
+        trade_type = str(trade['type'])
+        if trade_type in CLOSING_TYPES:
+            self.equity_curve.record_fill(ts, trade['pl'])
+            self.open_notional.pop(trade['symbol'], None)
+        elif trade_type.startswith('BUY') and trade['price'] > 0:
+            self.open_notional[trade['symbol']] = (
+                self.open_notional.get(trade['symbol'], 0.0) + trade['price'] * trade['size']
+            )
+        else:
+            return
+        self.equity_curve.set_exposure(ts, sum(self.open_notional.values()))
+
+    def record_equity(self, equity):
+        """Account equity (or balance) update"""
+        self.equity_curve.record_equity(datetime.now(timezone.utc).timestamp(), equity)
+
     def extract_size(self, size_str):
         """Extract numerical size from string"""
         try:
@@ -137,79 +173,50 @@ class PerformanceTab(ttk.Frame):
         except:
             return 0.0
 
-    def calculate_metrics(self, trades):
-        """Enhanced metrics calculation"""
+    def get_range_start(self, now=None):
+        """Start of the selected time range as epoch seconds (None for All Time)"""
+        now = now or datetime.now().astimezone()
+        range_str = self.time_range.get()
+        if range_str == "Today":
+            return now.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+        if range_str == "24 Hours":
+            return (now - timedelta(days=1)).timestamp()
+        if range_str == "7 Days":
+            return (now - timedelta(days=7)).timestamp()
+        if range_str == "30 Days":
+            return (now - timedelta(days=30)).timestamp()
+        return None
+
+    def calculate_metrics(self):
+        """Metrics for the selected time range from the incremental equity curve"""
         try:
-            # Get time range
-            range_str = self.time_range.get()
-            now = datetime.now()
-            
-            if range_str == "Today":
-                start_time = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            elif range_str == "24 Hours":
-                start_time = now - timedelta(days=1)
-            elif range_str == "7 Days":
-                start_time = now - timedelta(days=7)
-            elif range_str == "30 Days":
-                start_time = now - timedelta(days=30)
-            else:  # All Time
-                start_time = datetime.min
-                
-            # Filter trades by time range
-            filtered_trades = [t for t in trades if t['time'] >= start_time]
-            closed_trades = [t for t in filtered_trades if t['type'] in ['SELL', 'STOP LOSS', 'TAKE PROFIT']]
-            
-            if not closed_trades:
+            if self.equity_curve.first_time is None:
                 return self.get_default_metrics()
 
-            # Calculate basic metrics
-            pls = [t['pl'] for t in closed_trades]
-            total_pl = sum(pls)
-            winning_trades = [pl for pl in pls if pl > 0]
-            losing_trades = [pl for pl in pls if pl < 0]
-            
-            # Calculate detailed metrics
-            win_rate = len(winning_trades) / len(pls) if pls else 0
-            avg_win = sum(winning_trades) / len(winning_trades) if winning_trades else 0
-            avg_loss = sum(losing_trades) / len(losing_trades) if losing_trades else 0
-            largest_win = max(winning_trades) if winning_trades else 0
-            largest_loss = min(losing_trades) if losing_trades else 0
-            
-            # Calculate profit factor
-            gross_profit = sum(winning_trades) if winning_trades else 0
-            gross_loss = abs(sum(losing_trades)) if losing_trades else 0
-            profit_factor = gross_profit / gross_loss if gross_loss != 0 else float('inf')
-            
-            # Calculate risk metrics
-            returns = pd.Series(pls)
-            if len(returns) > 1:
-                sharpe = np.sqrt(252) * returns.mean() / returns.std() if returns.std() != 0 else 0
-                
-                # Calculate Max Drawdown
-                cumulative = returns.cumsum()
-                running_max = cumulative.expanding().max()
-                drawdowns = (cumulative - running_max) / running_max * 100
-                max_drawdown = abs(drawdowns.min()) if not drawdowns.empty else 0
-            else:
-                sharpe = 0
-                max_drawdown = 0
-                
+            now = datetime.now().astimezone()
+            stats = self.equity_curve.stats(self.get_range_start(now), now=now.timestamp())
+
             # Calculate 24h changes if we have previous metrics
-            changes = self.calculate_changes(total_pl, win_rate, avg_win, avg_loss)
+            changes = self.calculate_changes(stats, now)
 
             return {
-                "Total P/L": (f"${total_pl:,.2f}", changes['pl']),
-                "Win Rate": (f"{win_rate*100:.2f}%", changes['win_rate']),
-                "Total Trades": (str(len(pls)), ""),
-                "Winning Trades": (str(len(winning_trades)), ""),
-                "Losing Trades": (str(len(losing_trades)), ""),
-                "Average Win": (f"${avg_win:,.2f}", changes['avg_win']),
-                "Average Loss": (f"${avg_loss:,.2f}", changes['avg_loss']),
-                "Largest Win": (f"${largest_win:,.2f}", ""),
-                "Largest Loss": (f"${largest_loss:,.2f}", ""),
-                "Profit Factor": (f"{profit_factor:.2f}", ""),
-                "Sharpe Ratio": (f"{sharpe:.2f}", ""),
-                "Max Drawdown": (f"{max_drawdown:.2f}%", "")
+                "Total P/L": (f"${stats['pl']:,.2f}", changes['pl']),
+                "Return": (f"{stats['return_pct']:.2f}%", ""),
+                "Win Rate": (f"{stats['win_rate']*100:.2f}%", changes['win_rate']),
+                "Total Trades": (str(stats['trades']), ""),
+                "Winning Trades": (str(stats['wins']), ""),
+                "Losing Trades": (str(stats['losses']), ""),
+                "Average Win": (f"${stats['avg_win']:,.2f}", changes['avg_win']),
+                "Average Loss": (f"${stats['avg_loss']:,.2f}", changes['avg_loss']),
+                "Largest Win": (f"${stats['largest_win']:,.2f}", ""),
+                "Largest Loss": (f"${stats['largest_loss']:,.2f}", ""),
+                "Profit Factor": (f"{stats['profit_factor']:.2f}", ""),
+                "Sharpe Ratio": (f"{stats['sharpe']:.2f}", ""),
+                "Sortino Ratio": (f"{stats['sortino']:.2f}", ""),
+                "Max Drawdown": (f"{stats['max_drawdown_pct']:.2f}%", ""),
+                "Drawdown Duration": (self.format_duration(stats['drawdown_duration']), ""),
+                "Longest Drawdown": (self.format_duration(stats['longest_drawdown']), ""),
+                "Time in Market": (f"{stats['exposure_pct']:.2f}%", "")
             }
             
         except Exception as e:
@@ -221,6 +228,7 @@ class PerformanceTab(ttk.Frame):
         """Return default metrics when no trades exist"""
         return {
             "Total P/L": ("$0.00", ""),
+            "Return": ("0.00%", ""),
             "Win Rate": ("0.00%", ""),
             "Total Trades": ("0", ""),
             "Winning Trades": ("0", ""),
@@ -231,22 +239,20 @@ class PerformanceTab(ttk.Frame):
             "Largest Loss": ("$0.00", ""),
             "Profit Factor": ("0.00", ""),
             "Sharpe Ratio": ("0.00", ""),
-            "Max Drawdown": ("0.00%", "")
+            "Sortino Ratio": ("0.00", ""),
+            "Max Drawdown": ("0.00%", ""),
+            "Drawdown Duration": ("-", ""),
+            "Longest Drawdown": ("-", ""),
+            "Time in Market": ("0.00%", "")
         }
 
-    def calculate_changes(self, current_pl, current_win_rate, current_avg_win, current_avg_loss):
-        """Calculate 24h changes in metrics"""
+    def calculate_changes(self, current, now):
+        """Calculate changes against the 24-48 hours ago window"""
         try:
-            # Get trades from 24-48 hours ago for comparison
-            now = datetime.now()
-            day_ago = now - timedelta(days=1)
-            two_days_ago = now - timedelta(days=2)
-            
-            old_trades = [t for t in self.trades_cache 
-                         if two_days_ago <= t['time'] <= day_ago and 
-                         t['type'] in ['SELL', 'STOP LOSS', 'TAKE PROFIT']]
+            old = self.equity_curve.stats((now - timedelta(days=2)).timestamp(),
+                                          (now - timedelta(days=1)).timestamp())
             
-            if not old_trades:
+            if not old['trades']:
                 return {
                     'pl': "",
                     'win_rate': "",
@@ -254,21 +260,12 @@ class PerformanceTab(ttk.Frame):
                     'avg_loss': ""
                 }
                 
-            # Calculate old metrics
-            old_pls = [t['pl'] for t in old_trades]
-            old_pl = sum(old_pls)
-            old_winning = [pl for pl in old_pls if pl > 0]
-            old_losing = [pl for pl in old_pls if pl < 0]
-            
-            old_win_rate = len(old_winning) / len(old_pls) if old_pls else 0
-            old_avg_win = sum(old_winning) / len(old_winning) if old_winning else 0
-            old_avg_loss = sum(old_losing) / len(old_losing) if old_losing else 0
-            
             # Calculate changes
-            pl_change = ((current_pl - old_pl) / abs(old_pl) * 100) if old_pl != 0 else 0
-            win_rate_change = (current_win_rate - old_win_rate) * 100
-            avg_win_change = ((current_avg_win - old_avg_win) / old_avg_win * 100) if old_avg_win != 0 else 0
-            avg_loss_change = ((current_avg_loss - old_avg_loss) / old_avg_loss * 100) if old_avg_loss != 0 else 0
+            old_pl, old_avg_win, old_avg_loss = old['pl'], old['avg_win'], old['avg_loss']
+            pl_change = ((current['pl'] - old_pl) / abs(old_pl) * 100) if old_pl != 0 else 0
+            win_rate_change = (current['win_rate'] - old['win_rate']) * 100
+            avg_win_change = ((current['avg_win'] - old_avg_win) / old_avg_win * 100) if old_avg_win != 0 else 0
+            avg_loss_change = ((current['avg_loss'] - old_avg_loss) / old_avg_loss * 100) if old_avg_loss != 0 else 0
             
             return {
                 'pl': f"{'+' if pl_change >= 0 else ''}{pl_change:.1f}%",
@@ -281,14 +278,24 @@ class PerformanceTab(ttk.Frame):
             print(f"Error calculating changes: {e}")
             return {'pl': "", 'win_rate': "", 'avg_win': "", 'avg_loss': ""}
 
+    def format_duration(self, seconds):
+        """Format a duration in seconds as e.g. 2d 3h"""
+        if not seconds:
+            return "-"
+        minutes = int(seconds // 60)
+        days, minutes = divmod(minutes, 1440)
+        hours, minutes = divmod(minutes, 60)
+        if days:
+            return f"{days}d {hours}h"
+        if hours:
+            return f"{hours}h {minutes}m"
+        return f"{minutes}m"
+
     def update_metrics(self):
         """Update performance metrics display"""
         try:
-            # Get trades
-            trades = self.get_trades()
-            
             # Calculate metrics
-            metrics = self.calculate_metrics(trades)
+            metrics = self.calculate_metrics()
             
             # Update display
             self.display_metrics(metrics)
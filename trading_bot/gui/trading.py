@@ -16,6 +16,11 @@ import traceback
 import pandas as pd
 from trading.price_simulator import PriceSimulator
 from collections import defaultdict
+from utils.logger import get_logger, SAMPLED
+from trading.exit_engine import ExitEngine, ExitRules
+from trading.symbol_universe import SymbolUniverse
+
+log = get_logger(__name__)
 
 class TradingTab(ttk.Frame):
     def __init__(self, parent):
@@ -25,10 +30,14 @@ class TradingTab(ttk.Frame):
         self.is_trading = False
         self.simulation_mode = False
         self.active_positions = defaultdict(dict)
-        self.highest_prices = {}
-        self.partial_exits = set()
+        # Called with each trade log row, e.g. PerformanceTab.on_trade
+        self.trade_listeners = []
+        # Exit thresholds are parsed from the risk fields on the Tk thread, never per tick
+        self.exit_engine = ExitEngine()
+        self.symbol_universe = SymbolUniverse()
         self.setup_ui()
         self.initialize_clients()
+        self.load_symbols()
         self.start_market_status_updates()
 
     def verify_connection(self):
@@ -143,11 +152,12 @@ class TradingTab(ttk.Frame):
         self.symbol_combo = ttk.Combobox(
             symbol_frame,
             textvariable=self.symbol_var,
-            state="readonly",
             width=20
         )
         self.symbol_combo.pack(side=tk.LEFT, padx=5)
         self.symbol_combo.bind('<<ComboboxSelected>>', self.symbol_selection_changed)
+        # Type-ahead: the dropdown only ever holds the best matches for what has been typed
+        self.symbol_combo.bind('<KeyRelease>', self.filter_symbols)
         
         self.loading_label = ttk.Label(symbol_frame, text="")
         self.loading_label.pack(side=tk.LEFT, padx=5)
@@ -156,7 +166,7 @@ class TradingTab(ttk.Frame):
             symbol_frame,
             text="↻",
             width=3,
-            command=self.load_symbols
+            command=lambda: self.load_symbols(force=True)
         )
         self.refresh_button.pack(side=tk.LEFT, padx=5)
 
@@ -218,6 +228,10 @@ class TradingTab(ttk.Frame):
         self.partial_exit = ttk.Entry(advanced_frame, width=10)
         self.partial_exit.insert(0, "75")
         self.partial_exit.grid(row=0, column=1, padx=5, pady=5)
+
+        for entry in (self.stop_loss, self.take_profit, self.trailing_stop, self.max_hold_time, self.partial_exit):
+            entry.bind('<FocusOut>', self.refresh_exit_rules)
+            entry.bind('<Return>', self.refresh_exit_rules)
         
         # Trading Mode Settings
         ttk.Label(advanced_frame, text="Trading Mode:").grid(row=0, column=2, padx=5, pady=5)
@@ -369,6 +383,11 @@ class TradingTab(ttk.Frame):
                 account = self.alpaca_client.trading_client.get_account()
                 print(f"Account verified - Status: {account.status}")
                 
+                print("5. Loading market calendar...")
+                if self.market_clock is None:
+                    self.market_clock = MarketClock()
+                self.market_clock.attach(self.alpaca_client.trading_client)
+                
                 # Update market status label
                 if hasattr(self, 'market_status_label'):
                     self.market_status_label.config(
@@ -392,40 +411,56 @@ class TradingTab(ttk.Frame):
                 )
             return False
          
-    def load_symbols(self):
+    def load_symbols(self, force=False):
+        """Show the cached symbol universe immediately; download assets only when stale or forced"""
+        if not force and len(self.symbol_universe.index) == 0:
+            self.symbol_universe.load_cache()
+        if len(self.symbol_universe.index):
+            self._show_symbols()
+            if not force and self.symbol_universe.is_fresh():
+                return
+
+        if not (Config.API_KEY and Config.API_SECRET):
+            return
+
         def fetch_symbols():
             try:
-                self.loading_label.config(text="Loading symbols...")
-                self.refresh_button.config(state=tk.DISABLED)
-                self.symbol_combo.set("")
-                self.symbol_combo.config(values=[])
-            
                 if self.alpaca_client is None:
                     self.initialize_clients()
+                refreshed = self.alpaca_client is not None and self.symbol_universe.refresh(self.alpaca_client)
+            except Exception:
+                log.exception("Error loading symbols")
+                refreshed = False
 
-            # Get both stocks and crypto symbols
-                stock_symbols = self.alpaca_client.get_tradable_symbols()
-                crypto_symbols = self.alpaca_client.get_tradable_crypto_symbols()  # Add this method to AlpacaClient
-                
-                all_symbols = sorted(stock_symbols + crypto_symbols)
-                self.symbol_pairs = {symbol: 'crypto' if symbol in crypto_symbols else 'stock' for symbol in all_symbols}
-                
-                self.symbol_combo.config(values=all_symbols)
-                self.loading_label.config(text=f"{len(all_symbols)} symbols loaded")
-                self.refresh_button.config(state=tk.NORMAL)
-            
-                if all_symbols:
-                    self.symbol_combo.set(all_symbols[0])
-                
-            except Exception as e:
-                self.loading_label.config(text="Error loading symbols")
-                self.refresh_button.config(state=tk.NORMAL)
-                messagebox.showerror("Error", f"Failed to load symbols: {str(e)}")
+            if self.winfo_exists():
+                self.after(0, self._show_symbols if refreshed else self._on_symbols_failed)
 
+        self.loading_label.config(text="Loading symbols...")
+        self.refresh_button.config(state=tk.DISABLED)
         thread = threading.Thread(target=fetch_symbols)
         thread.daemon = True
-        thread.start() 
-    
+        thread.start()
+
+    def _show_symbols(self):
+        index = self.symbol_universe.index
+        self.symbol_combo.config(values=index.search(self.symbol_var.get(), limit=100))
+        self.loading_label.config(text=f"{len(index)} symbols loaded")
+        self.refresh_button.config(state=tk.NORMAL)
+        if not self.symbol_var.get() and len(index):
+            self.symbol_combo.set(index.symbols[0])
+
+    def _on_symbols_failed(self):
+        self.refresh_button.config(state=tk.NORMAL)
+        if len(self.symbol_universe.index) == 0:
+            self.loading_label.config(text="Error loading symbols")
+            messagebox.showerror("Error", "Failed to load symbols. Check your connection and press ↻.")
+
+    def filter_symbols(self, event=None):
+        """Narrow the dropdown to the best matches for the typed text"""
+        if event is not None and event.keysym in ('Up', 'Down', 'Return', 'Escape', 'Tab'):
+            return
+        self.symbol_combo.config(values=self.symbol_universe.index.search(self.symbol_var.get(), limit=100))
+
     def load_symbols_if_connected(self):
         if Config.API_KEY and Config.API_SECRET:
             self.load_symbols()
@@ -557,6 +592,7 @@ class TradingTab(ttk.Frame):
                 position = None
             
             if position is None:
+                self.exit_engine.remove(formatted_symbol)
                 # Check entry conditions
                 if self.check_entry_conditions(formatted_symbol, current_price, bars):
                     if is_crypto:
@@ -576,6 +612,7 @@ class TradingTab(ttk.Frame):
         try:
             if not self.validate_inputs():
                 return
+            self.refresh_exit_rules()
                 
             # Initialize clients if not already done
             if self.alpaca_client is None:
@@ -601,10 +638,13 @@ class TradingTab(ttk.Frame):
                         raise Exception("No trading client available")
                         
                     print("Checking market status...")
-                    clock = self.alpaca_client.trading_client.get_clock()
-                    print(f"Market is {'OPEN' if clock.is_open else 'CLOSED'}")
+                    if self.market_clock is None:
+                        self.market_clock = MarketClock()
+                        self.market_clock.attach(self.alpaca_client.trading_client)
+                    is_open = self.market_clock.is_market_open()
+                    print(f"Market is {'OPEN' if is_open else 'CLOSED'}")
                     
-                    if not clock.is_open:
+                    if not is_open:
                         messagebox.showerror(
                             "Error",
                             "Stock market is closed. Enable simulation mode to test trading."
@@ -670,10 +710,7 @@ class TradingTab(ttk.Frame):
             )
             
             # Clean up any tracking variables
-            if symbol in self.highest_prices:
-                del self.highest_prices[symbol]
-            if symbol in self.partial_exits:
-                self.partial_exits.remove(symbol)
+            self.exit_engine.remove(symbol)
                 
             # Show confirmation
             messagebox.showinfo("Trading Stopped", "Trading operations have been stopped.")
@@ -699,17 +736,16 @@ class TradingTab(ttk.Frame):
                     # For stocks, check market hours
                     else:
                         try:
-                            # Access clock through alpaca_client
-                            if self.alpaca_client and self.alpaca_client.trading_client:
-                                clock = self.alpaca_client.trading_client.get_clock()
-                                if clock.is_open:
+                            # Answered from the local calendar, no REST call per iteration
+                            if self.market_clock:
+                                if self.market_clock.is_market_open():
                                     self.execute_live_trade()
                                 else:
                                     print("Stock market is closed, stopping live trading")
                                     self.stop_trading()
                                     break
                             else:
-                                print("Trading client not available, stopping trading")
+                                print("Market clock not available, stopping trading")
                                 self.stop_trading()
                                 break
                         except Exception as e:
@@ -824,6 +860,7 @@ class TradingTab(ttk.Frame):
                 position = None
             
             if position is None:
+                self.exit_engine.remove(formatted_symbol)
                 # Check entry conditions
                 if self.check_entry_conditions(formatted_symbol, current_price, bars):
                     if is_crypto:
@@ -887,7 +924,7 @@ class TradingTab(ttk.Frame):
                 stop_loss={'stop_price': stop_loss, 'limit_price': stop_loss * 0.99}
             )
             
-            order = self.alpaca_client.submit_order(order_data)
+            order = self.alpaca_client.submit_order(order_data, reference_price=price)
             
             if order:
                 self.add_to_log(
@@ -953,7 +990,7 @@ class TradingTab(ttk.Frame):
             )
             
             print("\nSubmitting order...")
-            order = self.alpaca_client.submit_order(order_data)
+            order = self.alpaca_client.submit_order(order_data, reference_price=price)
             
             if order:
                 print("Order submitted successfully!")
@@ -1022,7 +1059,7 @@ class TradingTab(ttk.Frame):
             } for bar in bars])
             
             if len(df) < 20:
-                print(f"Insufficient data points: {len(df)}")
+                log.debug("Insufficient data points: %d", len(df), extra=SAMPLED)
                 return False
             
             # Calculate technical indicators
@@ -1040,11 +1077,14 @@ class TradingTab(ttk.Frame):
             rsi_favorable = 30 < latest['rsi'] < 70
             uptrend = latest['sma_20'] > latest['sma_50'] if len(df) >= 50 else True
 
-            print("\nEntry Conditions Check:")
-            print(f"Price (${current_price:.2f}) above SMA20 (${latest['sma_20']:.2f}): {price_above_sma}")
-            print(f"Volume ({latest['volume']:.0f}) above MA ({latest['volume_ma']:.0f}): {volume_increase}")
-            print(f"RSI ({latest['rsi']:.2f}) between 30-70: {rsi_favorable}")
-            print(f"Uptrend (SMA20 > SMA50): {uptrend}")
+            log.debug(
+                "Entry conditions for %s: price $%.2f > SMA20 $%.2f: %s | volume %.0f > MA %.0f: %s | "
+                "RSI %.2f in 30-70: %s | uptrend (SMA20 > SMA50): %s",
+                symbol, current_price, latest['sma_20'], price_above_sma,
+                latest['volume'], latest['volume_ma'], volume_increase,
+                latest['rsi'], rsi_favorable, uptrend,
+                extra=SAMPLED
+            )
             
             # More lenient conditions for crypto
             is_crypto = 'BTC' in symbol or 'ETH' in symbol
@@ -1053,17 +1093,16 @@ class TradingTab(ttk.Frame):
                 # For crypto, require only 2 out of 4 conditions
                 conditions_met = sum([price_above_sma, volume_increase, rsi_favorable, uptrend])
                 should_enter = conditions_met >= 2
-                print(f"Crypto conditions met: {conditions_met}/4")
+                log.debug("Crypto conditions met: %d/4", conditions_met, extra=SAMPLED)
             else:
                 # For stocks, use more conservative approach
                 should_enter = price_above_sma and (volume_increase or rsi_favorable) and uptrend
-                print(f"Stock conditions all met: {should_enter}")
+                log.debug("Stock conditions all met: %s", should_enter, extra=SAMPLED)
 
             return should_enter
 
-        except Exception as e:
-            print(f"Error checking entry conditions: {e}")
-            traceback.print_exc()
+        except Exception:
+            log.exception("Error checking entry conditions")
             return False
 
     def check_ai_signals(self):
@@ -1072,7 +1111,7 @@ class TradingTab(ttk.Frame):
             while not isinstance(notebook, ttk.Notebook):
                 notebook = notebook.master
                 if notebook is None:
-                    print("Could not find notebook")
+                    log.debug("Could not find notebook", extra=SAMPLED)
                     return False
 
             sachiel_tab = None
@@ -1082,14 +1121,15 @@ class TradingTab(ttk.Frame):
                     break
 
             if sachiel_tab is None:
-                print("AI tab not found - widget names:", [child.winfo_name() for child in notebook.winfo_children()])
+                log.debug("AI tab not found - widget names: %s",
+                          [child.winfo_name() for child in notebook.winfo_children()], extra=SAMPLED)
                 return False
 
             symbol = self.symbol_var.get()
             signals = sachiel_tab.get_ai_signals(symbol)
             
             if not signals:
-                print("No signals available")
+                log.debug("No signals available", extra=SAMPLED)
                 return False
                 
             if signals['signals']['should_trade']:
@@ -1106,8 +1146,9 @@ class TradingTab(ttk.Frame):
                         
                         self.take_profit.delete(0, tk.END)
                         self.take_profit.insert(0, str(signals['signals']['take_profit'] * 100))
+                        self.refresh_exit_rules()
                     except Exception as e:
-                        print(f"Error updating GUI: {e}")
+                        log.error("Error updating GUI: %s", e)
 
                 if self.winfo_exists():
                     self.after(0, update_gui)
@@ -1116,9 +1157,8 @@ class TradingTab(ttk.Frame):
                 
             return False
             
-        except Exception as e:
-            print(f"Error checking AI signals: {str(e)}")
-            traceback.print_exc()
+        except Exception:
+            log.exception("Error checking AI signals")
             return False
             
     def calculate_rsi(self, prices, period=14):
@@ -1147,174 +1187,99 @@ class TradingTab(ttk.Frame):
             
         return rsi
     
+    def refresh_exit_rules(self, event=None):
+        """Parse the risk fields into the exit engine; invalid input keeps the previous rules"""
+        try:
+            rules = ExitRules.from_percentages(
+                self.stop_loss.get(),
+                self.take_profit.get(),
+                self.trailing_stop.get(),
+                self.max_hold_time.get(),
+                self.partial_exit.get()
+            )
+        except ValueError:
+            log.warning("Invalid exit settings; keeping previous rules")
+            return
+        self.exit_engine.set_rules(rules)
+
+    def _position_entry_time(self, position):
+        """Entry time of an Alpaca position in epoch seconds, or None if the API doesn't report one"""
+        for attr in ('created_at', 'timestamp'):
+            value = getattr(position, attr, None)
+            if value:
+                try:
+                    entry_time = datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%fZ')
+                    return entry_time.replace(tzinfo=pytz.UTC).timestamp()
+                except (TypeError, ValueError) as e:
+                    log.warning("Error parsing entry time for %s: %s", position.symbol, e, extra=SAMPLED)
+        return None
+
     def check_live_exit(self, symbol, position, current_price):
         """Check and execute exit conditions for live trades"""
         try:
-            # Extract position details
             entry_price = float(position.avg_entry_price)
-            position_size = float(position.qty)
-            current_pl_pct = (current_price - entry_price) / entry_price
             unrealized_pl = float(position.unrealized_pl)
-            
-            print(f"\nChecking exit conditions for {symbol}:")
-            print(f"Entry Price: ${entry_price:.2f}")
-            print(f"Current Price: ${current_price:.2f}")
-            print(f"Current P/L: {current_pl_pct:.2%} (${unrealized_pl:.2f})")
-            
-            # Get configured exit levels
-            stop_loss_pct = float(self.stop_loss.get()) / 100
-            take_profit_pct = float(self.take_profit.get()) / 100
-            trailing_stop_pct = float(self.trailing_stop.get()) / 100
-            
-            # Initialize exit flags
-            exit_triggered = False
-            exit_type = None
-            
-            # 1. Stop Loss Check
-            if current_pl_pct <= -stop_loss_pct:
-                exit_triggered = True
-                exit_type = "STOP LOSS"
-                print(f"Stop loss triggered at {current_pl_pct:.2%}")
-            
-            # 2. Take Profit Check
-            elif current_pl_pct >= take_profit_pct:
-                exit_triggered = True
-                exit_type = "TAKE PROFIT"
-                print(f"Take profit triggered at {current_pl_pct:.2%}")
-            
-            # 3. Trailing Stop Check
-            if symbol in self.highest_prices:
-                highest_price = self.highest_prices[symbol]
-                if current_price > highest_price:
-                    self.highest_prices[symbol] = current_price
-                    print(f"New highest price: ${current_price:.2f}")
-                elif current_price < (highest_price * (1 - trailing_stop_pct)):
-                    exit_triggered = True
-                    exit_type = "TRAILING STOP"
-                    print(f"Trailing stop triggered. Highest: ${highest_price:.2f}, Current: ${current_price:.2f}")
-            else:
-                self.highest_prices[symbol] = current_price
-                print(f"Initial highest price set: ${current_price:.2f}")
-            
-            # 4. Time-Based Exit
-            max_hold_days = float(self.max_hold_time.get())
-            try:
-                # Try different possible timestamp attributes
-                if hasattr(position, 'created_at'):
-                    entry_time = datetime.strptime(position.created_at, '%Y-%m-%dT%H:%M:%S.%fZ')
-                elif hasattr(position, 'timestamp'):
-                    entry_time = datetime.strptime(position.timestamp, '%Y-%m-%dT%H:%M:%S.%fZ')
-                else:
-                    entry_time = None
-                    print("No entry timestamp found")
-                    
-                if entry_time:
-                    entry_time = entry_time.replace(tzinfo=pytz.UTC)
-                    hold_time = datetime.now(pytz.UTC) - entry_time
-                    print(f"Current hold time: {hold_time.days} days, {hold_time.seconds//3600} hours")
-                    
-                    if hold_time > timedelta(days=max_hold_days):
-                        exit_triggered = True
-                        exit_type = "TIME EXIT"
-                        print(f"Time exit triggered after {hold_time.days} days")
-                    
-            except Exception as e:
-                print(f"Error checking time-based exit: {e}")
-            
-            # 5. Partial Exit Check
-            partial_exit_threshold = float(self.partial_exit.get()) / 100
-            if (current_pl_pct >= take_profit_pct * partial_exit_threshold and 
-                position_size >= 2 and 
-                symbol not in self.partial_exits):
-                
-                try:
-                    print(f"Executing partial exit at {current_pl_pct:.2%} profit")
-                    # Sell half position
-                    partial_size = position_size / 2
-                    
-                    # Check if it's a crypto symbol
-                    is_crypto = 'BTC' in symbol or 'ETH' in symbol
-                    
-                    order_data = MarketOrderRequest(
-                        symbol=symbol.replace('/', ''),
-                        qty=partial_size,
-                        side=OrderSide.SELL,
-                        time_in_force=TimeInForce.IOC if is_crypto else TimeInForce.DAY
-                    )
-                    
-                    partial_order = self.alpaca_client.submit_order(order_data)
-                    
-                    if partial_order:
-                        self.partial_exits.add(symbol)
-                        print(f"Partial exit executed for {symbol}")
-                        self.add_to_log(
-                            datetime.now(pytz.UTC).strftime('%Y-%m-%d %H:%M:%S'),
-                            symbol,
-                            "PARTIAL EXIT",
-                            f"${current_price:.2f}",
-                            partial_size,
-                            f"${(unrealized_pl/2):.2f}",
-                            "Partial Profit",
-                            f"{current_pl_pct:.2%}"
-                        )
-                    
-                except Exception as e:
-                    print(f"Error executing partial exit: {e}")
-                    traceback.print_exc()
-            
-            # Execute full exit if triggered
-            if exit_triggered:
-                try:
-                    print(f"\nExecuting {exit_type} for {symbol}")
-                    print(f"Position Size: {position_size}")
-                    print(f"Exit Price: ${current_price:.2f}")
-                    
-                    # Check if it's a crypto symbol
-                    is_crypto = 'BTC' in symbol or 'ETH' in symbol
-                    
-                    order_data = MarketOrderRequest(
-                        symbol=symbol.replace('/', ''),
-                        qty=position_size,
-                        side=OrderSide.SELL,
-                        time_in_force=TimeInForce.IOC if is_crypto else TimeInForce.DAY
-                    )
-                    
-                    exit_order = self.alpaca_client.submit_order(order_data)
-                    
-                    if exit_order:
-                        self.add_to_log(
-                            datetime.now(pytz.UTC).strftime('%Y-%m-%d %H:%M:%S'),
-                            symbol,
-                            exit_type,
-                            f"${current_price:.2f}",
-                            position_size,
-                            f"${unrealized_pl:.2f}",
-                            exit_type,
-                            f"{current_pl_pct:.2%}"
-                        )
-                        
-                        # Clean up tracking variables
-                        if symbol in self.highest_prices:
-                            del self.highest_prices[symbol]
-                        if symbol in self.partial_exits:
-                            self.partial_exits.remove(symbol)
-                        
-                        print("Exit order submitted successfully")
-                        print(f"Final P&L: ${unrealized_pl:.2f} ({current_pl_pct:.2%})")
-                        
-                        return True
-                    else:
-                        print("Exit order submission failed")
-                        
-                except Exception as e:
-                    print(f"Error executing exit: {e}")
-                    traceback.print_exc()
-                    
+
+            self.exit_engine.set_position(
+                symbol, entry_price, float(position.qty), self._position_entry_time(position)
+            )
+            signals = self.exit_engine.evaluate({symbol: current_price})
+
+            log.debug("Checking exit conditions for %s: entry $%.2f, current $%.2f, P/L $%.2f",
+                      symbol, entry_price, current_price, unrealized_pl, extra=SAMPLED)
+
+            exited = False
+            for signal in signals:
+                exited = self._execute_exit_signal(signal, unrealized_pl) or exited
+            return exited
+
+        except Exception:
+            log.exception("Error in exit check")
             return False
-            
-        except Exception as e:
-            print(f"Error in exit check: {e}")
-            traceback.print_exc()
+
+    def _execute_exit_signal(self, signal, unrealized_pl):
+        """Submit the sell order for an ExitSignal; returns True once a full exit is sent"""
+        try:
+            log.info("Executing %s for %s: size %s, exit price $%.2f (%.2f%%)",
+                     signal.kind, signal.symbol, signal.qty, signal.price, signal.pl_pct * 100)
+
+            is_crypto = 'BTC' in signal.symbol or 'ETH' in signal.symbol
+            order_data = MarketOrderRequest(
+                symbol=signal.symbol.replace('/', ''),
+                qty=signal.qty,
+                side=OrderSide.SELL,
+                time_in_force=TimeInForce.IOC if is_crypto else TimeInForce.DAY
+            )
+            order = self.alpaca_client.submit_order(order_data, reference_price=signal.price)
+
+            if not order:
+                log.error("%s order submission failed for %s", signal.kind, signal.symbol)
+                if signal.is_partial:
+                    self.exit_engine.clear_partial(signal.symbol)
+                return False
+
+            self.add_to_log(
+                datetime.now(pytz.UTC).strftime('%Y-%m-%d %H:%M:%S'),
+                signal.symbol,
+                signal.kind,
+                f"${signal.price:.2f}",
+                signal.qty,
+                f"${(unrealized_pl / 2 if signal.is_partial else unrealized_pl):.2f}",
+                "Partial Profit" if signal.is_partial else signal.kind,
+                f"{signal.pl_pct:.2%}"
+            )
+
+            if signal.is_partial:
+                return False
+            self.exit_engine.remove(signal.symbol)
+            log.info("Exit order submitted successfully. Final P&L: $%.2f (%.2f%%)",
+                     unrealized_pl, signal.pl_pct * 100)
+            return True
+
+        except Exception:
+            if signal.is_partial:
+                self.exit_engine.clear_partial(signal.symbol)
+            log.exception("Error executing exit")
             return False
     
     def check_simulation_exit(self, current_price):
@@ -1383,6 +1348,15 @@ class TradingTab(ttk.Frame):
         if not self.symbol_var.get():
             messagebox.showerror("Error", "Please select a symbol")
             return False
+
+        # The picker is editable; map typed text onto a known symbol
+        index = self.symbol_universe.index
+        if len(index):
+            match = index.get(self.symbol_var.get().strip())
+            if match is None:
+                messagebox.showerror("Error", f"Unknown symbol: {self.symbol_var.get()}")
+                return False
+            self.symbol_var.set(match[0])
             
         position_size = self.position_size.get().strip() or "100"
         stop_loss = self.stop_loss.get().strip() or "2"
@@ -1426,7 +1400,7 @@ class TradingTab(ttk.Frame):
     def add_to_log(self, time_str, symbol, type_, price, size, pl, exit_reason="", confidence=""):
         """Add entry to trade log with all parameters"""
         try:
-            self.trade_log.insert('', 0, values=(
+            values = (
                 time_str,
                 symbol,
                 type_,
@@ -1435,7 +1409,10 @@ class TradingTab(ttk.Frame):
                 pl,
                 exit_reason,
                 confidence
-            ))
+            )
+            self.trade_log.insert('', 0, values=values)
+            for listener in self.trade_listeners:
+                listener(values)
             
             # Scroll to top to show latest entry
             self.trade_log.yview_moveto(0)
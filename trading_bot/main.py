@@ -14,6 +14,7 @@ from gui.sachiel_ai import SachielAITab
 from gui.performance import PerformanceTab
 from gui.chart_tab import ChartTab
 from trading.alpaca_client import AlpacaClient
+from utils.logger import configure_logging, shutdown_logging
 
 class MainApp(tk.Tk):
     def __init__(self):
@@ -52,6 +53,7 @@ class MainApp(tk.Tk):
         self.ai_tab = SachielAITab(self.notebook)
         self.performance_tab = PerformanceTab(self.notebook)
         self.chart_tab = ChartTab(self.notebook)
+        self.trading_tab.trade_listeners.append(self.performance_tab.on_trade)
         
         # Add tabs to notebook
         self.notebook.add(self.trading_tab, text='Trading')
@@ -125,9 +127,16 @@ class MainApp(tk.Tk):
             if hasattr(self, 'thread'):
                 self.thread.join(timeout=1.0)
             
+            # Stop the market calendar resync thread
+            if getattr(self.trading_tab, 'market_clock', None):
+                self.trading_tab.market_clock.close()
+
             # Close Alpaca client
             if self.alpaca_client:
                 self.alpaca_client.close()
+
+            # Flush anything still queued for the log writer thread
+            shutdown_logging()
             
         except Exception as e:
             print(f"Error during cleanup: {e}")
@@ -154,6 +163,7 @@ def main():
         sys.path.append(project_root)
         
         # Create and run the application
+        configure_logging()
         app = MainApp()
         app.run()
         
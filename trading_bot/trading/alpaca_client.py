@@ -4,6 +4,7 @@ from alpaca.data import StockHistoricalDataClient, CryptoHistoricalDataClient
 from alpaca.trading.requests import GetAssetsRequest
 from alpaca.trading.enums import AssetClass
 from config.settings import Config
+from trading.market_journal import JournalRecorder, to_price_units
 import pytz
 from alpaca.data.live import CryptoDataStream
 from alpaca.data.requests import CryptoLatestQuoteRequest
@@ -12,7 +13,7 @@ from datetime import datetime, timedelta
 from alpaca.data.timeframe import TimeFrame
 from alpaca.data.requests import StockBarsRequest, CryptoBarsRequest
 import pandas as pd
-import asyncio
+import threading
 
 
 class AlpacaClient:
@@ -21,7 +22,9 @@ class AlpacaClient:
         self.stock_data_client = None
         self.crypto_data_client = None
         self.crypto_stream = None
+        self._crypto_thread = None
         self.latest_crypto_prices = {}  # Cache for latest prices
+        self.journal = JournalRecorder("alpaca") if Config.JOURNAL_ENABLED else None
 
     async def init_crypto_stream(self):
         """Initialize crypto data stream with proper connection"""
@@ -40,15 +43,19 @@ class AlpacaClient:
 
             # Define the handler for crypto data
             async def handle_crypto_data(data):
-                print(f"Crypto data received: {data}")
-
-            # Set up the handler
-            self.crypto_stream.data_feed = handle_crypto_data
+                self.on_stream_bar(data)
 
             # Subscribe to default crypto pairs
             default_symbols = ["BTC/USD", "ETH/USD"]
-            await self.crypto_stream.subscribe_bars(default_symbols)
-            
+            self.crypto_stream.subscribe_bars(handle_crypto_data, *default_symbols)
+
+            # run() blocks in an event loop of its own, so it gets a thread of its own
+            if self.journal is not None:
+                self.journal.start()
+            self._crypto_thread = threading.Thread(target=self.crypto_stream.run, name="alpaca-crypto-stream",
+                                                   daemon=True)
+            self._crypto_thread.start()
+
             print(f"Successfully subscribed to crypto streams: {default_symbols}")
             return True
 
@@ -57,16 +64,33 @@ class AlpacaClient:
             traceback.print_exc()
             return False
 
+    def on_stream_bar(self, bar):
+        """Stream (or journal replay) bar: refresh the price cache and record it if journaling"""
+        self.latest_crypto_prices[bar.symbol] = float(bar.close)
+        if self.journal is not None:
+            self.journal.record_bar(
+                int(bar.timestamp.timestamp() * 1000), self.journal.symbol_key(bar.symbol),
+                to_price_units(bar.open), to_price_units(bar.high), to_price_units(bar.low),
+                to_price_units(bar.close), float(bar.volume)
+            )
+
     def close_crypto_stream(self):
         """Properly close the crypto stream"""
         try:
-            if hasattr(self, 'crypto_stream'):
-                asyncio.create_task(self.crypto_stream.close())
+            if self.crypto_stream is not None:
+                self._stop_crypto_stream()
                 print("Crypto stream closed")
         except Exception as e:
             print(f"Error closing crypto stream: {e}")
             traceback.print_exc()
         
+    def _stop_crypto_stream(self):
+        # stop() hands the shutdown to the stream's own loop and waits for it
+        stream, self.crypto_stream = self.crypto_stream, None
+        if self._crypto_thread is not None and self._crypto_thread.is_alive():
+            stream.stop()
+        self._crypto_thread = None
+
     def close(self):
         """Close all connections properly"""
         try:
@@ -76,18 +100,16 @@ class AlpacaClient:
                 pass
 
             # Close crypto stream if exists
-            if hasattr(self, 'crypto_stream'):
+            if self.crypto_stream is not None:
                 try:
-                    # Get event loop for async operations
-                    loop = asyncio.get_event_loop()
-                    if loop and loop.is_running():
-                        loop.create_task(self.crypto_stream.close())
-                    else:
-                        print("No running event loop for crypto stream cleanup")
+                    self._stop_crypto_stream()
                     print("Crypto stream closed")
                 except Exception as e:
                     print(f"Error closing crypto stream: {e}")
 
+            if self.journal is not None:
+                self.journal.stop()
+
         except Exception as e:
             print(f"Error in client cleanup: {e}")
             traceback.print_exc()
@@ -193,6 +215,21 @@ class AlpacaClient:
         except Exception as e:
             print(f"Error getting crypto symbols: {e}")
             return []
+
+    def get_tradable_assets(self):
+        """Tradable stocks and crypto as (symbol, 'stock' | 'crypto', name) tuples, from one get_all_assets call"""
+        if not self.trading_client:
+            self.connect()
+
+        kinds = {AssetClass.US_EQUITY: 'stock', AssetClass.CRYPTO: 'crypto'}
+        assets = []
+        for asset in self.trading_client.get_all_assets():
+            kind = kinds.get(asset.asset_class)
+            if kind and asset.tradable:
+                symbol = asset.symbol.replace("/", "") if kind == 'crypto' else asset.symbol
+                assets.append((symbol, kind, asset.name or ""))
+        return assets
+
     def get_account(self):
         try:
             if not self.trading_client:
@@ -527,43 +564,25 @@ class AlpacaClient:
             print(f"Error getting positions: {e}")
             return []
 
-    def submit_order(self, order_data):
-        """Submit an order with proper price validation"""
+    def submit_order(self, order_data, reference_price=None):
+        """
+        Submit an order. Pass the caller's latest price as reference_price to
+        validate a take profit leg; no extra position or quote calls are made.
+        """
         try:
             if not self.trading_client:
                 self.connect()
 
-            # Get the current price from Alpaca's quote
             symbol = order_data.symbol
-            current_price = None
-            
-            try:
-                positions = self.trading_client.get_all_positions()
-                for pos in positions:
-                    if pos.symbol == symbol:
-                        current_price = float(pos.current_price)
-                        break
-            except Exception as e:
-                print(f"Warning: Could not get position price: {e}")
-
-            if not current_price:
-                try:
-                    # Get latest quote for better price accuracy
-                    quotes = self.trading_client.get_quotes(symbol, "2023-12-15", "2023-12-15", limit=1)
-                    if quotes and len(quotes) > 0:
-                        quote = quotes[0]
-                        current_price = (float(quote.ask_price) + float(quote.bid_price)) / 2
-                        print(f"Using quote midpoint price: ${current_price:.2f}")
-                except Exception as e:
-                    print(f"Warning: Could not get quote: {e}")
 
             # If we have a take profit order, ensure it's valid
-            if hasattr(order_data, 'take_profit') and order_data.take_profit:
-                if current_price:
-                    # Make sure take profit is above current price
-                    new_take_profit = max(current_price * 1.001, current_price + 0.01)
-                    order_data.take_profit['limit_price'] = new_take_profit
-                    print(f"Adjusted take profit to ${new_take_profit:.2f}")
+            take_profit = getattr(order_data, 'take_profit', None)
+            min_take_profit = max(reference_price * 1.001, reference_price + 0.01) if reference_price else None
+            if take_profit and min_take_profit and take_profit.limit_price < min_take_profit:
+                # Make sure take profit is above current price
+                new_take_profit = round(min_take_profit, 2)
+                take_profit.limit_price = new_take_profit
+                print(f"Adjusted take profit to ${new_take_profit:.2f}")
 
             print(f"Submitting order for {symbol}...")
             return self.trading_client.submit_order(order_data)
@@ -0,0 +1,285 @@
+# trading/exit_engine.py
+"""
+Vectorized exit evaluation for every open position.
+
+Positions live in parallel NumPy arrays (entry price, quantity, peak price,
+entry time and per-position thresholds). evaluate() applies a batch of new
+prices and checks stop loss, take profit, trailing stop, time exit and
+partial exit for all positions in one pass, returning ExitSignals only for
+the rows that triggered. Thresholds are plain floats held by the engine, so
+the hot path never touches Tk widgets.
+"""
+import threading
+import time
+import numpy as np
+
+
+class ExitRules:
+    """Exit thresholds as fractions (0.02 == 2%) and seconds"""
+
+    def __init__(self, stop_loss_pct=0.02, take_profit_pct=0.04, trailing_stop_pct=0.015,
+                 max_hold_seconds=5 * 86400, partial_exit_ratio=0.75, partial_min_qty=2.0):
+        self.stop_loss_pct = stop_loss_pct
+        self.take_profit_pct = take_profit_pct
+        self.trailing_stop_pct = trailing_stop_pct
+        self.max_hold_seconds = max_hold_seconds
+        # Take half off once P/L reaches partial_exit_ratio * take_profit_pct
+        self.partial_exit_ratio = partial_exit_ratio
+        self.partial_min_qty = partial_min_qty
+
+    @classmethod
+    def from_percentages(cls, stop_loss, take_profit, trailing_stop, max_hold_days, partial_exit):
+        """Build rules from the GUI's percentage / day values"""
+        return cls(
+            stop_loss_pct=float(stop_loss) / 100,
+            take_profit_pct=float(take_profit) / 100,
+            trailing_stop_pct=float(trailing_stop) / 100,
+            max_hold_seconds=float(max_hold_days) * 86400,
+            partial_exit_ratio=float(partial_exit) / 100
+        )
+
+
+class ExitSignal:
+    STOP_LOSS = "STOP LOSS"
+    TAKE_PROFIT = "TAKE PROFIT"
+    TRAILING_STOP = "TRAILING STOP"
+    TIME_EXIT = "TIME EXIT"
+    PARTIAL_EXIT = "PARTIAL EXIT"
+
+    def __init__(self, symbol, kind, qty, price, entry_price, peak_price, key=None):
+        self.symbol = symbol
+        self.kind = kind
+        self.qty = qty
+        self.price = price
+        self.entry_price = entry_price
+        self.peak_price = peak_price
+        self.pl_pct = price / entry_price - 1 if entry_price else 0.0
+        self.key = key
+
+    @property
+    def is_partial(self):
+        return self.kind == self.PARTIAL_EXIT
+
+    def __repr__(self):
+        return f"ExitSignal({self.kind} {self.qty} {self.symbol} @ {self.price}, pl={self.pl_pct:.2%})"
+
+
+class ExitEngine:
+    def __init__(self, rules=None, capacity=64):
+        self.rules = rules or ExitRules()
+        self._lock = threading.Lock()
+        self._index = {}    # symbol -> row
+        self._symbols = []  # row -> symbol
+        self._keys = []     # row -> caller's position key (e.g. positionId)
+        self._n = 0
+        self._alloc(capacity)
+
+    def _alloc(self, capacity):
+        def grow(name, fill, dtype=np.float64):
+            arr = np.full(capacity, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                arr[:self._n] = old[:self._n]
+            setattr(self, name, arr)
+
+        grow('entry', np.nan)
+        grow('qty', 0.0)
+        grow('peak', np.nan)
+        grow('last', np.nan)
+        grow('entry_time', np.nan)
+        grow('stop_loss', self.rules.stop_loss_pct)
+        grow('take_profit', self.rules.take_profit_pct)
+        grow('trailing', self.rules.trailing_stop_pct)
+        grow('max_hold', self.rules.max_hold_seconds)
+        grow('partial_ratio', self.rules.partial_exit_ratio)
+        grow('partial_done', False, dtype=bool)
+        self._capacity = capacity
+
+    def __len__(self):
+        return self._n
+
+    def __contains__(self, symbol):
+        return symbol in self._index
+
+    @property
+    def symbols(self):
+        return list(self._symbols)
+
+    # --- Position bookkeeping --------------------------------------------------------------------
+    def set_position(self, symbol, entry_price, qty, entry_time=None, key=None, rules=None):
+        """
+        Insert or update a position. Trailing peak and partial-exit state are kept
+        while the entry price is unchanged; a new entry price starts a new position.
+        entry_time is epoch seconds; None disables the time exit for this row.
+        """
+        with self._lock:
+            row = self._index.get(symbol)
+            if row is None:
+                if self._n == self._capacity:
+                    self._alloc(self._capacity * 2)
+                row = self._n
+                self._n += 1
+                self._index[symbol] = row
+                self._symbols.append(symbol)
+                self._keys.append(key)
+                self._reset_row(row, entry_price, rules)
+            elif self.entry[row] != entry_price:
+                self._reset_row(row, entry_price, rules)
+            elif rules is not None:
+                self._set_row_rules(row, rules)
+
+            self.qty[row] = qty
+            self.entry_time[row] = np.nan if entry_time is None else entry_time
+            self._keys[row] = key
+
+    def _reset_row(self, row, entry_price, rules):
+        self.entry[row] = entry_price
+        self.peak[row] = entry_price
+        self.last[row] = entry_price
+        self.partial_done[row] = False
+        self._set_row_rules(row, rules or self.rules)
+
+    def _set_row_rules(self, row, rules):
+        self.stop_loss[row] = rules.stop_loss_pct
+        self.take_profit[row] = rules.take_profit_pct
+        self.trailing[row] = rules.trailing_stop_pct
+        self.max_hold[row] = rules.max_hold_seconds
+        self.partial_ratio[row] = rules.partial_exit_ratio
+
+    def set_rules(self, rules):
+        """Make rules the default and apply them to every tracked position"""
+        with self._lock:
+            self.rules = rules
+            n = self._n
+            self.stop_loss[:n] = rules.stop_loss_pct
+            self.take_profit[:n] = rules.take_profit_pct
+            self.trailing[:n] = rules.trailing_stop_pct
+            self.max_hold[:n] = rules.max_hold_seconds
+            self.partial_ratio[:n] = rules.partial_exit_ratio
+
+    def remove(self, symbol):
+        """Drop a position in O(1) by moving the last row into its slot"""
+        with self._lock:
+            row = self._index.pop(symbol, None)
+            if row is None:
+                return
+            last = self._n - 1
+            if row != last:
+                for name in ('entry', 'qty', 'peak', 'last', 'entry_time', 'stop_loss', 'take_profit',
+                             'trailing', 'max_hold', 'partial_ratio', 'partial_done'):
+                    arr = getattr(self, name)
+                    arr[row] = arr[last]
+                moved = self._symbols[last]
+                self._symbols[row] = moved
+                self._keys[row] = self._keys[last]
+                self._index[moved] = row
+            self._symbols.pop()
+            self._keys.pop()
+            self._n = last
+
+    def retain(self, symbols):
+        """Remove every tracked position whose symbol is not in `symbols`"""
+        keep = set(symbols)
+        for symbol in [s for s in self._symbols if s not in keep]:
+            self.remove(symbol)
+
+    def clear_partial(self, symbol):
+        """Re-arm the partial exit, e.g. after the partial order failed"""
+        with self._lock:
+            row = self._index.get(symbol)
+            if row is not None:
+                self.partial_done[row] = False
+
+    # --- Evaluation ------------------------------------------------------------------------------
+    def evaluate(self, prices=None, now=None):
+        """
+        Apply {symbol: price} updates and evaluate the updated positions in one pass
+        (every position when prices is None). Returns ExitSignals; a full exit takes
+        precedence over a partial one.
+        """
+        with self._lock:
+            n = self._n
+            if n == 0:
+                return []
+
+            if prices is None:
+                active = np.ones(n, dtype=bool)
+            else:
+                active = np.zeros(n, dtype=bool)
+                index = self._index
+                for symbol, price in prices.items():
+                    row = index.get(symbol)
+                    if row is not None:
+                        self.last[row] = price
+                        active[row] = True
+
+            now = time.time() if now is None else now
+            price = self.last[:n]
+            entry = self.entry[:n]
+            qty = self.qty[:n]
+
+            # Peak before this update drives the trailing check, as the per-position code did
+            prev_peak = self.peak[:n].copy()
+            np.fmax(self.peak[:n], price, out=self.peak[:n])
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                pl = price / entry - 1.0
+
+            stop_hit = pl <= -self.stop_loss[:n]
+            profit_hit = pl >= self.take_profit[:n]
+            trail_hit = price < prev_peak * (1.0 - self.trailing[:n])
+            time_hit = (now - self.entry_time[:n]) > self.max_hold[:n]
+            full_exit = stop_hit | profit_hit | trail_hit | time_hit
+
+            partial_hit = (
+                active
+                & ~full_exit
+                & ~self.partial_done[:n]
+                & (pl >= self.take_profit[:n] * self.partial_ratio[:n])
+                & (qty >= self.rules.partial_min_qty)
+            )
+
+            triggered = np.flatnonzero((full_exit | partial_hit) & active)
+            if triggered.size == 0:
+                return []
+
+            # Precedence matches the original checks: time > trailing > take profit / stop loss
+            kinds = np.select(
+                [time_hit, trail_hit, profit_hit, stop_hit, partial_hit],
+                [ExitSignal.TIME_EXIT, ExitSignal.TRAILING_STOP, ExitSignal.TAKE_PROFIT,
+                 ExitSignal.STOP_LOSS, ExitSignal.PARTIAL_EXIT],
+                default=""
+            )
+
+            signals = []
+            for row in triggered:
+                kind = str(kinds[row])
+                is_partial = kind == ExitSignal.PARTIAL_EXIT
+                if is_partial:
+                    self.partial_done[row] = True
+                signals.append(ExitSignal(
+                    self._symbols[row],
+                    kind,
+                    qty[row] / 2 if is_partial else qty[row],
+                    float(price[row]),
+                    float(entry[row]),
+                    float(self.peak[row]),
+                    key=self._keys[row]
+                ))
+            return signals
+
+    def snapshot(self):
+        """Per-position state for display or debugging"""
+        with self._lock:
+            n = self._n
+            return [
+                {
+                    'symbol': self._symbols[i],
+                    'entry_price': float(self.entry[i]),
+                    'qty': float(self.qty[i]),
+                    'peak_price': float(self.peak[i]),
+                    'last_price': float(self.last[i]),
+                    'partial_done': bool(self.partial_done[i]),
+                }
+                for i in range(n)
+            ]
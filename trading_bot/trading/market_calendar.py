@@ -0,0 +1,232 @@
+# trading/market_calendar.py
+import bisect
+import json
+import os
+import threading
+import traceback
+from datetime import datetime, timedelta
+import pytz
+
+EXCHANGE_TZ = pytz.timezone('America/New_York')
+BUNDLED_CALENDAR_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nyse_calendar.json')
+CALENDAR_CACHE_FILE = os.path.join(os.path.expanduser('~/.sachiel_trading'), 'market_calendar.json')
+
+
+class CalendarClock:
+    """Clock snapshot with the same attributes as Alpaca's Clock model"""
+
+    def __init__(self, timestamp, is_open, next_open, next_close):
+        self.timestamp = timestamp
+        self.is_open = is_open
+        self.next_open = next_open
+        self.next_close = next_close
+
+
+class MarketCalendar:
+    """
+    Local exchange calendar: trading sessions (with holidays and early closes
+    already applied) stored as two sorted arrays of epoch seconds. Every query
+    is a bisect over those arrays, so answering is-open / next-open /
+    next-close never touches the network. Only the background resync thread
+    talks to the broker.
+    """
+
+    def __init__(self, cache_file=CALENDAR_CACHE_FILE, resync_interval=6 * 3600):
+        self.cache_file = cache_file
+        self.resync_interval = resync_interval
+        self.trading_client = None
+        self.source = None
+        self.last_sync = None
+        # (opens, closes) is swapped as a single tuple so readers never need a lock
+        self._sessions = ([], [])
+        self._resync_stop = threading.Event()
+        self._resync_thread = None
+
+    # --- Loading ---------------------------------------------------------------------------------
+    def load(self, trading_client=None):
+        """Load sessions from the broker, falling back to the disk cache and then the bundled file"""
+        if trading_client is not None:
+            self.trading_client = trading_client
+
+        if self.trading_client is not None and self.load_from_broker(self.trading_client):
+            return True
+        if self.load_from_file(self.cache_file):
+            return True
+        return self.load_bundled()
+
+    def load_from_broker(self, trading_client, days_back=7, days_ahead=400):
+        """Fetch the session table from Alpaca's calendar endpoint (one REST call)"""
+        try:
+            from alpaca.trading.requests import GetCalendarRequest
+
+            today = datetime.now(EXCHANGE_TZ).date()
+            request = GetCalendarRequest(
+                start=today - timedelta(days=days_back),
+                end=today + timedelta(days=days_ahead)
+            )
+            days = trading_client.get_calendar(request)
+
+            sessions = []
+            for day in days:
+                # Alpaca returns naive open/close datetimes in exchange local time
+                open_dt = EXCHANGE_TZ.localize(day.open)
+                close_dt = EXCHANGE_TZ.localize(day.close)
+                sessions.append((open_dt.timestamp(), close_dt.timestamp()))
+
+            if not sessions:
+                print("Broker calendar returned no sessions")
+                return False
+
+            self._set_sessions(sessions, "broker")
+            self.save_to_file(self.cache_file)
+            return True
+
+        except Exception as e:
+            print(f"Error loading calendar from broker: {e}")
+            return False
+
+    def load_from_file(self, path):
+        """Load a session table previously written by save_to_file"""
+        try:
+            if not os.path.exists(path):
+                return False
+
+            with open(path, 'r') as f:
+                data = json.load(f)
+
+            sessions = [(float(s[0]), float(s[1])) for s in data.get('sessions', [])]
+            if not sessions:
+                return False
+
+            # A stale cache is still better than nothing, but skip it if it has run out
+            if sessions[-1][1] < datetime.now(pytz.UTC).timestamp():
+                print(f"Calendar cache {path} has expired")
+                return False
+
+            self._set_sessions(sessions, "cache")
+            return True
+
+        except Exception as e:
+            print(f"Error loading calendar cache {path}: {e}")
+            return False
+
+    def load_bundled(self, path=BUNDLED_CALENDAR_FILE):
+        """Build sessions from the bundled holiday / early close table"""
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+
+            holidays = set(data.get('holidays', []))
+            early_closes = data.get('early_closes', {})
+            open_h, open_m = (int(x) for x in data.get('regular_open', '09:30').split(':'))
+            close_str = data.get('regular_close', '16:00')
+
+            years = sorted({int(d[:4]) for d in holidays} | {int(d[:4]) for d in early_closes})
+            if not years:
+                return False
+
+            day = datetime(years[0], 1, 1)
+            end = datetime(years[-1], 12, 31)
+            sessions = []
+            while day <= end:
+                key = day.strftime('%Y-%m-%d')
+                if day.weekday() < 5 and key not in holidays:
+                    close_h, close_m = (int(x) for x in early_closes.get(key, close_str).split(':'))
+                    open_dt = EXCHANGE_TZ.localize(day.replace(hour=open_h, minute=open_m))
+                    close_dt = EXCHANGE_TZ.localize(day.replace(hour=close_h, minute=close_m))
+                    sessions.append((open_dt.timestamp(), close_dt.timestamp()))
+                day += timedelta(days=1)
+
+            self._set_sessions(sessions, "bundled")
+            return True
+
+        except Exception as e:
+            print(f"Error loading bundled calendar: {e}")
+            traceback.print_exc()
+            return False
+
+    def save_to_file(self, path):
+        try:
+            opens, closes = self._sessions
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'version': 1, 'sessions': list(zip(opens, closes))}, f)
+            os.replace(tmp_path, path)
+
+        except Exception as e:
+            print(f"Error saving calendar cache: {e}")
+
+    def _set_sessions(self, sessions, source):
+        sessions = sorted(sessions)
+        self._sessions = ([s[0] for s in sessions], [s[1] for s in sessions])
+        self.source = source
+        self.last_sync = datetime.now(pytz.UTC)
+        print(f"Market calendar loaded from {source}: {len(sessions)} sessions")
+
+    # --- Queries (O(log n), no network) ----------------------------------------------------------
+    def is_loaded(self):
+        return bool(self._sessions[0])
+
+    def _now(self, ts):
+        if ts is None:
+            return datetime.now(pytz.UTC).timestamp()
+        if isinstance(ts, datetime):
+            return ts.timestamp()
+        return float(ts)
+
+    def is_open(self, ts=None):
+        t = self._now(ts)
+        opens, closes = self._sessions
+        i = bisect.bisect_right(opens, t) - 1
+        return i >= 0 and t < closes[i]
+
+    def next_open(self, ts=None):
+        """Start of the next session strictly after ts (tomorrow's open while the market is open)"""
+        t = self._now(ts)
+        opens, _ = self._sessions
+        i = bisect.bisect_right(opens, t)
+        if i >= len(opens):
+            return None
+        return datetime.fromtimestamp(opens[i], EXCHANGE_TZ)
+
+    def next_close(self, ts=None):
+        """End of the current session, or of the next one if the market is closed"""
+        t = self._now(ts)
+        opens, closes = self._sessions
+        i = bisect.bisect_right(opens, t) - 1
+        if i >= 0 and t < closes[i]:
+            return datetime.fromtimestamp(closes[i], EXCHANGE_TZ)
+        if i + 1 < len(closes):
+            return datetime.fromtimestamp(closes[i + 1], EXCHANGE_TZ)
+        return None
+
+    def clock(self, ts=None):
+        t = self._now(ts)
+        return CalendarClock(
+            timestamp=datetime.fromtimestamp(t, EXCHANGE_TZ),
+            is_open=self.is_open(t),
+            next_open=self.next_open(t),
+            next_close=self.next_close(t)
+        )
+
+    # --- Background resync -----------------------------------------------------------------------
+    def start_resync(self):
+        """Periodically refresh the session table from the broker on a daemon thread"""
+        if self._resync_thread and self._resync_thread.is_alive():
+            return
+
+        def resync_loop():
+            while not self._resync_stop.wait(self.resync_interval):
+                if self.trading_client is not None:
+                    self.load_from_broker(self.trading_client)
+
+        self._resync_stop.clear()
+        self._resync_thread = threading.Thread(target=resync_loop, daemon=True)
+        self._resync_thread.start()
+
+    def stop_resync(self):
+        self._resync_stop.set()
@@ -3,6 +3,7 @@ from datetime import datetime
 import pytz
 from alpaca.trading.client import TradingClient
 from config.settings import Config
+from trading.market_calendar import MarketCalendar
 
 class MarketClock:
     def __init__(self):
@@ -10,6 +11,7 @@ class MarketClock:
         self.clock = None
         self.last_update = None
         self.update_interval = 60  # Update every 60 seconds
+        self.calendar = MarketCalendar()
 
     def connect(self):
         self.trading_client = TradingClient(
@@ -17,28 +19,41 @@ class MarketClock:
             Config.API_SECRET,
             paper=Config.PAPER_TRADING
         )
-        
+        self.attach(self.trading_client)
+
+    def attach(self, trading_client):
+        """Reuse an existing trading client and load the local calendar once"""
+        self.trading_client = trading_client
+        self.calendar.load(trading_client)
+        self.calendar.start_resync()
+
     def get_clock(self, force_update=False):
+        # Answer locally from the calendar; only fall back to REST if it has no sessions
+        if self.calendar.is_loaded() and not force_update:
+            return self.calendar.clock()
+
         current_time = datetime.now(pytz.UTC)
-        
+
         # Update clock if it's None or if last update was more than update_interval ago
-        if (self.clock is None or force_update or 
-            self.last_update is None or 
+        if (self.clock is None or force_update or
+            self.last_update is None or
             (current_time - self.last_update).seconds > self.update_interval):
-            
+
             self.clock = self.trading_client.get_clock()
             self.last_update = current_time
-            
+
         return self.clock
-        
+
     def is_market_open(self):
         try:
+            if self.calendar.is_loaded():
+                return self.calendar.is_open()
             clock = self.get_clock()
             return clock.is_open
         except Exception as e:
             print(f"Error checking market status: {e}")
             return False
-            
+
     def get_next_market_open(self):
         try:
             clock = self.get_clock()
@@ -46,7 +61,7 @@ class MarketClock:
         except Exception as e:
             print(f"Error getting next market open: {e}")
             return None
-            
+
     def get_next_market_close(self):
         try:
             clock = self.get_clock()
@@ -54,7 +69,7 @@ class MarketClock:
         except Exception as e:
             print(f"Error getting next market close: {e}")
             return None
-            
+
     def get_market_status_message(self):
         try:
             clock = self.get_clock()
@@ -63,4 +78,7 @@ class MarketClock:
             else:
                 return f"Market is CLOSED | Opens at: {self.get_next_market_open()}"
         except Exception as e:
-            return f"Error getting market status: {e}"
\ No newline at end of file
+            return f"Error getting market status: {e}"
+
+    def close(self):
+        self.calendar.stop_resync()
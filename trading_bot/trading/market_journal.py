@@ -0,0 +1,439 @@
+# trading/market_journal.py
+"""
+Market-data journal: record ticks and bars to compact binary files and
+replay them through the client callbacks.
+
+Layout, one directory per source ("ctrader", "alpaca"):
+
+    {JOURNAL_DIR}/{source}/{YYYYMMDD}.ticks      16-byte header + fixed-width tick records
+    {JOURNAL_DIR}/{source}/{YYYYMMDD}.ticks.idx  (timestamp, record number) every INDEX_STRIDE records
+    {JOURNAL_DIR}/{source}/{YYYYMMDD}.bars       header + fixed-width bar records (+ .idx)
+    {JOURNAL_DIR}/{source}/symbols.json          symbol key -> name
+
+Prices are integers in 1/100000 of a unit (the Open API wire format), so
+cTrader quotes are stored exactly as received; 0 means the side was absent
+from the event. Recording only appends to an in-memory buffer on the
+calling thread; a background thread writes the buffers once a second.
+Files are read back with numpy.memmap, and the sparse index turns a time
+range into a record range without scanning the file. Records are appended
+in arrival order, which is not always time order: backfilled bar histories
+arrive one symbol at a time. The first record older than the one before it
+adds an UNORDERED entry to the index; such files are scanned in full and
+their records sorted by time on read.
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import Config
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+PRICE_SCALE = 100000
+INDEX_STRIDE = 1024
+DAY_MS = 86400 * 1000
+MAGIC = b"SJNL"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHHII")  # magic, version, kind, price scale, record size
+INDEX = struct.Struct("<qq")
+INDEX_DTYPE = np.dtype([("ts", "<i8"), ("record", "<i8")])
+UNORDERED = -1  # Index record number marking a file whose records are not in time order
+
+TICKS, BARS = 1, 2
+RECORDS = {
+    TICKS: struct.Struct("<qIqq"),
+    BARS: struct.Struct("<qIqqqqd"),
+}
+DTYPES = {
+    TICKS: np.dtype([("ts", "<i8"), ("symbol", "<u4"), ("bid", "<i8"), ("ask", "<i8")]),
+    BARS: np.dtype([("ts", "<i8"), ("symbol", "<u4"), ("open", "<i8"), ("high", "<i8"),
+                    ("low", "<i8"), ("close", "<i8"), ("volume", "<f8")]),
+}
+EXTENSIONS = {TICKS: "ticks", BARS: "bars"}
+
+
+def to_price_units(price):
+    return int(round(price * PRICE_SCALE))
+
+
+def _day_name(day):
+    return datetime.fromtimestamp(day * 86400, tz=timezone.utc).strftime("%Y%m%d")
+
+
+class _JournalFile:
+    """Append state for one day's file of one kind; touched only under the recorder lock"""
+
+    def __init__(self, path, kind):
+        self.path = path
+        self.kind = kind
+        self.record = RECORDS[kind]
+        self.buffer = bytearray()
+        self.index = bytearray()
+        self.needs_header = not os.path.exists(path)
+        # Continue numbering after whatever a previous session wrote today
+        size = 0 if self.needs_header else os.path.getsize(path)
+        self.count = max(0, size - HEADER.size) // self.record.size
+        self.last_ts = self._last_ts()
+        self.ordered = True  # Until this session appends out of order
+
+    def _last_ts(self):
+        if not self.count:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(HEADER.size + (self.count - 1) * self.record.size)
+            return struct.unpack("<q", f.read(8))[0]
+
+    def append(self, ts, *fields):
+        if self.last_ts is not None and ts < self.last_ts and self.ordered:
+            self.index += INDEX.pack(ts, UNORDERED)
+            self.ordered = False
+        if self.count % INDEX_STRIDE == 0:
+            self.index += INDEX.pack(ts, self.count)
+        self.buffer += self.record.pack(ts, *fields)
+        self.count += 1
+        if self.last_ts is None or ts > self.last_ts:
+            self.last_ts = ts
+
+
+class JournalRecorder:
+    """Append-only recorder; record_* calls are cheap enough for the reactor thread"""
+
+    def __init__(self, source, directory=None, flush_interval=None):
+        self.directory = os.path.join(os.path.expanduser(directory or Config.JOURNAL_DIR), source)
+        self.flush_interval = flush_interval or Config.JOURNAL_FLUSH_INTERVAL_SEC
+        self._lock = threading.Lock()
+        self._files = {}  # (kind, day) -> _JournalFile
+        self._symbols = self._load_symbols()
+        self._symbol_keys = {name: key for key, name in self._symbols.items()}
+        self._symbols_dirty = False
+        self._last_bar = {}  # symbol key -> timestamp of the newest bar recorded
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _load_symbols(self):
+        try:
+            with open(os.path.join(self.directory, "symbols.json"), "r") as f:
+                return {int(key): name for key, name in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except (IOError, ValueError) as e:
+            log.warning("Ignoring unreadable journal symbol table: %s", e)
+            return {}
+
+    def symbol_key(self, name, symbol_id=None):
+        """Key stored in records: the broker's symbol id if it has one, else a journal-assigned id"""
+        key = self._symbol_keys.get(name)
+        if key is None:
+            with self._lock:
+                key = symbol_id if symbol_id is not None else max(self._symbols, default=0) + 1
+                self._symbols[key] = name
+                self._symbol_keys[name] = key
+                self._symbols_dirty = True
+        return key
+
+    def _file(self, kind, ts):
+        day = ts // DAY_MS
+        journal_file = self._files.get((kind, day))
+        if journal_file is None:
+            path = os.path.join(self.directory, f"{_day_name(day)}.{EXTENSIONS[kind]}")
+            journal_file = self._files[(kind, day)] = _JournalFile(path, kind)
+        return journal_file
+
+    def record_tick(self, ts, symbol, bid, ask):
+        """ts in epoch ms; bid/ask in price units (0 if absent)"""
+        with self._lock:
+            self._file(TICKS, ts).append(ts, symbol, bid, ask)
+
+    def record_bar(self, ts, symbol, open_, high, low, close, volume):
+        """Record a completed bar; bars at or before the last one recorded for the symbol are skipped"""
+        if ts <= self._last_bar.get(symbol, -1):
+            return False
+        self._last_bar[symbol] = ts
+        with self._lock:
+            self._file(BARS, ts).append(ts, symbol, open_, high, low, close, volume)
+        return True
+
+    # --- Background writer -----------------------------------------------------------------------
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        today = int(time.time() * 1000) // DAY_MS
+        with self._lock:
+            pending = []
+            for key, journal_file in list(self._files.items()):
+                if journal_file.buffer:
+                    pending.append((journal_file, bytes(journal_file.buffer), bytes(journal_file.index),
+                                    journal_file.needs_header))
+                    journal_file.buffer.clear()
+                    journal_file.index.clear()
+                    journal_file.needs_header = False
+                elif key[1] < today - 1:
+                    del self._files[key]  # Nothing more will arrive for an old day
+            symbols = dict(self._symbols) if self._symbols_dirty else None
+            self._symbols_dirty = False
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            for journal_file, data, index, needs_header in pending:
+                with open(journal_file.path, "ab") as f:
+                    if needs_header:
+                        f.write(HEADER.pack(MAGIC, VERSION, journal_file.kind, PRICE_SCALE, journal_file.record.size))
+                    f.write(data)
+                with open(journal_file.path + ".idx", "ab") as f:
+                    f.write(index)
+            if symbols is not None:
+                path = os.path.join(self.directory, "symbols.json")
+                with open(path + ".tmp", "w") as f:
+                    json.dump({str(key): name for key, name in symbols.items()}, f)
+                os.replace(path + ".tmp", path)
+        except OSError as e:
+            log.error("Error writing market journal: %s", e)
+
+
+class JournalReader:
+    """Read one journal file as a NumPy structured array"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, kind, scale, record_size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} market journal")
+        self.kind = kind
+        self.scale = scale
+        self.dtype = DTYPES[kind]
+        if record_size != self.dtype.itemsize:
+            raise ValueError(f"{path} has {record_size}-byte records, expected {self.dtype.itemsize}")
+        # A record cut short by a crash is ignored
+        self.count = (os.path.getsize(path) - HEADER.size) // record_size
+
+    def records(self):
+        if self.count == 0:
+            return np.empty(0, dtype=self.dtype)
+        return np.memmap(self.path, dtype=self.dtype, mode="r", offset=HEADER.size, shape=(self.count,))
+
+    def _index(self):
+        try:
+            return np.fromfile(self.path + ".idx", dtype=INDEX_DTYPE)
+        except (FileNotFoundError, ValueError):
+            return np.empty(0, dtype=INDEX_DTYPE)
+
+    def read(self, start_ms=None, end_ms=None, symbols=None):
+        """Records with start_ms <= ts < end_ms in time order, optionally only for the given symbol keys"""
+        records = self.records()
+        first, last = 0, self.count
+        index = self._index()
+        # The index only narrows the range when records and index are both in time order
+        if len(index) and (index["record"] >= 0).all() and (np.diff(index["ts"]) >= 0).all():
+            # Index entries are every INDEX_STRIDE records; widen by one entry on each side
+            if start_ms is not None:
+                position = np.searchsorted(index["ts"], start_ms, side="left") - 1
+                first = int(index["record"][position]) if position >= 0 else 0
+            if end_ms is not None:
+                position = np.searchsorted(index["ts"], end_ms, side="right")
+                last = int(index["record"][position]) if position < len(index) else self.count
+        records = records[first:last]
+
+        mask = np.ones(len(records), dtype=bool)
+        if start_ms is not None:
+            mask &= records["ts"] >= start_ms
+        if end_ms is not None:
+            mask &= records["ts"] < end_ms
+        if symbols is not None:
+            mask &= np.isin(records["symbol"], list(symbols))
+        return _in_time_order(np.asarray(records[mask]))
+
+
+def _in_time_order(records):
+    ts = records["ts"]
+    if len(ts) > 1 and (ts[1:] < ts[:-1]).any():
+        return records[np.argsort(ts, kind="stable")]
+    return records
+
+
+class Journal:
+    """All days of one source"""
+
+    def __init__(self, source, directory=None):
+        self.directory = os.path.join(os.path.expanduser(directory or Config.JOURNAL_DIR), source)
+
+    def symbols(self):
+        try:
+            with open(os.path.join(self.directory, "symbols.json"), "r") as f:
+                return {int(key): name for key, name in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+
+    def days(self, kind=TICKS):
+        extension = "." + EXTENSIONS[kind]
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-len(extension)] for name in names if name.endswith(extension))
+
+    def read(self, kind=TICKS, start_ms=None, end_ms=None, symbols=None):
+        """Matching records of every day overlapping the range, in time order"""
+        parts = []
+        for day in self.days(kind):
+            day_start = int(datetime.strptime(day, "%Y%m%d").replace(tzinfo=timezone.utc).timestamp() * 1000)
+            if (start_ms is not None and day_start + DAY_MS <= start_ms) or (end_ms is not None and day_start >= end_ms):
+                continue
+            reader = JournalReader(os.path.join(self.directory, f"{day}.{EXTENSIONS[kind]}"))
+            parts.append(reader.read(start_ms, end_ms, symbols))
+        if not parts:
+            return np.empty(0, dtype=DTYPES[kind])
+        return _in_time_order(np.concatenate(parts))
+
+
+class ReplayEngine:
+    """
+    Feed journal records to a callback at recorded pace (speed=1), N times
+    faster (speed=N) or as fast as possible (speed=None). Records are
+    delivered on the calling thread.
+    """
+
+    def __init__(self, speed=1.0, sleep=time.sleep, clock=time.perf_counter):
+        self.speed = speed
+        self.sleep = sleep
+        self.clock = clock
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def replay(self, records, deliver, chunk_size=65536):
+        """
+        deliver(record) for each record in order, where record is a plain tuple
+        in the dtype's field order (ts first). Returns (count, elapsed seconds).
+        """
+        self._stop.clear()
+        count = 0
+        start = self.clock()
+        if len(records) == 0:
+            return 0, 0.0
+        first_ts = int(records["ts"][0])
+        scale = 1000 * self.speed if self.speed else None
+
+        # tolist() in chunks: tuples of Python ints are much cheaper per field than numpy scalars
+        for offset in range(0, len(records), chunk_size):
+            for record in records[offset:offset + chunk_size].tolist():
+                if self._stop.is_set():
+                    return count, self.clock() - start
+                if scale:
+                    wait = (record[0] - first_ts) / scale - (self.clock() - start)
+                    if wait > 0:
+                        self.sleep(wait)
+                deliver(record)
+                count += 1
+        return count, self.clock() - start
+
+
+def ctrader_spot_delivery(client, symbol_names):
+    """Deliver tick records as ProtoOASpotEvents to CTraderClient._handle_spot_event"""
+    from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent
+
+    for key, name in symbol_names.items():
+        client.symbols_map.setdefault(name, key)
+    handle = client._handle_spot_event
+    account_id = client.ctid_trader_account_id or 0
+
+    def deliver(record):
+        ts, symbol, bid, ask = record
+        event = ProtoOASpotEvent(ctidTraderAccountId=account_id, symbolId=symbol, timestamp=ts)
+        if bid:
+            event.bid = bid
+        if ask:
+            event.ask = ask
+        handle(event)
+
+    return deliver
+
+
+class _ReplayedBar:
+    __slots__ = ("symbol", "timestamp", "open", "high", "low", "close", "volume")
+
+
+def alpaca_bar_delivery(client, symbol_names):
+    """Deliver bar records to AlpacaClient.on_stream_bar as bar-like objects"""
+
+    def deliver(record):
+        ts, symbol, open_, high, low, close, volume = record
+        bar = _ReplayedBar()
+        bar.symbol = symbol_names.get(symbol, str(symbol))
+        bar.timestamp = datetime.fromtimestamp(ts / 1000, tz=timezone.utc)
+        bar.open = open_ / PRICE_SCALE
+        bar.high = high / PRICE_SCALE
+        bar.low = low / PRICE_SCALE
+        bar.close = close / PRICE_SCALE
+        bar.volume = volume
+        client.on_stream_bar(bar)
+
+    return deliver
+
+
+def _parse_speed(value):
+    return None if value in ("max", "0") else float(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or replay the market-data journal")
+    parser.add_argument("command", choices=["info", "replay"])
+    parser.add_argument("--source", default="ctrader")
+    parser.add_argument("--dir", help=f"journal directory (default {Config.JOURNAL_DIR})")
+    parser.add_argument("--speed", type=_parse_speed, default=None, help="1, N or max (default max)")
+    args = parser.parse_args(argv)
+
+    journal = Journal(args.source, args.dir)
+    if args.command == "info":
+        for kind in (TICKS, BARS):
+            for day in journal.days(kind):
+                reader = JournalReader(os.path.join(journal.directory, f"{day}.{EXTENSIONS[kind]}"))
+                print(f"{day} {EXTENSIONS[kind]:<5} {reader.count:>12,} records")
+        print(f"{len(journal.symbols())} symbols")
+        return 0
+
+    # Replay into an unconnected client to profile the handling path
+    if args.source == "alpaca":
+        from trading.alpaca_client import AlpacaClient
+        client = AlpacaClient()
+        records, deliver = journal.read(BARS), alpaca_bar_delivery(client, journal.symbols())
+    else:
+        from trading.ctrader_client import CTraderClient
+        client = CTraderClient()
+        records, deliver = journal.read(TICKS), ctrader_spot_delivery(client, journal.symbols())
+    client.journal = None  # Do not record the replay itself
+
+    count, elapsed = ReplayEngine(args.speed).replay(records, deliver)
+    rate = count / elapsed if elapsed else float("inf")
+    print(f"Replayed {count:,} records in {elapsed:.3f}s ({rate:,.0f} records/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# trading/symbol_universe.py
+import bisect
+import json
+import os
+import time
+import traceback
+
+UNIVERSE_CACHE_FILE = os.path.join(os.path.expanduser('~/.sachiel_trading'), 'symbol_universe.json')
+CACHE_VERSION = 1
+
+
+class SymbolIndex:
+    """
+    In-memory search over symbols and asset names.
+
+    Symbols are kept in one sorted list, so a prefix query is two bisects plus
+    a slice. Longer queries also go through a trigram index (trigram -> sorted
+    row ids) built over symbol and name; the shortest posting lists are
+    intersected first and the survivors are checked with a substring test.
+    Results are ranked exact match, then symbol prefix, then substring.
+    """
+
+    def __init__(self, assets=()):
+        # assets: iterable of (symbol, kind, name)
+        rows = sorted({symbol.upper(): (symbol, kind, name or "") for symbol, kind, name in assets}.items())
+        self._keys = [key for key, _ in rows]
+        self._rows = [row for _, row in rows]
+        self._haystack = [f"{key} {row[2].upper()}" for key, row in rows]
+        self._trigrams = {}
+        for i, text in enumerate(self._haystack):
+            for gram in {text[j:j + 3] for j in range(len(text) - 2)}:
+                self._trigrams.setdefault(gram, []).append(i)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, symbol):
+        return self.get(symbol) is not None
+
+    def get(self, symbol):
+        """(symbol, kind, name) for an exact symbol, or None"""
+        key = symbol.upper()
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self._rows[i]
+        return None
+
+    def kind(self, symbol):
+        row = self.get(symbol)
+        return row[1] if row else None
+
+    @property
+    def symbols(self):
+        return [row[0] for row in self._rows]
+
+    def prefix(self, query, limit=50):
+        """Symbols starting with query, in sorted order"""
+        key = query.upper()
+        lo = bisect.bisect_left(self._keys, key)
+        hi = bisect.bisect_left(self._keys, key + "\uffff", lo)
+        return [self._rows[i][0] for i in range(lo, min(hi, lo + limit))]
+
+    def search(self, query, limit=50):
+        """Ranked symbols matching query by symbol prefix or symbol/name substring"""
+        key = query.strip().upper()
+        if not key:
+            return self.symbols[:limit]
+
+        results = self.prefix(key, limit)
+        if len(results) >= limit or len(key) < 3:
+            return results
+
+        grams = [key[j:j + 3] for j in range(len(key) - 2)]
+        postings = sorted((self._trigrams.get(gram, ()) for gram in grams), key=len)
+        if not postings[0]:
+            return results
+
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return results
+
+        seen = set(results)
+        symbol_hits = []
+        name_hits = []
+        for i in sorted(candidates):
+            symbol = self._rows[i][0]
+            if symbol in seen:
+                continue
+            pos = self._haystack[i].find(key)
+            if pos < 0:
+                continue
+            (symbol_hits if pos < len(self._keys[i]) else name_hits).append(symbol)
+
+        return (results + symbol_hits + name_hits)[:limit]
+
+
+class SymbolUniverse:
+    """Tradable assets from the broker, cached on disk with a TTL and searchable through SymbolIndex"""
+
+    def __init__(self, cache_file=UNIVERSE_CACHE_FILE, ttl=24 * 3600):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.saved_at = None
+        self.index = SymbolIndex()
+
+    def is_fresh(self):
+        return len(self.index) > 0 and self.saved_at is not None and time.time() - self.saved_at < self.ttl
+
+    def load_cache(self):
+        """Load the cached universe; returns True if one was found (fresh or not)"""
+        try:
+            if not self.cache_file or not os.path.exists(self.cache_file):
+                return False
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+            if data.get('version') != CACHE_VERSION:
+                return False
+            self.index = SymbolIndex(tuple(asset) for asset in data['assets'])
+            self.saved_at = data.get('saved_at')
+            return True
+        except Exception as e:
+            print(f"Error loading symbol cache: {e}")
+            return False
+
+    def save_cache(self):
+        if not self.cache_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            data = {
+                'version': CACHE_VERSION,
+                'saved_at': self.saved_at,
+                'assets': [list(row) for row in self.index._rows],
+            }
+            tmp_file = self.cache_file + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            print(f"Error saving symbol cache: {e}")
+
+    def refresh(self, alpaca_client):
+        """Download tradable stocks and crypto (one get_all_assets call) and rewrite the cache"""
+        try:
+            assets = alpaca_client.get_tradable_assets()
+            if not assets:
+                return False
+            self.index = SymbolIndex(assets)
+            self.saved_at = time.time()
+            self.save_cache()
+            return True
+        except Exception as e:
+            print(f"Error refreshing symbol universe: {e}")
+            traceback.print_exc()
+            return False
@@ -0,0 +1,177 @@
+# utils/logger.py
+"""
+Non-blocking logging for the trading hot paths.
+
+    from utils.logger import get_logger, SAMPLED
+    log = get_logger(__name__)
+
+    log.debug("Current price for %s: %s", symbol, price)      # lazy %-formatting
+    log.debug("Spot %s bid=%s", symbol_id, bid, extra=SAMPLED)  # rate-limited
+
+Callers only pay for a level check when a message is disabled. Enabled
+records are pushed onto a bounded queue; a single background listener thread
+formats them and writes to a rotating file (and optionally the console). If
+the queue is full the record is dropped rather than blocking the trading
+thread.
+
+Modules call get_logger() at import time; nothing is written until the
+application entry point calls configure_logging().
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import Config
+
+ROOT_LOGGER_NAME = "sachiel"
+LOG_FORMAT = "%(asctime)s %(levelname)-7s [%(threadName)s] %(name)s: %(message)s"
+
+# Pass as `extra=SAMPLED` for messages that may fire many times per second
+SAMPLED = {'sampled': True}
+
+# Arguments of these types cannot change before the writer thread formats them
+_IMMUTABLE_ARG_TYPES = (str, int, float, bool, bytes, type(None))
+
+_configure_lock = threading.Lock()
+_listener = None
+_queue_handler = None
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that defers formatting to the listener thread where safe and never blocks"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The stock implementation always formats here, on the caller's thread. Plain scalar
+        # arguments are left for the writer; anything mutable (protobufs, DataFrames, dicts)
+        # is rendered now so the log shows its state at call time, not at write time.
+        if record.args and not all(isinstance(arg, _IMMUTABLE_ARG_TYPES) for arg in record.args):
+            record.msg = record.getMessage()
+            record.args = None
+
+        # Render tracebacks immediately so queued records don't pin frames and their locals
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    """Let at most `max_per_interval` records per message template through per interval"""
+
+    def __init__(self, max_per_interval=5, interval=1.0):
+        super().__init__()
+        self.max_per_interval = max_per_interval
+        self.interval = interval
+        self._windows = {}
+        self.suppressed = 0
+
+    def filter(self, record):
+        if not getattr(record, 'sampled', False):
+            return True
+
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        window_start, count = self._windows.get(key, (now, 0))
+        if now - window_start >= self.interval:
+            window_start, count = now, 0
+
+        if count >= self.max_per_interval:
+            self._windows[key] = (window_start, count)
+            self.suppressed += 1
+            return False
+
+        self._windows[key] = (window_start, count + 1)
+        return True
+
+
+def configure_logging(level=None, log_file=None, console=None):
+    """Install the queue handler and start the background writer (idempotent)"""
+    global _listener, _queue_handler
+
+    with _configure_lock:
+        if _listener is not None:
+            return logging.getLogger(ROOT_LOGGER_NAME)
+
+        level = level or Config.LOG_LEVEL
+        log_file = os.path.expanduser(log_file or Config.LOG_FILE)
+        console = Config.LOG_TO_CONSOLE if console is None else console
+
+        formatter = logging.Formatter(LOG_FORMAT)
+        handlers = []
+
+        try:
+            log_dir = os.path.dirname(log_file)
+            if log_dir and not os.path.exists(log_dir):
+                os.makedirs(log_dir)
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file,
+                maxBytes=Config.LOG_MAX_BYTES,
+                backupCount=Config.LOG_BACKUP_COUNT,
+                encoding="utf-8"
+            )
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        except OSError as e:
+            print(f"Could not open log file {log_file}: {e}")
+
+        if console or not handlers:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(formatter)
+            handlers.append(console_handler)
+
+        log_queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+        _queue_handler = DeferredQueueHandler(log_queue)
+        _queue_handler.addFilter(SamplingFilter(Config.LOG_SAMPLE_RATE))
+
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        root.setLevel(level)
+        root.addHandler(_queue_handler)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+        return root
+
+
+def get_logger(name):
+    """Return a child of the `sachiel` logger; safe to call at import time"""
+    if name.startswith(f"{ROOT_LOGGER_NAME}."):
+        return logging.getLogger(name)
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener, _queue_handler
+
+    with _configure_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            try:
+                handler.close()
+            except Exception:
+                pass
+        logging.getLogger(ROOT_LOGGER_NAME).removeHandler(_queue_handler)
+        _listener = None
+        _queue_handler = None
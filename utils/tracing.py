@@ -0,0 +1,242 @@
+# utils/tracing.py
+"""
+Lightweight hot-path timing.
+
+    from utils.tracing import tracer
+
+    with tracer.span("bars.fetch"):
+        ...
+
+    @tracer.timed("order.submit")
+    def submit_order(...): ...
+
+Each span costs two perf_counter_ns() calls and one ring-buffer write.
+Durations feed rolling per-stage histograms that can be exported as JSON,
+as Prometheus text, or served over a local HTTP endpoint.
+"""
+import bisect
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from array import array
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Cumulative bucket upper bounds in milliseconds (Prometheus "le" labels)
+DEFAULT_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histogram:
+    """Rolling window of the last `window` samples plus cumulative bucket counts"""
+
+    def __init__(self, name, window=2048, buckets_ms=DEFAULT_BUCKETS_MS):
+        self.name = name
+        self.window = window
+        self.buckets_ms = buckets_ms
+        self._samples = array('d', bytes(8 * window))
+        self._pos = 0
+        self._filled = 0
+        self._bucket_counts = [0] * (len(buckets_ms) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, duration_ms):
+        with self._lock:
+            self._samples[self._pos] = duration_ms
+            self._pos = (self._pos + 1) % self.window
+            if self._filled < self.window:
+                self._filled += 1
+            self._bucket_counts[bisect.bisect_left(self.buckets_ms, duration_ms)] += 1
+            self.count += 1
+            self.total_ms += duration_ms
+            if duration_ms > self.max_ms:
+                self.max_ms = duration_ms
+
+    def snapshot(self):
+        """Percentiles over the rolling window; computed only when someone asks"""
+        with self._lock:
+            samples = sorted(self._samples[:self._filled])
+            count = self.count
+            total = self.total_ms
+            max_ms = self.max_ms
+
+        def pct(p):
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+        return {
+            'count': count,
+            'mean_ms': total / count if count else 0.0,
+            'p50_ms': pct(0.50),
+            'p95_ms': pct(0.95),
+            'p99_ms': pct(0.99),
+            'max_ms': max_ms,
+            'last_ms': self._samples[(self._pos - 1) % self.window] if self._filled else 0.0
+        }
+
+    def cumulative_buckets(self):
+        with self._lock:
+            counts = list(self._bucket_counts)
+        cumulative = []
+        running = 0
+        for bound, c in zip(list(self.buckets_ms) + [float('inf')], counts):
+            running += c
+            cumulative.append((bound, running))
+        return cumulative
+
+
+class _Span:
+    __slots__ = ('_tracer', '_name', '_start')
+
+    def __init__(self, tracer, name):
+        self._tracer = tracer
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._tracer.record(self._name, (time.perf_counter_ns() - self._start) / 1e6)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    def __init__(self, window=2048):
+        self.window = window
+        self.enabled = True
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._http_server = None
+
+    def histogram(self, name):
+        hist = self._histograms.get(name)
+        if hist is None:
+            with self._lock:
+                hist = self._histograms.get(name)
+                if hist is None:
+                    hist = Histogram(name, window=self.window)
+                    self._histograms[name] = hist
+        return hist
+
+    def record(self, name, duration_ms):
+        self.histogram(name).observe(duration_ms)
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def timed(self, name):
+        """Decorator form of span(); works for plain functions and coroutines"""
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        return {name: hist.snapshot() for name, hist in sorted(self._histograms.items())}
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+    # --- Export ----------------------------------------------------------------------------------
+    def export_json(self, path):
+        try:
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'timestamp': time.time(), 'stages': self.snapshot()}, f, indent=2)
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            print(f"Error exporting metrics to {path}: {e}")
+            return False
+
+    def to_prometheus(self, prefix="sachiel_stage_latency_ms"):
+        lines = [
+            f"# HELP {prefix} Trading pipeline stage latency in milliseconds",
+            f"# TYPE {prefix} histogram"
+        ]
+        for name, hist in sorted(self._histograms.items()):
+            label = name.replace('"', '')
+            for bound, count in hist.cumulative_buckets():
+                le = "+Inf" if bound == float('inf') else f"{bound:g}"
+                lines.append(f'{prefix}_bucket{{stage="{label}",le="{le}"}} {count}')
+            lines.append(f'{prefix}_sum{{stage="{label}"}} {hist.total_ms:.6f}')
+            lines.append(f'{prefix}_count{{stage="{label}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port, host="127.0.0.1"):
+        """Serve /metrics in Prometheus text format on a daemon thread"""
+        if self._http_server is not None:
+            return True
+
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != "/metrics":
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = tracer.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._http_server = HTTPServer((host, port), MetricsHandler)
+            threading.Thread(target=self._http_server.serve_forever, daemon=True).start()
+            print(f"Metrics endpoint listening on http://{host}:{port}/metrics")
+            return True
+        except Exception as e:
+            print(f"Failed to start metrics endpoint: {e}")
+            self._http_server = None
+            return False
+
+    def stop_http_server(self):
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+            self._http_server = None
+
+
+# Process-wide tracer used by the trading pipeline
+tracer = Tracer()